@@ -16,13 +16,17 @@ Date: 2025-10-30
 """
 
 import json
-from typing import List, Dict, Optional, Tuple
+import queue
+import threading
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 
 try:
     import pdfplumber
+    from pdf_extraction_cache import (extraction_cache, iter_pages_cached, cached_stream, source_kind,
+                                      PARAGRAPHS)
     PDFPLUMBER_AVAILABLE = True
 except ImportError:
     PDFPLUMBER_AVAILABLE = False
@@ -36,6 +40,16 @@ from semantic_embedder import SemanticEmbedder
 from semantic_comparator import SemanticComparator
 from requirement_analyzer import RequirementAnalyzer
 from local_llm import LocalLLM, ExplanationGenerator
+from comparison_jobs import no_progress
+
+# Paragraphs translated and embedded together while a document streams in
+STREAM_BATCH_SIZE = 32
+
+# Paragraphs the document language is detected from
+LANGUAGE_SAMPLE_SIZE = 5
+
+# Paragraphs a document's extraction thread may run ahead of translation and embedding
+PREFETCH_PARAGRAPHS = 1024
 
 
 @dataclass
@@ -51,6 +65,7 @@ class ComparisonConfig:
         use_gpu: Use GPU acceleration
         llm_model_path: Path to LLM model (if enable_llm=True)
         max_llm_explanations: Maximum LLM explanations to generate
+        enable_extraction_cache: Reuse text/paragraphs extracted from the same PDF before
     """
     enable_translation: bool = True
     enable_requirements: bool = True
@@ -59,6 +74,7 @@ class ComparisonConfig:
     use_gpu: bool = True
     llm_model_path: Optional[str] = None
     max_llm_explanations: int = 10
+    enable_extraction_cache: bool = True
 
 
 @dataclass
@@ -72,6 +88,23 @@ class DocumentInfo:
     needs_translation: bool = False
 
 
+@dataclass
+class ProcessedDocument:
+    """
+    A document taken through extraction, translation and embedding
+
+    Attributes:
+        info: Document information
+        paragraphs: Paragraphs as extracted
+        translated: Paragraphs in English (as extracted if no translation was needed)
+        embeddings: Embedding of each translated paragraph (None where embedding failed)
+    """
+    info: DocumentInfo
+    paragraphs: List[str] = field(default_factory=list)
+    translated: List[str] = field(default_factory=list)
+    embeddings: List = field(default_factory=list)
+
+
 @dataclass
 class ComparisonReport:
     """
@@ -131,6 +164,68 @@ class ComparisonReport:
         print(f"[+] Report saved to: {output_path}")
 
 
+class PrefetchedStream:
+    """
+    Iterator over items produced on a background thread
+
+    The thread starts right away and stays at most max_items ahead of the
+    consumer. Errors raised while producing are raised to the consumer;
+    close() (or stopping iteration early) stops the thread.
+    """
+
+    _ITEM, _ERROR, _END = range(3)
+
+    def __init__(self, items: Iterable, max_items: int, name: str = 'prefetch'):
+        self._buffer = queue.Queue(max_items)
+        self._stop = threading.Event()
+        self._finished = False
+        self._thread = threading.Thread(target=self._produce, args=(items,), name=name, daemon=True)
+        self._thread.start()
+
+    def _put(self, entry) -> bool:
+        """Queue an entry, waiting for room; False once the consumer has stopped"""
+        while not self._stop.is_set():
+            try:
+                self._buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self, items: Iterable):
+        iterator = iter(items)
+        try:
+            for item in iterator:
+                if not self._put((self._ITEM, item)):
+                    return
+            self._put((self._END, None))
+        except Exception as e:
+            self._put((self._ERROR, e))
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._finished:
+            raise StopIteration
+        kind, value = self._buffer.get()
+        if kind == self._ITEM:
+            return value
+        self.close()
+        if kind == self._ERROR:
+            raise value
+        raise StopIteration
+
+    def close(self):
+        """Stop producing; items not consumed yet are dropped"""
+        self._finished = True
+        self._stop.set()
+
+
 class AdvancedPDFComparator:
     """
     Advanced PDF comparison engine
@@ -159,6 +254,11 @@ class AdvancedPDFComparator:
         self.paragraph_extractor = ParagraphExtractor()
         print("[+] Paragraph extractor ready")
 
+        self.extraction_cache = None
+        if self.config.enable_extraction_cache and PDFPLUMBER_AVAILABLE:
+            self.extraction_cache = extraction_cache()
+            print("[+] Extraction cache ready")
+
         self.language_detector = LanguageDetector()
         print("[+] Language detector ready")
 
@@ -190,39 +290,67 @@ class AdvancedPDFComparator:
         print("\n[+] All components initialized")
         print("=" * 60)
 
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
+    def iter_paragraphs(self, pdf_path: str, page_lengths: Optional[List[int]] = None) -> Iterator[str]:
         """
-        Extract text from PDF file
+        Yield the paragraphs of a PDF as its pages are extracted
+
+        Pages stream in from pdf_parallel.iter_pages and paragraphs are
+        emitted as soon as they are complete, carrying over page breaks (see
+        ParagraphExtractor.stream_paragraphs).
 
         Args:
             pdf_path: Path to PDF file
+            page_lengths: If given, the length of each page with text is appended
+                to it (pages are read even when the paragraphs come from the cache)
 
-        Returns:
-            Extracted text
+        Yields:
+            Paragraph texts
         """
-        if not PDFPLUMBER_AVAILABLE:
-            print("[!] pdfplumber not available, cannot extract PDF")
-            return ""
-
-        try:
-            text_content = []
-
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        text_content.append(text)
+        def pages():
+            for text in iter_pages_cached(pdf_path, cache=self.extraction_cache):
+                if text and page_lengths is not None:
+                    page_lengths.append(len(text))
+                yield text
+
+        page_stream = pages()
+        yield from cached_stream(self.extraction_cache, pdf_path, source_kind(PARAGRAPHS),
+                                 lambda: self.paragraph_extractor.stream_paragraphs(page_stream))
+        if page_lengths is not None:
+            for _ in page_stream:
+                pass
+
+    def _document_info(
+        self,
+        pdf_path: str,
+        paragraphs: List[str],
+        character_count: int,
+        lang_result,
+        extract_requirements: bool
+    ) -> DocumentInfo:
+        """Document information for extracted paragraphs, counting requirements if enabled"""
+        requirement_count = 0
+        if extract_requirements and self.config.enable_requirements:
+            print("[i] Analyzing requirements...")
+            requirements = self.requirement_analyzer.analyze_paragraphs(paragraphs)
+            requirement_count = len(requirements)
+            print(f"[+] Found {requirement_count} requirements")
 
-            return "\n\n".join(text_content)
+        needs_translation = self.translates(lang_result.language)
 
-        except Exception as e:
-            print(f"[-] Error extracting PDF: {e}")
-            return ""
+        return DocumentInfo(
+            file_path=pdf_path,
+            language=lang_result.language_name,
+            paragraph_count=len(paragraphs),
+            character_count=character_count,
+            requirement_count=requirement_count,
+            needs_translation=needs_translation
+        )
 
     def analyze_document(
         self,
         pdf_path: str,
-        extract_requirements: bool = True
+        extract_requirements: bool = True,
+        text: Optional[str] = None
     ) -> Tuple[List[str], DocumentInfo]:
         """
         Analyze a single document
@@ -230,17 +358,24 @@ class AdvancedPDFComparator:
         Args:
             pdf_path: Path to PDF file
             extract_requirements: Whether to extract requirements
+            text: Text already extracted from the file (streamed from the PDF if None)
 
         Returns:
             (paragraphs, document_info)
         """
         print(f"\n[i] Analyzing: {Path(pdf_path).name}")
 
-        # Extract text
-        print("[i] Extracting text...")
-        text = self.extract_text_from_pdf(pdf_path)
-
-        if not text:
+        # Extract paragraphs
+        print("[i] Extracting paragraphs...")
+        if text is None:
+            page_lengths = []
+            paragraphs = self._read_paragraphs(pdf_path, page_lengths)
+            character_count = sum(page_lengths)
+        else:
+            paragraphs = self.paragraph_extractor.extract_paragraphs(text)
+            character_count = len(text)
+
+        if not character_count:
             print("[-] No text extracted")
             return [], DocumentInfo(
                 file_path=pdf_path,
@@ -248,41 +383,149 @@ class AdvancedPDFComparator:
                 paragraph_count=0,
                 character_count=0
             )
-
-        # Extract paragraphs
-        print("[i] Extracting paragraphs...")
-        paragraphs = self.paragraph_extractor.extract_paragraphs(text)
         print(f"[+] Extracted {len(paragraphs)} paragraphs")
 
         # Detect language
         print("[i] Detecting language...")
-        lang_result = self.language_detector.detect_document_language(paragraphs)
+        lang_result = self.language_detector.detect_document_language(paragraphs, LANGUAGE_SAMPLE_SIZE)
         print(f"[+] Language: {lang_result.language_name} ({lang_result.confidence:.0%} confidence)")
 
-        # Analyze requirements if enabled
-        requirement_count = 0
-        if extract_requirements and self.config.enable_requirements:
-            print("[i] Analyzing requirements...")
-            requirements = self.requirement_analyzer.analyze_paragraphs(paragraphs)
-            requirement_count = len(requirements)
-            print(f"[+] Found {requirement_count} requirements")
+        doc_info = self._document_info(pdf_path, paragraphs, character_count, lang_result, extract_requirements)
+        return paragraphs, doc_info
 
-        # Check if translation needed
-        needs_translation = (
-            self.config.enable_translation and
-            lang_result.language not in ['en', 'unknown']
-        )
+    def _read_paragraphs(self, pdf_path: str, page_lengths: List[int]) -> List[str]:
+        """All paragraphs of a PDF ([] if it could not be read)"""
+        if not PDFPLUMBER_AVAILABLE:
+            print("[!] pdfplumber not available, cannot extract PDF")
+            return []
+        try:
+            return list(self.iter_paragraphs(pdf_path, page_lengths))
+        except Exception as e:
+            print(f"[-] Error extracting PDF: {e}")
+            page_lengths.clear()
+            return []
 
-        doc_info = DocumentInfo(
-            file_path=pdf_path,
-            language=lang_result.language_name,
-            paragraph_count=len(paragraphs),
-            character_count=len(text),
-            requirement_count=requirement_count,
-            needs_translation=needs_translation
-        )
+    def start_extraction(self, pdf_path: str) -> Tuple[PrefetchedStream, List[int]]:
+        """
+        Start extracting a PDF's paragraphs on a background thread
 
-        return paragraphs, doc_info
+        Extraction then overlaps with whatever the caller does meanwhile:
+        translating and embedding earlier paragraphs, or processing another
+        document first.
+
+        Args:
+            pdf_path: Path to PDF file
+
+        Returns:
+            (paragraph stream, page lengths); page lengths are filled in as
+            pages are extracted and are empty if the PDF could not be read
+        """
+        page_lengths = []
+
+        def read_paragraphs():
+            # Only extraction errors mean the document has no text
+            if not PDFPLUMBER_AVAILABLE:
+                print("[!] pdfplumber not available, cannot extract PDF")
+                return
+            try:
+                yield from self.iter_paragraphs(pdf_path, page_lengths)
+            except Exception as e:
+                print(f"[-] Error extracting PDF: {e}")
+                page_lengths.clear()
+
+        thread_name = f"extract-{Path(pdf_path).name}"
+        return PrefetchedStream(read_paragraphs(), PREFETCH_PARAGRAPHS, thread_name), page_lengths
+
+    def process_document(
+        self,
+        pdf_path: str,
+        progress=None,
+        position: float = 0.0,
+        extraction: Optional[Tuple[PrefetchedStream, List[int]]] = None
+    ) -> ProcessedDocument:
+        """
+        Extract, translate and embed a document in one streaming pass
+
+        Paragraphs are extracted on a background thread (start_extraction).
+        The language is detected from the first paragraphs; from then on
+        paragraphs are translated (if needed) and embedded in batches while
+        the rest of the document is still being extracted, so model inference
+        starts on the first pages instead of after the last one.
+
+        Args:
+            pdf_path: Path to PDF file
+            progress: Optional callback(stage, fraction, message), reported as 'parse'
+            position: Fraction of the 'parse' stage done before this document
+            extraction: start_extraction() result for the file, if already started
+
+        Returns:
+            ProcessedDocument (without paragraphs if no text could be extracted)
+        """
+        report = progress or no_progress
+        name = Path(pdf_path).name
+        print(f"\n[i] Analyzing: {name}")
+
+        document = ProcessedDocument(info=None)
+        lang_result = None
+        batch = []
+
+        def flush():
+            translated = self.translate_if_needed(batch, lang_result.language)
+            document.translated.extend(translated)
+            document.embeddings.extend(self.embedder.embed_batch(translated))
+            report('parse', position, f"{name}: {len(document.translated)} paragraphs")
+            batch.clear()
+
+        report('parse', position, name)
+        paragraphs, page_lengths = extraction or self.start_extraction(pdf_path)
+        try:
+            for paragraph in paragraphs:
+                document.paragraphs.append(paragraph)
+                batch.append(paragraph)
+                if lang_result is None:
+                    if len(document.paragraphs) < LANGUAGE_SAMPLE_SIZE:
+                        continue
+                    lang_result = self.language_detector.detect_document_language(document.paragraphs)
+                    print(f"[+] Language: {lang_result.language_name} ({lang_result.confidence:.0%} confidence)")
+                if len(batch) >= STREAM_BATCH_SIZE:
+                    flush()
+        finally:
+            # Translation or embedding failed: stop extracting
+            paragraphs.close()
+
+        if not sum(page_lengths):
+            print("[-] No text extracted")
+            document.info = DocumentInfo(
+                file_path=pdf_path,
+                language='unknown',
+                paragraph_count=0,
+                character_count=0
+            )
+            document.paragraphs, document.translated, document.embeddings = [], [], []
+            return document
+
+        # Short documents: detected from all their paragraphs
+        if lang_result is None:
+            lang_result = self.language_detector.detect_document_language(document.paragraphs)
+            print(f"[+] Language: {lang_result.language_name} ({lang_result.confidence:.0%} confidence)")
+        if batch:
+            flush()
+        print(f"[+] Extracted and embedded {len(document.paragraphs)} paragraphs")
+
+        document.info = self._document_info(pdf_path, document.paragraphs, sum(page_lengths), lang_result, True)
+        return document
+
+    def translates(self, source_language: str) -> bool:
+        """
+        Check if text in a language is translated to English before comparing
+
+        Languages without a translation model (and 'unknown') are compared as they are.
+        """
+        if not self.config.enable_translation:
+            return False
+        if not self.language_detector.needs_translation(source_language, 'en'):
+            return False
+        return self.translator.supports(source_language, 'en')
 
     def translate_if_needed(
         self,
@@ -299,10 +542,7 @@ class AdvancedPDFComparator:
         Returns:
             Translated paragraphs (or original if no translation needed)
         """
-        if not self.config.enable_translation:
-            return paragraphs
-
-        if source_language == 'en':
+        if not self.translates(source_language):
             return paragraphs
 
         # Translate to English
@@ -319,7 +559,8 @@ class AdvancedPDFComparator:
     def compare_documents(
         self,
         old_pdf_path: str,
-        new_pdf_path: str
+        new_pdf_path: str,
+        progress=None
     ) -> ComparisonReport:
         """
         Compare two PDF documents
@@ -327,45 +568,54 @@ class AdvancedPDFComparator:
         Args:
             old_pdf_path: Path to old/original PDF
             new_pdf_path: Path to new/modified PDF
+            progress: Optional callback(stage, fraction, message) for the
+                parse/translate/embed/diff/explain stages (see comparison_jobs)
 
         Returns:
             ComparisonReport with complete results
         """
         import time
         start_time = time.time()
+        report = progress or no_progress
 
         print("\n" + "=" * 60)
         print("STARTING DOCUMENT COMPARISON")
         print("=" * 60)
 
-        # Analyze both documents
+        # Extract, translate and embed both documents, each in one streaming pass;
+        # both are extracted from the start, the new one while the old one is embedded
         print("\n[STEP 1] Analyzing documents...")
-        old_paragraphs, old_doc_info = self.analyze_document(old_pdf_path)
-        new_paragraphs, new_doc_info = self.analyze_document(new_pdf_path)
+        old_extraction = self.start_extraction(old_pdf_path)
+        new_extraction = self.start_extraction(new_pdf_path)
+        try:
+            old_document = self.process_document(old_pdf_path, progress, 0.0, old_extraction)
+            new_document = self.process_document(new_pdf_path, progress, 0.5, new_extraction)
+        finally:
+            new_extraction[0].close()
+        old_doc_info, new_doc_info = old_document.info, new_document.info
 
-        if not old_paragraphs or not new_paragraphs:
+        if not old_document.paragraphs or not new_document.paragraphs:
             print("[-] Cannot compare - no content extracted")
             return None
 
-        # Translate if needed
-        print("\n[STEP 2] Translation check...")
-        old_lang_code = self.language_detector.get_language_code(old_doc_info.language)
-        new_lang_code = self.language_detector.get_language_code(new_doc_info.language)
-
-        old_paragraphs_translated = self.translate_if_needed(old_paragraphs, old_lang_code)
-        new_paragraphs_translated = self.translate_if_needed(new_paragraphs, new_lang_code)
+        old_paragraphs_translated = old_document.translated
+        new_paragraphs_translated = new_document.translated
 
         # Semantic comparison
-        print("\n[STEP 3] Semantic comparison...")
+        print("\n[STEP 2] Semantic comparison...")
         comparison_result = self.comparator.compare_paragraphs(
             old_paragraphs_translated,
-            new_paragraphs_translated
+            new_paragraphs_translated,
+            progress=progress,
+            old_embeddings=old_document.embeddings,
+            new_embeddings=new_document.embeddings
         )
 
         # Requirement analysis
         requirement_changes = []
         if self.config.enable_requirements:
-            print("\n[STEP 4] Requirement analysis...")
+            print("\n[STEP 3] Requirement analysis...")
+            report('diff', 0.5, "Requirements")
             old_requirements = self.requirement_analyzer.analyze_paragraphs(old_paragraphs_translated)
             new_requirements = self.requirement_analyzer.analyze_paragraphs(new_paragraphs_translated)
 
@@ -380,7 +630,8 @@ class AdvancedPDFComparator:
         # LLM explanations
         llm_explanations = []
         if self.config.enable_llm:
-            print("\n[STEP 5] Generating LLM explanations...")
+            print("\n[STEP 4] Generating LLM explanations...")
+            report('explain', 0.0)
             matches_with_explanations = self.explanation_generator.explain_matches(
                 [m.to_dict() for m in comparison_result.matches[:self.config.max_llm_explanations]]
             )
@@ -437,7 +688,8 @@ class AdvancedPDFComparator:
     def compare_texts(
         self,
         old_text: str,
-        new_text: str
+        new_text: str,
+        progress=None
     ) -> ComparisonReport:
         """
         Compare two text strings directly (without PDF extraction)
@@ -445,6 +697,8 @@ class AdvancedPDFComparator:
         Args:
             old_text: Original text
             new_text: Modified text
+            progress: Optional callback(stage, fraction, message) for the
+                parse/embed/diff stages (see comparison_jobs)
 
         Returns:
             ComparisonReport
@@ -455,6 +709,7 @@ class AdvancedPDFComparator:
         print("\n[i] Comparing text strings...")
 
         # Extract paragraphs
+        (progress or no_progress)('parse', 0.0, "Paragraphs")
         old_paragraphs = self.paragraph_extractor.extract_paragraphs(old_text)
         new_paragraphs = self.paragraph_extractor.extract_paragraphs(new_text)
 
@@ -480,7 +735,8 @@ class AdvancedPDFComparator:
         # Semantic comparison
         comparison_result = self.comparator.compare_paragraphs(
             old_paragraphs,
-            new_paragraphs
+            new_paragraphs,
+            progress=progress
         )
 
         # Requirement analysis
@@ -0,0 +1,103 @@
+"""
+Excel Diff Benchmark
+
+Measures comparison throughput (cells per second) of the legacy
+per-cell openpyxl loop against the vectorized diff engine on
+synthetic workbooks.
+
+Usage:
+    python benchmark_excel_diff.py [--rows 20000] [--cols 60] [--change-rate 0.01]
+"""
+
+import argparse
+import io
+import random
+import time
+
+import openpyxl
+
+from excel_diff_engine import sheet_to_array, diff_grids, build_modifications, column_headers_from_array
+
+
+def make_workbook_pair(rows: int, cols: int, change_rate: float, seed: int = 42):
+    """Create an (original, modified) pair of in-memory .xlsx files"""
+    rng = random.Random(seed)
+
+    original = openpyxl.Workbook()
+    modified = openpyxl.Workbook()
+    ws_orig = original.active
+    ws_mod = modified.active
+
+    header = [f"Col {c}" for c in range(1, cols + 1)]
+    ws_orig.append(header)
+    ws_mod.append(header)
+
+    for r in range(rows):
+        row = [r * cols + c if c % 2 else f"v{r}-{c}" for c in range(cols)]
+        ws_orig.append(row)
+        changed = [v if rng.random() >= change_rate else (None if rng.random() < 0.3 else f"x{v}") for v in row]
+        ws_mod.append(changed)
+
+    buffers = []
+    for wb in (original, modified):
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        buffer.seek(0)
+        buffers.append(buffer)
+    return buffers
+
+
+def legacy_compare(original_sheet, modified_sheet):
+    """The original nested loop from ExcelDiffVisualizer.compare_sheets"""
+    max_row = max(original_sheet.max_row, modified_sheet.max_row, 10)
+    max_col = max(original_sheet.max_column, modified_sheet.max_column, 5)
+    changes = 0
+    for row in range(1, max_row + 1):
+        for col in range(1, max_col + 1):
+            if original_sheet.cell(row=row, column=col).value != modified_sheet.cell(row=row, column=col).value:
+                changes += 1
+    return max_row * max_col, changes
+
+
+def vectorized_compare(original_sheet, modified_sheet):
+    """Load both grids once and diff them with the vectorized engine"""
+    original_values = sheet_to_array(original_sheet)
+    modified_values = sheet_to_array(modified_sheet)
+    grid_diff = diff_grids(original_values, modified_values)
+    build_modifications(grid_diff, column_headers_from_array(modified_values))
+    return grid_diff.cells_compared, len(grid_diff)
+
+
+def run_benchmark(rows: int, cols: int, change_rate: float):
+    """Run both engines on the same synthetic workbooks and print throughput"""
+    print(f"Generating synthetic workbooks: {rows:,} rows x {cols} columns, {change_rate:.1%} changed")
+    original_buffer, modified_buffer = make_workbook_pair(rows, cols, change_rate)
+
+    original_wb = openpyxl.load_workbook(original_buffer, data_only=True)
+    modified_wb = openpyxl.load_workbook(modified_buffer, data_only=True)
+    original_sheet = original_wb.active
+    modified_sheet = modified_wb.active
+
+    results = {}
+    for name, compare in (("legacy loop", legacy_compare), ("vectorized", vectorized_compare)):
+        start = time.perf_counter()
+        cells, changes = compare(original_sheet, modified_sheet)
+        elapsed = time.perf_counter() - start
+        results[name] = (cells, changes, elapsed)
+        print(f"  {name:<12} {elapsed:8.3f}s  {cells / elapsed:14,.0f} cells/s  ({changes:,} changes)")
+
+    legacy_time = results["legacy loop"][2]
+    vectorized_time = results["vectorized"][2]
+    if results["legacy loop"][1] != results["vectorized"][1]:
+        print("[!] Change counts differ between engines")
+    print(f"Speedup: {legacy_time / vectorized_time:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Excel diff engine")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--cols", type=int, default=60)
+    parser.add_argument("--change-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    run_benchmark(args.rows, args.cols, args.change_rate)
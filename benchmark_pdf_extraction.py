@@ -0,0 +1,59 @@
+"""
+PDF Extraction Benchmark
+
+Measures text extraction throughput (pages per second) of each installed
+backend in pdf_text_backends - plus pdfplumber's layout mode, which the
+structure comparison used to extract with - on the given PDFs.
+
+Usage:
+    python benchmark_pdf_extraction.py spec_v1.pdf spec_v2.pdf [--backends pdfium pypdf pdfplumber]
+"""
+
+import argparse
+import time
+
+from pdf_text_backends import available_backends, open_backend, PDFPLUMBER, PLAIN, LAYOUT
+
+
+def extract_all(backend: str, pdf_path: str, mode: str):
+    """Extract every page in-process; returns (pages, pages with text, characters)"""
+    document = open_backend(backend, pdf_path, mode)
+    try:
+        texts = [document.page_text(page_index) for page_index in range(len(document))]
+    finally:
+        document.close()
+    with_text = [text for text in texts if text]
+    return len(texts), len(with_text), sum(len(text) for text in with_text)
+
+
+def run_benchmark(pdf_paths, backends):
+    """Extract each PDF with each backend and print throughput"""
+    runs = [(backend, PLAIN) for backend in backends]
+    if PDFPLUMBER in backends:
+        runs.append((PDFPLUMBER, LAYOUT))
+
+    for pdf_path in pdf_paths:
+        print(f"{pdf_path}")
+        results = {}
+        for backend, mode in runs:
+            label = f"{backend} ({mode})"
+            start = time.perf_counter()
+            pages, with_text, chars = extract_all(backend, pdf_path, mode)
+            elapsed = time.perf_counter() - start
+            results[label] = elapsed
+            print(f"  {label:<20} {elapsed:8.3f}s  {pages / elapsed:10,.1f} pages/s  "
+                  f"({with_text}/{pages} pages with text, {chars:,} chars)")
+
+        baseline = results.get(f"{PDFPLUMBER} ({PLAIN})")
+        if baseline:
+            for label, elapsed in results.items():
+                print(f"  Speedup {label:<20} {baseline / elapsed:6.1f}x vs pdfplumber")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the PDF text extraction backends")
+    parser.add_argument("pdfs", nargs="+", help="PDF files to extract")
+    parser.add_argument("--backends", nargs="+", default=available_backends(), choices=available_backends())
+    args = parser.parse_args()
+
+    run_benchmark(args.pdfs, args.backends)
@@ -0,0 +1,243 @@
+"""
+Background Comparison Jobs
+
+Runs comparisons in worker threads so the Streamlit script thread never
+blocks on them. Jobs live in a process-wide registry keyed by job id: a
+rerun picks up the running job or its result, and so does a new session
+after a browser refresh, which finds the job id in the page URL. The work
+function reports stage-level progress (parse, diff, embed, translate,
+render, ...) through the JobProgress it is handed, and the UI polls the
+job until it is finished.
+
+Threads rather than processes, because results (open workbooks,
+comparators, loaded models) are not picklable; steps that need more than
+one core keep using their own process pools (excel_parallel).
+"""
+
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Job states
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+# Labels for the stages comparisons report
+STAGE_LABELS = {
+    'parse': "Parsing documents",
+    'diff': "Comparing",
+    'embed': "Computing embeddings",
+    'translate': "Translating",
+    'explain': "Generating explanations",
+    'render': "Preparing results",
+}
+
+# Finished jobs are dropped this long after they end, if nobody collected them
+KEEP_SECONDS = 60 * 60
+
+DEFAULT_WORKERS = 2
+
+
+@dataclass
+class Job:
+    """One background comparison and its progress"""
+    job_id: str
+    kind: str  # What is being compared, e.g. 'excel'
+    stages: Tuple[str, ...]  # Stages in the order the job runs them
+    status: str = QUEUED
+    stage: Optional[str] = None  # Current stage
+    stage_progress: float = 0.0  # Fraction of the current stage done
+    message: str = ""  # Detail for the current stage
+    result: Any = None
+    error: Optional[str] = None  # Traceback of a failed job
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    @property
+    def finished_ok(self) -> bool:
+        return self.status == DONE
+
+    @property
+    def active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+    @property
+    def progress(self) -> float:
+        """Overall fraction done, counting each stage equally"""
+        if self.status == DONE:
+            return 1.0
+        if self.stage not in self.stages:
+            return 0.0
+        return (self.stages.index(self.stage) + self.stage_progress) / len(self.stages)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the job started (0 while queued)"""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def describe(self) -> str:
+        """Readable status line"""
+        if self.status == QUEUED:
+            return "Waiting to start..."
+        if self.status == FAILED:
+            return "Failed"
+        if self.status == DONE:
+            return f"Done in {self.elapsed:.1f}s"
+        label = STAGE_LABELS.get(self.stage, self.stage or "Starting")
+        return f"{label}: {self.message}" if self.message else f"{label}..."
+
+
+class JobProgress:
+    """Progress callback handed to a job's work function"""
+
+    def __init__(self, job: Job):
+        self.job = job
+
+    def __call__(self, stage: str, fraction: float = 0.0, message: str = ""):
+        """
+        Report progress
+
+        Args:
+            stage: Current stage (one of the job's stages)
+            fraction: Fraction of the stage done, 0..1
+            message: Detail, e.g. the sheet or document being worked on
+        """
+        # Attribute writes are atomic; readers only ever see whole values
+        self.job.stage = stage
+        self.job.stage_progress = min(max(float(fraction), 0.0), 1.0)
+        self.job.message = message
+
+
+def no_progress(stage: str, fraction: float = 0.0, message: str = ""):
+    """Progress callback for work run outside a job"""
+
+
+class JobRegistry:
+    """Process-wide store of background jobs, run on a small thread pool"""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, keep_seconds: float = KEEP_SECONDS):
+        """
+        Args:
+            workers: Jobs run at the same time; later ones wait in the queue
+            keep_seconds: How long finished jobs wait to be collected
+        """
+        self.keep_seconds = keep_seconds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='comparison-job')
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, work: Callable, *args, stages: Tuple[str, ...] = ('parse', 'diff'),
+               **kwargs) -> str:
+        """
+        Start a job
+
+        Args:
+            kind: What is being compared
+            work: Called as work(*args, progress=JobProgress, **kwargs); its
+                return value becomes the job's result
+            stages: Stages the job reports, in order
+
+        Returns:
+            The job id
+        """
+        job = Job(job_id=uuid.uuid4().hex, kind=kind, stages=tuple(stages))
+        with self._lock:
+            self._prune()
+            self._jobs[job.job_id] = job
+        self._executor.submit(self._run, job, work, args, kwargs)
+        return job.job_id
+
+    @staticmethod
+    def _run(job: Job, work: Callable, args, kwargs):
+        job.status = RUNNING
+        job.started = time.time()
+        try:
+            job.result = work(*args, progress=JobProgress(job), **kwargs)
+            job.status = DONE
+        except Exception:
+            job.error = traceback.format_exc()
+            job.status = FAILED
+            print(f"[-] Job {job.job_id} ({job.kind}) failed:\n{job.error}")
+        finally:
+            job.finished = time.time()
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        """The job with this id, or None if unknown or already dropped"""
+        with self._lock:
+            # Every rerun polls here, so expired jobs go even when nothing new is submitted
+            self._prune()
+            return self._jobs.get(job_id) if job_id else None
+
+    def forget(self, job_id: Optional[str]):
+        """Drop a job (once its result has been collected)"""
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def _prune(self):
+        """Drop finished jobs nobody collected in time (lock held)"""
+        cutoff = time.time() - self.keep_seconds
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished is not None and job.finished < cutoff]:
+            del self._jobs[job_id]
+
+
+_registry: Optional[JobRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def job_registry() -> JobRegistry:
+    """The registry shared by every session of this server process"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = JobRegistry()
+        return _registry
+
+
+def show_job_progress(job: Job, poll_seconds: float = 0.5):
+    """
+    Streamlit: show a running job's progress and rerun until it finishes
+
+    Returns only for finished jobs (done or failed); while the job is
+    active this ends the script run with a rerun.
+    """
+    import streamlit as st
+
+    if not job.active:
+        return
+    st.progress(job.progress, text=job.describe())
+    time.sleep(poll_seconds)
+    st.rerun()
+
+
+def track_job(param: str, job_id: Optional[str] = None) -> Optional[str]:
+    """
+    Streamlit: remember a job id in the page URL, or read it back
+
+    Args:
+        param: Query parameter holding the job id
+        job_id: Job to remember; None to read the current one
+
+    Returns:
+        The tracked job id, if any
+    """
+    import streamlit as st
+
+    if job_id is not None:
+        st.query_params[param] = job_id
+        return job_id
+    return st.query_params.get(param)
+
+
+def untrack_job(param: str):
+    """Streamlit: remove a job id from the page URL"""
+    import streamlit as st
+
+    if param in st.query_params:
+        del st.query_params[param]
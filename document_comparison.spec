@@ -29,9 +29,28 @@ datas += pdfplumber_datas
 datas += [
     ('app.py', '.'),
     ('main.py', '.'),
+    ('excel_diff_engine.py', '.'),
+    ('excel_row_matching.py', '.'),
+    ('excel_sheet_compare.py', '.'),
+    ('excel_parallel.py', '.'),
+    ('excel_fingerprint.py', '.'),
+    ('excel_diff_export.py', '.'),
+    ('excel_grid_view.py', '.'),
+    ('excel_workbook_cache.py', '.'),
+    ('excel_incremental.py', '.'),
+    ('excel_formulas.py', '.'),
+    ('excel_styles.py', '.'),
+    ('excel_nway.py', '.'),
+    ('excel_delimited.py', '.'),
+    ('excel_spill.py', '.'),
+    ('comparison_jobs.py', '.'),
+    ('grid_view_frontend', 'grid_view_frontend'),
     ('pdf_compare.py', '.'),
     ('pdf_compare_ui.py', '.'),
     ('pdf_compare_optimized.py', '.'),
+    ('pdf_parallel.py', '.'),
+    ('pdf_text_backends.py', '.'),
+    ('pdf_extraction_cache.py', '.'),
     ('pdf_compare_ui_optimized.py', '.'),
     ('smart_diff.py', '.'),
 ]
@@ -45,6 +64,7 @@ hiddenimports += [
     'streamlit.hello',
     'pdfplumber',
     'pdfplumber.utils',
+    'pypdfium2',
     'PIL._tkinter_finder',
     'pandas',
     'openpyxl',
@@ -0,0 +1,336 @@
+"""
+Headless Batch Excel Diff
+
+Compares many (original, modified) workbook pairs without Streamlit, e.g.
+for nightly reconciliation of client workbooks against their templates.
+Pairs come from a manifest and are diffed across a process pool; each
+finished pair immediately gets a JSON change report and a highlighted
+diff workbook in the output directory plus one line in results.ndjson.
+The run ends with a throughput summary (files/s, cells/s, peak RSS).
+
+Pairs may be .xlsx workbooks or CSV/TSV exports (excel_delimited).
+
+Manifest: CSV with "original" and "modified" columns (optional "name"),
+or a JSON list of objects with the same keys. Relative paths are
+resolved against the manifest's directory.
+
+Usage:
+    python excel_batch_diff.py manifest.csv --output-dir diff_results [--workers 4]
+        [--mode cell|aligned|key] [--key-columns ID,Date] [--streaming]
+        [--cache-dir excel_cache] [--no-workbooks] [--formulas] [--styles]
+        [--spill-dir /scratch/spill]
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from excel_diff_engine import open_workbook
+from excel_sheet_compare import (
+    MODES, CompareOptions, sheet_order, compare_workbook_sheets, skipped_result, summarize_results
+)
+from excel_fingerprint import file_digest
+from excel_workbook_cache import WorkbookCache
+from excel_incremental import load_workbook_incremental
+from excel_delimited import delimiter_for
+from excel_diff_export import write_diff_workbook, write_json_report, format_value
+from excel_parallel import default_workers
+
+RESULTS_FILE = 'results.ndjson'
+SUMMARY_FILE = 'batch_summary.json'
+
+
+@dataclass
+class BatchJob:
+    """One workbook pair from the manifest"""
+    name: str  # Base name of the job's output files
+    original: str
+    modified: str
+
+
+def load_manifest(path: str) -> List[BatchJob]:
+    """
+    Read (original, modified) pairs from a CSV or JSON manifest
+
+    Args:
+        path: Manifest file
+
+    Returns:
+        Jobs in manifest order, with unique names
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            entries = json.load(f)
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            entries = list(csv.DictReader(f))
+
+    jobs = []
+    used_names = set()
+    for line, entry in enumerate(entries, 1):
+        if not entry.get('original') or not entry.get('modified'):
+            raise ValueError(f"Manifest entry {line} needs 'original' and 'modified' paths")
+
+        original = os.path.join(base_dir, entry['original'])
+        modified = os.path.join(base_dir, entry['modified'])
+        name = entry.get('name') or os.path.splitext(os.path.basename(modified))[0]
+
+        # Keep output files of same-named workbooks apart
+        unique_name, suffix = name, 2
+        while unique_name in used_names:
+            unique_name, suffix = f"{name}_{suffix}", suffix + 1
+        used_names.add(unique_name)
+
+        jobs.append(BatchJob(unique_name, original, modified))
+    return jobs
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process (None where unavailable)"""
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def run_job(job: BatchJob, output_dir: str, options: CompareOptions, write_workbooks: bool = True,
+            cache_dir: Optional[str] = None) -> Dict:
+    """
+    Diff one workbook pair and write its reports (runs in a worker)
+
+    Args:
+        job: Workbook pair
+        output_dir: Directory for the JSON report and diff workbook
+        options: How to load and compare
+        write_workbooks: Also write the highlighted diff workbook
+        cache_dir: WorkbookCache directory, to parse each template only once
+
+    Returns:
+        Result record for results.ndjson
+    """
+    start = time.perf_counter()
+    record = {'name': job.name, 'original': job.original, 'modified': job.modified}
+
+    original_wb = modified_wb = None
+    try:
+        original_digest = file_digest(job.original)
+        modified_digest = file_digest(job.modified)
+        cache = WorkbookCache(cache_dir) if cache_dir else None
+
+        def load(path, digest, baselines=()):
+            if cache is None or delimiter_for(path) is not None:
+                # CSV/TSV files are streamed in blocks; caching would hold whole grids
+                return open_workbook(path, read_only=True)
+            cached = cache.load(digest, path)
+            if cached is not None:
+                return cached
+            workbook = open_workbook(path, read_only=True)
+            # Rows unchanged from the (cached) template are copied, not parsed
+            loaded = load_workbook_incremental(workbook, digest, list(baselines))
+            if loaded is not None:
+                workbook.close()
+                workbook = loaded[0]
+            stored = cache.store(digest, workbook)
+            if stored is None:
+                return workbook  # Holds values the cache cannot store
+            workbook.close()
+            return stored
+
+        original_wb = load(job.original, original_digest)
+        modified_wb = load(job.modified, modified_digest, [original_wb])
+        sheet_names = sheet_order(original_wb.sheetnames, modified_wb.sheetnames)
+
+        if original_digest == modified_digest:
+            results = [skipped_result(name) for name in sheet_names]
+        else:
+            results = compare_workbook_sheets(original_wb, modified_wb, sheet_names, options)
+        summary, changes = summarize_results(results)
+
+        report_path = os.path.join(output_dir, f"{job.name}.json")
+        with open(report_path, 'w', encoding='utf-8') as f:
+            write_json_report(f, changes, summary, format_value)
+        record['report'] = report_path
+
+        if write_workbooks and summary['sheets_modified']:
+            workbook_path = os.path.join(output_dir, f"{job.name}_diff.xlsx")
+            write_diff_workbook(workbook_path, changes, summary, modified_wb, format_value)
+            record['diff_workbook'] = workbook_path
+
+        record.update({
+            'status': 'ok',
+            'identical': original_digest == modified_digest,
+            'summary': summary,
+            'cells_compared': sum(result.cells_compared for result in results),
+        })
+    except Exception as e:
+        record.update({'status': 'error', 'error': f"{type(e).__name__}: {e}",
+                       'traceback': traceback.format_exc(), 'cells_compared': 0})
+    finally:
+        for workbook in (original_wb, modified_wb):
+            if workbook is not None:
+                workbook.close()
+
+    record['seconds'] = time.perf_counter() - start
+    record['peak_rss_bytes'] = peak_rss_bytes()
+    return record
+
+
+def run_batch(jobs: List[BatchJob], output_dir: str, options: CompareOptions, workers: Optional[int] = None,
+              write_workbooks: bool = True, cache_dir: Optional[str] = None,
+              progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Diff every job and stream the results to output_dir
+
+    Each record is appended to results.ndjson as soon as its job finishes;
+    the throughput summary is written to batch_summary.json at the end.
+
+    Args:
+        jobs: Workbook pairs
+        output_dir: Output directory (created if missing)
+        options: How to load and compare
+        workers: Process count (default: one per CPU, at most 8; 1 runs inline)
+        write_workbooks: Also write highlighted diff workbooks
+        cache_dir: WorkbookCache directory shared by the workers
+        progress: Called with each result record as it arrives
+
+    Returns:
+        Throughput summary
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = max(1, min(workers or default_workers(), len(jobs) or 1))
+
+    counts = {'ok': 0, 'error': 0, 'with_changes': 0}
+    cells = 0
+    worker_peak = 0
+    start = time.perf_counter()
+
+    with open(os.path.join(output_dir, RESULTS_FILE), 'w', encoding='utf-8') as results_file:
+        def collect(record):
+            nonlocal cells, worker_peak
+            counts[record['status']] += 1
+            if record['status'] == 'ok' and record['summary']['sheets_modified']:
+                counts['with_changes'] += 1
+            cells += record['cells_compared']
+            worker_peak = max(worker_peak, record['peak_rss_bytes'] or 0)
+
+            results_file.write(json.dumps(record, default=str) + "\n")
+            results_file.flush()
+            if progress:
+                progress(record)
+
+        if workers == 1:
+            for job in jobs:
+                collect(run_job(job, output_dir, options, write_workbooks, cache_dir))
+        else:
+            # Spawn for the same behaviour on every platform (and in the frozen EXE)
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                futures = [executor.submit(run_job, job, output_dir, options, write_workbooks, cache_dir)
+                           for job in jobs]
+                for future in as_completed(futures):
+                    collect(future.result())
+
+    elapsed = time.perf_counter() - start
+    main_peak = peak_rss_bytes()
+    stats = {
+        'files': len(jobs),
+        'succeeded': counts['ok'],
+        'failed': counts['error'],
+        'with_changes': counts['with_changes'],
+        'workers': workers,
+        'seconds': elapsed,
+        'files_per_second': len(jobs) / elapsed if elapsed else 0.0,
+        'cells_compared': cells,
+        'cells_per_second': cells / elapsed if elapsed else 0.0,
+        'peak_rss_bytes': main_peak,
+        'peak_worker_rss_bytes': worker_peak or None,
+    }
+    with open(os.path.join(output_dir, SUMMARY_FILE), 'w', encoding='utf-8') as f:
+        json.dump(stats, f, indent=2)
+    return stats
+
+
+def _format_bytes(size: Optional[int]) -> str:
+    return "n/a" if size is None else f"{size / (1024 * 1024):,.1f} MB"
+
+
+def print_progress(record: Dict):
+    """One line per finished job"""
+    if record['status'] == 'ok':
+        summary = record['summary']
+        print(f"[OK] {record['name']}: {summary['total_modifications']:,} modifications in "
+              f"{len(summary['sheets_modified'])} sheet(s) ({record['seconds']:.2f}s)")
+    else:
+        print(f"[ERROR] {record['name']}: {record['error']}")
+
+
+def print_stats(stats: Dict):
+    """Throughput summary at the end of a run"""
+    print("\nBatch complete")
+    print(f"  Files:     {stats['files']} ({stats['succeeded']} ok, {stats['failed']} failed, "
+          f"{stats['with_changes']} with changes)")
+    print(f"  Time:      {stats['seconds']:.2f}s on {stats['workers']} worker(s)")
+    print(f"  Files/s:   {stats['files_per_second']:,.2f}")
+    print(f"  Cells/s:   {stats['cells_per_second']:,.0f} ({stats['cells_compared']:,} cells)")
+    print(f"  Peak RSS:  {_format_bytes(stats['peak_rss_bytes'])} main, "
+          f"{_format_bytes(stats['peak_worker_rss_bytes'])} largest worker")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Diff Excel workbook pairs listed in a manifest")
+    parser.add_argument("manifest", help="CSV or JSON manifest with original/modified paths")
+    parser.add_argument("--output-dir", default="diff_results")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU, max 8)")
+    parser.add_argument("--mode", choices=MODES, default='cell')
+    parser.add_argument("--key-columns", default="", help="Comma-separated key columns for --mode key")
+    parser.add_argument("--streaming", action="store_true", help="Diff in row blocks to bound memory")
+    parser.add_argument("--spill-dir", default=None,
+                        help="Write streamed changes to disk here instead of memory (implies --streaming)")
+    parser.add_argument("--cache-dir", default=None, help="Cache parsed workbooks here (reuses templates)")
+    parser.add_argument("--no-workbooks", action="store_true", help="Skip the highlighted diff workbooks")
+    parser.add_argument("--formulas", action="store_true",
+                        help="Also diff formula text (cell mode; bypasses --cache-dir)")
+    parser.add_argument("--styles", action="store_true",
+                        help="Also diff fills, fonts, borders and number formats (cell mode; bypasses --cache-dir)")
+    args = parser.parse_args(argv)
+
+    key_columns = [column.strip() for column in args.key_columns.split(',') if column.strip()]
+    if args.mode == 'key' and not key_columns:
+        parser.error("--mode key needs --key-columns")
+    if args.formulas and args.mode != 'cell':
+        parser.error("--formulas needs --mode cell")
+    if args.styles and args.mode != 'cell':
+        parser.error("--styles needs --mode cell")
+
+    jobs = load_manifest(args.manifest)
+    options = CompareOptions(mode=args.mode, key_columns=key_columns,
+                             streaming=args.streaming or args.spill_dir is not None,
+                             keep_frames=False, formulas=args.formulas, styles=args.styles,
+                             spill_dir=args.spill_dir)
+
+    print(f"Comparing {len(jobs)} workbook pair(s) -> {args.output_dir}")
+    # Cached grids hold no formulas or styles
+    cache_dir = None if args.formulas or args.styles else args.cache_dir
+    stats = run_batch(jobs, args.output_dir, options, args.workers, not args.no_workbooks, cache_dir,
+                      progress=print_progress)
+    print_stats(stats)
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
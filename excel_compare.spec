@@ -14,6 +14,22 @@ a = Analysis(
     datas=[
         # Include main.py as a data file
         ('main.py', '.'),
+        ('excel_diff_engine.py', '.'),
+        ('excel_row_matching.py', '.'),
+        ('excel_sheet_compare.py', '.'),
+        ('excel_parallel.py', '.'),
+        ('excel_fingerprint.py', '.'),
+        ('excel_diff_export.py', '.'),
+        ('excel_grid_view.py', '.'),
+        ('excel_workbook_cache.py', '.'),
+        ('excel_incremental.py', '.'),
+        ('excel_formulas.py', '.'),
+        ('excel_styles.py', '.'),
+        ('excel_nway.py', '.'),
+        ('excel_delimited.py', '.'),
+        ('excel_spill.py', '.'),
+        ('comparison_jobs.py', '.'),
+        ('grid_view_frontend', 'grid_view_frontend'),
         # Include Streamlit's static files and metadata
         ('venv/Lib/site-packages/streamlit/static', 'streamlit/static'),
         ('venv/Lib/site-packages/streamlit/runtime', 'streamlit/runtime'),
@@ -0,0 +1,200 @@
+"""
+CSV / TSV Workbooks
+
+Lets delimited text exports go through the Excel comparison unchanged,
+without converting them to .xlsx first. open_workbook() returns a
+DelimitedWorkbook for .csv/.tsv sources: a one-sheet stand-in whose
+sheet yields typed row blocks straight from a chunked reader, so the
+streaming diff holds one block per file at a time, and the in-memory,
+aligned and key modes get the same object grids as from a worksheet.
+
+Cells are typed one by one, independent of the rest of their column:
+integers become int, decimals float, empty fields None, and everything
+else stays text (like Excel opening the file, minus date detection).
+"""
+
+import csv
+import io
+import os
+import re
+from itertools import islice
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from excel_diff_engine import rows_to_array, stack_blocks, DEFAULT_BLOCK_ROWS
+
+# Delimiter per file extension
+DELIMITERS = {'.csv': ',', '.tsv': '\t', '.tab': '\t'}
+
+# Name of the single sheet, so two delimited files compare sheet to sheet
+# (and against the first sheet of a default Excel workbook)
+SHEET_NAME = 'Sheet1'
+
+_INTEGER = re.compile(r'[+-]?\d+')
+_DECIMAL = re.compile(r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+
+
+def source_name(source) -> str:
+    """File name of a path or upload ('' if unknown)"""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    return getattr(source, 'name', '') or ''
+
+
+def delimiter_for(source) -> Optional[str]:
+    """Field delimiter of a delimited source, or None for workbooks"""
+    return DELIMITERS.get(os.path.splitext(source_name(source))[1].lower())
+
+
+def type_cells(text: np.ndarray) -> np.ndarray:
+    """
+    Typed object grid from a grid of field strings
+
+    Args:
+        text: 2-D object array of str, with None or NaN for missing fields
+
+    Returns:
+        Object array of the same shape holding int, float, str or None
+    """
+    grid = np.full(text.shape, None, dtype=object)
+    for col in range(text.shape[1]):
+        column = pd.Series(text[:, col], dtype=object)
+        present = column.notna() & (column != '')
+        if not present.any():
+            continue
+        fields = column[present].astype(str)
+        values = fields.to_numpy(dtype=object).copy()
+
+        stripped = fields.str.strip()
+        integers = stripped.str.fullmatch(_INTEGER).to_numpy(dtype=bool)
+        decimals = stripped.str.fullmatch(_DECIMAL).to_numpy(dtype=bool) & ~integers
+        if integers.any():
+            try:
+                values[integers] = stripped[integers].astype(np.int64).tolist()
+            except OverflowError:
+                # Beyond int64: Python ints keep them exact
+                values[integers] = [int(field) for field in stripped[integers].tolist()]
+        if decimals.any():
+            values[decimals] = pd.to_numeric(stripped[decimals]).tolist()
+
+        grid[present.to_numpy(dtype=bool), col] = values
+    return grid
+
+
+class DelimitedSheet:
+    """Worksheet stand-in reading a delimited file in typed row blocks"""
+
+    # Unknown until the file has been read
+    max_row = None
+    max_column = None
+
+    def __init__(self, parent: 'DelimitedWorkbook', title: str = SHEET_NAME):
+        self.parent = parent
+        self.title = title
+
+    def _open_text(self):
+        source = self.parent.source
+        if isinstance(source, (str, os.PathLike)):
+            return open(source, newline='', encoding=self.parent.encoding, errors='replace')
+        source.seek(0)
+        data = source.getvalue() if hasattr(source, 'getvalue') else source.read()
+        return io.StringIO(data.decode(self.parent.encoding, errors='replace'), newline='')
+
+    def _csv_blocks(self, block_rows: int) -> Iterator[np.ndarray]:
+        """Blocks via the csv module, which accepts rows of any length"""
+        with self._open_text() as f:
+            rows = []
+            for row in csv.reader(f, delimiter=self.parent.delimiter):
+                rows.append(tuple(row))
+                if len(rows) == block_rows:
+                    yield type_cells(rows_to_array(rows))
+                    rows = []
+            if rows:
+                yield type_cells(rows_to_array(rows))
+
+    def iter_blocks(self, block_rows: int = DEFAULT_BLOCK_ROWS) -> Iterator[np.ndarray]:
+        """
+        Stream the file as typed blocks of rows
+
+        Args:
+            block_rows: Rows per block; only the final block may be shorter
+
+        Yields:
+            2-D object arrays of shape (block_rows, width)
+        """
+        source = self.parent.source
+        if not isinstance(source, (str, os.PathLike)):
+            source.seek(0)
+        produced = 0
+        try:
+            reader = pd.read_csv(source, sep=self.parent.delimiter, header=None, dtype=str,
+                                 keep_default_na=False, na_filter=False, skip_blank_lines=False,
+                                 chunksize=block_rows, encoding=self.parent.encoding,
+                                 encoding_errors='replace')
+            with reader:
+                for chunk in reader:
+                    yield type_cells(chunk.to_numpy(dtype=object))
+                    produced += 1
+        except pd.errors.ParserError:
+            # A row wider than the first: continue with the tolerant reader
+            yield from islice(self._csv_blocks(block_rows), produced, None)
+        except pd.errors.EmptyDataError:
+            return
+
+    @property
+    def grid(self) -> np.ndarray:
+        """The whole file as one typed grid (read by sheet_to_array)"""
+        return stack_blocks(list(self.iter_blocks()))
+
+    def iter_rows(self, min_row=None, max_row=None, values_only=True):
+        """Rows as value tuples, like openpyxl's iter_rows(values_only=True)"""
+        start = (min_row or 1) - 1
+        row_number = 0
+        for block in self.iter_blocks():
+            for row in block.tolist():
+                if max_row is not None and row_number >= max_row:
+                    return
+                if row_number >= start:
+                    yield tuple(row)
+                row_number += 1
+
+
+class DelimitedWorkbook:
+    """Workbook stand-in for a CSV/TSV file: a single DelimitedSheet"""
+
+    def __init__(self, source, delimiter: str, encoding: str = 'utf-8-sig'):
+        """
+        Args:
+            source: Path or binary file-like object
+            delimiter: Field delimiter
+            encoding: Text encoding (a UTF-8 byte order mark is skipped)
+        """
+        self.source = source
+        self.delimiter = delimiter
+        self.encoding = encoding
+        self._sheet = DelimitedSheet(self)
+
+    @property
+    def sheetnames(self) -> List[str]:
+        return [self._sheet.title]
+
+    @property
+    def worksheets(self) -> List[DelimitedSheet]:
+        return [self._sheet]
+
+    @property
+    def active(self) -> DelimitedSheet:
+        return self._sheet
+
+    def __getitem__(self, name: str) -> DelimitedSheet:
+        if name != self._sheet.title:
+            raise KeyError(f"Worksheet {name} does not exist.")
+        return self._sheet
+
+    def __contains__(self, name: str) -> bool:
+        return name == self._sheet.title
+
+    def close(self):
+        """Nothing held open between reads"""
@@ -0,0 +1,742 @@
+"""
+Vectorized Excel Diff Engine
+
+Loads each worksheet once into an aligned 2-D NumPy object array and
+computes the changed-cell mask, change categories and summary counters
+with array operations. Modification records are only built for the
+coordinates that actually differ.
+
+For very large workbooks a streaming path reads both files in read-only
+mode and diffs them in lockstep blocks of rows, so only the current block
+and the changed cells are held as Python objects.
+"""
+
+import sys
+from dataclasses import dataclass, field
+from itertools import zip_longest
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import openpyxl
+from openpyxl.utils import get_column_letter
+
+
+# Change categories, indexed by the uint8 codes produced by diff_grids()
+CHANGE_TYPES = ('blank_to_value', 'value_to_blank', 'value_to_value')
+BLANK_TO_VALUE, VALUE_TO_BLANK, VALUE_TO_VALUE = range(len(CHANGE_TYPES))
+
+# The UI always renders at least this many rows/columns
+MIN_ROWS = 10
+MIN_COLS = 5
+
+# Rows per block on the streaming path
+DEFAULT_BLOCK_ROWS = 4096
+
+
+@dataclass
+class GridDiff:
+    """Changed cells between two aligned sheet grids"""
+    rows: np.ndarray  # 1-based row numbers (int32)
+    cols: np.ndarray  # 1-based column numbers (int32)
+    codes: np.ndarray  # Index into CHANGE_TYPES (uint8)
+    old_values: np.ndarray  # Original cell values (object)
+    new_values: np.ndarray  # Modified cell values (object)
+    shape: Tuple[int, int] = (0, 0)  # Compared grid (rows, cols)
+    counts: Dict[str, int] = field(default_factory=dict)
+    original_rows: Optional[np.ndarray] = None  # Set when rows were re-aligned
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def cells_compared(self) -> int:
+        return self.shape[0] * self.shape[1]
+
+
+def sheet_to_array(sheet) -> np.ndarray:
+    """
+    Read a worksheet into a 2-D object array in a single pass
+
+    Args:
+        sheet: openpyxl worksheet
+
+    Returns:
+        Array of shape (max_row, max_column); empty cells are None
+    """
+    grid = getattr(sheet, 'grid', None)
+    if grid is not None:
+        # Sheet from the parsed-workbook cache (excel_workbook_cache)
+        return grid
+    
+    cells = getattr(sheet, '_cells', None)
+    if cells is None:
+        # Read-only worksheet: dimensions may be unknown until the rows are read
+        return stack_blocks(list(iter_row_blocks(sheet)))
+
+    values = np.full((sheet.max_row, sheet.max_column), None, dtype=object)
+
+    # Full-mode worksheet: scatter the sparse cell store in one assignment
+    # instead of looking up every (row, col) of the rectangle
+    coords = np.fromiter((k for rc in cells for k in rc), dtype=np.int64, count=2 * len(cells))
+    coords = coords.reshape(-1, 2) - 1
+    values[coords[:, 0], coords[:, 1]] = np.fromiter(
+        (cell._value for cell in cells.values()), dtype=object, count=len(cells)
+    )
+    return values
+
+
+def rows_to_array(rows: List[tuple]) -> np.ndarray:
+    """Pack a list of (possibly ragged) row tuples into a 2-D object array"""
+    width = max((len(row) for row in rows), default=0)
+    values = np.full((len(rows), width), None, dtype=object)
+    for row_idx, row in enumerate(rows):
+        values[row_idx, :len(row)] = row
+    return values
+
+
+def stack_blocks(blocks: List[np.ndarray]) -> np.ndarray:
+    """Stack row blocks of different widths into one grid"""
+    if not blocks:
+        return np.full((0, 0), None, dtype=object)
+
+    width = max(block.shape[1] for block in blocks)
+    return np.vstack([pad_grid(block, block.shape[0], width) for block in blocks])
+
+
+def pad_grid(values: np.ndarray, n_rows: int, n_cols: int) -> np.ndarray:
+    """Pad a grid with None up to (n_rows, n_cols)"""
+    if values.shape == (n_rows, n_cols):
+        return values
+
+    padded = np.full((n_rows, n_cols), None, dtype=object)
+    padded[:values.shape[0], :values.shape[1]] = values
+    return padded
+
+
+def column_headers_from_array(values: np.ndarray) -> Dict[int, str]:
+    """Map 1-based column numbers to the header text found in row 1"""
+    headers = {}
+    if values.shape[0] >= 1:
+        for col, value in enumerate(values[0].tolist(), start=1):
+            headers[col] = str(value) if value else get_column_letter(col)
+    return headers
+
+
+def frame_from_array(values: np.ndarray) -> pd.DataFrame:
+    """Wrap a sheet grid in a DataFrame with Excel column letters"""
+    if values.size == 0:
+        return pd.DataFrame()
+
+    columns = [get_column_letter(i) for i in range(1, values.shape[1] + 1)]
+    # dtype=object keeps None for empty cells instead of coercing to NaN
+    return pd.DataFrame(values, columns=columns, dtype=object)
+
+
+def diff_grids(original: np.ndarray, modified: np.ndarray,
+               min_rows: int = MIN_ROWS, min_cols: int = MIN_COLS) -> GridDiff:
+    """
+    Compare two sheet grids cell by cell using vectorized operations
+
+    Cells are compared with Python equality, exactly like comparing
+    openpyxl cell values directly, so 1 == 1.0 and None == None.
+
+    Args:
+        original: Grid from the original workbook
+        modified: Grid from the modified workbook
+        min_rows: Minimum number of rows to compare
+        min_cols: Minimum number of columns to compare
+
+    Returns:
+        GridDiff with the changed coordinates in row-major order
+    """
+    n_rows = max(original.shape[0], modified.shape[0], min_rows)
+    n_cols = max(original.shape[1], modified.shape[1], min_cols)
+
+    original = pad_grid(original, n_rows, n_cols)
+    modified = pad_grid(modified, n_rows, n_cols)
+
+    changed = np.not_equal(original, modified).astype(bool, copy=False)
+    rows, cols = np.nonzero(changed)
+
+    old_values = original[rows, cols]
+    new_values = modified[rows, cols]
+
+    old_blank = np.equal(old_values, None).astype(bool, copy=False)
+    new_blank = np.equal(new_values, None).astype(bool, copy=False)
+    codes = np.full(len(rows), VALUE_TO_VALUE, dtype=np.uint8)
+    codes[new_blank] = VALUE_TO_BLANK
+    codes[old_blank] = BLANK_TO_VALUE
+
+    tallies = np.bincount(codes, minlength=len(CHANGE_TYPES))
+    counts = {name: int(tallies[i]) for i, name in enumerate(CHANGE_TYPES)}
+
+    return GridDiff(
+        rows=(rows + 1).astype(np.int32),
+        cols=(cols + 1).astype(np.int32),
+        codes=codes,
+        old_values=old_values,
+        new_values=new_values,
+        shape=(n_rows, n_cols),
+        counts=counts
+    )
+
+
+def unchanged_values(changes: GridDiff, value_diff: GridDiff) -> np.ndarray:
+    """
+    Which of a formula/style diff's cells kept their value
+
+    Args:
+        changes: Diff of another cell layer over the same padded shape
+        value_diff: diff_grids() result for the cell values
+
+    Returns:
+        Bool array per change in changes: True where the value did not change
+    """
+    n_cols = value_diff.shape[1]
+    # Compare flat cell positions instead of (row, col) pairs
+    value_cells = (value_diff.rows.astype(np.int64) - 1) * n_cols + value_diff.cols - 1
+    changed_cells = (changes.rows.astype(np.int64) - 1) * n_cols + changes.cols - 1
+    return ~np.isin(changed_cells, value_cells)
+
+
+def is_blank(value) -> bool:
+    """True for empty cells, including missing entries of nullable columns"""
+    return value is None or value is pd.NA
+
+
+class Modification:
+    """One changed cell, read from a ModificationTable (cell_ref and column_name are derived on access)"""
+    __slots__ = ('row', 'col', 'change_type', 'old_value', 'new_value', 'original_row', '_column_headers')
+
+    def __init__(self, row, col, change_type, old_value, new_value, original_row, column_headers):
+        self.row = row  # Modified-sheet row (1-based)
+        self.col = col
+        self.change_type = change_type
+        self.old_value = old_value
+        self.new_value = new_value
+        self.original_row = original_row  # Original-sheet row; differs from row after re-alignment
+        self._column_headers = column_headers
+
+    @property
+    def row_number(self) -> int:
+        return self.row
+
+    @property
+    def cell(self) -> Tuple[int, int]:
+        return (self.row, self.col)
+
+    @property
+    def cell_ref(self) -> str:
+        return f"{get_column_letter(self.col)}{self.row}"
+
+    @property
+    def column_name(self) -> str:
+        return self._column_headers.get(self.col) or get_column_letter(self.col)
+
+    def _key(self):
+        return (self.row, self.col, self.change_type, self.old_value, self.new_value, self.original_row)
+
+    def __eq__(self, other):
+        return isinstance(other, Modification) and self._key() == other._key()
+
+    def __repr__(self):
+        return (f"Modification({self.cell_ref}, {self.change_type}: "
+                f"{self.old_value!r} -> {self.new_value!r})")
+
+
+@dataclass
+class ModificationTable:
+    """
+    Changed cells of one sheet as parallel typed arrays
+
+    Old and new values are indexes into one pool of interned values, so
+    repeated values are stored once. Iterating yields transient
+    Modification records; nothing per-change is kept as a Python object.
+    """
+    rows: np.ndarray  # 1-based modified-sheet rows (int32)
+    cols: np.ndarray  # 1-based columns (int32)
+    codes: np.ndarray  # Index into CHANGE_TYPES (uint8)
+    old_index: np.ndarray  # Index into values (int32)
+    new_index: np.ndarray  # Index into values (int32)
+    values: List = field(default_factory=list)  # Interned value pool
+    column_headers: Dict[int, str] = field(default_factory=dict)
+    original_rows: Optional[np.ndarray] = None  # Original-sheet rows, set when rows were re-aligned
+
+    @classmethod
+    def empty(cls) -> 'ModificationTable':
+        """Table with no changes"""
+        no_rows = np.empty(0, dtype=np.int32)
+        return cls(no_rows, no_rows, np.empty(0, dtype=np.uint8), no_rows, no_rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[Modification]:
+        original_rows = self.rows if self.original_rows is None else self.original_rows
+        values = self.values
+        headers = self.column_headers
+        for row, col, code, old, new, original_row in zip(self.rows.tolist(), self.cols.tolist(),
+                                                          self.codes.tolist(), self.old_index.tolist(),
+                                                          self.new_index.tolist(), original_rows.tolist()):
+            yield Modification(row, col, CHANGE_TYPES[code], values[old], values[new], original_row, headers)
+
+    def __getitem__(self, key):
+        """Modification for an int index; sub-table (same value pool) for a slice, mask or index array"""
+        if isinstance(key, (int, np.integer)):
+            original_rows = self.rows if self.original_rows is None else self.original_rows
+            return Modification(int(self.rows[key]), int(self.cols[key]), CHANGE_TYPES[self.codes[key]],
+                                self.values[self.old_index[key]], self.values[self.new_index[key]],
+                                int(original_rows[key]), self.column_headers)
+        return ModificationTable(
+            self.rows[key], self.cols[key], self.codes[key], self.old_index[key], self.new_index[key],
+            self.values, self.column_headers,
+            None if self.original_rows is None else self.original_rows[key]
+        )
+
+    def where(self, change_types) -> 'ModificationTable':
+        """Only the changes of the given CHANGE_TYPES names"""
+        wanted = [CHANGE_TYPES.index(name) for name in change_types]
+        return self[np.isin(self.codes, wanted)]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of changes per change type"""
+        counts = np.bincount(self.codes, minlength=len(CHANGE_TYPES))
+        return {name: int(counts[code]) for code, name in enumerate(CHANGE_TYPES)}
+
+    def pages(self, page_size: int = 1000) -> Iterator['ModificationTable']:
+        """Consecutive sub-tables of at most page_size changes (as SpilledModifications.pages())"""
+        for start in range(0, len(self), page_size):
+            yield self[start:start + page_size]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the coordinate, code and index arrays"""
+        arrays = [self.rows, self.cols, self.codes, self.old_index, self.new_index]
+        if self.original_rows is not None:
+            arrays.append(self.original_rows)
+        return sum(array.nbytes for array in arrays)
+
+
+def _group_offsets(keys: np.ndarray):
+    """(distinct keys, start of each key's run, change offsets sorted by key)"""
+    order = np.argsort(keys, kind='stable')
+    distinct, starts = np.unique(keys[order], return_index=True)
+    return distinct, np.append(starts, len(keys)), order
+
+
+@dataclass
+class ModificationIndex:
+    """
+    Precomputed counters and lookups over one sheet's modification table
+
+    Built once per sheet by compare_sheet(), so the UI can show counts,
+    filter by column and page through changes without rescanning the
+    table on every rerun. Offsets are positions in the table, ascending
+    within each row, column and change type.
+    """
+    counts: Dict[str, int]  # Changes per CHANGE_TYPES name
+    total: int
+    row_numbers: np.ndarray  # Distinct changed rows, ascending
+    row_starts: np.ndarray  # Run of row_numbers[i] in row_offsets: row_starts[i]:row_starts[i + 1]
+    row_offsets: np.ndarray
+    col_numbers: np.ndarray  # Distinct changed columns, ascending
+    col_starts: np.ndarray
+    col_offsets: np.ndarray
+    type_starts: np.ndarray  # Run of change code c in type_offsets: type_starts[c]:type_starts[c + 1]
+    type_offsets: np.ndarray
+
+    @classmethod
+    def build(cls, table) -> 'ModificationIndex':
+        """Index a ModificationTable (or SpilledModifications)"""
+        rows = np.asarray(table.rows)
+        cols = np.asarray(table.cols)
+        codes = np.asarray(table.codes)
+
+        row_numbers, row_starts, row_offsets = _group_offsets(rows)
+        col_numbers, col_starts, col_offsets = _group_offsets(cols)
+        type_offsets = np.argsort(codes, kind='stable')
+        tallies = np.bincount(codes, minlength=len(CHANGE_TYPES))
+        return cls(
+            counts={name: int(tallies[code]) for code, name in enumerate(CHANGE_TYPES)},
+            total=len(codes),
+            row_numbers=row_numbers, row_starts=row_starts, row_offsets=row_offsets,
+            col_numbers=col_numbers, col_starts=col_starts, col_offsets=col_offsets,
+            type_starts=np.concatenate([[0], np.cumsum(tallies)]), type_offsets=type_offsets
+        )
+
+    @classmethod
+    def empty(cls) -> 'ModificationIndex':
+        """Index of a table with no changes"""
+        return cls.build(ModificationTable.empty())
+
+    @staticmethod
+    def _run(numbers: np.ndarray, starts: np.ndarray, offsets: np.ndarray, number: int) -> np.ndarray:
+        i = np.searchsorted(numbers, number)
+        if i == len(numbers) or numbers[i] != number:
+            return offsets[:0]
+        return offsets[starts[i]:starts[i + 1]]
+
+    def row(self, row: int) -> np.ndarray:
+        """Offsets of the changes in a 1-based row"""
+        return self._run(self.row_numbers, self.row_starts, self.row_offsets, row)
+
+    def column(self, col: int) -> np.ndarray:
+        """Offsets of the changes in a 1-based column"""
+        return self._run(self.col_numbers, self.col_starts, self.col_offsets, col)
+
+    def column_counts(self) -> Dict[int, int]:
+        """Changes per 1-based column"""
+        return dict(zip(self.col_numbers.tolist(), np.diff(self.col_starts).tolist()))
+
+    def _of_types(self, change_types) -> Optional[np.ndarray]:
+        """Offsets of the given change types, None for all of them"""
+        codes = sorted(CHANGE_TYPES.index(name) for name in change_types)
+        if len(codes) == len(CHANGE_TYPES):
+            return None
+        runs = [self.type_offsets[self.type_starts[code]:self.type_starts[code + 1]] for code in codes]
+        return runs[0] if len(runs) == 1 else np.sort(np.concatenate(runs))
+
+    def select(self, change_types=CHANGE_TYPES, column: Optional[int] = None) -> Optional[np.ndarray]:
+        """
+        Offsets of the changes matching a filter
+
+        Args:
+            change_types: CHANGE_TYPES names to keep
+            column: Only this 1-based column, if given
+
+        Returns:
+            Ascending offsets, or None when every change matches
+        """
+        if column is None:
+            return self._of_types(change_types)
+        offsets = self.column(column)
+        wanted = self._of_types(change_types)
+        return offsets if wanted is None else offsets[np.isin(offsets, wanted, assume_unique=True)]
+
+    def count(self, change_types=CHANGE_TYPES, column: Optional[int] = None) -> int:
+        """Number of changes matching a filter (see select())"""
+        if column is None:
+            return sum(self.counts[name] for name in set(change_types))
+        selected = self.select(change_types, column)
+        return self.total if selected is None else len(selected)
+
+    def page(self, table, number: int, page_size: int, change_types=CHANGE_TYPES,
+             column: Optional[int] = None):
+        """
+        One page of the matching changes
+
+        Args:
+            table: The indexed ModificationTable (or SpilledModifications)
+            number: 0-based page number
+            page_size: Changes per page
+            change_types: CHANGE_TYPES names to keep
+            column: Only this 1-based column, if given
+
+        Returns:
+            Sub-table of at most page_size changes
+        """
+        start = number * page_size
+        selected = self.select(change_types, column)
+        if selected is None:
+            return table[start:start + page_size]
+        return table[selected[start:start + page_size]]
+
+
+def _intern_values(old_values: np.ndarray, new_values: np.ndarray):
+    """Pool distinct values; returns (pool, old indexes, new indexes)"""
+    pool = [None]
+    positions = {(type(None), None): 0}
+
+    def index_of(values):
+        indexes = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values.tolist()):
+            # Keyed by type too, so 1, 1.0 and True stay distinct
+            key = (type(value), value)
+            position = positions.get(key)
+            if position is None:
+                position = positions[key] = len(pool)
+                pool.append(value)
+            indexes[i] = position
+        return indexes
+
+    return pool, index_of(old_values), index_of(new_values)
+
+
+def build_modifications(grid_diff: GridDiff, column_headers: Dict[int, str]) -> ModificationTable:
+    """
+    Turn a GridDiff into the modification table used by the UI and exports
+
+    Args:
+        grid_diff: Result of diff_grids()
+        column_headers: 1-based column number -> header text
+
+    Returns:
+        ModificationTable with one entry per changed cell
+    """
+    pool, old_index, new_index = _intern_values(grid_diff.old_values, grid_diff.new_values)
+    return ModificationTable(
+        rows=grid_diff.rows.astype(np.int32, copy=False),
+        cols=grid_diff.cols.astype(np.int32, copy=False),
+        codes=grid_diff.codes.astype(np.uint8, copy=False),
+        old_index=old_index,
+        new_index=new_index,
+        values=pool,
+        column_headers=column_headers,
+        original_rows=None if grid_diff.original_rows is None else grid_diff.original_rows.astype(np.int32)
+    )
+
+
+# ---------------------------------------------------------------------------
+# Streaming (read-only) path
+# ---------------------------------------------------------------------------
+
+def open_workbook(source, read_only: bool = False):
+    """
+    Open a workbook with cached formula values
+
+    CSV and TSV files (by extension) open as a one-sheet DelimitedWorkbook
+    read in typed row blocks (excel_delimited).
+
+    Args:
+        source: Path or binary file-like object
+        read_only: Use openpyxl's lazy read-only mode, which parses rows
+            on demand instead of building the full cell object model
+
+    Returns:
+        openpyxl Workbook (or DelimitedWorkbook)
+    """
+    # Imported here: excel_delimited builds on this module
+    from excel_delimited import DelimitedWorkbook, delimiter_for
+    delimiter = delimiter_for(source)
+    if delimiter is not None:
+        return DelimitedWorkbook(source, delimiter)
+
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return openpyxl.load_workbook(source, read_only=read_only, data_only=True)
+
+
+def read_header_names(source) -> List[str]:
+    """
+    Distinct row-1 header texts across all sheets of a workbook
+
+    Only the first row of each sheet is parsed, so this is cheap enough to
+    populate a key-column picker before the comparison runs.
+    """
+    workbook = open_workbook(source, read_only=True)
+    names = []
+    try:
+        for sheet in workbook.worksheets:
+            for row in sheet.iter_rows(max_row=1, values_only=True):
+                for value in row:
+                    if value is not None and str(value) not in names:
+                        names.append(str(value))
+    finally:
+        workbook.close()
+    return names
+
+
+def iter_row_blocks(sheet, block_rows: int = DEFAULT_BLOCK_ROWS) -> Iterator[np.ndarray]:
+    """
+    Stream a worksheet as consecutive blocks of rows
+
+    Args:
+        sheet: openpyxl worksheet (read-only or full mode)
+        block_rows: Rows per block; only the final block may be shorter
+
+    Yields:
+        2-D object arrays of shape (block_rows, width)
+    """
+    iter_blocks = getattr(sheet, 'iter_blocks', None)
+    if iter_blocks is not None:
+        # Delimited sheets are read in blocks already (excel_delimited)
+        yield from iter_blocks(block_rows)
+        return
+
+    rows = []
+    for row in sheet.iter_rows(values_only=True):
+        rows.append(row)
+        if len(rows) == block_rows:
+            yield rows_to_array(rows)
+            rows = []
+    if rows:
+        yield rows_to_array(rows)
+
+
+def compact_column(values: np.ndarray):
+    """
+    Store one column of cell values compactly
+
+    Pure integer and pure float columns become nullable Int64/Float64 arrays
+    (missing cells read back as pd.NA); everything else stays an object
+    array with repeated strings interned.
+    """
+    items = values.tolist()
+    kinds = {type(v) for v in items if v is not None}
+
+    if kinds == {int} or kinds == {float}:
+        try:
+            return pd.array(values, dtype='Int64' if kinds == {int} else 'Float64')
+        except (OverflowError, TypeError, ValueError):
+            pass  # e.g. integers beyond int64
+
+    return np.array([sys.intern(v) if type(v) is str else v for v in items], dtype=object)
+
+
+def _chunk_to_object(chunk) -> np.ndarray:
+    if isinstance(chunk, np.ndarray):
+        return chunk
+    return chunk.to_numpy(dtype=object, na_value=None)
+
+
+def _chunk_is_blank(chunk) -> bool:
+    if isinstance(chunk, np.ndarray):
+        return bool(np.equal(chunk, None).all())
+    return bool(chunk.isna().all())
+
+
+def _concat_chunks(chunks: list) -> pd.Series:
+    """Concatenate the compact chunks of one column into a Series"""
+    dtypes = {str(chunk.dtype) for chunk in chunks if not _chunk_is_blank(chunk)}
+
+    if len(dtypes) == 1 and dtypes != {'object'}:
+        # Every non-empty chunk has the same nullable numeric dtype
+        dtype = dtypes.pop()
+        return pd.concat([pd.Series(chunk).astype(dtype) for chunk in chunks], ignore_index=True)
+
+    # dtype=object keeps None for empty cells instead of coercing to NaN
+    return pd.Series(np.concatenate([_chunk_to_object(chunk) for chunk in chunks]), dtype=object)
+
+
+class ColumnBuffer:
+    """
+    Compact column-wise copy of a streamed sheet
+
+    Rows are appended block by block and each column is stored with
+    compact_column(), so a sheet costs a few bytes per numeric cell
+    instead of one Python object per cell.
+    """
+
+    def __init__(self, keep_values: bool = True):
+        """
+        Initialize buffer
+
+        Args:
+            keep_values: Store cell values; when False only the header row
+                and row count are kept
+        """
+        self.keep_values = keep_values
+        self.columns: List[list] = []
+        self.header_row: Optional[np.ndarray] = None
+        self.n_rows = 0
+
+    def append_block(self, block: np.ndarray):
+        """Append a block of rows produced by iter_row_blocks()"""
+        n = block.shape[0]
+        if n == 0:
+            return
+
+        if self.header_row is None:
+            self.header_row = block[:1]
+
+        if self.keep_values:
+            for col in range(max(block.shape[1], len(self.columns))):
+                if col == len(self.columns):
+                    # Column first seen in this block: backfill earlier rows
+                    self.columns.append([np.full(self.n_rows, None, dtype=object)] if self.n_rows else [])
+                if col < block.shape[1]:
+                    self.columns[col].append(compact_column(block[:, col]))
+                else:
+                    self.columns[col].append(np.full(n, None, dtype=object))
+
+        self.n_rows += n
+
+    def column_headers(self) -> Dict[int, str]:
+        """Header text from the first row, as column_headers_from_array()"""
+        if self.header_row is None:
+            return {}
+        return column_headers_from_array(pad_grid(self.header_row, 1, max(self.header_row.shape[1], len(self.columns))))
+
+    def to_frame(self) -> pd.DataFrame:
+        """Build a DataFrame over the compact columns"""
+        if not self.columns or not self.n_rows:
+            return pd.DataFrame()
+
+        return pd.DataFrame({
+            get_column_letter(col): _concat_chunks(chunks)
+            for col, chunks in enumerate(self.columns, start=1)
+        })
+
+
+def concat_grid_diffs(parts: List[GridDiff], shape: Tuple[int, int]) -> GridDiff:
+    """Merge per-block GridDiffs (already offset to sheet rows) into one"""
+    counts = {name: sum(part.counts.get(name, 0) for part in parts) for name in CHANGE_TYPES}
+
+    if not parts:
+        empty = np.empty(0, dtype=object)
+        return GridDiff(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32),
+                        np.empty(0, dtype=np.uint8), empty, empty, shape=shape, counts=counts)
+
+    return GridDiff(
+        rows=np.concatenate([part.rows for part in parts]),
+        cols=np.concatenate([part.cols for part in parts]),
+        codes=np.concatenate([part.codes for part in parts]),
+        old_values=np.concatenate([part.old_values for part in parts]),
+        new_values=np.concatenate([part.new_values for part in parts]),
+        shape=shape,
+        counts=counts
+    )
+
+
+def stream_diff(original_sheet, modified_sheet, block_rows: int = DEFAULT_BLOCK_ROWS,
+                original_buffer: Optional[ColumnBuffer] = None,
+                modified_buffer: Optional[ColumnBuffer] = None, spill=None) -> GridDiff:
+    """
+    Diff two worksheets block by block without materialising either sheet
+
+    Both sheets are walked in lockstep; block k of each covers the same rows,
+    so the result is identical to diff_grids() on the full grids.
+
+    Args:
+        original_sheet: Worksheet from the original workbook (read-only mode)
+        modified_sheet: Worksheet from the modified workbook (read-only mode)
+        block_rows: Rows per block
+        original_buffer: Optional ColumnBuffer to receive the original rows
+        modified_buffer: Optional ColumnBuffer to receive the modified rows
+        spill: Optional ChangeSpill (excel_spill) to write each block's
+            changes to instead of keeping them
+
+    Returns:
+        GridDiff for the whole sheet; with a spill, only its shape and
+        counters (the changes are in the spill)
+    """
+    empty = np.full((0, 0), None, dtype=object)
+    blocks = zip_longest(iter_row_blocks(original_sheet, block_rows),
+                         iter_row_blocks(modified_sheet, block_rows),
+                         fillvalue=empty)
+
+    parts = []
+    counts = []  # Per-block counters of spilled blocks
+    n_rows = n_cols = 0
+    for original_block, modified_block in blocks:
+        if original_buffer is not None:
+            original_buffer.append_block(original_block)
+        if modified_buffer is not None:
+            modified_buffer.append_block(modified_block)
+
+        part = diff_grids(original_block, modified_block, min_rows=0, min_cols=0)
+        part.rows += n_rows
+        if spill is not None:
+            spill.append(part)
+            counts.append(part.counts)
+        elif len(part):
+            parts.append(part)
+
+        n_rows += part.shape[0]
+        n_cols = max(n_cols, part.shape[1])
+
+    grid_diff = concat_grid_diffs(parts, shape=(max(n_rows, MIN_ROWS), max(n_cols, MIN_COLS)))
+    if spill is not None:
+        grid_diff.counts = {name: sum(block.get(name, 0) for block in counts) for name in CHANGE_TYPES}
+    return grid_diff
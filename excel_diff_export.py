@@ -0,0 +1,391 @@
+"""
+Diff Workbook Export
+
+Writes the "Export Diff Excel" workbook: the modified workbook's values
+with changed cells highlighted and annotated. Sheets are streamed from a
+read-only source into an openpyxl write-only workbook, merged in row
+order with the sheet's changes, which are read a page at a time (spilled
+changes stay on disk until their page comes up). Export time is linear
+in cells and memory stays flat regardless of sheet or change count.
+
+The text and JSON reports are written change by change straight from each
+sheet's ModificationTable.
+"""
+
+import json
+from datetime import datetime
+from typing import Callable, Dict, Iterator, TextIO, Tuple
+
+import numpy as np
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.comments import Comment
+from openpyxl.styles import PatternFill, Font
+
+from excel_diff_engine import ModificationTable
+
+# Color for modifications
+MODIFIED_FILL = PatternFill(start_color="FFFF99", end_color="FFFF99", fill_type="solid")
+# Rows new in the modified sheet (aligned: inserted, key mode: added)
+INSERTED_FILL = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
+# Rows that moved to a new position (aligned mode)
+MOVED_FILL = PatternFill(start_color="DDEBF7", end_color="DDEBF7", fill_type="solid")
+
+# Formula changed but the cached value did not (formula mode)
+FORMULA_FILL = PatternFill(start_color="FCE4D6", end_color="FCE4D6", fill_type="solid")
+# Formatting changed but the value did not (style mode)
+STYLE_FILL = PatternFill(start_color="E4DFEC", end_color="E4DFEC", fill_type="solid")
+
+# Cell layers diffed next to the values: (changes key, value-same mask key,
+# label, note for unchanged values, highlight in the diff workbook)
+CELL_LAYERS = (
+    ('formula_changes', 'formula_value_same', "formula", "value unchanged", FORMULA_FILL),
+    ('style_changes', 'style_value_same', "formatting", "formatting only", STYLE_FILL),
+)
+
+ROW_FILLS = {'inserted': INSERTED_FILL, 'added': INSERTED_FILL, 'moved': MOVED_FILL}
+
+
+def format_value(value) -> str:
+    """Display text for a cell value ("[empty]" for blank cells)"""
+    if value is None:
+        return "[empty]"
+    return str(value)
+
+
+# Changes read per page while merging them with the sheet rows
+EXPORT_PAGE_SIZE = 1000
+
+
+def iter_changed_rows(modifications, page_size: int = EXPORT_PAGE_SIZE) -> Iterator[Tuple[int, Dict]]:
+    """
+    Changes grouped by modified-sheet row, in row order
+
+    Args:
+        modifications: ModificationTable or SpilledModifications
+        page_size: Changes read per page
+
+    Yields:
+        (row, {col: Modification}) for each row with changes
+    """
+    rows = modifications.rows
+    if len(rows) > 1 and (np.diff(rows) < 0).any():
+        # Re-aligned tables follow the original rows; they are in memory, so sort
+        # them (streamed and spilled changes are in row order already)
+        modifications = modifications[np.argsort(rows, kind='stable')]
+
+    row, row_mods = None, {}
+    for page in modifications.pages(page_size):
+        for mod in page:
+            if mod.row != row:
+                if row_mods:
+                    yield row, row_mods
+                row, row_mods = mod.row, {}
+            row_mods[mod.col] = mod
+    if row_mods:
+        yield row, row_mods
+
+
+def index_row_fills(row_changes) -> Dict[int, PatternFill]:
+    """Fill for each modified-sheet row that was inserted, added or moved"""
+    return {change['modified_row']: ROW_FILLS[change['type']]
+            for change in row_changes if change['type'] in ROW_FILLS}
+
+
+def _modification_comment(mod, format_value: Callable) -> Comment:
+    """Cell comment describing one modification"""
+    old_val = format_value(mod.old_value)
+    new_val = format_value(mod.new_value)
+
+    # Include column name in comment
+    comment_text = f"Location: {mod.column_name}, Row {mod.row_number}\n"
+    comment_text += f"Modified from: {old_val}\n"
+    comment_text += f"Modified to: {new_val}"
+
+    return Comment(comment_text, "Diff Tool")
+
+
+def _layer_comment(mod, label: str) -> Comment:
+    """Cell comment for a formula or formatting change on a cell whose value did not change"""
+    comment_text = f"Location: {mod.column_name}, Row {mod.row_number}\n"
+    comment_text += f"{label.capitalize()} changed from: {format_value(mod.old_value)}\n"
+    comment_text += f"{label.capitalize()} changed to: {format_value(mod.new_value)}\n"
+    comment_text += "Value unchanged"
+    return Comment(comment_text, "Diff Tool")
+
+
+def _write_summary_sheet(diff_wb, summary: Dict):
+    """Add the MODIFICATION_SUMMARY sheet (written first, so it comes first)"""
+    summary_sheet = diff_wb.create_sheet("MODIFICATION_SUMMARY")
+    summary_data = [
+        ["Excel Modification Report", ""],
+        ["Generated:", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
+        ["", ""],
+        ["Total Modifications:", summary['total_modifications']],
+        ["[empty] → Value:", summary['blank_to_value']],
+        ["Value → [empty]:", summary['value_to_blank']],
+        ["Value → Value:", summary['value_to_value']],
+        ["Formulas Changed:", summary.get('formulas_changed', 0)],
+        ["Formula Changed, Value Same:", summary.get('formulas_value_same', 0)],
+        ["Formatting Changed:", summary.get('styles_changed', 0)],
+        ["Formatting Only:", summary.get('styles_value_same', 0)],
+        ["", ""],
+        ["Sheets Modified:", ", ".join(summary['sheets_modified']) if summary['sheets_modified'] else "None"],
+    ]
+
+    for row_idx, row_data in enumerate(summary_data, 1):
+        row = []
+        for col_idx, value in enumerate(row_data, 1):
+            cell = WriteOnlyCell(summary_sheet, value=value)
+            if row_idx == 1:
+                cell.font = Font(bold=True, size=14)
+            elif col_idx == 1 and row_idx > 3:
+                cell.font = Font(bold=True)
+            row.append(cell)
+        summary_sheet.append(row)
+
+
+def write_diff_sheet(diff_sheet, source_sheet, sheet_changes: Dict, format_value: Callable):
+    """
+    Copy a sheet's values, highlighting changed cells and inserted/moved rows
+
+    Args:
+        diff_sheet: Write-only worksheet to fill
+        source_sheet: Modified worksheet (read-only works)
+        sheet_changes: The sheet's entry in ExcelDiffVisualizer.changes
+        format_value: Formats old/new values for cell comments
+    """
+    modifications = sheet_changes.get('modifications')
+    if modifications is None:
+        modifications = ModificationTable.empty()
+    changed_rows = iter_changed_rows(modifications)
+    next_row, next_mods = next(changed_rows, (None, None))
+    row_fills = index_row_fills(sheet_changes.get('row_changes', []))
+
+    # Formula/formatting changes on cells with unchanged values get their own
+    # highlight; the index maps those cells to (layer table, position). Layers
+    # are only diffed in memory (cell mode), never spilled.
+    layers_by_row = {}
+    for changes_key, same_key, label, _, fill in CELL_LAYERS:
+        layer_changes = sheet_changes.get(changes_key)
+        if layer_changes is None or not len(layer_changes):
+            continue
+        layer_changes = layer_changes[sheet_changes[same_key]]
+        for position, (row, col) in enumerate(zip(layer_changes.rows.tolist(), layer_changes.cols.tolist())):
+            layers_by_row.setdefault(row, {}).setdefault(col, (layer_changes, position, label, fill))
+
+    for row_num, row_values in enumerate(source_sheet.iter_rows(values_only=True), 1):
+        while next_row is not None and next_row < row_num:
+            next_row, next_mods = next(changed_rows, (None, None))
+        row_mods = next_mods if next_row == row_num else None
+        layer_mods = layers_by_row.get(row_num)
+        if layer_mods is not None:
+            row_mods = {**layer_mods, **(row_mods or {})}  # Value changes take precedence
+        row_fill = row_fills.get(row_num)
+
+        if row_mods is None and row_fill is None:
+            # Unchanged row: plain values, no per-cell work
+            diff_sheet.append(row_values)
+            continue
+
+        row = []
+        for col_num, value in enumerate(row_values, 1):
+            change = row_mods.get(col_num) if row_mods else None
+            if change is None and row_fill is None:
+                row.append(value)
+                continue
+
+            cell = WriteOnlyCell(diff_sheet, value=value)
+            if isinstance(change, tuple):
+                layer_changes, layer_position, label, fill = change
+                cell.fill = fill
+                cell.comment = _layer_comment(layer_changes[layer_position], label)
+            elif change is not None:
+                cell.fill = MODIFIED_FILL
+                cell.comment = _modification_comment(change, format_value)
+            else:
+                cell.fill = row_fill
+            row.append(cell)
+        diff_sheet.append(row)
+
+
+def write_diff_workbook(output, changes: Dict, summary: Dict, modified_wb, format_value: Callable):
+    """
+    Write the highlighted diff workbook
+
+    Args:
+        output: Path or binary file-like object to save to
+        changes: ExcelDiffVisualizer.changes
+        summary: ExcelDiffVisualizer.summary
+        modified_wb: Modified workbook (read-only works)
+        format_value: Formats old/new values for cell comments
+    """
+    diff_wb = openpyxl.Workbook(write_only=True)
+
+    # Add summary sheet
+    _write_summary_sheet(diff_wb, summary)
+
+    for sheet_name, sheet_changes in changes.items():
+        if sheet_changes['sheet_removed']:
+            continue
+
+        diff_sheet = diff_wb.create_sheet(sheet_name)
+
+        # Use modified version as base
+        if sheet_name in modified_wb.sheetnames:
+            write_diff_sheet(diff_sheet, modified_wb[sheet_name], sheet_changes, format_value)
+
+    diff_wb.save(output)
+
+
+def _clean_sheet_name(sheet_name: str) -> str:
+    """Sheet name without the summary's "(New Sheet)"/"(Sheet Removed)" suffix"""
+    return sheet_name.replace(" (New Sheet)", "").replace(" (Sheet Removed)", "")
+
+
+def write_text_report(output: TextIO, changes: Dict, summary: Dict, format_value: Callable,
+                      describe_row_change: Callable):
+    """
+    Write the plain-text change report
+
+    Args:
+        output: Text stream to write to
+        changes: ExcelDiffVisualizer.changes
+        summary: ExcelDiffVisualizer.summary
+        format_value: Formats old/new values
+        describe_row_change: Formats one whole-row change
+    """
+    output.write(f"""EXCEL MODIFICATION REPORT
+Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+
+SUMMARY
+=======
+Total Modifications: {summary['total_modifications']}
+- [empty] → Value: {summary['blank_to_value']}
+- Value → [empty]: {summary['value_to_blank']}
+- Value → Value: {summary['value_to_value']}
+- Formulas changed: {summary.get('formulas_changed', 0)} ({summary.get('formulas_value_same', 0)} with the same value)
+- Formatting changed: {summary.get('styles_changed', 0)} ({summary.get('styles_value_same', 0)} with the same value)
+
+DETAILED CHANGES BY SHEET
+========================
+""")
+    for sheet_name in summary['sheets_modified']:
+        sheet_changes = changes.get(_clean_sheet_name(sheet_name), {})
+        modifications = sheet_changes.get('modifications', ())
+        if (not len(modifications) and not sheet_changes.get('row_changes')
+                and not any(len(sheet_changes.get(layer[0], ())) for layer in CELL_LAYERS)):
+            continue
+
+        output.write(f"\n\nSheet: {sheet_name}\n")
+        output.write("-" * (len(sheet_name) + 7) + "\n")
+
+        for row_change in sheet_changes.get('row_changes', []):
+            output.write(f"  {describe_row_change(row_change)}\n")
+
+        for mod in modifications:
+            output.write(f"  {mod.column_name}, Row {mod.row_number}: "
+                         f"{format_value(mod.old_value)} → {format_value(mod.new_value)}\n")
+
+        for changes_key, same_key, label, note, _ in CELL_LAYERS:
+            for mod, value_same in zip(sheet_changes.get(changes_key, ()), sheet_changes.get(same_key, ())):
+                flag = f" ({note})" if value_same else ""
+                output.write(f"  {mod.column_name}, Row {mod.row_number}: {label} "
+                             f"{format_value(mod.old_value)} → {format_value(mod.new_value)}{flag}\n")
+
+
+def _indented_json(value, indent: str) -> str:
+    """json.dumps(value, indent=2) nested at the given indentation"""
+    return json.dumps(value, indent=2, default=str).replace("\n", "\n" + indent)
+
+
+def _write_layer_changes(output: TextIO, changes: Dict, changes_key: str, same_key: str):
+    """Write the "<layer>_changes_by_sheet" entry of the JSON report"""
+    dumps = json.dumps
+    output.write(f',\n  "{changes_key}_by_sheet": {{')
+    first_sheet = True
+    for sheet_name, sheet_changes in changes.items():
+        layer_changes = sheet_changes.get(changes_key, ())
+        if not len(layer_changes):
+            continue
+        output.write(("\n" if first_sheet else ",\n") + f"    {dumps(sheet_name)}: [")
+        first_sheet = False
+
+        separator = "\n"
+        for mod, value_same in zip(layer_changes, sheet_changes[same_key].tolist()):
+            output.write(
+                f'{separator}      {{\n'
+                f'        "cell": {dumps(mod.cell_ref)},\n'
+                f'        "location": {dumps(f"{mod.column_name}, Row {mod.row_number}")},\n'
+                f'        "from": {dumps(mod.old_value)},\n'
+                f'        "to": {dumps(mod.new_value)},\n'
+                f'        "type": {dumps(mod.change_type)},\n'
+                f'        "value_changed": {dumps(not value_same)}\n'
+                f'      }}'
+            )
+            separator = ",\n"
+        output.write("\n    ]")
+    output.write("\n  }" if not first_sheet else "}")
+
+
+def write_json_report(output: TextIO, changes: Dict, summary: Dict, format_value: Callable):
+    """
+    Write the JSON change report, one modification record at a time
+
+    Same layout as json.dumps(report, indent=2) of a dict with summary,
+    modifications_by_sheet, formula_changes_by_sheet, style_changes_by_sheet,
+    row_changes_by_sheet and timestamp keys.
+
+    Args:
+        output: Text stream to write to
+        changes: ExcelDiffVisualizer.changes
+        summary: ExcelDiffVisualizer.summary
+        format_value: Formats old/new values
+    """
+    dumps = json.dumps
+    output.write('{\n  "summary": ')
+    output.write(_indented_json(summary, "  "))
+    output.write(',\n  "modifications_by_sheet": {')
+
+    first_sheet = True
+    for sheet_name, sheet_changes in changes.items():
+        modifications = sheet_changes.get('modifications', ())
+        if not len(modifications):
+            continue
+        output.write(("\n" if first_sheet else ",\n") + f"    {dumps(sheet_name)}: [")
+        first_sheet = False
+
+        separator = "\n"
+        for mod in modifications:
+            cell_ref = mod.cell_ref
+            column_name = mod.column_name
+            output.write(
+                f'{separator}      {{\n'
+                f'        "cell": {dumps(cell_ref)},\n'
+                f'        "location": {dumps(f"{column_name}, Row {mod.row_number}")},\n'
+                f'        "column": {dumps(column_name)},\n'
+                f'        "row": {mod.row_number},\n'
+                f'        "from": {dumps(format_value(mod.old_value))},\n'
+                f'        "to": {dumps(format_value(mod.new_value))},\n'
+                f'        "type": {dumps(mod.change_type)}\n'
+                f'      }}'
+            )
+            separator = ",\n"
+        output.write("\n    ]")
+    output.write("\n  }" if not first_sheet else "}")
+
+    for changes_key, same_key, _, _, _ in CELL_LAYERS:
+        _write_layer_changes(output, changes, changes_key, same_key)
+
+    output.write(',\n  "row_changes_by_sheet": {')
+    first_sheet = True
+    for sheet_name, sheet_changes in changes.items():
+        if not sheet_changes.get('row_changes'):
+            continue
+        output.write(("\n" if first_sheet else ",\n") + f"    {dumps(sheet_name)}: "
+                     + _indented_json(sheet_changes['row_changes'], "    "))
+        first_sheet = False
+    output.write("\n  }" if not first_sheet else "}")
+
+    output.write(f',\n  "timestamp": {dumps(datetime.now().isoformat())}\n}}')
@@ -0,0 +1,236 @@
+"""
+Workbook and Sheet Fingerprints
+
+Cheap content hashes used to skip work on unchanged input:
+
+- file_digest(): SHA-256 of the uploaded bytes; equal digests mean the
+  workbooks are byte-identical and nothing needs comparing.
+- sheet_fingerprint(): SHA-256 of a sheet's raw XML part, read straight
+  from the .xlsx archive without parsing cells. Two sheets with equal
+  fingerprints hold the same values, provided their workbooks decode
+  values the same way (see same_value_context()). Sheets served from the
+  parsed-workbook cache carry a hash of their decoded values instead.
+- sheet_rows()/row_fingerprints(): the raw XML of each <row> element and
+  a hash of it, so a revision can be matched row by row against an
+  earlier parse (see excel_incremental). Shared-string indexes are
+  resolved to their text while hashing, so rows keep their hash when
+  Excel rewrites the shared strings table.
+- value_context_digest(): hash of everything besides the sheet XML and
+  the shared strings that decides how that XML decodes to values.
+"""
+
+import hashlib
+import os
+import re
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+_ROW_START = re.compile(rb'<row\b')
+_ROW_NUMBER = re.compile(rb'<row\b[^>]*?\sr="(\d+)"')
+_SHEET_DATA = re.compile(rb'<sheetData\s*(/?)>')
+_ROOT_TAG = re.compile(rb'<worksheet\b[^>]*>')
+_SHARED_STRING_VALUE = re.compile(rb'(<c\b[^>]*?\st="s"[^>]*>\s*<v>)(\d+)(</v>)')
+
+# Bytes per row fingerprint
+ROW_DIGEST_SIZE = 16
+
+
+def file_digest(source) -> str:
+    """
+    SHA-256 of a workbook file
+
+    Args:
+        source: File path or file-like object (position is restored)
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    if hasattr(source, 'getvalue'):
+        digest.update(source.getvalue())
+        return digest.hexdigest()
+
+    position = source.tell()
+    source.seek(0)
+    for chunk in iter(lambda: source.read(1 << 20), b''):
+        digest.update(chunk)
+    source.seek(position)
+    return digest.hexdigest()
+
+
+def sheet_fingerprint(sheet) -> Optional[str]:
+    """
+    SHA-256 of a worksheet's XML part
+
+    Only read-only worksheets keep a link to their archive part; for
+    anything else None is returned and the sheet is always compared.
+    Cached sheets (excel_workbook_cache) return their value digest.
+    """
+    value_digest = getattr(sheet, 'value_digest', None)
+    if value_digest is not None:
+        return value_digest
+
+    worksheet_path = getattr(sheet, '_worksheet_path', None)
+    archive = getattr(sheet.parent, '_archive', None)
+    if worksheet_path is None or archive is None:
+        return None
+
+    digest = hashlib.sha256()
+    with archive.open(worksheet_path) as src:
+        for chunk in iter(lambda: src.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def same_value_context(original_wb, modified_wb) -> bool:
+    """
+    Whether identical sheet XML decodes to identical values in both workbooks
+
+    Sheet XML stores text as indexes into the shared strings table, and
+    openpyxl turns numbers into dates based on the cell style, so both
+    must match for sheet fingerprints to be comparable. Cached workbooks
+    hash decoded values, which are comparable only with each other.
+    """
+    original_cached = getattr(original_wb, 'from_cache', False)
+    modified_cached = getattr(modified_wb, 'from_cache', False)
+    if original_cached or modified_cached:
+        return original_cached and modified_cached
+
+    original_sheets = [ws for ws in original_wb.worksheets if hasattr(ws, '_shared_strings')]
+    modified_sheets = [ws for ws in modified_wb.worksheets if hasattr(ws, '_shared_strings')]
+    if not original_sheets or not modified_sheets:
+        return False
+
+    return (original_wb.epoch == modified_wb.epoch
+            and original_wb._date_formats == modified_wb._date_formats
+            and original_wb._timedelta_formats == modified_wb._timedelta_formats
+            and original_sheets[0]._shared_strings == modified_sheets[0]._shared_strings)
+
+
+def _read_sheet_xml(sheet) -> Optional[bytes]:
+    """Raw XML part of a read-only worksheet (None for other sheets)"""
+    worksheet_path = getattr(sheet, '_worksheet_path', None)
+    archive = getattr(sheet.parent, '_archive', None)
+    if worksheet_path is None or archive is None:
+        return None
+    return archive.read(worksheet_path)
+
+
+def sheet_rows(sheet) -> Optional[Tuple[bytes, np.ndarray, List[bytes]]]:
+    """
+    Split a worksheet's XML into its <row> elements without parsing cells
+
+    Args:
+        sheet: Read-only openpyxl worksheet
+
+    Returns:
+        (root start tag, 1-based row numbers as int32, raw row elements),
+        or None if the sheet has no archive part or its rows cannot be
+        split reliably (namespace prefixes, rows without an r attribute)
+    """
+    xml = _read_sheet_xml(sheet)
+    if xml is None:
+        return None
+
+    root = _ROOT_TAG.search(xml)
+    sheet_data = _SHEET_DATA.search(xml)
+    if root is None or sheet_data is None:
+        return None
+    if sheet_data.group(1):
+        # <sheetData/>: no rows
+        return root.group(0), np.empty(0, dtype=np.int32), []
+
+    start = sheet_data.end()
+    end = xml.find(b'</sheetData>', start)
+    if end < 0:
+        return None
+
+    starts = [match.start() for match in _ROW_START.finditer(xml, start, end)]
+    if not starts and xml[start:end].strip():
+        return None
+
+    chunks = [xml[a:b] for a, b in zip(starts, starts[1:] + [end])]
+    row_numbers = np.empty(len(chunks), dtype=np.int32)
+    for i, chunk in enumerate(chunks):
+        match = _ROW_NUMBER.match(chunk)
+        if match is None:
+            return None
+        row_numbers[i] = int(match.group(1))
+    return root.group(0), row_numbers, chunks
+
+
+def _resolve_shared_strings(chunk: bytes, shared_strings) -> bytes:
+    """Row XML with shared-string indexes replaced by the strings (NUL-delimited, which XML cannot contain)"""
+    def resolve(match):
+        index = int(match.group(2))
+        if index >= len(shared_strings):
+            return match.group(0)
+        return match.group(1) + b'\x00' + str(shared_strings[index]).encode('utf-8') + b'\x00' + match.group(3)
+    return _SHARED_STRING_VALUE.sub(resolve, chunk)
+
+
+def digest_rows(chunks: List[bytes], shared_strings=None) -> np.ndarray:
+    """
+    Hash raw row elements
+
+    Args:
+        chunks: Raw <row> elements (see sheet_rows())
+        shared_strings: The workbook's shared strings table; shared-string
+            cells are hashed by their text rather than their index
+
+    Returns:
+        (n, ROW_DIGEST_SIZE) uint8 array
+    """
+    if shared_strings is not None:
+        chunks = [_resolve_shared_strings(chunk, shared_strings) if b't="s"' in chunk else chunk
+                  for chunk in chunks]
+    digests = b''.join(hashlib.blake2b(chunk, digest_size=ROW_DIGEST_SIZE).digest() for chunk in chunks)
+    return np.frombuffer(digests, dtype=np.uint8).reshape(-1, ROW_DIGEST_SIZE)
+
+
+def row_fingerprints(sheet) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Hash of every <row> element of a read-only worksheet
+
+    Equal row hashes mean equal cell values, provided both workbooks have
+    the same value_context_digest().
+
+    Returns:
+        (row numbers, digests) or None, see sheet_rows()
+    """
+    rows = sheet_rows(sheet)
+    if rows is None:
+        return None
+    _, row_numbers, chunks = rows
+    return row_numbers, digest_rows(chunks, getattr(sheet, '_shared_strings', None))
+
+
+def value_context_digest(workbook) -> Optional[str]:
+    """
+    Hash of the epoch and date/timedelta styles of a workbook
+
+    Rows with equal row_fingerprints() decode to identical values in two
+    workbooks with equal context digests. The shared strings are not part
+    of it: row fingerprints hash the strings themselves, so editing one
+    string (which makes Excel rewrite the table) leaves the other rows
+    reusable. Returns None for workbooks that are not read-only openpyxl
+    workbooks; cached workbooks return the digest recorded when they were
+    stored.
+    """
+    if getattr(workbook, 'from_cache', False):
+        return getattr(workbook, 'context', None)
+    if getattr(workbook, '_archive', None) is None or getattr(workbook, 'shared_strings', None) is None:
+        return None
+
+    digest = hashlib.sha256()
+    digest.update(repr((workbook.epoch, sorted(workbook._date_formats),
+                        sorted(workbook._timedelta_formats))).encode('utf-8'))
+    return digest.hexdigest()
@@ -0,0 +1,153 @@
+"""
+Formula-Aware Sheet Reading
+
+Reads a read-only worksheet's cached values and formula text in one pass
+over its XML, so formula edits can be diffed alongside value edits
+without opening the workbook a second time with data_only=False.
+
+A formula change whose cached value stayed the same ("formula changed,
+value same") is the case a value-only diff misses: the cell now computes
+its result differently, but happens to agree for the current inputs.
+
+The same pass can also collect each cell's style id, for the style diff
+in excel_styles.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+from openpyxl.worksheet._reader import WorkSheetParser, FORMULA_TAG
+
+from excel_diff_engine import GridDiff, diff_grids, pad_grid, unchanged_values
+
+
+class _ValueAndFormulaParser(WorkSheetParser):
+    """Worksheet parser that keeps each cell's cached value and, if any, its formula"""
+
+    keep_formulas = True
+
+    def parse_cell(self, element):
+        # data_only=True: the value is the cached result
+        cell = super().parse_cell(element)
+        if self.keep_formulas and element.find(FORMULA_TAG) is not None:
+            # Also resolves shared formulas relative to their master cell
+            cell['formula'] = formula_text(self.parse_formula(element))
+        return cell
+
+
+def formula_text(formula) -> str:
+    """Formula as text (array formulas by their text, data tables by their attributes)"""
+    if isinstance(formula, str):
+        return formula
+    text = getattr(formula, 'text', None)
+    if text is not None:
+        return text
+    return "{" + ", ".join(f"{key}={value}" for key, value in formula) + "}"
+
+
+def read_values_and_formulas(sheet) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Cached values and formula text of a read-only worksheet from one XML pass
+
+    Args:
+        sheet: Worksheet of a workbook opened with open_workbook(read_only=True)
+
+    Returns:
+        (values, formulas) grids of the same shape; values match
+        sheet_to_array(), formulas holds the formula text or None. None
+        for worksheets without an archive part (full-mode or cached).
+    """
+    layers = read_sheet_layers(sheet)
+    return None if layers is None else layers[:2]
+
+
+def read_sheet_layers(sheet, formulas: bool = True,
+                      styles: bool = False) -> Optional[Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]]:
+    """
+    Cached values plus formula text and/or style ids from one XML pass
+
+    Args:
+        sheet: Worksheet of a workbook opened with open_workbook(read_only=True)
+        formulas: Collect formula text
+        styles: Collect cell style ids (indexes into the workbook's cell styles)
+
+    Returns:
+        (values, formulas or None, style ids or None) grids of the same
+        shape; style ids are int32 with 0 (the default style) for cells
+        without one. None for worksheets without an archive part.
+    """
+    workbook = sheet.parent
+    if getattr(sheet, '_worksheet_path', None) is None or getattr(workbook, '_archive', None) is None:
+        return None
+
+    n_rows, n_cols = sheet.max_row, sheet.max_column
+    sized = n_rows is not None and n_cols is not None
+
+    values = {}
+    formula_cells = {}
+    style_cells = {}
+    last_row = last_col = 0
+    with sheet._get_source() as source:
+        parser = _ValueAndFormulaParser(source, sheet._shared_strings, data_only=True,
+                                        epoch=workbook.epoch, date_formats=workbook._date_formats,
+                                        timedelta_formats=workbook._timedelta_formats)
+        parser.keep_formulas = formulas
+        for row_number, cells in parser.parse():
+            if sized and row_number > n_rows:
+                break
+            last_row = row_number
+            if cells:
+                # Unsized sheets are as wide as the widest row's last cell, as in iter_rows()
+                last_col = max(last_col, cells[-1]['column'])
+            for cell in cells:
+                key = (row_number - 1, cell['column'] - 1)
+                if cell['value'] is not None:
+                    values[key] = cell['value']
+                if 'formula' in cell:
+                    formula_cells[key] = cell['formula']
+                if styles and cell['style_id']:
+                    style_cells[key] = cell['style_id']
+
+    if not sized:
+        n_rows, n_cols = last_row, last_col
+    style_ids = None
+    if styles:
+        style_ids = np.zeros((n_rows, n_cols), dtype=np.int32)
+        for (row, col), style_id in style_cells.items():
+            if row < n_rows and col < n_cols:
+                style_ids[row, col] = style_id
+    return (_scatter(values, n_rows, n_cols),
+            _scatter(formula_cells, n_rows, n_cols) if formulas else None,
+            style_ids)
+
+
+def _scatter(cells, n_rows: int, n_cols: int) -> np.ndarray:
+    """Grid of the given shape with the (row, col) -> value entries that fit in it"""
+    grid = np.full((n_rows, n_cols), None, dtype=object)
+    if cells:
+        coords = np.array(list(cells), dtype=np.int64).reshape(-1, 2)
+        inside = (coords[:, 0] < n_rows) & (coords[:, 1] < n_cols)
+        cell_values = np.empty(len(cells), dtype=object)
+        cell_values[:] = list(cells.values())
+        grid[coords[inside, 0], coords[inside, 1]] = cell_values[inside]
+    return grid
+
+
+def diff_formulas(original_formulas: np.ndarray, modified_formulas: np.ndarray,
+                  value_diff: GridDiff) -> Tuple[GridDiff, np.ndarray]:
+    """
+    Diff formula grids and flag changes whose cached value did not change
+
+    Args:
+        original_formulas: Formula grid of the original sheet
+        modified_formulas: Formula grid of the modified sheet
+        value_diff: diff_grids() result for the same sheets' values
+
+    Returns:
+        (formula GridDiff over the same padded shape as value_diff,
+        bool array per formula change: True where the value is unchanged)
+    """
+    n_rows, n_cols = value_diff.shape
+    formula_diff = diff_grids(pad_grid(original_formulas, n_rows, n_cols),
+                              pad_grid(modified_formulas, n_rows, n_cols))
+    return formula_diff, unchanged_values(formula_diff, value_diff)
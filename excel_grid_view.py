@@ -0,0 +1,196 @@
+"""
+Virtualized Side-by-Side Grid
+
+Windowed alternative to the full-HTML synchronized diff view. The browser
+component (grid_view_frontend/index.html) draws only the cells in its
+viewport and asks for the window of rows and columns it is scrolled to;
+the server answers with that window's values and changes as compact JSON.
+Payload size and render time depend on the viewport, not the sheet.
+
+Comparisons that keep no sheet frames (low-memory streaming) read each
+window from the workbooks instead, through a read_values callback.
+"""
+
+import os
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from excel_diff_engine import ModificationTable, is_blank
+
+# Rows/columns per window; windows start on multiples of half this size,
+# so the one starting at or before the first visible cell covers the viewport
+WINDOW_ROWS = 200
+WINDOW_COLS = 40
+
+# Sheets smaller than this keep the full-HTML view
+VIRTUAL_GRID_MIN_CELLS = 20_000
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "grid_view_frontend")
+
+_component = None
+
+
+@dataclass
+class SideChanges:
+    """Changes on one side of the diff, sorted by 0-based row for window lookups"""
+    rows: np.ndarray  # Changed cells
+    cols: np.ndarray
+    row_numbers: np.ndarray  # Whole-row changes (inserted/deleted/moved/added/removed)
+    row_kinds: np.ndarray
+
+    def window(self, r0: int, r1: int, c0: int, c1: int):
+        """Changed cells and whole-row changes inside rows [r0, r1) and columns [c0, c1)"""
+        lo, hi = np.searchsorted(self.rows, [r0, r1])
+        rows, cols = self.rows[lo:hi], self.cols[lo:hi]
+        inside = (cols >= c0) & (cols < c1)
+        cells = np.column_stack([rows[inside], cols[inside]]).tolist()
+
+        lo, hi = np.searchsorted(self.row_numbers, [r0, r1])
+        whole_rows = [[int(row), str(kind)] for row, kind in zip(self.row_numbers[lo:hi], self.row_kinds[lo:hi])]
+        return cells, whole_rows
+
+
+def _side_changes(cells: np.ndarray, whole_rows) -> SideChanges:
+    """Sort (row, col) cells and (row, kind) whole-row changes"""
+    cells = cells.astype(np.int64).reshape(-1, 2)
+    cells = cells[np.lexsort((cells[:, 1], cells[:, 0]))]
+    whole_rows = sorted(whole_rows)
+    return SideChanges(
+        rows=cells[:, 0], cols=cells[:, 1],
+        row_numbers=np.array([row for row, _ in whole_rows], dtype=np.int64),
+        row_kinds=np.array([kind for _, kind in whole_rows], dtype=object)
+    )
+
+
+def build_change_index(sheet_changes: Dict):
+    """
+    Index a sheet's changes by side for window lookups
+
+    Returns:
+        (original, modified) SideChanges, with 0-based rows and columns
+    """
+    table = sheet_changes.get('modifications')
+    if table is None:
+        table = ModificationTable.empty()
+    original_rows = table.rows if table.original_rows is None else table.original_rows
+    original_cells = np.column_stack([original_rows - 1, table.cols - 1])
+    modified_cells = np.column_stack([table.rows - 1, table.cols - 1])
+
+    original_rows, modified_rows = [], []
+    for row_change in sheet_changes.get('row_changes', []):
+        if row_change['type'] == 'changed':
+            continue  # Changed keys are highlighted cell by cell
+        if row_change['original_row'] is not None:
+            original_rows.append((row_change['original_row'] - 1, row_change['type']))
+        if row_change['modified_row'] is not None:
+            modified_rows.append((row_change['modified_row'] - 1, row_change['type']))
+
+    return _side_changes(original_cells, original_rows), _side_changes(modified_cells, modified_rows)
+
+
+def grid_shape(sheet_changes: Dict):
+    """(rows, cols) spanned by both frames (or the recorded sheet shape), at least 10 x 5 like the HTML view"""
+    shapes = [df.shape for df in (sheet_changes.get('original_df'), sheet_changes.get('modified_df'))
+              if df is not None and not df.empty]
+    if not shapes and sheet_changes.get('shape') is not None:
+        shapes = [sheet_changes['shape']]
+    return (max([rows for rows, _ in shapes] + [10]), max([cols for _, cols in shapes] + [5]))
+
+
+def _window_values(df: Optional[pd.DataFrame], r0: int, r1: int, c0: int, c1: int):
+    """Window of a frame as lists of display strings (None for empty cells)"""
+    if df is None or df.empty:
+        return []
+    block = df.iloc[r0:r1, c0:c1].to_numpy(dtype=object)
+    return [[None if is_blank(value) else str(value) for value in row] for row in block]
+
+
+def read_sheet_window(sheet, r0: int, r1: int, c0: int, c1: int):
+    """
+    Window of a worksheet as lists of display strings, read on demand
+
+    Works on openpyxl, cached and delimited sheets alike (anything with
+    iter_rows(min_row, max_row, values_only=True)); None reads as no rows.
+    """
+    if sheet is None:
+        return []
+    rows = islice(sheet.iter_rows(min_row=r0 + 1, max_row=r1, values_only=True), r1 - r0)
+    return [[None if is_blank(value) else str(value) for value in row[c0:c1]] for row in rows]
+
+
+def sheet_window(sheet_changes: Dict, change_index, r0: int, c0: int,
+                 n_rows: int = WINDOW_ROWS, n_cols: int = WINDOW_COLS,
+                 read_values: Optional[Callable] = None) -> Dict:
+    """
+    One window of the side-by-side grid as JSON-ready data
+
+    Args:
+        sheet_changes: The sheet's entry in ExcelDiffVisualizer.changes
+        change_index: build_change_index() result for the sheet
+        r0: First row (0-based)
+        c0: First column (0-based)
+        n_rows: Rows in the window
+        n_cols: Columns in the window
+        read_values: Called as read_values(side, r0, r1, c0, c1), with side
+            'original' or 'modified', for a side that has no frame
+
+    Returns:
+        Dict with the window origin, headers, per-side values, changed
+        cells and whole-row changes (absolute 0-based coordinates)
+    """
+    total_rows, total_cols = grid_shape(sheet_changes)
+    r0, c0 = max(0, min(r0, total_rows - 1)), max(0, min(c0, total_cols - 1))
+    r1, c1 = min(r0 + n_rows, total_rows), min(c0 + n_cols, total_cols)
+
+    column_headers = sheet_changes.get('column_headers', {})
+    original_changes, modified_changes = change_index
+    original_cells, original_rows = original_changes.window(r0, r1, c0, c1)
+    modified_cells, modified_rows = modified_changes.window(r0, r1, c0, c1)
+
+    values = {}
+    for side in ('original', 'modified'):
+        df = sheet_changes.get(f'{side}_df')
+        if (df is None or df.empty) and read_values is not None:
+            values[side] = read_values(side, r0, r1, c0, c1)
+        else:
+            values[side] = _window_values(df, r0, r1, c0, c1)
+
+    return {
+        'r0': r0, 'c0': c0, 'r1': r1, 'c1': c1,
+        'headers': [None if is_blank(column_headers.get(col)) else str(column_headers[col])
+                    for col in range(c0 + 1, c1 + 1)],
+        'original': values['original'],
+        'modified': values['modified'],
+        'original_cells': original_cells,
+        'modified_cells': modified_cells,
+        'original_rows': original_rows,
+        'modified_rows': modified_rows,
+    }
+
+
+def grid_view(sheet_name: str, sheet_changes: Dict, change_index, key: str, height: int = 600,
+              read_values: Optional[Callable] = None):
+    """
+    Render the virtualized grid for one sheet (Streamlit)
+
+    The component reports the window it needs as its value; each rerun
+    sends that window. read_values is passed on to sheet_window().
+    """
+    global _component
+    if _component is None:
+        import streamlit.components.v1 as components
+        _component = components.declare_component("excel_grid_view", path=FRONTEND_DIR)
+
+    import streamlit as st
+    requested = st.session_state.get(key) or {}
+    total_rows, total_cols = grid_shape(sheet_changes)
+    window = sheet_window(sheet_changes, change_index, int(requested.get('r0', 0)), int(requested.get('c0', 0)),
+                          read_values=read_values)
+
+    _component(sheet=sheet_name, n_rows=total_rows, n_cols=total_cols, window=window,
+               row_step=WINDOW_ROWS // 2, col_step=WINDOW_COLS // 2, height=height,
+               key=key, default=None)
@@ -0,0 +1,198 @@
+"""
+Incremental Workbook Loading
+
+Loads a new revision of a workbook by reusing rows parsed on an earlier
+run. Every <row> element of the revision's sheet XML is hashed without
+parsing (excel_fingerprint.sheet_rows); rows whose hash matches the same
+row of a baseline (the template, or the previous revision) are copied
+from the baseline's grid, and only the remaining rows go through
+openpyxl's cell parser. Reparsing cost therefore follows the number of
+rows that changed, not the size of the sheet.
+
+Baselines are CachedWorkbooks: from the parsed-workbook cache on disk,
+or kept in the Streamlit session from the previous comparison. A row is
+only reused from a baseline whose date styles match the revision's
+(value_context_digest), since the same XML would otherwise decode to
+different values. Row hashes resolve shared-string indexes, so a
+rewritten shared strings table does not stop rows being reused.
+"""
+
+import io
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from openpyxl.utils import column_index_from_string
+from openpyxl.worksheet._reader import WorkSheetParser
+
+from excel_diff_engine import sheet_to_array
+from excel_fingerprint import sheet_rows, digest_rows, value_context_digest
+from excel_workbook_cache import CachedSheet, CachedWorkbook
+
+
+_CELL_COLUMN = re.compile(rb'<c\b[^>]*?\sr="([A-Z]+)\d+"')
+
+
+@dataclass
+class IncrementalStats:
+    """How a workbook was loaded"""
+    rows_reused: int = 0  # Rows copied from a baseline
+    rows_parsed: int = 0  # Rows run through the cell parser
+    sheets_full: int = 0  # Sheets that had to be loaded without row matching
+
+    def merge(self, other: 'IncrementalStats'):
+        self.rows_reused += other.rows_reused
+        self.rows_parsed += other.rows_parsed
+        self.sheets_full += other.sheets_full
+
+
+def _parse_rows(sheet, root_tag: bytes, chunks: List[bytes], grid: np.ndarray):
+    """Parse raw <row> elements with openpyxl's reader and write their values into the grid"""
+    if not chunks:
+        return
+
+    workbook = sheet.parent
+    source = io.BytesIO(root_tag + b'<sheetData>' + b''.join(chunks) + b'</sheetData></worksheet>')
+    parser = WorkSheetParser(source, sheet._shared_strings, data_only=workbook.data_only,
+                             epoch=workbook.epoch, date_formats=workbook._date_formats,
+                             timedelta_formats=workbook._timedelta_formats)
+
+    n_rows, n_cols = grid.shape
+    for row_number, cells in parser.parse():
+        if row_number > n_rows:
+            continue
+        for cell in cells:
+            if cell['column'] <= n_cols:
+                grid[row_number - 1, cell['column'] - 1] = cell['value']
+
+
+def _undimensioned_shape(chunks: List[bytes], row_numbers: np.ndarray) -> Optional[Tuple[int, int]]:
+    """
+    Grid shape of a sheet without a <dimension>, as openpyxl's reader sees it
+
+    Rows run to the last <row>; columns to the last cell of the widest row.
+    None if a cell has no r attribute to read its column from.
+    """
+    n_cols = 0
+    for chunk in chunks:
+        last_cell = chunk.rfind(b'<c')
+        while last_cell >= 0 and chunk[last_cell + 2:last_cell + 3] not in (b' ', b'>', b'/'):
+            last_cell = chunk.rfind(b'<c', 0, last_cell)  # <col...>-like tags are not cells
+        if last_cell < 0:
+            continue
+        match = _CELL_COLUMN.match(chunk, last_cell)
+        if match is None:
+            return None
+        n_cols = max(n_cols, column_index_from_string(match.group(1).decode('ascii')))
+    return (int(row_numbers.max()) if len(row_numbers) else 0), n_cols
+
+
+def _baseline_rows(baseline: CachedSheet, n_cols: int) -> Optional[Dict[bytes, int]]:
+    """Row digest -> row number for the rows of a baseline sheet usable at this width"""
+    fingerprints = baseline.row_fingerprints
+    if fingerprints is None or baseline.shape[1] < n_cols:
+        return None
+    row_numbers, digests = fingerprints
+    return {digest.tobytes(): int(row) for row, digest in zip(row_numbers, digests)
+            if row <= baseline.shape[0]}
+
+
+def load_sheet_incremental(sheet, baselines: List[CachedSheet]) -> Tuple[CachedSheet, IncrementalStats]:
+    """
+    Load one read-only worksheet, reusing rows that match a baseline sheet
+
+    Args:
+        sheet: Read-only openpyxl worksheet of the new revision
+        baselines: Same-named sheets of earlier parses with a matching value context
+
+    Returns:
+        (CachedSheet holding the grid and row fingerprints, stats)
+    """
+    stats = IncrementalStats()
+    rows = sheet_rows(sheet)
+    shape = None
+    if rows is not None:
+        root_tag, row_numbers, chunks = rows
+        if sheet.max_row is not None and sheet.max_column is not None:
+            shape = (sheet.max_row, sheet.max_column)
+        else:
+            shape = _undimensioned_shape(chunks, row_numbers)
+
+    if shape is None:
+        # No usable row layout: plain parse, nothing to reuse next time
+        grid = sheet_to_array(sheet)
+        stats.sheets_full = 1
+        stats.rows_parsed = grid.shape[0]
+        return CachedSheet(None, sheet.title, None, grid.shape, grid=grid), stats
+
+    n_rows, n_cols = shape
+    digests = digest_rows(chunks, sheet._shared_strings)
+    grid = np.full((n_rows, n_cols), None, dtype=object)
+
+    candidates = [(baseline, _baseline_rows(baseline, n_cols)) for baseline in baselines]
+    candidates = [(baseline, by_digest) for baseline, by_digest in candidates if by_digest]
+
+    to_parse = []
+    reused = [[] for _ in candidates]  # 0-based rows copied from each candidate
+    for row_number, digest, chunk in zip(row_numbers.tolist(), digests, chunks):
+        if row_number > n_rows:
+            continue
+        key = digest.tobytes()
+        for i, (_, by_digest) in enumerate(candidates):
+            # Row XML carries its own row number, so a match is the same row
+            if by_digest.get(key) == row_number:
+                reused[i].append(row_number - 1)
+                break
+        else:
+            to_parse.append(chunk)
+
+    for (baseline, _), indexes in zip(candidates, reused):
+        if indexes:
+            grid[indexes] = baseline.grid[indexes, :n_cols]
+
+    _parse_rows(sheet, root_tag, to_parse, grid)
+    stats.rows_reused = sum(len(indexes) for indexes in reused)
+    stats.rows_parsed = len(to_parse)
+
+    # Every row taken from one baseline of the same shape: the values are that baseline's
+    value_digest = None
+    for (baseline, by_digest), indexes in zip(candidates, reused):
+        if (not to_parse and baseline.shape == grid.shape and len(indexes) == len(by_digest)
+                and len(indexes) == stats.rows_reused):
+            value_digest = baseline.value_digest
+
+    return CachedSheet(None, sheet.title, value_digest, grid.shape, grid=grid,
+                       row_fingerprints=(row_numbers, digests)), stats
+
+
+def load_workbook_incremental(workbook, digest: str,
+                              baselines: List[CachedWorkbook]) -> Optional[Tuple[CachedWorkbook, IncrementalStats]]:
+    """
+    Load a read-only workbook into memory, reusing rows from baseline workbooks
+
+    Args:
+        workbook: Read-only openpyxl workbook of the new revision
+        digest: SHA-256 of the workbook file
+        baselines: Earlier parses (template, previous revision); any order
+
+    Returns:
+        (CachedWorkbook, IncrementalStats), or None if the workbook is not
+        a read-only openpyxl workbook
+    """
+    context = value_context_digest(workbook)
+    if context is None:
+        return None
+
+    usable = [baseline for baseline in baselines
+              if baseline is not None and getattr(baseline, 'context', None) == context]
+
+    sheets = []
+    stats = IncrementalStats()
+    for title in workbook.sheetnames:
+        sheet_baselines = [baseline[title] for baseline in usable if title in baseline]
+        cached_sheet, sheet_stats = load_sheet_incremental(workbook[title], sheet_baselines)
+        sheets.append(cached_sheet)
+        stats.merge(sheet_stats)
+
+    return CachedWorkbook(digest, sheets, context), stats
@@ -5,9 +5,13 @@ This script properly launches the Streamlit app when running as an EXE
 
 import sys
 import os
+import multiprocessing
 from streamlit.web import cli as stcli
 
 if __name__ == '__main__':
+    # Needed in the frozen EXE so parallel comparison workers start correctly
+    multiprocessing.freeze_support()
+
     # Get the directory where the EXE is running
     if getattr(sys, 'frozen', False):
         # Running as compiled EXE
@@ -0,0 +1,380 @@
+"""
+N-Way Excel Comparison Against One Template
+
+Compares one master template against many submissions (e.g. 30 regional
+copies) in a single run. The template is parsed once into in-memory
+grids and handed to every worker process when it starts; each worker
+then only parses its submissions, reusing the template's rows wherever a
+submission's row XML is unchanged (excel_incremental), and diffs them
+against the shared template grids with the usual per-sheet comparison.
+
+The result holds one change table per submission and, per template
+sheet, a heatmap counting how many submissions changed each cell.
+
+Usage:
+    python excel_nway.py template.xlsx sub1.xlsx sub2.xlsx ... --output-dir nway_results
+        [--workers 4] [--mode cell|aligned|key] [--key-columns ID,Date]
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import openpyxl
+from openpyxl.formatting.rule import ColorScaleRule
+from openpyxl.utils import get_column_letter
+
+from excel_diff_engine import open_workbook, sheet_to_array, CHANGE_TYPES
+from excel_sheet_compare import (
+    MODES, CompareOptions, sheet_order, compare_workbook_sheets, summarize_results
+)
+from excel_fingerprint import file_digest
+from excel_workbook_cache import CachedSheet, CachedWorkbook
+from excel_incremental import load_workbook_incremental
+from excel_diff_export import write_json_report, format_value
+from excel_parallel import default_workers
+
+HEATMAP_FILE = 'heatmap.xlsx'
+SUMMARY_FILE = 'submissions.csv'
+
+# Template grids of this worker process, set by _init_worker
+_template: Optional[CachedWorkbook] = None
+
+
+@dataclass
+class SubmissionResult:
+    """Changes of one submission against the template"""
+    name: str
+    summary: Dict = field(default_factory=dict)
+    changes: Dict = field(default_factory=dict)  # sheet_changes per sheet (no DataFrames)
+    seconds: float = 0.0
+    rows_reused: int = 0  # Submission rows copied from the template instead of parsed
+    error: Optional[str] = None
+
+
+@dataclass
+class NWayResult:
+    """All submissions' changes plus per-cell change counts"""
+    template_sheets: List[str]
+    submissions: List[SubmissionResult]  # In input order
+    heatmaps: Dict[str, np.ndarray]  # Template sheet -> int32 grid of submissions changing each cell
+    column_headers: Dict[str, Dict[int, str]]  # Template sheet -> row-1 headers
+    seconds: float = 0.0
+
+    def file_table(self) -> pd.DataFrame:
+        """One row per submission and changed sheet (one row for unchanged or failed files)"""
+        records = []
+        for submission in self.submissions:
+            if submission.error:
+                records.append({'File': submission.name, 'Sheet': None, 'Error': submission.error})
+                continue
+            changed_sheets = 0
+            for sheet_name, sheet_changes in submission.changes.items():
+                modifications = sheet_changes['modifications']
+                if not (len(modifications) or sheet_changes['row_changes']
+                        or sheet_changes['sheet_added'] or sheet_changes['sheet_removed']):
+                    continue
+                record = {'File': submission.name, 'Sheet': sheet_name, 'Error': None}
+                record.update(modifications.counts())
+                record['row_changes'] = len(sheet_changes['row_changes'])
+                record['sheet_added'] = sheet_changes['sheet_added']
+                record['sheet_removed'] = sheet_changes['sheet_removed']
+                record['total'] = len(modifications)
+                records.append(record)
+                changed_sheets += 1
+            if not changed_sheets:
+                # Unchanged submissions still get their row
+                records.append({'File': submission.name, 'Sheet': None, 'total': 0, 'Error': None})
+        columns = ['File', 'Sheet', *CHANGE_TYPES, 'row_changes', 'sheet_added', 'sheet_removed', 'total', 'Error']
+        return pd.DataFrame(records, columns=columns)
+
+    def hot_cells(self, sheet_name: str, limit: int = 50) -> pd.DataFrame:
+        """Cells of a template sheet changed by the most submissions"""
+        heatmap = self.heatmaps.get(sheet_name)
+        if heatmap is None or not heatmap.any():
+            return pd.DataFrame(columns=['Cell', 'Column', 'Row', 'Submissions'])
+
+        rows, cols = np.nonzero(heatmap)
+        counts = heatmap[rows, cols]
+        # Most-changed first, then row-major
+        order = np.lexsort((cols, rows, -counts))[:limit]
+        headers = self.column_headers.get(sheet_name, {})
+        return pd.DataFrame({
+            'Cell': [f"{get_column_letter(int(c) + 1)}{int(r) + 1}" for r, c in zip(rows[order], cols[order])],
+            'Column': [headers.get(int(c) + 1, get_column_letter(int(c) + 1)) for c in cols[order]],
+            'Row': rows[order] + 1,
+            'Submissions': counts[order],
+        })
+
+
+def load_template(source, digest: Optional[str] = None) -> CachedWorkbook:
+    """
+    Parse the template once into in-memory grids
+
+    Args:
+        source: Path or binary file-like object
+        digest: SHA-256 of the file, if already known
+
+    Returns:
+        CachedWorkbook with every sheet's grid and row fingerprints
+    """
+    digest = digest or file_digest(source)
+    workbook = open_workbook(source, read_only=True)
+    try:
+        loaded = load_workbook_incremental(workbook, digest, [])
+        if loaded is None:
+            # CSV/TSV template: grids only, no row fingerprints to reuse
+            sheets = []
+            for sheet in workbook.worksheets:
+                grid = sheet_to_array(sheet)
+                sheets.append(CachedSheet(None, sheet.title, None, grid.shape, grid=grid))
+            return CachedWorkbook(digest, sheets)
+    finally:
+        workbook.close()
+    return loaded[0]
+
+
+def _init_worker(template: CachedWorkbook):
+    """Pool initializer: keep the template grids for every job of this worker"""
+    global _template
+    _template = template
+
+
+def diff_submission(name: str, source, options: CompareOptions,
+                    template: Optional[CachedWorkbook] = None) -> SubmissionResult:
+    """
+    Diff one submission against the template (runs in a worker)
+
+    Args:
+        name: Submission label
+        source: Path or binary file-like object (named, for CSV/TSV)
+        options: How to compare (value modes only)
+        template: Template grids (default: this worker's shared template)
+
+    Returns:
+        SubmissionResult; failures are recorded in its error field
+    """
+    template = template if template is not None else _template
+    start = time.perf_counter()
+    result = SubmissionResult(name)
+    try:
+        digest = file_digest(source)
+        workbook = open_workbook(source, read_only=True)
+        try:
+            # Rows whose XML matches the template are copied, not parsed
+            loaded = load_workbook_incremental(workbook, digest, [template])
+            # CSV/TSV submissions are diffed as read, block by block
+            submission = workbook if loaded is None else loaded[0]
+
+            sheet_names = sheet_order(template.sheetnames, submission.sheetnames)
+            result.summary, result.changes = summarize_results(
+                compare_workbook_sheets(template, submission, sheet_names, options))
+            result.rows_reused = 0 if loaded is None else loaded[1].rows_reused
+        finally:
+            workbook.close()
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def build_heatmaps(template: CachedWorkbook, submissions: List[SubmissionResult]) -> Dict[str, np.ndarray]:
+    """
+    Count, per template sheet cell, how many submissions changed it
+
+    Cells are counted in template coordinates (original_rows in the
+    aligned and key modes); sheets that only exist in submissions are left
+    out.
+    """
+    heatmaps = {name: np.zeros(template[name].shape, dtype=np.int32) for name in template.sheetnames}
+    for submission in submissions:
+        for sheet_name, sheet_changes in submission.changes.items():
+            if sheet_name not in heatmaps:
+                continue
+            table = sheet_changes['modifications']
+            if not len(table):
+                continue
+            rows = (table.rows if table.original_rows is None else table.original_rows) - 1
+            cols = table.cols - 1
+
+            heatmap = heatmaps[sheet_name]
+            n_rows, n_cols = max(heatmap.shape[0], rows.max() + 1), max(heatmap.shape[1], cols.max() + 1)
+            if (n_rows, n_cols) != heatmap.shape:
+                # Submissions may extend past the template's used range
+                grown = np.zeros((n_rows, n_cols), dtype=np.int32)
+                grown[:heatmap.shape[0], :heatmap.shape[1]] = heatmap
+                heatmap = heatmaps[sheet_name] = grown
+            # Each cell appears at most once per submission
+            heatmap[rows, cols] += 1
+    return heatmaps
+
+
+def _submission_payload(source):
+    """Paths go to workers as-is; uploads and streams as named in-memory copies"""
+    if isinstance(source, (str, os.PathLike)):
+        return source
+    if hasattr(source, 'getvalue'):
+        payload = io.BytesIO(source.getvalue())
+    else:
+        source.seek(0)
+        payload = io.BytesIO(source.read())
+    # The extension tells workbooks and CSV/TSV files apart
+    payload.name = getattr(source, 'name', '')
+    return payload
+
+
+def compare_against_template(template_source, submissions: List[Tuple[str, object]],
+                             options: Optional[CompareOptions] = None, workers: Optional[int] = None,
+                             progress: Optional[Callable[[SubmissionResult], None]] = None) -> NWayResult:
+    """
+    Diff many submissions against one template, parsing the template once
+
+    Args:
+        template_source: Template path or binary file-like object
+        submissions: (name, path or file-like) per submission
+        options: How to compare; formula and style diffs are not supported
+        workers: Process count (default: one per CPU, at most 8; 1 runs inline)
+        progress: Called with each SubmissionResult as it finishes
+
+    Returns:
+        NWayResult with per-file changes and per-cell heatmaps
+    """
+    options = options or CompareOptions()
+    if options.formulas or options.styles:
+        raise ValueError("N-way comparison diffs values only (no formula or style diff)")
+    # Submissions are diffed against grids; DataFrames would only cost memory
+    options = CompareOptions(mode=options.mode, key_columns=options.key_columns, keep_frames=False,
+                             skip_identical=options.skip_identical)
+
+    start = time.perf_counter()
+    template = load_template(template_source)
+    workers = max(1, min(workers or default_workers(), len(submissions) or 1))
+
+    results: Dict[int, SubmissionResult] = {}
+    if workers == 1:
+        for index, (name, source) in enumerate(submissions):
+            results[index] = diff_submission(name, _submission_payload(source), options, template)
+            if progress:
+                progress(results[index])
+    else:
+        # The template is pickled once per worker, not once per submission
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker, initargs=(template,)) as executor:
+            futures = {executor.submit(diff_submission, name, _submission_payload(source), options): index
+                       for index, (name, source) in enumerate(submissions)}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                if progress:
+                    progress(results[futures[future]])
+
+    ordered = [results[index] for index in range(len(submissions))]
+    return NWayResult(
+        template_sheets=template.sheetnames,
+        submissions=ordered,
+        heatmaps=build_heatmaps(template, ordered),
+        column_headers={name: sheet_headers(template[name]) for name in template.sheetnames},
+        seconds=time.perf_counter() - start
+    )
+
+
+def sheet_headers(sheet) -> Dict[int, str]:
+    """Row-1 headers of a cached template sheet"""
+    grid = sheet.grid
+    if not grid.shape[0]:
+        return {}
+    return {col: str(value) for col, value in enumerate(grid[0].tolist(), 1) if value is not None}
+
+
+def write_heatmap_workbook(output, result: NWayResult):
+    """
+    Write the heatmap workbook: a per-file summary sheet plus one sheet of
+    change counts per template sheet, shaded with a color scale
+
+    Args:
+        output: Path or binary file-like object to save to
+        result: compare_against_template() result
+    """
+    workbook = openpyxl.Workbook()
+    summary_sheet = workbook.active
+    summary_sheet.title = "SUBMISSIONS"
+    table = result.file_table()
+    summary_sheet.append(list(table.columns))
+    for record in table.itertuples(index=False):
+        summary_sheet.append([None if pd.isna(value) else value for value in record])
+
+    n_files = len(result.submissions)
+    for sheet_name, heatmap in result.heatmaps.items():
+        sheet = workbook.create_sheet(sheet_name[:31])
+        for row in heatmap.tolist():
+            sheet.append([count or None for count in row])
+        if heatmap.size:
+            cell_range = f"A1:{get_column_letter(heatmap.shape[1])}{heatmap.shape[0]}"
+            sheet.conditional_formatting.add(cell_range, ColorScaleRule(
+                start_type='num', start_value=1, start_color='FFF2CC',
+                end_type='num', end_value=max(n_files, 1), end_color='C00000'))
+
+    workbook.save(output)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Diff many Excel submissions against one template")
+    parser.add_argument("template", help="Master template workbook")
+    parser.add_argument("submissions", nargs='+', help="Submitted workbooks")
+    parser.add_argument("--output-dir", default="nway_results")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU, max 8)")
+    parser.add_argument("--mode", choices=MODES, default='cell')
+    parser.add_argument("--key-columns", default="", help="Comma-separated key columns for --mode key")
+    args = parser.parse_args(argv)
+
+    key_columns = [column.strip() for column in args.key_columns.split(',') if column.strip()]
+    if args.mode == 'key' and not key_columns:
+        parser.error("--mode key needs --key-columns")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    submissions = []
+    used_names = set()
+    for path in args.submissions:
+        # Keep report files of same-named workbooks apart
+        name = base_name = os.path.splitext(os.path.basename(path))[0]
+        suffix = 2
+        while name in used_names:
+            name, suffix = f"{base_name}_{suffix}", suffix + 1
+        used_names.add(name)
+        submissions.append((name, path))
+
+    def print_progress(submission: SubmissionResult):
+        if submission.error:
+            print(f"[ERROR] {submission.name}: {submission.error}")
+        else:
+            print(f"[OK] {submission.name}: {submission.summary['total_modifications']:,} modifications "
+                  f"({submission.rows_reused:,} template rows reused, {submission.seconds:.2f}s)")
+
+    print(f"Comparing {len(submissions)} submission(s) against {args.template}")
+    result = compare_against_template(args.template, submissions,
+                                      CompareOptions(mode=args.mode, key_columns=key_columns),
+                                      args.workers, progress=print_progress)
+
+    for submission in result.submissions:
+        if submission.error is None:
+            with open(os.path.join(args.output_dir, f"{submission.name}.json"), 'w', encoding='utf-8') as f:
+                write_json_report(f, submission.changes, submission.summary, format_value)
+    result.file_table().to_csv(os.path.join(args.output_dir, SUMMARY_FILE), index=False)
+    write_heatmap_workbook(os.path.join(args.output_dir, HEATMAP_FILE), result)
+
+    failed = sum(1 for submission in result.submissions if submission.error)
+    print(f"\nDone in {result.seconds:.2f}s: {len(submissions) - failed} ok, {failed} failed -> {args.output_dir}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
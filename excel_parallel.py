@@ -0,0 +1,132 @@
+"""
+Parallel Sheet Comparison
+
+Diffs the sheets of a workbook pair across a process pool. Each worker
+opens both workbooks read-only from disk and compares the sheets assigned
+to it; results come back in the caller's sheet order, so merging them
+gives the same changes/summary as the serial path.
+"""
+
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+from excel_diff_engine import open_workbook
+from excel_sheet_compare import CompareOptions, SheetResult, compare_workbook_sheets
+from excel_workbook_cache import WorkbookCache
+
+
+def default_workers() -> int:
+    """Worker count when none is given: one per CPU, at most 8"""
+    return max(1, min(os.cpu_count() or 1, 8))
+
+
+def partition_sheets(sheet_names: List[str], weights: Dict[str, int], workers: int) -> List[List[str]]:
+    """
+    Split sheets into at most `workers` groups of similar total size
+
+    Largest sheet first, each onto the currently lightest group.
+
+    Args:
+        sheet_names: Sheets to compare
+        weights: Estimated cell count per sheet
+        workers: Number of groups
+
+    Returns:
+        Non-empty groups of sheet names
+    """
+    groups = [[] for _ in range(max(1, min(workers, len(sheet_names))))]
+    loads = [0] * len(groups)
+
+    for sheet_name in sorted(sheet_names, key=lambda name: -weights.get(name, 0)):
+        lightest = loads.index(min(loads))
+        groups[lightest].append(sheet_name)
+        loads[lightest] += max(weights.get(sheet_name, 0), 1)
+
+    return [group for group in groups if group]
+
+
+def _source_to_path(source, temp_files: List[str]) -> str:
+    """Path of a workbook on disk, spilling in-memory uploads to a temp file"""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    data = source.getvalue() if hasattr(source, 'getvalue') else source.read()
+
+    # Keep the extension: it tells workbooks and CSV/TSV files apart
+    extension = os.path.splitext(getattr(source, 'name', '') or '')[1] or '.xlsx'
+    handle, path = tempfile.mkstemp(suffix=extension)
+    with os.fdopen(handle, 'wb') as f:
+        f.write(data)
+    temp_files.append(path)
+    return path
+
+
+def _compare_sheet_group(original_path: str, modified_path: str, sheet_names: List[str],
+                         options: CompareOptions, cache_dir: Optional[str] = None,
+                         digests: Tuple[Optional[str], Optional[str]] = (None, None)) -> List[SheetResult]:
+    """Worker: open both workbooks read-only (or from the cache) and diff the assigned sheets"""
+    cache = WorkbookCache(cache_dir) if cache_dir else None
+    original_wb = (cache and cache.load(digests[0], original_path)) or open_workbook(original_path, read_only=True)
+    modified_wb = (cache and cache.load(digests[1], modified_path)) or open_workbook(modified_path, read_only=True)
+    try:
+        return compare_workbook_sheets(original_wb, modified_wb, sheet_names, options)
+    finally:
+        original_wb.close()
+        modified_wb.close()
+
+
+def compare_sheets_parallel(original_source, modified_source, sheet_names: List[str],
+                            options: CompareOptions, workers: Optional[int] = None,
+                            weights: Optional[Dict[str, int]] = None, cache_dir: Optional[str] = None,
+                            digests: Tuple[Optional[str], Optional[str]] = (None, None),
+                            on_result: Optional[Callable[[SheetResult], None]] = None) -> List[SheetResult]:
+    """
+    Compare sheets across a process pool
+
+    Args:
+        original_source: Original workbook (path or file-like)
+        modified_source: Modified workbook (path or file-like)
+        sheet_names: Sheets to compare, in result order
+        options: How to load and compare
+        workers: Process count (default: one per CPU, at most 8)
+        weights: Estimated cell count per sheet, for balancing the groups
+        cache_dir: WorkbookCache directory to load parsed workbooks from
+        digests: (original, modified) file digests for cache lookups
+        on_result: Called with each SheetResult as its sheet group finishes
+
+    Returns:
+        One SheetResult per sheet, in sheet_names order
+    """
+    workers = workers or default_workers()
+    groups = partition_sheets(sheet_names, weights or {}, workers)
+
+    temp_files = []
+    try:
+        original_path = _source_to_path(original_source, temp_files)
+        modified_path = _source_to_path(modified_source, temp_files)
+
+        # Spawn rather than fork: the Streamlit server process runs threads
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=len(groups), mp_context=context) as executor:
+            futures = [executor.submit(_compare_sheet_group, original_path, modified_path, group, options,
+                                       cache_dir, digests)
+                       for group in groups]
+            by_name = {}
+            for future in as_completed(futures):
+                for result in future.result():
+                    by_name[result.sheet_name] = result
+                    if on_result is not None:
+                        on_result(result)
+    finally:
+        for path in temp_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    return [by_name[sheet_name] for sheet_name in sheet_names]
@@ -0,0 +1,451 @@
+"""
+Row Matching for Excel Comparison
+
+Matches rows between two sheet grids by content instead of by absolute
+position, so an inserted or deleted row near the top of a sheet shows up
+as one row-level change rather than as every cell below it changing.
+
+Two strategies are provided:
+- align_sheet(): rows are hashed, aligned with a patience diff over the
+  row hashes, and only the aligned row pairs are cell-diffed
+- key_join_sheet(): rows are matched by one or more key columns through a
+  vectorized pandas hash join, for tables that get re-sorted
+"""
+
+import difflib
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from openpyxl.utils import get_column_letter, column_index_from_string
+
+from excel_diff_engine import GridDiff, diff_grids, pad_grid, MIN_ROWS, MIN_COLS
+
+
+# Row-level change types: align_sheet() reports inserted/deleted/moved rows,
+# key_join_sheet() reports added/removed/changed keys
+ROW_CHANGE_TYPES = ('inserted', 'deleted', 'moved', 'added', 'removed', 'changed')
+
+# Gaps up to this many (deleted x inserted) row pairs are paired by
+# similarity; larger gaps are first split at rows anchored on their
+# first-column value (see _pair_large_gap)
+MAX_SIMILARITY_PAIRS = 10000
+
+# Minimum share of equal non-empty cells for two rows to count as the
+# same row with edits rather than a delete plus an insert
+MIN_ROW_SIMILARITY = 0.5
+
+
+@dataclass
+class AlignedDiff:
+    """Result of a row-aligned sheet comparison"""
+    cells: GridDiff  # Cell changes in paired rows; rows are modified-sheet rows
+    row_changes: List[Dict] = field(default_factory=list)
+    counts: Dict[str, int] = field(default_factory=dict)  # rows_<row change type>
+
+
+def row_hashes(values: np.ndarray) -> np.ndarray:
+    """
+    Hash every row of a grid
+
+    Uses Python's tuple hash, which agrees with cell equality
+    (1 == 1.0, so both hash the same).
+    """
+    return np.fromiter((hash(tuple(row)) for row in values.tolist()), dtype=np.int64, count=values.shape[0])
+
+
+def _longest_increasing_run(pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Longest subsequence of (i, j) pairs (sorted by i) with increasing j"""
+    tails = []  # Smallest j ending an increasing run of each length
+    tail_idx = []
+    prev = [-1] * len(pairs)
+
+    for k, (_, j) in enumerate(pairs):
+        pos = bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_idx.append(k)
+        else:
+            tails[pos] = j
+            tail_idx[pos] = k
+        prev[k] = tail_idx[pos - 1] if pos else -1
+
+    result = []
+    k = tail_idx[-1] if tail_idx else -1
+    while k >= 0:
+        result.append(pairs[k])
+        k = prev[k]
+    return result[::-1]
+
+
+def patience_matches(a: Sequence, b: Sequence) -> List[Tuple[int, int]]:
+    """
+    Match equal items of two sequences with a patience diff
+
+    Items that occur exactly once on both sides are used as anchors; the
+    regions between anchors are aligned recursively, falling back to
+    difflib's longest-matching-block alignment where no unique items exist.
+
+    Args:
+        a: Original sequence (e.g. row hashes)
+        b: Modified sequence
+
+    Returns:
+        Sorted list of matched (index_in_a, index_in_b) pairs
+    """
+    matches = []
+    stack = [(0, len(a), 0, len(b))]
+
+    while stack:
+        a_lo, a_hi, b_lo, b_hi = stack.pop()
+
+        # Common prefix and suffix match trivially
+        while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+            matches.append((a_lo, b_lo))
+            a_lo += 1
+            b_lo += 1
+        while a_lo < a_hi and b_lo < b_hi and a[a_hi - 1] == b[b_hi - 1]:
+            a_hi -= 1
+            b_hi -= 1
+            matches.append((a_hi, b_hi))
+
+        if a_lo == a_hi or b_lo == b_hi:
+            continue
+
+        counts = {}
+        for i in range(a_lo, a_hi):
+            entry = counts.setdefault(a[i], [0, 0, i])
+            entry[0] += 1
+        for j in range(b_lo, b_hi):
+            entry = counts.get(b[j])
+            if entry is not None:
+                entry[1] += 1
+                entry.append(j)
+
+        unique = sorted((entry[2], entry[3]) for entry in counts.values() if entry[0] == 1 and entry[1] == 1)
+        anchors = _longest_increasing_run(unique)
+
+        if not anchors:
+            matcher = difflib.SequenceMatcher(None, a[a_lo:a_hi], b[b_lo:b_hi], autojunk=False)
+            for block in matcher.get_matching_blocks():
+                matches.extend((a_lo + block.a + k, b_lo + block.b + k) for k in range(block.size))
+            continue
+
+        # Recurse into the regions between consecutive anchors
+        prev_i, prev_j = a_lo, b_lo
+        for i, j in anchors:
+            matches.append((i, j))
+            stack.append((prev_i, i, prev_j, j))
+            prev_i, prev_j = i + 1, j + 1
+        stack.append((prev_i, a_hi, prev_j, b_hi))
+
+    matches.sort()
+    return matches
+
+
+def _row_similarity(original: np.ndarray, modified: np.ndarray) -> np.ndarray:
+    """Share of equal non-empty cells for every (original, modified) row pair"""
+    equal = np.equal(original[:, None, :], modified[None, :, :]).astype(bool, copy=False)
+    filled = ~(np.equal(original, None).astype(bool, copy=False)[:, None, :] &
+               np.equal(modified, None).astype(bool, copy=False)[None, :, :])
+    shared = (equal & filled).sum(axis=2)
+    return shared / np.maximum(filled.sum(axis=2), 1)
+
+
+def _pair_similarity(original: np.ndarray, modified: np.ndarray) -> np.ndarray:
+    """Share of equal non-empty cells for each row pair (original[k], modified[k])"""
+    equal = np.equal(original, modified).astype(bool, copy=False)
+    filled = ~(np.equal(original, None).astype(bool, copy=False) & np.equal(modified, None).astype(bool, copy=False))
+    return (equal & filled).sum(axis=1) / np.maximum(filled.sum(axis=1), 1)
+
+
+def _pair_large_gap(original: np.ndarray, modified: np.ndarray,
+                    deleted: List[int], inserted: List[int]) -> List[Tuple[int, int]]:
+    """
+    Pair rows of a gap too large for the similarity matrix
+
+    Rows whose first-column value occurs once among the deleted and once
+    among the inserted rows are anchored (an order-preserving run, as in
+    patience_matches()) and paired if similar enough; the stretches between
+    anchors are paired by _pair_gap(). Without anchors the gap stays
+    deleted and inserted rows.
+    """
+    counts = {}
+    for k, row in enumerate(deleted):
+        entry = counts.setdefault(original[row, 0], [0, 0, k])
+        entry[0] += 1
+    for k, row in enumerate(inserted):
+        entry = counts.get(modified[row, 0])
+        if entry is not None:
+            entry[1] += 1
+            entry.append(k)
+    unique = sorted((entry[2], entry[3]) for key, entry in counts.items()
+                    if key is not None and entry[0] == 1 and entry[1] == 1)
+    anchors = _longest_increasing_run(unique)
+    if not anchors:
+        return []
+
+    similarity = _pair_similarity(original[[deleted[i] for i, _ in anchors]],
+                                  modified[[inserted[j] for _, j in anchors]])
+    pairs = []
+    prev_i = prev_j = 0
+    for (i, j), pair in zip(anchors, similarity):
+        pairs.extend(_pair_gap(original, modified, deleted[prev_i:i], inserted[prev_j:j]))
+        if pair >= MIN_ROW_SIMILARITY:
+            pairs.append((deleted[i], inserted[j]))
+        prev_i, prev_j = i + 1, j + 1
+    pairs.extend(_pair_gap(original, modified, deleted[prev_i:], inserted[prev_j:]))
+    return pairs
+
+
+def _pair_gap(original: np.ndarray, modified: np.ndarray, deleted: List[int], inserted: List[int]) -> List[Tuple[int, int]]:
+    """
+    Pair deleted and inserted rows of one gap as edited rows
+
+    Small gaps use an order-preserving best match on row similarity;
+    large gaps are split at anchor rows first (_pair_large_gap).
+    """
+    if not deleted or not inserted:
+        return []
+
+    if len(deleted) * len(inserted) > MAX_SIMILARITY_PAIRS:
+        return _pair_large_gap(original, modified, deleted, inserted)
+
+    similarity = _row_similarity(original[deleted], modified[inserted])
+    n, m = similarity.shape
+
+    # Order-preserving maximum-similarity matching (weighted LCS)
+    score = np.zeros((n + 1, m + 1))
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            pair = similarity[i - 1, j - 1]
+            take = score[i - 1, j - 1] + pair if pair >= MIN_ROW_SIMILARITY else -1.0
+            score[i, j] = max(take, score[i - 1, j], score[i, j - 1])
+
+    pairs = []
+    i, j = n, m
+    while i > 0 and j > 0:
+        pair = similarity[i - 1, j - 1]
+        if pair >= MIN_ROW_SIMILARITY and score[i, j] == score[i - 1, j - 1] + pair:
+            pairs.append((deleted[i - 1], inserted[j - 1]))
+            i -= 1
+            j -= 1
+        elif score[i, j] == score[i - 1, j]:
+            i -= 1
+        else:
+            j -= 1
+    return pairs[::-1]
+
+
+def diff_row_pairs(original: np.ndarray, modified: np.ndarray,
+                   pair_i: np.ndarray, pair_j: np.ndarray) -> GridDiff:
+    """
+    Cell-diff matched row pairs in one vectorized pass
+
+    Args:
+        original: Original grid
+        modified: Modified grid, same width
+        pair_i: 0-based original row of each pair
+        pair_j: 0-based modified row of each pair
+
+    Returns:
+        GridDiff whose rows are modified-sheet rows, with original_rows set
+    """
+    cells = diff_grids(original[pair_i], modified[pair_j], min_rows=0, min_cols=0)
+    row_idx = cells.rows.astype(np.int64) - 1
+    cells.original_rows = (pair_i[row_idx] + 1).astype(np.int32)
+    cells.rows = (pair_j[row_idx] + 1).astype(np.int32)
+    return cells
+
+
+def align_sheet(original: np.ndarray, modified: np.ndarray,
+                min_rows: int = MIN_ROWS, min_cols: int = MIN_COLS) -> AlignedDiff:
+    """
+    Compare two sheet grids with row alignment
+
+    Args:
+        original: Grid from the original workbook
+        modified: Grid from the modified workbook
+        min_rows: Minimum number of rows reported as compared
+        min_cols: Minimum number of columns to compare
+
+    Returns:
+        AlignedDiff with inserted/deleted/moved rows and the cell changes
+        of rows present on both sides
+    """
+    n_cols = max(original.shape[1], modified.shape[1], min_cols)
+    original = pad_grid(original, original.shape[0], n_cols)
+    modified = pad_grid(modified, modified.shape[0], n_cols)
+
+    original_hashes = row_hashes(original).tolist()
+    modified_hashes = row_hashes(modified).tolist()
+    identical = patience_matches(original_hashes, modified_hashes)
+
+    # Walk the gaps between identical rows and pair edited rows inside them
+    edited = []
+    deleted = []
+    inserted = []
+    prev_i = prev_j = 0
+    for i, j in identical + [(original.shape[0], modified.shape[0])]:
+        gap_deleted = list(range(prev_i, i))
+        gap_inserted = list(range(prev_j, j))
+        pairs = _pair_gap(original, modified, gap_deleted, gap_inserted)
+        paired_i = {p[0] for p in pairs}
+        paired_j = {p[1] for p in pairs}
+        edited.extend(pairs)
+        deleted.extend(k for k in gap_deleted if k not in paired_i)
+        inserted.extend(k for k in gap_inserted if k not in paired_j)
+        prev_i, prev_j = i + 1, j + 1
+
+    # An unmatched row that reappears unchanged elsewhere was moved
+    inserted_by_hash = {}
+    for j in inserted:
+        inserted_by_hash.setdefault(modified_hashes[j], []).append(j)
+    moved = []
+    for i in deleted:
+        candidates = inserted_by_hash.get(original_hashes[i])
+        if candidates:
+            moved.append((i, candidates.pop(0)))
+    moved_i = {i for i, _ in moved}
+    moved_j = {j for _, j in moved}
+    deleted = [i for i in deleted if i not in moved_i]
+    inserted = [j for j in inserted if j not in moved_j]
+
+    # Cell-diff only the edited row pairs
+    edited.sort(key=lambda p: p[1])
+    pair_i = np.array([p[0] for p in edited], dtype=np.int64)
+    pair_j = np.array([p[1] for p in edited], dtype=np.int64)
+    cells = diff_row_pairs(original, modified, pair_i, pair_j)
+    cells.shape = (max(original.shape[0], modified.shape[0], min_rows), n_cols)
+
+    row_changes = (
+        [{'type': 'inserted', 'original_row': None, 'modified_row': j + 1} for j in inserted] +
+        [{'type': 'deleted', 'original_row': i + 1, 'modified_row': None} for i in deleted] +
+        [{'type': 'moved', 'original_row': i + 1, 'modified_row': j + 1} for i, j in moved]
+    )
+    row_changes.sort(key=lambda c: (c['modified_row'] or c['original_row'], c['type']))
+
+    counts = {
+        'rows_inserted': len(inserted),
+        'rows_deleted': len(deleted),
+        'rows_moved': len(moved)
+    }
+
+    return AlignedDiff(cells=cells, row_changes=row_changes, counts=counts)
+
+
+def resolve_key_columns(column_headers: Dict[int, str], keys: Sequence[str]) -> List[int]:
+    """
+    Resolve key column names to 1-based column numbers
+
+    Args:
+        column_headers: 1-based column number -> header text (row 1)
+        keys: Header names, or column letters such as "A"
+
+    Returns:
+        Column numbers, or an empty list if any key is missing from the sheet
+    """
+    by_name = {name: col for col, name in column_headers.items()}
+    columns = []
+    for key in keys:
+        if key in by_name:
+            columns.append(by_name[key])
+            continue
+        try:
+            col = column_index_from_string(key.strip().upper())
+        except ValueError:
+            return []
+        if col not in column_headers:
+            return []
+        columns.append(col)
+    return columns
+
+
+def _key_frame(data: np.ndarray, key_columns: List[int]) -> pd.DataFrame:
+    """Key columns of the data rows, plus an occurrence counter for duplicate keys"""
+    names = [f"k{col}" for col in key_columns]
+    frame = pd.DataFrame(data[:, [col - 1 for col in key_columns]], columns=names, dtype=object)
+    frame['_row'] = np.arange(len(frame), dtype=np.int64)
+    # Rows whose key cells are all empty cannot be matched by key
+    frame = frame[frame[names].notna().any(axis=1)]
+    # The n-th occurrence of a key on one side pairs with the n-th on the other
+    frame['_dup'] = frame.groupby(names, sort=False, dropna=False).cumcount()
+    return frame
+
+
+def key_join_sheet(original: np.ndarray, modified: np.ndarray, key_columns: List[int],
+                   min_rows: int = MIN_ROWS, min_cols: int = MIN_COLS) -> AlignedDiff:
+    """
+    Compare two sheet grids by matching rows on key columns
+
+    Row 1 is treated as the header row and compared in place. Data rows
+    are matched with a vectorized hash join on the key columns, so the
+    comparison is independent of row order.
+
+    Args:
+        original: Grid from the original workbook
+        modified: Grid from the modified workbook
+        key_columns: 1-based key column numbers
+        min_rows: Minimum number of rows reported as compared
+        min_cols: Minimum number of columns to compare
+
+    Returns:
+        AlignedDiff with per-key added/removed/changed rows and the cell
+        changes of every key present on both sides
+    """
+    n_cols = max(original.shape[1], modified.shape[1], max(key_columns), min_cols)
+    original = pad_grid(original, original.shape[0], n_cols)
+    modified = pad_grid(modified, modified.shape[0], n_cols)
+
+    names = [f"k{col}" for col in key_columns]
+    joined = pd.merge(
+        _key_frame(original[1:], key_columns),
+        _key_frame(modified[1:], key_columns),
+        on=names + ['_dup'], how='outer', suffixes=('_orig', '_mod'), indicator=True, sort=False
+    )
+
+    both = joined[joined['_merge'] == 'both']
+    removed = joined[joined['_merge'] == 'left_only']
+    added = joined[joined['_merge'] == 'right_only']
+
+    # Data rows start at sheet row 2; the header rows are paired directly
+    header_pair = np.zeros(1 if min(original.shape[0], modified.shape[0]) else 0, dtype=np.int64)
+    pair_i = np.concatenate([header_pair, both['_row_orig'].to_numpy(dtype=np.int64) + 1])
+    pair_j = np.concatenate([header_pair, both['_row_mod'].to_numpy(dtype=np.int64) + 1])
+    order = np.argsort(pair_j, kind='stable')
+    cells = diff_row_pairs(original, modified, pair_i[order], pair_j[order])
+    cells.shape = (max(original.shape[0], modified.shape[0], min_rows), n_cols)
+
+    def key_of(frame):
+        return list(zip(*(frame[name].tolist() for name in names))) if len(frame) else []
+
+    changed_rows, changed_counts = np.unique(cells.rows[cells.rows > 1], return_counts=True)
+    changed_original = dict(zip(cells.rows.tolist(), cells.original_rows.tolist()))
+    key_by_modified_row = dict(zip((both['_row_mod'] + 2).tolist(), key_of(both)))
+
+    row_changes = (
+        [{'type': 'added', 'key': key, 'original_row': None, 'modified_row': row}
+         for key, row in zip(key_of(added), (added['_row_mod'] + 2).astype(int).tolist())] +
+        [{'type': 'removed', 'key': key, 'original_row': row, 'modified_row': None}
+         for key, row in zip(key_of(removed), (removed['_row_orig'] + 2).astype(int).tolist())] +
+        [{'type': 'changed', 'key': key_by_modified_row[row], 'original_row': changed_original[row],
+          'modified_row': row, 'cells_changed': count}
+         for row, count in zip(changed_rows.tolist(), changed_counts.tolist())]
+    )
+    row_changes.sort(key=lambda c: (c['modified_row'] or c['original_row'], c['type']))
+
+    counts = {
+        'rows_added': len(added),
+        'rows_removed': len(removed),
+        'rows_changed': len(changed_rows)
+    }
+
+    return AlignedDiff(cells=cells, row_changes=row_changes, counts=counts)
+
+
+def format_key(key_columns: List[int], key: tuple, column_headers: Dict[int, str]) -> str:
+    """Render a row key as 'ID=42, Region=EU'"""
+    return ", ".join(f"{column_headers.get(col, get_column_letter(col))}={value}"
+                     for col, value in zip(key_columns, key))
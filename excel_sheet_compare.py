@@ -0,0 +1,401 @@
+"""
+Per-Sheet Excel Comparison
+
+Compares one worksheet pair and returns the sheet_changes record used by
+ExcelDiffVisualizer. Kept free of Streamlit so the same code runs in the
+UI process and in worker processes.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from excel_diff_engine import (
+    sheet_to_array, column_headers_from_array, frame_from_array,
+    diff_grids, build_modifications, iter_row_blocks, stream_diff, ColumnBuffer, ModificationTable,
+    ModificationIndex, CHANGE_TYPES
+)
+from excel_row_matching import align_sheet, key_join_sheet, resolve_key_columns, format_key
+from excel_fingerprint import sheet_fingerprint, same_value_context
+from excel_formulas import read_sheet_layers, diff_formulas
+from excel_styles import workbook_styles, same_styles, diff_styles
+from excel_spill import ChangeSpill, SpilledModifications
+
+
+# Comparison modes: cells by absolute position, rows aligned by content,
+# or rows matched on key columns
+MODES = ('cell', 'aligned', 'key')
+
+# Row-level summary counters, filled by the aligned and key modes
+ROW_COUNTERS = ('rows_inserted', 'rows_deleted', 'rows_moved', 'rows_added', 'rows_removed', 'rows_changed')
+
+# Formula summary counters, filled when formulas are compared (cell mode)
+FORMULA_COUNTERS = ('formulas_changed', 'formulas_value_same')
+
+# Style summary counters, filled when styles are compared (cell mode)
+STYLE_COUNTERS = ('styles_changed', 'styles_value_same')
+
+
+@dataclass
+class CompareOptions:
+    """How a sheet pair is loaded and compared"""
+    mode: str = 'cell'
+    key_columns: List[str] = field(default_factory=list)  # Header names or column letters
+    streaming: bool = False  # Diff lockstep row blocks instead of whole grids
+    keep_frames: bool = True  # Keep sheet DataFrames for the side-by-side view
+    skip_identical: bool = True  # Skip sheets whose fingerprints match
+    formulas: bool = False  # Also diff formula text (cell mode, read-only workbooks)
+    styles: bool = False  # Also diff cell styles (cell mode, read-only workbooks)
+    spill_dir: Optional[str] = None  # Streaming: write the changes to disk under this directory
+
+
+@dataclass
+class SheetResult:
+    """Outcome of comparing one sheet"""
+    sheet_name: str
+    sheet_changes: Dict
+    counts: Dict[str, int]  # Summary counters contributed by this sheet
+    seconds: float = 0.0
+    cells_compared: int = 0
+
+
+def new_summary() -> Dict:
+    """Empty ExcelDiffVisualizer.summary"""
+    return {
+        'total_modifications': 0,
+        'sheets_modified': [],
+        'blank_to_value': 0,  # Previously "added"
+        'value_to_blank': 0,  # Previously "removed"
+        'value_to_value': 0,  # Previously "modified"
+        'rows_inserted': 0,  # Row-level changes (aligned mode only)
+        'rows_deleted': 0,
+        'rows_moved': 0,
+        'rows_added': 0,  # Row-level changes (key mode only)
+        'rows_removed': 0,
+        'rows_changed': 0,
+        'formulas_changed': 0,  # Formula text changes (formula mode only)
+        'formulas_value_same': 0,  # ... of which the cached value stayed the same
+        'styles_changed': 0,  # Font/fill/border/number format changes (style mode only)
+        'styles_value_same': 0,  # ... of which the value stayed the same
+        'sheets_skipped': [],  # Identical sheets that were not compared
+    }
+
+
+def new_sheet_changes() -> Dict:
+    """Empty sheet_changes record"""
+    return {
+        'modifications': ModificationTable.empty(),  # All changes are now modifications
+        'modification_index': ModificationIndex.empty(),  # Counters and row/column lookups of modifications
+        'sheet_added': False,
+        'sheet_removed': False,
+        'original_df': None,
+        'modified_df': None,
+        'shape': None,  # (rows, cols) spanned by both sheets, for views reading from the workbooks
+        'column_headers': {},
+        'row_changes': [],  # Inserted/deleted/moved rows or added/removed/changed keys
+        'key_columns': [],  # Resolved 1-based key columns (key mode)
+        'formula_changes': ModificationTable.empty(),  # Old/new formula text (formula mode)
+        'formula_value_same': np.zeros(0, dtype=bool),  # Per formula change: cached value unchanged
+        'style_changes': ModificationTable.empty(),  # Old/new differing style parts (style mode)
+        'style_value_same': np.zeros(0, dtype=bool),  # Per style change: value unchanged
+        'skipped': False  # Identical content, not compared
+    }
+
+
+def sheet_order(original_names: List[str], modified_names: List[str]) -> List[str]:
+    """All sheet names: original workbook order, then sheets new in the modified one"""
+    return list(original_names) + [name for name in modified_names if name not in original_names]
+
+
+def load_sheet_frame(sheet, options: CompareOptions, values=None) -> Tuple[pd.DataFrame, Dict[int, str]]:
+    """
+    Load a sheet as a DataFrame plus its row-1 column headers
+
+    Args:
+        sheet: openpyxl worksheet
+        options: Compare options (streaming / keep_frames)
+        values: Grid already read with sheet_to_array(), if any
+
+    Returns:
+        (frame, column_headers)
+    """
+    if values is None and options.streaming:
+        buffer = ColumnBuffer(keep_values=options.keep_frames)
+        for block in iter_row_blocks(sheet):
+            buffer.append_block(block)
+        return buffer.to_frame(), buffer.column_headers()
+
+    if values is None:
+        values = sheet_to_array(sheet)
+
+    # Headers are assumed to be in the first row
+    headers = column_headers_from_array(values)
+
+    if not options.keep_frames:
+        return pd.DataFrame(), headers
+    return frame_from_array(values), headers
+
+
+def _load_sheet_grids(original_sheet, modified_sheet, sheet_changes, options):
+    """Read both sheets into grids and fill in frames and headers"""
+    original_values = sheet_to_array(original_sheet)
+    modified_values = sheet_to_array(modified_sheet)
+
+    sheet_changes['original_df'], original_headers = load_sheet_frame(original_sheet, options, original_values)
+    sheet_changes['modified_df'], modified_headers = load_sheet_frame(modified_sheet, options, modified_values)
+
+    # Use modified headers as primary, fall back to original if needed
+    sheet_changes['column_headers'] = modified_headers or original_headers
+
+    return original_values, modified_values
+
+
+def _diff_in_memory(original_sheet, modified_sheet, sheet_changes, options, counts):
+    """Load both sheets once into aligned grids and diff them"""
+    original_values, modified_values = _load_sheet_grids(original_sheet, modified_sheet, sheet_changes, options)
+
+    # Vectorized comparison over the whole grid (at least 10 rows x 5 columns)
+    return diff_grids(original_values, modified_values)
+
+
+def _diff_with_layers(original_sheet, modified_sheet, sheet_changes, options, counts):
+    """Read values plus formulas and/or style ids in one pass per sheet, then diff each layer"""
+    original_styles = modified_styles = None
+    if options.styles:
+        original_styles = workbook_styles(original_sheet.parent)
+        modified_styles = workbook_styles(modified_sheet.parent)
+
+    original = read_sheet_layers(original_sheet, options.formulas, original_styles is not None)
+    modified = read_sheet_layers(modified_sheet, options.formulas, modified_styles is not None)
+    if original is None or modified is None:
+        # No sheet XML to read formulas/styles from (cached or full-mode sheets)
+        return _diff_in_memory(original_sheet, modified_sheet, sheet_changes, options, counts)
+
+    original_values, original_formulas, original_ids = original
+    modified_values, modified_formulas, modified_ids = modified
+    sheet_changes['original_df'], original_headers = load_sheet_frame(original_sheet, options, original_values)
+    sheet_changes['modified_df'], modified_headers = load_sheet_frame(modified_sheet, options, modified_values)
+    sheet_changes['column_headers'] = modified_headers or original_headers
+
+    grid_diff = diff_grids(original_values, modified_values)
+
+    if options.formulas:
+        formula_diff, value_same = diff_formulas(original_formulas, modified_formulas, grid_diff)
+        sheet_changes['formula_changes'] = build_modifications(formula_diff, sheet_changes['column_headers'])
+        sheet_changes['formula_value_same'] = value_same
+        counts['formulas_changed'] = len(formula_diff)
+        counts['formulas_value_same'] = int(value_same.sum())
+
+    if original_ids is not None and modified_ids is not None:
+        style_diff, value_same = diff_styles(original_ids, modified_ids, original_styles, modified_styles,
+                                             grid_diff)
+        sheet_changes['style_changes'] = build_modifications(style_diff, sheet_changes['column_headers'])
+        sheet_changes['style_value_same'] = value_same
+        counts['styles_changed'] = len(style_diff)
+        counts['styles_value_same'] = int(value_same.sum())
+    return grid_diff
+
+
+def _diff_streaming(original_sheet, modified_sheet, sheet_changes, options, counts):
+    """Diff one sheet in lockstep row blocks"""
+    original_buffer = ColumnBuffer(keep_values=options.keep_frames)
+    modified_buffer = ColumnBuffer(keep_values=options.keep_frames)
+
+    spill = ChangeSpill(options.spill_dir) if options.spill_dir is not None else None
+
+    try:
+        grid_diff = stream_diff(original_sheet, modified_sheet, original_buffer=original_buffer,
+                                modified_buffer=modified_buffer, spill=spill)
+    except Exception:
+        if spill is not None:
+            spill.discard()
+        raise
+
+    sheet_changes['original_df'] = original_buffer.to_frame()
+    sheet_changes['modified_df'] = modified_buffer.to_frame()
+
+    # Use modified headers as primary, fall back to original if needed
+    sheet_changes['column_headers'] = modified_buffer.column_headers() or original_buffer.column_headers()
+
+    if spill is not None:
+        # Changes stay on disk; compare_sheet keeps this table
+        sheet_changes['modifications'] = spill.finish(sheet_changes['column_headers'])
+
+    return grid_diff
+
+
+def _diff_aligned(original_sheet, modified_sheet, sheet_changes, options, counts):
+    """Align rows by content, then diff cells of the aligned row pairs"""
+    original_values, modified_values = _load_sheet_grids(original_sheet, modified_sheet, sheet_changes, options)
+
+    aligned = align_sheet(original_values, modified_values)
+    sheet_changes['row_changes'] = aligned.row_changes
+    counts.update(aligned.counts)
+
+    return aligned.cells
+
+
+def _diff_keyed(original_sheet, modified_sheet, sheet_changes, options, counts):
+    """Match rows on the key columns with a hash join, then diff matched rows"""
+    original_values, modified_values = _load_sheet_grids(original_sheet, modified_sheet, sheet_changes, options)
+    column_headers = sheet_changes['column_headers']
+
+    key_columns = resolve_key_columns(column_headers, options.key_columns)
+    if not key_columns:
+        # Sheet lacks the key columns: fall back to aligning rows by content
+        aligned = align_sheet(original_values, modified_values)
+    else:
+        aligned = key_join_sheet(original_values, modified_values, key_columns)
+        for row_change in aligned.row_changes:
+            row_change['key_label'] = format_key(key_columns, row_change['key'], column_headers)
+
+    sheet_changes['key_columns'] = key_columns
+    sheet_changes['row_changes'] = aligned.row_changes
+    counts.update(aligned.counts)
+
+    return aligned.cells
+
+
+def _empty_counts() -> Dict[str, int]:
+    """Zeroed summary counters for one sheet"""
+    return {name: 0 for name in ('total_modifications',) + CHANGE_TYPES + ROW_COUNTERS + FORMULA_COUNTERS + STYLE_COUNTERS}
+
+
+def skipped_result(sheet_name: str) -> SheetResult:
+    """SheetResult for a sheet known to be identical in both workbooks"""
+    sheet_changes = new_sheet_changes()
+    sheet_changes['skipped'] = True
+    return SheetResult(sheet_name, sheet_changes, _empty_counts())
+
+
+def compare_sheet(sheet_name: str, original_sheet, modified_sheet, options: CompareOptions) -> SheetResult:
+    """
+    Compare one sheet
+
+    Either worksheet may be None when the sheet only exists on one side.
+
+    Args:
+        sheet_name: Sheet name
+        original_sheet: Worksheet from the original workbook, or None
+        modified_sheet: Worksheet from the modified workbook, or None
+        options: How to load and compare
+
+    Returns:
+        SheetResult with the sheet_changes record and summary counters
+    """
+    start = time.perf_counter()
+    sheet_changes = new_sheet_changes()
+    counts = _empty_counts()
+    cells_compared = 0
+
+    if original_sheet is None:
+        sheet_changes['sheet_added'] = True
+        sheet_changes['modified_df'], sheet_changes['column_headers'] = load_sheet_frame(modified_sheet, options)
+        sheet_changes['shape'] = (modified_sheet.max_row or 0, modified_sheet.max_column or 0)
+    elif modified_sheet is None:
+        sheet_changes['sheet_removed'] = True
+        sheet_changes['original_df'], sheet_changes['column_headers'] = load_sheet_frame(original_sheet, options)
+        sheet_changes['shape'] = (original_sheet.max_row or 0, original_sheet.max_column or 0)
+    else:
+        if options.mode == 'key':
+            diff_sheet = _diff_keyed
+        elif options.mode == 'aligned':
+            diff_sheet = _diff_aligned
+        elif options.formulas or options.styles:
+            diff_sheet = _diff_with_layers
+        elif options.streaming:
+            diff_sheet = _diff_streaming
+        else:
+            diff_sheet = _diff_in_memory
+
+        grid_diff = diff_sheet(original_sheet, modified_sheet, sheet_changes, options, counts)
+        sheet_changes['shape'] = grid_diff.shape
+
+        if not isinstance(sheet_changes['modifications'], SpilledModifications):
+            # Only the changed cells become modification records
+            sheet_changes['modifications'] = build_modifications(grid_diff, sheet_changes['column_headers'])
+
+        # Counters and lookups for the UI, so reruns never rescan the changes
+        sheet_changes['modification_index'] = ModificationIndex.build(sheet_changes['modifications'])
+
+        counts.update(grid_diff.counts)
+        counts['total_modifications'] = len(sheet_changes['modifications'])
+        cells_compared = grid_diff.cells_compared
+
+    return SheetResult(sheet_name, sheet_changes, counts, time.perf_counter() - start, cells_compared)
+
+
+def compare_workbook_sheets(original_wb, modified_wb, sheet_names: List[str], options: CompareOptions,
+                            on_result: Optional[Callable[[SheetResult], None]] = None) -> List[SheetResult]:
+    """
+    Compare the named sheets of two open workbooks, one after another
+
+    With read-only workbooks, sheets whose raw XML is identical are
+    skipped before any cell is parsed. on_result, if given, is called
+    with each SheetResult as soon as that sheet is done.
+    """
+    check_fingerprints = options.skip_identical and same_value_context(original_wb, modified_wb)
+    if options.styles:
+        # Identical sheet XML only means identical formatting under the same style table
+        check_fingerprints = check_fingerprints and same_styles(original_wb, modified_wb)
+
+    results = []
+    for sheet_name in sheet_names:
+        original_sheet = original_wb[sheet_name] if sheet_name in original_wb.sheetnames else None
+        modified_sheet = modified_wb[sheet_name] if sheet_name in modified_wb.sheetnames else None
+
+        if check_fingerprints and original_sheet is not None and modified_sheet is not None:
+            start = time.perf_counter()
+            fingerprint = sheet_fingerprint(original_sheet)
+            if fingerprint is not None and fingerprint == sheet_fingerprint(modified_sheet):
+                result = skipped_result(sheet_name)
+                result.seconds = time.perf_counter() - start
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+                continue
+
+        results.append(compare_sheet(sheet_name, original_sheet, modified_sheet, options))
+        if on_result is not None:
+            on_result(results[-1])
+    return results
+
+
+def merge_sheet_result(summary: Dict, changes: Dict, result: SheetResult):
+    """Add one SheetResult to a summary and changes dict, as compare_sheets() does"""
+    sheet_changes = result.sheet_changes
+
+    for key, count in result.counts.items():
+        summary[key] += count
+
+    if sheet_changes['skipped']:
+        summary['sheets_skipped'].append(result.sheet_name)
+    elif sheet_changes['sheet_added']:
+        summary['sheets_modified'].append(f"{result.sheet_name} (New Sheet)")
+    elif sheet_changes['sheet_removed']:
+        summary['sheets_modified'].append(f"{result.sheet_name} (Sheet Removed)")
+    elif (len(sheet_changes['modifications']) or sheet_changes['row_changes']
+          or len(sheet_changes['formula_changes']) or len(sheet_changes['style_changes'])):
+        summary['sheets_modified'].append(result.sheet_name)
+
+    changes[result.sheet_name] = sheet_changes
+
+
+def estimate_sheet_cells(workbook, sheet_name: str) -> int:
+    """Rough sheet size from its declared dimensions (0 if unknown)"""
+    if sheet_name not in workbook.sheetnames:
+        return 0
+    sheet = workbook[sheet_name]
+    return (sheet.max_row or 0) * (sheet.max_column or 0)
+
+
+def summarize_results(results: List[SheetResult], summary: Optional[Dict] = None) -> Tuple[Dict, Dict]:
+    """Fold SheetResults (in order) into a fresh summary and changes dict"""
+    summary = summary if summary is not None else new_summary()
+    changes = {}
+    for result in results:
+        merge_sheet_result(summary, changes, result)
+    return summary, changes
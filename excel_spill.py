@@ -0,0 +1,286 @@
+"""
+Out-of-Core Change Store
+
+For sheets with millions of rows even the changed cells can outgrow
+memory. The streaming diff can hand each block's changes to a ChangeSpill
+instead of keeping them: coordinates and change codes are appended to one
+raw file per column, and old/new values are written in segments of
+SEGMENT_CHANGES changes, typed as in the workbook cache (excel_workbook_cache).
+
+The result is a SpilledModifications, which reads like a ModificationTable:
+the coordinate columns are memory-mapped, so counts and the UI's row/col
+indexes stay vectorized, while values are only decoded for the segments a
+page, lookup or export actually touches. pages() walks the changes one
+ModificationTable at a time for the UI and exports.
+
+The spill directory is removed when the last SpilledModifications using it
+is garbage collected. Pickling one (e.g. back from a worker process) hands
+that ownership to the unpickled copy.
+"""
+
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from excel_diff_engine import GridDiff, Modification, ModificationTable, CHANGE_TYPES
+from excel_workbook_cache import encode_grid, decode_grid
+
+# Changes per value segment; the unit read back for a page or lookup
+SEGMENT_CHANGES = 65536
+
+# Default changes per page of SpilledModifications.pages()
+DEFAULT_PAGE_SIZE = 1000
+
+# Coordinate columns: file name -> dtype
+COLUMNS = {'rows': np.int32, 'cols': np.int32, 'codes': np.uint8}
+
+
+def _encode_values(old_values: np.ndarray, new_values: np.ndarray) -> Dict[str, np.ndarray]:
+    """Arrays for np.savez holding one segment's old and new values"""
+    pairs = np.empty((len(old_values), 2), dtype=object)
+    pairs[:, 0] = old_values
+    pairs[:, 1] = new_values
+    arrays = encode_grid(pairs)
+    if arrays is None:
+        # Values the typed encoding cannot store (e.g. huge ints): pickle them
+        return {'objects': pairs}
+    return arrays
+
+
+def _decode_values(path: str) -> np.ndarray:
+    """(n, 2) object array of (old, new) values written by _encode_values()"""
+    with np.load(path, allow_pickle=True) as arrays:
+        if 'objects' in arrays:
+            return arrays['objects']
+        return decode_grid(arrays)
+
+
+class ChangeSpill:
+    """Writes the changes of one streamed sheet to a spill directory, block by block"""
+
+    def __init__(self, spill_dir: Optional[str] = None):
+        """
+        Args:
+            spill_dir: Directory to create the spill in (default: system temp)
+        """
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix='excel_spill_', dir=spill_dir)
+        self._files = {name: open(os.path.join(self.path, f"{name}.bin"), 'wb') for name in COLUMNS}
+        self._pending: List[tuple] = []  # (old values, new values) not yet in a segment
+        self._pending_changes = 0
+        self.segment_starts = [0]  # Change offset of each value segment, plus the total
+        self.n_changes = 0
+
+    def append(self, part: GridDiff):
+        """Add one block's changes (rows already offset to sheet rows)"""
+        if not len(part):
+            return
+        self._files['rows'].write(part.rows.astype(np.int32, copy=False).tobytes())
+        self._files['cols'].write(part.cols.astype(np.int32, copy=False).tobytes())
+        self._files['codes'].write(part.codes.astype(np.uint8, copy=False).tobytes())
+        self.n_changes += len(part)
+
+        self._pending.append((part.old_values, part.new_values))
+        self._pending_changes += len(part)
+        while self._pending_changes >= SEGMENT_CHANGES:
+            self._flush_values(SEGMENT_CHANGES)
+
+    def _flush_values(self, n: int):
+        """Write the first n pending values as one segment"""
+        old_values = np.concatenate([old for old, _ in self._pending])
+        new_values = np.concatenate([new for _, new in self._pending])
+        segment = len(self.segment_starts) - 1
+        np.savez(os.path.join(self.path, f"values{segment}.npz"), **_encode_values(old_values[:n], new_values[:n]))
+        self.segment_starts.append(self.segment_starts[-1] + n)
+        self._pending = [(old_values[n:], new_values[n:])] if n < len(old_values) else []
+        self._pending_changes -= n
+
+    def finish(self, column_headers: Dict[int, str]) -> 'SpilledModifications':
+        """
+        Close the spill files
+
+        Args:
+            column_headers: 1-based column number -> header text
+
+        Returns:
+            SpilledModifications reading the spilled changes
+        """
+        if self._pending_changes:
+            self._flush_values(self._pending_changes)
+        for f in self._files.values():
+            f.close()
+        return SpilledModifications(self.path, self.n_changes, np.array(self.segment_starts, dtype=np.int64),
+                                    column_headers)
+
+    def discard(self):
+        """Remove the spill without reading it (e.g. after an error)"""
+        for f in self._files.values():
+            f.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class SpilledModifications:
+    """
+    Changed cells of one sheet, read from a spill directory
+
+    Supports what the UI and exports use of a ModificationTable: len(),
+    iteration, int lookups, slices (which return an in-memory
+    ModificationTable), where(), counts() and the rows/cols/codes arrays.
+    """
+    original_rows = None  # The streaming diff never re-aligns rows
+    values = None  # Values stay on disk; slices carry their own pool
+
+    def __init__(self, path: str, n_changes: int, segment_starts: np.ndarray, column_headers: Dict[int, str],
+                 positions: Optional[np.ndarray] = None, owner: bool = True):
+        """
+        Args:
+            path: Spill directory written by ChangeSpill
+            n_changes: Number of spilled changes
+            segment_starts: Change offset of each value segment, plus the total
+            column_headers: 1-based column number -> header text
+            positions: Spilled changes selected by where(), None for all
+            owner: Remove the spill directory once this object is collected
+        """
+        self.path = path
+        self.n_changes = n_changes
+        self.segment_starts = segment_starts
+        self.column_headers = column_headers
+        self.positions = positions
+        self._columns = {}
+        self._segment_cache = (None, None)  # (segment number, decoded values)
+        self._finalizer = weakref.finalize(self, shutil.rmtree, path, True) if owner else None
+
+    def __reduce__(self):
+        # The unpickled copy takes over removing the directory
+        owner = self._finalizer is not None and self._finalizer.detach() is not None
+        return (SpilledModifications,
+                (self.path, self.n_changes, self.segment_starts, self.column_headers, self.positions, owner))
+
+    def _column(self, name: str) -> np.ndarray:
+        """Memory-mapped coordinate column over all spilled changes"""
+        if name not in self._columns:
+            if self.n_changes:
+                self._columns[name] = np.memmap(os.path.join(self.path, f"{name}.bin"), dtype=COLUMNS[name],
+                                                mode='r', shape=(self.n_changes,))
+            else:
+                self._columns[name] = np.empty(0, dtype=COLUMNS[name])
+        return self._columns[name]
+
+    def _selected(self, name: str) -> np.ndarray:
+        column = self._column(name)
+        return column if self.positions is None else column[self.positions]
+
+    @property
+    def rows(self) -> np.ndarray:
+        return self._selected('rows')
+
+    @property
+    def cols(self) -> np.ndarray:
+        return self._selected('cols')
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._selected('codes')
+
+    def __len__(self):
+        return self.n_changes if self.positions is None else len(self.positions)
+
+    def _segment(self, segment: int) -> np.ndarray:
+        """Decoded (old, new) values of one segment; the last one read is kept"""
+        cached_segment, values = self._segment_cache
+        if cached_segment != segment:
+            values = _decode_values(os.path.join(self.path, f"values{segment}.npz"))
+            self._segment_cache = (segment, values)
+        return values
+
+    def _values_at(self, spilled: np.ndarray) -> np.ndarray:
+        """(n, 2) (old, new) values of the given spilled change offsets, in order"""
+        values = np.empty((len(spilled), 2), dtype=object)
+        segments = np.searchsorted(self.segment_starts, spilled, side='right') - 1
+        for segment in np.unique(segments).tolist():
+            selected = segments == segment
+            values[selected] = self._segment(segment)[spilled[selected] - self.segment_starts[segment]]
+        return values
+
+    def _spilled_offsets(self, key) -> np.ndarray:
+        """Spilled change offsets of an int, slice, mask or index array over this view"""
+        if isinstance(key, slice):
+            offsets = np.arange(*key.indices(len(self)))
+        else:
+            offsets = np.asarray(key)
+            if offsets.dtype == bool:
+                offsets = np.flatnonzero(offsets)
+            offsets = np.where(offsets < 0, offsets + len(self), offsets)
+        return offsets if self.positions is None else self.positions[offsets]
+
+    def _table(self, spilled: np.ndarray) -> ModificationTable:
+        """In-memory ModificationTable of the given spilled change offsets"""
+        values = self._values_at(spilled)
+        pool = [None] + values.ravel().tolist()
+        indexes = np.arange(1, 2 * len(spilled) + 1, dtype=np.int32).reshape(-1, 2)
+        return ModificationTable(
+            rows=np.asarray(self._column('rows')[spilled]),
+            cols=np.asarray(self._column('cols')[spilled]),
+            codes=np.asarray(self._column('codes')[spilled]),
+            old_index=indexes[:, 0].copy(),
+            new_index=indexes[:, 1].copy(),
+            values=pool,
+            column_headers=self.column_headers
+        )
+
+    def __getitem__(self, key):
+        """Modification for an int index; in-memory ModificationTable for a slice, mask or index array"""
+        if isinstance(key, (int, np.integer)):
+            spilled = int(self._spilled_offsets(key))
+            old, new = self._values_at(np.array([spilled]))[0]
+            return Modification(int(self._column('rows')[spilled]), int(self._column('cols')[spilled]),
+                                CHANGE_TYPES[self._column('codes')[spilled]], old, new,
+                                int(self._column('rows')[spilled]), self.column_headers)
+        return self._table(self._spilled_offsets(key))
+
+    def pages(self, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[ModificationTable]:
+        """
+        Walk the changes in order, one page at a time
+
+        Args:
+            page_size: Changes per page
+
+        Yields:
+            In-memory ModificationTables of at most page_size changes
+        """
+        for start in range(0, len(self), page_size):
+            yield self[start:start + page_size]
+
+    def __iter__(self) -> Iterator[Modification]:
+        for page in self.pages(SEGMENT_CHANGES):
+            yield from page
+
+    def where(self, change_types) -> 'SpilledModifications':
+        """Only the changes of the given CHANGE_TYPES names (values stay on disk)"""
+        wanted = [CHANGE_TYPES.index(name) for name in change_types]
+        selected = np.flatnonzero(np.isin(self.codes, wanted))
+        positions = selected if self.positions is None else self.positions[selected]
+        view = SpilledModifications(self.path, self.n_changes, self.segment_starts, self.column_headers,
+                                    positions, owner=False)
+        view._owner = self  # Keeps the directory alive while the view is in use
+        return view
+
+    def counts(self) -> Dict[str, int]:
+        """Number of changes per change type"""
+        counts = np.bincount(self.codes, minlength=len(CHANGE_TYPES))
+        return {name: int(counts[code]) for code, name in enumerate(CHANGE_TYPES)}
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in memory (the selection, if any); the changes themselves are on disk"""
+        return 0 if self.positions is None else self.positions.nbytes
+
+    @property
+    def disk_bytes(self) -> int:
+        """Size of the spill directory"""
+        return sum(entry.stat().st_size for entry in os.scandir(self.path))
@@ -0,0 +1,202 @@
+"""
+Cell Style Diff
+
+Compares cell formatting (font, fill, border, number format) between two
+read-only workbooks. Every distinct cell style of a workbook is reduced
+once to a 64-bit signature hashed from the XML of those four parts, so
+the same formatting gets the same signature in both workbooks even where
+their style tables are numbered differently. A sheet's per-cell style
+ids (read in the same pass as its values, excel_formulas) then map to a
+signature grid, and the two grids are compared with one vectorized !=.
+
+Only cell-level styles are compared; row and column default styles are
+not. Nothing here runs unless the style diff is turned on.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from openpyxl.styles.numbers import BUILTIN_FORMATS, BUILTIN_FORMATS_MAX_SIZE
+from openpyxl.xml.functions import tostring
+
+from excel_diff_engine import GridDiff, VALUE_TO_VALUE, CHANGE_TYPES, unchanged_values
+
+
+# Compared parts of a cell style, in signature order
+STYLE_PARTS = ('font', 'fill', 'border', 'number_format')
+
+
+@dataclass
+class StyleTable:
+    """Signatures and readable descriptions of a workbook's cell styles"""
+    signatures: np.ndarray  # int64 signature per style id
+    part_keys: List[Tuple[bytes, ...]]  # Per style id: serialized STYLE_PARTS
+    descriptions: List[Tuple[str, ...]]  # Per style id: readable STYLE_PARTS
+
+    def __len__(self):
+        return len(self.signatures)
+
+
+def _color(color) -> Optional[str]:
+    """Readable color: ARGB, theme or palette index"""
+    if color is None:
+        return None
+    if color.type == 'rgb':
+        return color.rgb
+    return f"{color.type} {color.value}"
+
+
+def _describe_font(font) -> str:
+    parts = [font.name or "", f"{font.sz:g}" if font.sz else ""]
+    parts += [flag for flag, on in (("bold", font.b), ("italic", font.i), ("underline", font.u),
+                                    ("strike", font.strike)) if on]
+    color = _color(font.color)
+    if color:
+        parts.append(color)
+    return " ".join(part for part in parts if part) or "default"
+
+
+def _describe_fill(fill) -> str:
+    pattern = getattr(fill, 'patternType', None)
+    if pattern is None:
+        return "gradient" if getattr(fill, 'stop', None) else "none"
+    color = _color(fill.fgColor)
+    return f"{pattern} {color}" if color else pattern
+
+
+def _describe_border(border) -> str:
+    sides = [f"{side}={getattr(border, side).style}" for side in ('left', 'right', 'top', 'bottom')
+             if getattr(border, side) is not None and getattr(border, side).style]
+    return " ".join(sides) or "none"
+
+
+def _number_format(workbook, format_id: int) -> str:
+    if format_id < BUILTIN_FORMATS_MAX_SIZE:
+        return BUILTIN_FORMATS.get(format_id, "General")
+    return workbook._number_formats[format_id - BUILTIN_FORMATS_MAX_SIZE]
+
+
+def workbook_styles(workbook) -> Optional[StyleTable]:
+    """
+    Style table of an openpyxl workbook (computed once per workbook)
+
+    Args:
+        workbook: openpyxl workbook (read-only or full)
+
+    Returns:
+        StyleTable indexed by style id, or None for workbooks without
+        style information (e.g. from the parsed-workbook cache)
+    """
+    table = getattr(workbook, '_diff_style_table', None)
+    if table is not None:
+        return table
+    cell_styles = getattr(workbook, '_cell_styles', None)
+    if cell_styles is None:
+        return None
+
+    # Style parts are shared between cell styles; serialize each one once
+    serialized: Dict[Tuple[str, int], bytes] = {}
+
+    def part_xml(name: str, collection, index: int) -> bytes:
+        key = (name, index)
+        if key not in serialized:
+            serialized[key] = tostring(collection[index].to_tree())
+        return serialized[key]
+
+    signatures = np.zeros(len(cell_styles), dtype=np.int64)
+    part_keys = []
+    descriptions = []
+    for style_id, style in enumerate(cell_styles):
+        number_format = _number_format(workbook, style.numFmtId)
+        keys = (part_xml('font', workbook._fonts, style.fontId),
+                part_xml('fill', workbook._fills, style.fillId),
+                part_xml('border', workbook._borders, style.borderId),
+                number_format.encode('utf-8'))
+        digest = hashlib.blake2b(b'\0'.join(keys), digest_size=8).digest()
+        signatures[style_id] = int.from_bytes(digest, 'little', signed=True)
+        part_keys.append(keys)
+        descriptions.append((_describe_font(workbook._fonts[style.fontId]),
+                             _describe_fill(workbook._fills[style.fillId]),
+                             _describe_border(workbook._borders[style.borderId]),
+                             number_format))
+
+    table = StyleTable(signatures, part_keys, descriptions)
+    workbook._diff_style_table = table
+    return table
+
+
+def same_styles(original_wb, modified_wb) -> bool:
+    """True if both workbooks number their cell styles identically"""
+    original = workbook_styles(original_wb)
+    modified = workbook_styles(modified_wb)
+    return (original is not None and modified is not None
+            and np.array_equal(original.signatures, modified.signatures))
+
+
+def _signature_grid(style_ids: np.ndarray, table: StyleTable, n_rows: int,
+                    n_cols: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(signatures, style ids) of a style id grid padded with the default style to (n_rows, n_cols)"""
+    padded = np.zeros((n_rows, n_cols), dtype=np.int32)
+    rows, cols = min(style_ids.shape[0], n_rows), min(style_ids.shape[1], n_cols)
+    padded[:rows, :cols] = np.clip(style_ids[:rows, :cols], 0, len(table) - 1)
+    return table.signatures[padded], padded
+
+
+def describe_style_change(original: StyleTable, original_id: int, modified: StyleTable,
+                          modified_id: int) -> Tuple[str, str]:
+    """Readable (old, new) of the style parts that differ between two styles"""
+    old_parts, new_parts = [], []
+    for i, name in enumerate(STYLE_PARTS):
+        if original.part_keys[original_id][i] != modified.part_keys[modified_id][i]:
+            label = name.replace('_', ' ')
+            old_parts.append(f"{label}: {original.descriptions[original_id][i]}")
+            new_parts.append(f"{label}: {modified.descriptions[modified_id][i]}")
+    return "; ".join(old_parts), "; ".join(new_parts)
+
+
+def diff_styles(original_ids: np.ndarray, modified_ids: np.ndarray, original: StyleTable,
+                modified: StyleTable, value_diff: GridDiff) -> Tuple[GridDiff, np.ndarray]:
+    """
+    Diff per-cell styles and flag changes whose value did not change
+
+    Args:
+        original_ids: Style id grid of the original sheet
+        modified_ids: Style id grid of the modified sheet
+        original: Style table of the original workbook
+        modified: Style table of the modified workbook
+        value_diff: diff_grids() result for the same sheets' values
+
+    Returns:
+        (style GridDiff over the same padded shape as value_diff, whose
+        old/new values describe the differing style parts; bool array per
+        style change: True where the value is unchanged)
+    """
+    n_rows, n_cols = value_diff.shape
+    old_signatures, old_ids = _signature_grid(original_ids, original, n_rows, n_cols)
+    new_signatures, new_ids = _signature_grid(modified_ids, modified, n_rows, n_cols)
+
+    rows, cols = np.nonzero(old_signatures != new_signatures)
+
+    # Describe each distinct (old style, new style) pair once
+    pairs = np.stack([old_ids[rows, cols], new_ids[rows, cols]], axis=1)
+    distinct, inverse = np.unique(pairs, axis=0, return_inverse=True)
+    described = [describe_style_change(original, int(old_id), modified, int(new_id))
+                 for old_id, new_id in distinct]
+    old_text = np.empty(len(distinct), dtype=object)
+    new_text = np.empty(len(distinct), dtype=object)
+    old_text[:] = [old for old, _ in described]
+    new_text[:] = [new for _, new in described]
+    inverse = inverse.reshape(-1)
+
+    style_diff = GridDiff(
+        rows=(rows + 1).astype(np.int32),
+        cols=(cols + 1).astype(np.int32),
+        codes=np.full(len(rows), VALUE_TO_VALUE, dtype=np.uint8),
+        old_values=old_text[inverse],
+        new_values=new_text[inverse],
+        shape=(n_rows, n_cols),
+        counts={name: 0 for name in CHANGE_TYPES}
+    )
+    return style_diff, unchanged_values(style_diff, value_diff)
@@ -0,0 +1,421 @@
+"""
+Parsed Workbook Cache
+
+Disk cache of parsed sheet grids, keyed by the SHA-256 of the workbook
+file, so comparing against a known template skips openpyxl entirely.
+
+Each entry is a directory holding a manifest and one .npz per sheet. A
+sheet is stored column-major as typed NumPy arrays (no pickling): a
+uint8 type code per cell plus int64/float64 value arrays and one UTF-8
+string blob. Entries are evicted least-recently-used once the cache
+grows past its size budget.
+
+Entries also keep each sheet's raw row fingerprints and the workbook's
+value context, so a cached template can serve as the baseline for an
+incremental load of its next revision (excel_incremental).
+
+Entries are shared by sessions and worker processes, and are written
+once: storing a workbook that already has a valid entry leaves it alone.
+Sheets of a loaded entry are read lazily; if the entry has been evicted
+in the meantime, the sheet is parsed again from the workbook file.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from excel_diff_engine import open_workbook, sheet_to_array
+from excel_fingerprint import row_fingerprints, value_context_digest
+
+# Bump when the on-disk layout changes; older entries are ignored
+CACHE_FORMAT_VERSION = 3
+
+DEFAULT_CACHE_DIR = 'excel_cache'
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB
+
+# Marks a directory being written by store(); never a complete entry
+TEMP_SUFFIX = '.tmp'
+
+# Sessions and job workers store from threads of one process: the check for a
+# valid entry and the move into place must not interleave
+_store_lock = threading.Lock()
+
+# Cell type codes
+EMPTY, INT, FLOAT, STR, BOOL, DATETIME, DATE, TIME, TIMEDELTA = range(9)
+
+TYPE_CODES = {
+    type(None): EMPTY,
+    int: INT,
+    float: FLOAT,
+    str: STR,
+    bool: BOOL,
+    datetime.datetime: DATETIME,
+    datetime.date: DATE,
+    datetime.time: TIME,
+    datetime.timedelta: TIMEDELTA,
+}
+UNSUPPORTED = 255
+
+# Strings are joined with NUL, which XML (and so .xlsx) cannot contain
+STRING_SEPARATOR = '\x00'
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def _time_to_us(value: datetime.time) -> int:
+    """Microseconds since midnight"""
+    return ((value.hour * 60 + value.minute) * 60 + value.second) * 1_000_000 + value.microsecond
+
+
+def _us_to_time(us: int) -> datetime.time:
+    """Inverse of _time_to_us()"""
+    seconds, microsecond = divmod(us, 1_000_000)
+    minutes, second = divmod(seconds, 60)
+    hour, minute = divmod(minutes, 60)
+    return datetime.time(hour, minute, second, microsecond)
+
+
+def encode_grid(values: np.ndarray) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Encode an object grid as typed columnar arrays
+
+    Args:
+        values: 2-D object array from sheet_to_array()
+
+    Returns:
+        Dict of arrays for np.savez, or None if a cell holds a type the
+        cache cannot store (the sheet is then simply not cached)
+    """
+    flat = values.ravel(order='F')  # Column-major: one column after another
+    codes = np.fromiter((TYPE_CODES.get(type(v), UNSUPPORTED) for v in flat), dtype=np.uint8, count=flat.size)
+    if (codes == UNSUPPORTED).any():
+        return None
+
+    # Every non-float, non-string value becomes one int64
+    int_mask = np.isin(codes, (INT, BOOL, DATETIME, DATE, TIME, TIMEDELTA))
+    int_values = flat[int_mask]
+    int_codes = codes[int_mask]
+    ints = np.empty(int_values.size, dtype=np.int64)
+    try:
+        for code, convert in ((INT, int), (BOOL, int),
+                              (DATETIME, lambda v: (v - _EPOCH) // datetime.timedelta(microseconds=1)),
+                              (DATE, lambda v: v.toordinal()),
+                              (TIME, _time_to_us),
+                              (TIMEDELTA, lambda v: v // datetime.timedelta(microseconds=1))):
+            selected = int_codes == code
+            if selected.any():
+                ints[selected] = [convert(v) for v in int_values[selected]]
+    except (OverflowError, TypeError):
+        # Integers beyond int64, timezone-aware datetimes
+        return None
+
+    strings = STRING_SEPARATOR.join(flat[codes == STR].tolist()).encode('utf-8')
+
+    return {
+        'shape': np.array(values.shape, dtype=np.int64),
+        'codes': codes,
+        'ints': ints,
+        'floats': flat[codes == FLOAT].astype(np.float64),
+        'strings': np.frombuffer(strings, dtype=np.uint8),
+    }
+
+
+def decode_grid(arrays) -> np.ndarray:
+    """Rebuild the object grid written by encode_grid()"""
+    shape = tuple(int(n) for n in arrays['shape'])
+    codes = arrays['codes']
+    flat = np.full(codes.size, None, dtype=object)
+
+    flat[codes == FLOAT] = arrays['floats'].tolist()
+
+    if (codes == STR).any():
+        flat[codes == STR] = arrays['strings'].tobytes().decode('utf-8').split(STRING_SEPARATOR)
+
+    int_mask = np.isin(codes, (INT, BOOL, DATETIME, DATE, TIME, TIMEDELTA))
+    ints = arrays['ints']
+    int_codes = codes[int_mask]
+    int_values = np.empty(ints.size, dtype=object)
+    for code, convert in ((INT, lambda a: a.tolist()),
+                          (BOOL, lambda a: a.astype(bool).tolist()),
+                          (DATETIME, lambda a: a.astype('datetime64[us]').astype(object)),
+                          (DATE, lambda a: [datetime.date.fromordinal(int(v)) for v in a]),
+                          (TIME, lambda a: [_us_to_time(int(v)) for v in a]),
+                          (TIMEDELTA, lambda a: a.astype('timedelta64[us]').astype(object))):
+        selected = int_codes == code
+        if selected.any():
+            int_values[selected] = convert(ints[selected])
+    flat[int_mask] = int_values
+
+    return flat.reshape(shape, order='F')
+
+
+def grid_digest(arrays: Dict[str, np.ndarray]) -> str:
+    """Content hash of an encoded grid; equal digests mean equal cell values"""
+    digest = hashlib.sha256()
+    for name in ('shape', 'codes', 'ints', 'floats', 'strings'):
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+        digest.update(b'|')
+    return digest.hexdigest()
+
+
+class CachedSheet:
+    """Worksheet stand-in backed by a cached grid (read by sheet_to_array and iter_rows)"""
+
+    def __init__(self, parent, title: str, value_digest: Optional[str], shape, path: Optional[str] = None,
+                 grid: Optional[np.ndarray] = None, row_fingerprints=None):
+        self.parent = parent
+        self.title = title
+        self.value_digest = value_digest  # grid_digest() of the cell values, None if not computed
+        self.shape = tuple(shape)
+        self._path = path
+        self._grid = grid
+        self._row_fingerprints = row_fingerprints
+
+    @property
+    def grid(self) -> np.ndarray:
+        """The sheet's object grid, loaded from disk on first use"""
+        if self._grid is None:
+            try:
+                with np.load(self._path, allow_pickle=False) as arrays:
+                    self._grid = decode_grid(arrays)
+            except OSError:
+                # Entry evicted since it was loaded: a cache miss
+                self._grid = self._reparse(sheet_to_array)
+        return self._grid
+
+    @property
+    def row_fingerprints(self):
+        """(row numbers, digests) of the sheet XML's rows, or None if unknown"""
+        if self._row_fingerprints is None and self._path is not None:
+            try:
+                with np.load(self._path, allow_pickle=False) as arrays:
+                    if 'row_numbers' in arrays:
+                        self._row_fingerprints = (arrays['row_numbers'], arrays['row_digests'])
+            except OSError:
+                self._row_fingerprints = self._reparse(row_fingerprints)
+        return self._row_fingerprints
+
+    def _reparse(self, read):
+        """Read the sheet from the workbook file the cache entry was made from"""
+        source = getattr(self.parent, 'source', None)
+        if source is None:
+            raise FileNotFoundError(f"Cache entry of sheet '{self.title}' was removed and its workbook is unknown")
+        workbook = open_workbook(source, read_only=True)
+        try:
+            return read(workbook[self.title])
+        finally:
+            workbook.close()
+
+    @property
+    def max_row(self) -> int:
+        return self.shape[0]
+
+    @property
+    def max_column(self) -> int:
+        return self.shape[1]
+
+    def iter_rows(self, min_row=None, max_row=None, values_only=True):
+        """Rows as value tuples, like openpyxl's iter_rows(values_only=True)"""
+        start = (min_row or 1) - 1
+        stop = max_row if max_row is not None else self.grid.shape[0]
+        for row in self.grid[start:stop].tolist():
+            yield tuple(row)
+
+
+class CachedWorkbook:
+    """Workbook stand-in for a cache entry: sheet names plus CachedSheets"""
+
+    from_cache = True
+
+    def __init__(self, digest: str, sheets: List[CachedSheet], context: Optional[str] = None, source=None):
+        self.digest = digest
+        self.context = context  # value_context_digest() of the source workbook
+        self.source = source  # Workbook file (path or file-like) to reparse evicted sheets from
+        self._sheets = {}
+        for sheet in sheets:
+            sheet.parent = self
+            self._sheets[sheet.title] = sheet
+
+    @property
+    def sheetnames(self) -> List[str]:
+        return list(self._sheets)
+
+    @property
+    def worksheets(self) -> List[CachedSheet]:
+        return list(self._sheets.values())
+
+    def __getitem__(self, name: str) -> CachedSheet:
+        return self._sheets[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sheets
+
+    def close(self):
+        """Nothing to close; matches openpyxl's read-only Workbook.close()"""
+
+
+class WorkbookCache:
+    """Disk cache of parsed workbooks with LRU eviction under a size budget"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize workbook cache
+
+        Args:
+            cache_dir: Directory holding one subdirectory per cached workbook
+            max_bytes: Size budget; least recently used entries are evicted past it
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_dir(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, digest)
+
+    def _manifest(self, digest: str) -> Optional[Dict]:
+        """Manifest of a complete, current-format entry (marked as recently used), or None"""
+        manifest_path = os.path.join(self._entry_dir(digest), 'manifest.json')
+        try:
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') != CACHE_FORMAT_VERSION:
+                return None
+            os.utime(manifest_path)
+        except (OSError, ValueError):
+            return None
+        return manifest
+
+    def load(self, digest: str, source=None) -> Optional[CachedWorkbook]:
+        """
+        Cached workbook for a file digest
+
+        Args:
+            digest: SHA-256 of the workbook file (see excel_fingerprint.file_digest)
+            source: The workbook file (path or file-like); sheets whose entry
+                is evicted before they are read are parsed from it
+
+        Returns:
+            CachedWorkbook whose sheets load lazily, or None on a miss
+        """
+        manifest = self._manifest(digest)
+        if manifest is None:
+            return None
+
+        entry_dir = self._entry_dir(digest)
+        sheets = [CachedSheet(None, sheet['title'], sheet['digest'], sheet['shape'],
+                              path=os.path.join(entry_dir, sheet['file']))
+                  for sheet in manifest['sheets']]
+        return CachedWorkbook(digest, sheets, manifest.get('context'), source)
+
+    def store(self, digest: str, workbook) -> Optional[CachedWorkbook]:
+        """
+        Parse every sheet of a workbook and cache the grids
+
+        Args:
+            digest: SHA-256 of the workbook file
+            workbook: openpyxl workbook (read-only works)
+
+        Returns:
+            CachedWorkbook holding the parsed grids in memory, or None if a
+            sheet holds values the cache cannot store
+        """
+        sheets = []
+        encoded = []
+        for title in workbook.sheetnames:
+            sheet = workbook[title]
+            grid = sheet_to_array(sheet)
+            arrays = encode_grid(grid)
+            if arrays is None:
+                return None
+            fingerprints = (sheet.row_fingerprints if isinstance(sheet, CachedSheet)
+                            else row_fingerprints(sheet))
+            if fingerprints is not None:
+                arrays['row_numbers'], arrays['row_digests'] = fingerprints
+            sheets.append(CachedSheet(None, title, grid_digest(arrays), grid.shape, grid=grid,
+                                      row_fingerprints=fingerprints))
+            encoded.append(arrays)
+        context = value_context_digest(workbook)
+
+        if self._manifest(digest) is not None:
+            # Stored meanwhile by another session or worker, which may be reading its files
+            return CachedWorkbook(digest, sheets, context)
+
+        # Write into a temporary directory of this call only, then move it into place
+        entry_dir = self._entry_dir(digest)
+        temp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix=digest, suffix=TEMP_SUFFIX)
+
+        manifest = {'version': CACHE_FORMAT_VERSION, 'created': time.time(), 'context': context, 'sheets': []}
+        for index, (sheet, arrays) in enumerate(zip(sheets, encoded)):
+            file_name = f"sheet{index}.npz"
+            np.savez(os.path.join(temp_dir, file_name), **arrays)
+            manifest['sheets'].append({'title': sheet.title, 'file': file_name, 'digest': sheet.value_digest,
+                                       'shape': list(sheet.shape)})
+        with open(os.path.join(temp_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+
+        with _store_lock:
+            if self._manifest(digest) is not None:
+                # Another thread stored the same workbook first: keep its entry
+                shutil.rmtree(temp_dir, ignore_errors=True)
+            else:
+                # Only an incomplete or outdated entry is in the way; nothing reads those
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                try:
+                    os.replace(temp_dir, entry_dir)
+                except OSError:
+                    # Another process stored the same workbook first
+                    shutil.rmtree(temp_dir, ignore_errors=True)
+
+        self.evict()
+        return CachedWorkbook(digest, sheets, context)
+
+    def _entries(self):
+        """(last_used, size, path) for every complete entry"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(TEMP_SUFFIX):
+                continue  # Still being written
+            entry_dir = os.path.join(self.cache_dir, name)
+            manifest_path = os.path.join(entry_dir, 'manifest.json')
+            if not os.path.isfile(manifest_path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(entry_dir) if entry.is_file())
+            entries.append((os.path.getmtime(manifest_path), size, entry_dir))
+        return entries
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits its budget"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+
+    def get_statistics(self) -> Dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dict with entry count and total size
+        """
+        entries = self._entries()
+        return {
+            'workbooks': len(entries),
+            'total_bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+        }
+
+    def clear(self):
+        """Remove all cached workbooks"""
+        for _, _, entry_dir in self._entries():
+            shutil.rmtree(entry_dir, ignore_errors=True)
@@ -5,6 +5,7 @@ This is the entry point for PyInstaller
 
 import sys
 import os
+import multiprocessing
 from pathlib import Path
 
 # Add the script directory to Python path
@@ -41,4 +42,6 @@ def main():
     sys.exit(stcli.main())
 
 if __name__ == "__main__":
+    # Needed in the frozen executable so worker processes start correctly
+    multiprocessing.freeze_support()
     main()
@@ -22,6 +22,8 @@ from typing import List, Dict, Optional, Any
 from dataclasses import dataclass
 from enum import Enum
 
+from model_manager import model_registry
+
 try:
     from llama_cpp import Llama
     LLAMA_CPP_AVAILABLE = True
@@ -174,21 +176,25 @@ Identify the most critical change and explain its potential impact (2-3 sentence
             print("[!] No model path specified")
             return None
 
-        try:
-            print(f"[i] Loading LLM model: {self.model_path}...")
+        # Determine GPU layers
+        n_gpu_layers = -1 if self.use_gpu else 0
 
-            # Determine GPU layers
-            n_gpu_layers = -1 if self.use_gpu else 0
-
-            self._model = Llama(
+        def load():
+            print(f"[i] Loading LLM model: {self.model_path}...")
+            model = Llama(
                 model_path=self.model_path,
                 n_ctx=self.n_ctx,
                 n_threads=self.n_threads,
                 n_gpu_layers=n_gpu_layers,
                 verbose=False
             )
-
             print("[+] Model loaded successfully")
+            return model
+
+        try:
+            # The context size and thread count are fixed at load time, so they are part of the name
+            name = f"{self.model_path} (n_ctx={self.n_ctx}, n_threads={self.n_threads})"
+            self._model = model_registry().get('llm', name, 'gpu' if self.use_gpu else 'cpu', load)
             return self._model
 
         except Exception as e:
@@ -255,13 +261,15 @@ Identify the most critical change and explain its potential impact (2-3 sentence
 
         try:
             # Generate response
-            output = model(
-                prompt,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                stop=["User:", "Question:", "\n\n\n"],
-                echo=False
-            )
+            # One generation at a time per loaded model
+            with model_registry().using(model):
+                output = model(
+                    prompt,
+                    max_tokens=self.max_tokens,
+                    temperature=self.temperature,
+                    stop=["User:", "Question:", "\n\n\n"],
+                    echo=False
+                )
 
             # Extract generated text
             generated_text = output['choices'][0]['text'].strip()
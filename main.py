@@ -8,11 +8,28 @@ from datetime import datetime
 import json
 import io
 import base64
+import tempfile
 from pathlib import Path
+from functools import partial
 import difflib
 import html
 import streamlit.components.v1 as components
 
+from excel_diff_engine import is_blank, open_workbook, read_header_names, CHANGE_TYPES
+from excel_sheet_compare import (
+    MODES, CompareOptions, new_summary, sheet_order, load_sheet_frame,
+    compare_workbook_sheets, merge_sheet_result, estimate_sheet_cells, skipped_result
+)
+from excel_fingerprint import file_digest
+from excel_workbook_cache import WorkbookCache, DEFAULT_MAX_BYTES
+from excel_incremental import IncrementalStats, load_workbook_incremental
+from excel_diff_export import write_diff_workbook, write_text_report, write_json_report, format_value
+from excel_grid_view import grid_view, grid_shape, build_change_index, read_sheet_window, VIRTUAL_GRID_MIN_CELLS
+from excel_parallel import compare_sheets_parallel, default_workers
+from excel_nway import compare_against_template, write_heatmap_workbook
+from excel_delimited import delimiter_for
+from comparison_jobs import job_registry, show_job_progress, track_job, no_progress
+
 # Page configuration
 st.set_page_config(
     page_title="Excel Diff Visualizer",
@@ -311,142 +328,146 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 class ExcelDiffVisualizer:
-    def __init__(self, original_file, modified_file):
-        self.original_wb = openpyxl.load_workbook(original_file, data_only=True)
-        self.modified_wb = openpyxl.load_workbook(modified_file, data_only=True)
+    MODES = MODES  # See excel_sheet_compare
+    
+    def __init__(self, original_file, modified_file, streaming=False, keep_frames=True, mode='cell',
+                 key_columns=None, workers=1, cache=None, baselines=None, formulas=False,
+                 styles=False, spill_dir=None):
+        # Workbooks are opened read-only so sheets are parsed lazily: identical
+        # sheets (same raw XML) are skipped without parsing any cells.
+        # Streaming mode diffs rows in blocks, keeping only compact column
+        # buffers (or nothing, if keep_frames is False). With a spill_dir,
+        # the changes themselves are written to disk there (excel_spill).
+        # With workers > 1, sheets are diffed in a process pool; each worker
+        # reopens the files read-only.
+        # With a WorkbookCache, parsed grids are stored by file hash and reused,
+        # so a known file (e.g. a template) is never parsed twice.
+        # With baselines (a list, possibly empty), workbooks are loaded into
+        # memory row by row, copying rows whose raw XML matches a baseline
+        # (the template, the previous revision) instead of parsing them.
+        # With formulas / styles, cell mode also diffs formula text / cell
+        # formatting, read in the same pass as the cached values; cached
+        # grids hold neither, so the cache and baselines are not used then.
+        # CSV/TSV files are read in typed row blocks on every run
+        # (excel_delimited); they bypass the cache and baselines, which
+        # would hold their whole grids in memory.
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown comparison mode: {mode}")
+        if mode == 'key' and not key_columns:
+            raise ValueError("Key mode needs at least one key column")
+        if formulas and mode != 'cell':
+            raise ValueError("Formula comparison is only available in cell mode")
+        if styles and mode != 'cell':
+            raise ValueError("Style comparison is only available in cell mode")
+        self.formulas = formulas
+        self.styles = styles
+        self.reads_sheet_xml = formulas or styles  # Needs the workbook files, not cached grids
+        self.delimited = delimiter_for(original_file) is not None or delimiter_for(modified_file) is not None
+        self.streaming = streaming
+        self.keep_frames = keep_frames
+        self.spill_dir = spill_dir
+        self.mode = mode
+        self.key_columns = list(key_columns or [])  # Header names or column letters
+        self.workers = max(1, int(workers or 1))
+        self.original_file = original_file
+        self.modified_file = modified_file
+        self.cache = cache
+        self.incremental = baselines is not None
+        self.baselines = [baseline for baseline in (baselines or []) if baseline is not None]
+        self.load_stats = IncrementalStats()  # Rows reused/parsed by incremental loading
+        self.original_digest = file_digest(original_file)
+        self.modified_digest = file_digest(modified_file)
+        self.files_identical = self.original_digest == self.modified_digest
+        self.cache_hits = []  # 'original' / 'modified' when served from the cache or session
+        self.original_wb = self._open_workbook(original_file, self.original_digest, 'original')
+        self.modified_wb = self._open_workbook(modified_file, self.modified_digest, 'modified')
         self.changes = {}
-        self.summary = {
-            'total_modifications': 0,
-            'sheets_modified': [],
-            'blank_to_value': 0,  # Previously "added"
-            'value_to_blank': 0,  # Previously "removed"
-            'value_to_value': 0,  # Previously "modified"
-        }
-    
-    def get_sheet_as_dataframe(self, sheet):
+        self.summary = new_summary()
+        self.sheet_timings = {}  # Seconds spent per sheet
+        self._change_indexes = {}  # Per-sheet change lookups for the virtualized grid
+    
+    def _open_workbook(self, source, digest, side):
+        """Cached workbook for the file if available, otherwise open (and cache) it"""
+        if (self.files_identical or self.reads_sheet_xml or self.delimited
+                or (self.cache is None and not self.incremental)):
+            return open_workbook(source, read_only=True)
+        
+        for baseline in self.baselines:
+            if baseline.digest == digest:
+                self.cache_hits.append(side)
+                return baseline
+        
+        cached = self.cache.load(digest, source) if self.cache is not None else None
+        if cached is not None:
+            self.cache_hits.append(side)
+            return cached
+        
+        workbook = open_workbook(source, read_only=True)
+        if self.incremental:
+            # The template opened first is a baseline for the modified file too
+            baselines = self.baselines + [wb for wb in (getattr(self, 'original_wb', None),)
+                                          if getattr(wb, 'from_cache', False)]
+            loaded = load_workbook_incremental(workbook, digest, baselines)
+            if loaded is not None:
+                workbook.close()
+                workbook, stats = loaded
+                self.load_stats.merge(stats)
+        
+        if self.cache is None:
+            return workbook
+        stored = self.cache.store(digest, workbook)
+        if stored is None:
+            return workbook  # Holds values the cache cannot store
+        workbook.close()
+        return stored
+    
+    @property
+    def options(self):
+        """Compare options shared by the serial and parallel paths"""
+        return CompareOptions(mode=self.mode, key_columns=self.key_columns,
+                              streaming=self.streaming, keep_frames=self.keep_frames,
+                              formulas=self.formulas, styles=self.styles, spill_dir=self.spill_dir)
+    
+    def get_sheet_as_dataframe(self, sheet, values=None):
         """Convert sheet to DataFrame for easier comparison"""
-        data = []
-        max_row = sheet.max_row
-        max_col = sheet.max_column
-        
-        # Store headers separately (assuming first row contains headers)
-        headers = {}
-        if max_row >= 1:
-            for col in range(1, max_col + 1):
-                cell = sheet.cell(row=1, column=col)
-                if cell.value:
-                    headers[col] = str(cell.value)
-                else:
-                    headers[col] = get_column_letter(col)
+        frame, self.column_headers = load_sheet_frame(sheet, self.options, values)
+        return frame
+    
+    def compare_sheets(self, progress=None):
+        """
+        Compare all sheets in the workbooks
         
-        for row in range(1, max_row + 1):
-            row_data = []
-            for col in range(1, max_col + 1):
-                cell = sheet.cell(row=row, column=col)
-                # Store None for empty cells to distinguish from empty string
-                row_data.append(cell.value if cell.value is not None else None)
-            data.append(row_data)
+        Args:
+            progress: Optional JobProgress (comparison_jobs), told about each finished sheet
+        """
+        sheet_names = sheet_order(self.original_wb.sheetnames, self.modified_wb.sheetnames)
+        finished = []
         
-        # Create column headers
-        columns = [get_column_letter(i) for i in range(1, max_col + 1)]
+        def on_result(result):
+            finished.append(result.sheet_name)
+            if progress is not None:
+                progress('diff', len(finished) / len(sheet_names), result.sheet_name)
         
-        if data:
-            df = pd.DataFrame(data, columns=columns[:len(data[0])])
+        if self.files_identical:
+            # Byte-identical uploads: nothing to compare
+            results = [skipped_result(name) for name in sheet_names]
+        elif self.workers > 1 and len(sheet_names) > 1:
+            weights = {name: max(estimate_sheet_cells(self.original_wb, name),
+                                 estimate_sheet_cells(self.modified_wb, name))
+                       for name in sheet_names}
+            cached = {}
+            if self.cache and not (self.reads_sheet_xml or self.delimited):
+                cached = {'cache_dir': self.cache.cache_dir,
+                          'digests': (self.original_digest, self.modified_digest)}
+            results = compare_sheets_parallel(self.original_file, self.modified_file, sheet_names,
+                                              self.options, self.workers, weights, on_result=on_result, **cached)
         else:
-            df = pd.DataFrame()
-        
-        # Store headers for later use
-        self.column_headers = headers
-        
-        return df
-    
-    def compare_sheets(self):
-        """Compare all sheets in the workbooks"""
-        all_sheets = set(self.original_wb.sheetnames) | set(self.modified_wb.sheetnames)
-        
-        for sheet_name in all_sheets:
-            sheet_changes = {
-                'modifications': [],  # All changes are now modifications
-                'sheet_added': False,
-                'sheet_removed': False,
-                'original_df': None,
-                'modified_df': None,
-                'column_headers': {}
-            }
-            
-            # Check if sheet exists in both workbooks
-            if sheet_name not in self.original_wb.sheetnames:
-                sheet_changes['sheet_added'] = True
-                sheet_changes['modified_df'] = self.get_sheet_as_dataframe(self.modified_wb[sheet_name])
-                sheet_changes['column_headers'] = getattr(self, 'column_headers', {})
-                self.summary['sheets_modified'].append(f"{sheet_name} (New Sheet)")
-            elif sheet_name not in self.modified_wb.sheetnames:
-                sheet_changes['sheet_removed'] = True
-                sheet_changes['original_df'] = self.get_sheet_as_dataframe(self.original_wb[sheet_name])
-                sheet_changes['column_headers'] = getattr(self, 'column_headers', {})
-                self.summary['sheets_modified'].append(f"{sheet_name} (Sheet Removed)")
-            else:
-                # Get both sheets as DataFrames
-                original_sheet = self.original_wb[sheet_name]
-                modified_sheet = self.modified_wb[sheet_name]
-                
-                sheet_changes['original_df'] = self.get_sheet_as_dataframe(original_sheet)
-                original_headers = dict(getattr(self, 'column_headers', {}))
-                
-                sheet_changes['modified_df'] = self.get_sheet_as_dataframe(modified_sheet)
-                modified_headers = dict(getattr(self, 'column_headers', {}))
-                
-                # Use modified headers as primary, fall back to original if needed
-                sheet_changes['column_headers'] = modified_headers or original_headers
-                
-                # Get max dimensions for both sheets
-                max_row = max(original_sheet.max_row, modified_sheet.max_row, 10)  # At least 10 rows
-                max_col = max(original_sheet.max_column, modified_sheet.max_column, 5)  # At least 5 columns
-                
-                # Compare all cells in the grid
-                has_changes = False
-                for row in range(1, max_row + 1):
-                    for col in range(1, max_col + 1):
-                        orig_cell = original_sheet.cell(row=row, column=col)
-                        mod_cell = modified_sheet.cell(row=row, column=col)
-                        
-                        orig_val = orig_cell.value
-                        mod_val = mod_cell.value
-                        
-                        # Only track if there's an actual change
-                        if orig_val != mod_val:
-                            change_type = self._categorize_change(orig_val, mod_val)
-                            
-                            # Get column header name for better description
-                            col_header = sheet_changes['column_headers'].get(col, get_column_letter(col))
-                            
-                            sheet_changes['modifications'].append({
-                                'cell': (row, col),
-                                'cell_ref': f"{get_column_letter(col)}{row}",
-                                'column_name': col_header,
-                                'row_number': row,
-                                'old_value': orig_val,
-                                'new_value': mod_val,
-                                'row': row,
-                                'col': col,
-                                'change_type': change_type
-                            })
-                            
-                            # Update summary
-                            if change_type == 'blank_to_value':
-                                self.summary['blank_to_value'] += 1
-                            elif change_type == 'value_to_blank':
-                                self.summary['value_to_blank'] += 1
-                            else:
-                                self.summary['value_to_value'] += 1
-                            
-                            has_changes = True
-                            self.summary['total_modifications'] += 1
-                
-                if has_changes:
-                    self.summary['sheets_modified'].append(sheet_name)
-            
-            self.changes[sheet_name] = sheet_changes
+            results = compare_workbook_sheets(self.original_wb, self.modified_wb, sheet_names, self.options,
+                                              on_result=on_result)
+        
+        for result in results:
+            merge_sheet_result(self.summary, self.changes, result)
+            self.sheet_timings[result.sheet_name] = result.seconds
         
         return self.changes
     
@@ -459,14 +480,25 @@ class ExcelDiffVisualizer:
         else:
             return 'value_to_value'
     
+    def _describe_row_change(self, row_change):
+        """Describe an inserted/deleted/moved row or an added/removed/changed key"""
+        if row_change['type'] == 'inserted':
+            return f"Row {row_change['modified_row']} inserted"
+        elif row_change['type'] == 'deleted':
+            return f"Row {row_change['original_row']} deleted"
+        elif row_change['type'] == 'moved':
+            return f"Row {row_change['original_row']} moved to row {row_change['modified_row']}"
+        elif row_change['type'] == 'added':
+            return f"{row_change['key_label']} added (row {row_change['modified_row']})"
+        elif row_change['type'] == 'removed':
+            return f"{row_change['key_label']} removed (was row {row_change['original_row']})"
+        else:
+            return (f"{row_change['key_label']} changed in {row_change['cells_changed']} cell(s) "
+                    f"(row {row_change['original_row']} → row {row_change['modified_row']})")
+    
     def _format_value(self, value):
         """Format value for display"""
-        if value is None:
-            return "[empty]"
-        elif isinstance(value, (int, float)):
-            return str(value)
-        else:
-            return str(value)
+        return format_value(value)
     
     def create_synchronized_diff_component(self, sheet_name):
         """Create synchronized diff view using Streamlit components for true scrolling sync"""
@@ -486,22 +518,20 @@ class ExcelDiffVisualizer:
         max_cols = max(len(original_df.columns) if not original_df.empty else 5,
                       len(modified_df.columns) if not modified_df.empty else 5, 5)
         
-        # Build change map
-        change_map = {}
-        for mod in sheet_changes.get('modifications', []):
-            change_map[(mod['row']-1, mod['col']-1)] = mod
+        # Build change maps (aligned diffs place a change at different rows on each side)
+        original_map, modified_map = self._build_change_maps(sheet_changes, max_cols)
         
         # Clean sheet name for IDs
         sheet_id = sheet_name.replace(' ', '_').replace('(', '').replace(')', '')
         
         # Generate HTML for original side
         original_html = self._generate_table_html(
-            original_df, column_headers, change_map, max_rows, max_cols, is_original=True
+            original_df, column_headers, original_map, max_rows, max_cols, is_original=True
         )
         
         # Generate HTML for modified side
         modified_html = self._generate_table_html(
-            modified_df, column_headers, change_map, max_rows, max_cols, is_original=False
+            modified_df, column_headers, modified_map, max_rows, max_cols, is_original=False
         )
         
         # Create full HTML with embedded JavaScript for synchronized scrolling
@@ -798,6 +828,43 @@ class ExcelDiffVisualizer:
         
         return full_html
     
+    def get_change_index(self, sheet_name):
+        """Window lookup index of a sheet's changes (built on first use)"""
+        if sheet_name not in self._change_indexes:
+            self._change_indexes[sheet_name] = build_change_index(self.changes.get(sheet_name, {}))
+        return self._change_indexes[sheet_name]
+    
+    def read_window(self, sheet_name, side, r0, r1, c0, c1):
+        """Values of a grid window read from the workbooks (for comparisons that keep no frames)"""
+        workbook = self.original_wb if side == 'original' else self.modified_wb
+        sheet = workbook[sheet_name] if sheet_name in workbook.sheetnames else None
+        return read_sheet_window(sheet, r0, r1, c0, c1)
+    
+    def _build_change_maps(self, sheet_changes, max_cols):
+        """Map 0-based (row, col) to the change shown there, for each side"""
+        original_map = {}
+        modified_map = {}
+        
+        table = sheet_changes.get('modifications')
+        if table is not None and len(table):
+            original_rows = table.rows if table.original_rows is None else table.original_rows
+            change_types = [CHANGE_TYPES[code] for code in table.codes.tolist()]
+            cols = (table.cols - 1).tolist()
+            original_map.update(zip(zip((original_rows - 1).tolist(), cols), change_types))
+            modified_map.update(zip(zip((table.rows - 1).tolist(), cols), change_types))
+        
+        # Whole-row changes from aligned mode highlight every cell of the row
+        for row_change in sheet_changes.get('row_changes', []):
+            if row_change['type'] == 'changed':
+                continue  # Changed keys are already highlighted cell by cell
+            for col_idx in range(max_cols):
+                if row_change['original_row'] is not None:
+                    original_map[(row_change['original_row']-1, col_idx)] = row_change
+                if row_change['modified_row'] is not None:
+                    modified_map[(row_change['modified_row']-1, col_idx)] = row_change
+        
+        return original_map, modified_map
+    
     def _generate_table_html(self, df, column_headers, change_map, max_rows, max_cols, is_original=True):
         """Generate HTML table for one side of the diff"""
         html_output = '<div class="diff-table">'
@@ -831,7 +898,7 @@ class ExcelDiffVisualizer:
                     value = df.iloc[row_idx, col_idx]
                     
                     if (row_idx, col_idx) in change_map:
-                        if value is None:
+                        if is_blank(value):
                             cell_html += '<span class="cell-empty">[empty]</span>'
                         else:
                             if is_original:
@@ -839,7 +906,7 @@ class ExcelDiffVisualizer:
                             else:
                                 cell_html += f'<span class="cell-value-new">{str(value)}</span>'
                     else:
-                        if value is None:
+                        if is_blank(value):
                             cell_html += '<span class="cell-empty">·</span>'
                         else:
                             cell_html += str(value)
@@ -877,8 +944,10 @@ class ExcelDiffVisualizer:
         
         # Build change map
         change_map = {}
-        for mod in sheet_changes.get('modifications', []):
-            change_map[(mod['row']-1, mod['col']-1)] = mod
+        table = sheet_changes.get('modifications')
+        if table is not None and len(table):
+            change_map.update(zip(zip((table.rows - 1).tolist(), (table.cols - 1).tolist()),
+                                  [CHANGE_TYPES[code] for code in table.codes.tolist()]))
         
         # Generate unique ID for this sheet's containers
         sheet_id = sheet_name.replace(' ', '_').replace('(', '').replace(')', '')
@@ -928,12 +997,12 @@ class ExcelDiffVisualizer:
                     
                     if (row_idx, col_idx) in change_map:
                         change = change_map[(row_idx, col_idx)]
-                        if value is None:
+                        if is_blank(value):
                             cell_html += '<span class="cell-empty">[empty]</span>'
                         else:
                             cell_html += f'<span class="cell-value-old">{str(value)}</span>'
                     else:
-                        if value is None:
+                        if is_blank(value):
                             cell_html += '<span class="cell-empty">·</span>'
                         else:
                             cell_html += str(value)
@@ -985,12 +1054,12 @@ class ExcelDiffVisualizer:
                     
                     if (row_idx, col_idx) in change_map:
                         change = change_map[(row_idx, col_idx)]
-                        if value is None:
+                        if is_blank(value):
                             cell_html += '<span class="cell-empty">[empty]</span>'
                         else:
                             cell_html += f'<span class="cell-value-new">{str(value)}</span>'
                     else:
-                        if value is None:
+                        if is_blank(value):
                             cell_html += '<span class="cell-empty">·</span>'
                         else:
                             cell_html += str(value)
@@ -1031,7 +1100,7 @@ class ExcelDiffVisualizer:
                 row_data = []
                 for col_idx in range(len(df.columns)):
                     value = df.iloc[row_idx, col_idx]
-                    if value is not None:
+                    if not is_blank(value):
                         row_data.append(f'<span class="value-new">{str(value)}</span>')
                     else:
                         row_data.append('<span class="cell-empty">[empty]</span>')
@@ -1063,7 +1132,7 @@ class ExcelDiffVisualizer:
                 row_data = []
                 for col_idx in range(len(df.columns)):
                     value = df.iloc[row_idx, col_idx]
-                    if value is not None:
+                    if not is_blank(value):
                         row_data.append(f'<span class="value-old">{str(value)}</span>')
                     else:
                         row_data.append('<span class="cell-empty">[empty]</span>')
@@ -1076,25 +1145,199 @@ class ExcelDiffVisualizer:
         html += "</div></div>"
         return html
 
+# Combined upload size above which the streaming loader is used
+STREAMING_THRESHOLD_BYTES = 50 * 1024 * 1024
+
+# Modifications per page of the Change List view
+CHANGE_LIST_PAGE_SIZE = 20
+
+# Query parameter holding the running comparison's job id
+EXCEL_JOB_PARAM = 'excel_job'
+
+
+def run_comparison_job(original_file, modified_file, progress=no_progress, **settings):
+    """
+    Job body for "Compare Files" (runs in a comparison_jobs worker thread)
+    
+    Args:
+        original_file: Original upload
+        modified_file: Modified upload
+        progress: JobProgress for the 'parse' and 'diff' stages (no_progress outside a job)
+        **settings: ExcelDiffVisualizer keyword arguments
+    
+    Returns:
+        The ExcelDiffVisualizer, with its sheets compared
+    """
+    progress('parse', 0.0, "Loading workbooks")
+    visualizer = ExcelDiffVisualizer(original_file, modified_file, **settings)
+    progress('diff', 0.0)
+    visualizer.compare_sheets(progress=progress)
+    return visualizer
+
+def session_spill_dir():
+    """Directory this session's streamed changes are spilled to (created on first use)"""
+    if 'excel_spill_dir' not in st.session_state:
+        st.session_state['excel_spill_dir'] = tempfile.mkdtemp(prefix='excel_diff_session_')
+    return st.session_state['excel_spill_dir']
+
+# Sidebar labels for ExcelDiffVisualizer comparison modes
+COMPARISON_MODES = {
+    "Cell by Position": 'cell',
+    "Align Rows": 'aligned',
+    "Match by Key Columns": 'key',
+}
+
+# What the app compares: one file pair, or a template against many submissions
+APP_MODES = ("Two Files", "Template vs. Submissions")
+
+# Largest heatmap window rendered in the N-way view
+HEATMAP_MAX_ROWS = 200
+HEATMAP_MAX_COLS = 40
+
+
+def heatmap_styles(counts: pd.DataFrame, n_files: int) -> pd.DataFrame:
+    """Cell CSS shading each count by its share of the submissions"""
+    def shade(count):
+        if not count:
+            return ""
+        return f"background-color: rgba(192, 0, 0, {0.15 + 0.85 * count / max(n_files, 1):.2f}); color: white"
+    return pd.DataFrame([[shade(count) for count in row] for row in counts.values.tolist()],
+                        index=counts.index, columns=counts.columns)
+
+
+def render_nway():
+    """Template vs. many submissions: per-file change tables and a per-cell heatmap"""
+    with st.sidebar:
+        st.header("📁 Upload Files")
+        template_file = st.file_uploader(
+            "Upload Master Template",
+            type=['xlsx', 'csv', 'tsv'],
+            key="nway_template",
+            help="Parsed once and shared by every comparison"
+        )
+        submission_files = st.file_uploader(
+            "Upload Submissions",
+            type=['xlsx', 'csv', 'tsv'],
+            accept_multiple_files=True,
+            key="nway_submissions",
+            help="Each submission is compared against the template"
+        )
+        
+        st.divider()
+        
+        comparison_mode = st.radio("Comparison Mode", list(COMPARISON_MODES), index=0, key="nway_mode")
+        key_columns = []
+        if COMPARISON_MODES[comparison_mode] == 'key' and template_file:
+            header_key = f"header_names_{template_file.file_id}"
+            if header_key not in st.session_state:
+                st.session_state[header_key] = read_header_names(template_file)
+            key_columns = st.multiselect("Key Columns", st.session_state[header_key], key="nway_key_columns")
+        key_mode_ready = COMPARISON_MODES[comparison_mode] != 'key' or bool(key_columns)
+        
+        workers = st.number_input(
+            "Parallel workers",
+            min_value=1,
+            max_value=default_workers(),
+            value=default_workers(),
+            key="nway_workers",
+            help="Submissions are diffed concurrently in separate processes"
+        )
+        
+        ready = template_file and submission_files and key_mode_ready
+        if st.button("🔍 Compare Submissions", type="primary", disabled=not ready):
+            with st.spinner(f"Comparing {len(submission_files)} submissions against the template..."):
+                options = CompareOptions(mode=COMPARISON_MODES[comparison_mode], key_columns=key_columns)
+                st.session_state['nway_result'] = compare_against_template(
+                    template_file, [(uploaded.name, uploaded) for uploaded in submission_files], options, workers)
+    
+    result = st.session_state.get('nway_result')
+    if result is None:
+        st.info("Upload a master template and its submissions to compare them all in one run")
+        return
+    
+    failed = [submission for submission in result.submissions if submission.error]
+    changed = [submission for submission in result.submissions
+               if not submission.error and submission.summary['sheets_modified']]
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Submissions", len(result.submissions))
+    with col2:
+        st.metric("With Changes", len(changed))
+    with col3:
+        st.metric("Failed", len(failed))
+    with col4:
+        st.metric("Time", f"{result.seconds:.1f}s")
+    for submission in failed:
+        st.error(f"{submission.name}: {submission.error}")
+    
+    st.markdown("### 📋 Changes per Submission")
+    st.dataframe(result.file_table(), use_container_width=True, hide_index=True)
+    
+    st.markdown("### 🔥 Change Heatmap")
+    sheet_name = st.selectbox("Template sheet", result.template_sheets)
+    heatmap = result.heatmaps[sheet_name]
+    if not heatmap.any():
+        st.info("No submission changed a cell of this sheet")
+    else:
+        st.caption("How many submissions changed each cell")
+        st.dataframe(result.hot_cells(sheet_name), use_container_width=True, hide_index=True)
+        
+        # Window over the changed region, capped for the browser
+        rows, cols = np.nonzero(heatmap)
+        r0, c0 = int(rows.min()), int(cols.min())
+        r1 = min(int(rows.max()) + 1, r0 + HEATMAP_MAX_ROWS)
+        c1 = min(int(cols.max()) + 1, c0 + HEATMAP_MAX_COLS)
+        headers = result.column_headers.get(sheet_name, {})
+        window = pd.DataFrame(
+            heatmap[r0:r1, c0:c1],
+            index=range(r0 + 1, r1 + 1),
+            columns=[f"{get_column_letter(col)} {headers.get(col, '')}".strip() for col in range(c0 + 1, c1 + 1)]
+        )
+        st.dataframe(window.style.apply(heatmap_styles, axis=None, n_files=len(result.submissions)),
+                     use_container_width=True)
+    
+    output = io.BytesIO()
+    write_heatmap_workbook(output, result)
+    st.download_button(
+        label="📊 Download Heatmap Workbook",
+        data=output.getvalue(),
+        file_name=f"submission_heatmap_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+
+
 # Main Streamlit App
+@st.fragment
+def render_virtual_grid(visualizer, sheet_name):
+    """Virtualized side-by-side grid; scrolling reruns only this fragment"""
+    grid_view(sheet_name, visualizer.changes[sheet_name], visualizer.get_change_index(sheet_name),
+              key=f"grid_view_{sheet_name}", read_values=partial(visualizer.read_window, sheet_name))
+
+
 def main():
     st.title("🔍 Excel Diff Visualizer")
     st.markdown("All changes shown as modifications - from original value to new value")
     
+    with st.sidebar:
+        app_mode = st.radio("Compare", APP_MODES, horizontal=True)
+    if app_mode == "Template vs. Submissions":
+        render_nway()
+        return
+    
     # Sidebar for file upload
     with st.sidebar:
         st.header("📁 Upload Files")
         
         original_file = st.file_uploader(
             "Upload Original Template", 
-            type=['xlsx', 'xls'],
-            help="Upload the original Excel template"
+            type=['xlsx', 'xls', 'csv', 'tsv'],
+            help="Upload the original Excel template (or a CSV/TSV export)"
         )
         
         modified_file = st.file_uploader(
             "Upload Modified Version", 
-            type=['xlsx', 'xls'],
-            help="Upload the modified Excel file"
+            type=['xlsx', 'xls', 'csv', 'tsv'],
+            help="Upload the modified Excel file (or a CSV/TSV export)"
         )
         
         st.divider()
@@ -1110,18 +1353,130 @@ def main():
         
         show_empty_changes = st.checkbox("Show [empty] → value changes", value=True)
         
-        if st.button("🔍 Compare Files", type="primary", disabled=not (original_file and modified_file)):
+        comparison_mode = st.radio(
+            "Comparison Mode",
+            list(COMPARISON_MODES),
+            index=0,
+            help="Align Rows matches rows by content, so inserted, deleted and moved rows "
+                 "are reported once instead of shifting every cell below them. "
+                 "Match by Key Columns pairs rows on ID columns, regardless of row order"
+        )
+        
+        key_columns = []
+        if COMPARISON_MODES[comparison_mode] == 'key' and modified_file:
+            # Header names only need reading once per uploaded file
+            header_key = f"header_names_{modified_file.file_id}"
+            if header_key not in st.session_state:
+                st.session_state[header_key] = read_header_names(modified_file)
+            key_columns = st.multiselect(
+                "Key Columns",
+                st.session_state[header_key],
+                help="Rows are matched on these header columns (row 1). "
+                     "Sheets without them fall back to Align Rows."
+            )
+        key_mode_ready = COMPARISON_MODES[comparison_mode] != 'key' or bool(key_columns)
+        
+        compare_formulas = st.checkbox(
+            "Compare formulas",
+            value=False,
+            disabled=COMPARISON_MODES[comparison_mode] != 'cell',
+            help="Also reports formula edits, including those whose result did not change. "
+                 "Compare Cells mode only; bypasses the parsed-workbook cache."
+        )
+        
+        compare_styles = st.checkbox(
+            "Compare formatting",
+            value=False,
+            disabled=COMPARISON_MODES[comparison_mode] != 'cell',
+            help="Also reports changed fills, fonts, borders and number formats, "
+                 "including on cells whose value did not change. "
+                 "Compare Cells mode only; bypasses the parsed-workbook cache."
+        )
+        
+        low_memory_mode = st.checkbox(
+            "Low-memory streaming mode",
+            value=False,
+            help="Reads workbooks read-only, compares rows in blocks and keeps "
+                 "the changes on disk. Turned on automatically for uploads over 50 MB."
+        )
+        
+        parallel_workers = st.number_input(
+            "Parallel workers",
+            min_value=1,
+            max_value=default_workers(),
+            value=1,
+            help="Diff sheets concurrently in separate processes. "
+                 "Only helps workbooks with several large sheets."
+        )
+        
+        use_cache = st.checkbox(
+            "Cache parsed workbooks",
+            value=True,
+            help="Keeps parsed sheets on disk, keyed by file content, so comparing "
+                 "against the same template again skips parsing it."
+        )
+        cache_mb = st.number_input(
+            "Cache size limit (MB)",
+            min_value=50,
+            value=DEFAULT_MAX_BYTES // (1024 * 1024),
+            step=256,
+            disabled=not use_cache
+        )
+        
+        reuse_previous = st.checkbox(
+            "Reuse rows from the previous comparison",
+            value=True,
+            help="Keeps the parsed template and last revision in this session; a new "
+                 "revision only parses the rows that differ from them. Off in low-memory mode."
+        )
+        
+        if st.button("🔍 Compare Files", type="primary", disabled=not (original_file and modified_file and key_mode_ready)):
             if original_file and modified_file:
-                with st.spinner("Analyzing modifications..."):
-                    st.session_state['original_file'] = original_file
-                    st.session_state['modified_file'] = modified_file
-                    
-                    visualizer = ExcelDiffVisualizer(original_file, modified_file)
-                    changes = visualizer.compare_sheets()
-                    
-                    st.session_state['changes'] = changes
-                    st.session_state['visualizer'] = visualizer
-                    st.session_state['comparison_done'] = True
+                streaming = low_memory_mode or (original_file.size + modified_file.size > STREAMING_THRESHOLD_BYTES)
+                # Baselines hold whole grids in memory, which streaming mode avoids
+                incremental = reuse_previous and not streaming
+                
+                # Runs in the background: reruns and page refreshes pick the job up again
+                registry = job_registry()
+                registry.forget(track_job(EXCEL_JOB_PARAM))
+                job_id = registry.submit(
+                    'excel', run_comparison_job, original_file, modified_file,
+                    stages=('parse', 'diff'),
+                    streaming=streaming,
+                    # Streaming keeps no sheet frames; the side-by-side view reads windows on demand
+                    keep_frames=not streaming,
+                    mode=COMPARISON_MODES[comparison_mode],
+                    key_columns=key_columns, workers=parallel_workers,
+                    cache=WorkbookCache(max_bytes=cache_mb * 1024 * 1024) if use_cache else None,
+                    baselines=st.session_state.get('excel_baselines', []) if incremental else None,
+                    formulas=compare_formulas and COMPARISON_MODES[comparison_mode] == 'cell',
+                    styles=compare_styles and COMPARISON_MODES[comparison_mode] == 'cell',
+                    # Streamed changes are kept on disk, not in the session
+                    spill_dir=session_spill_dir() if streaming else None
+                )
+                track_job(EXCEL_JOB_PARAM, job_id)
+                st.session_state['comparison_done'] = False
+    
+    job = job_registry().get(track_job(EXCEL_JOB_PARAM))
+    if job is not None and job.active:
+        show_job_progress(job)
+    elif job is not None and not job.finished_ok:
+        st.error("❌ Comparison failed")
+        st.code(job.error)
+    elif job is not None and st.session_state.get('excel_job_collected') != job.job_id:
+        # Finished job not yet shown in this session (e.g. after a refresh)
+        visualizer = job.result
+        st.session_state['excel_job_collected'] = job.job_id
+        
+        # Template and this revision become the baselines of the next run
+        st.session_state['excel_baselines'] = [
+            wb for wb in (visualizer.original_wb, visualizer.modified_wb)
+            if visualizer.incremental and getattr(wb, 'from_cache', False)
+        ]
+        
+        st.session_state['changes'] = visualizer.changes
+        st.session_state['visualizer'] = visualizer
+        st.session_state['comparison_done'] = True
     
     # Main content area
     if 'comparison_done' in st.session_state and st.session_state['comparison_done']:
@@ -1153,6 +1508,59 @@ def main():
         """
         st.markdown(stats_html, unsafe_allow_html=True)
         
+        if visualizer.mode == 'aligned':
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Rows Inserted", visualizer.summary['rows_inserted'])
+            with col2:
+                st.metric("Rows Deleted", visualizer.summary['rows_deleted'])
+            with col3:
+                st.metric("Rows Moved", visualizer.summary['rows_moved'])
+        elif visualizer.mode == 'key':
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Keys Added", visualizer.summary['rows_added'])
+            with col2:
+                st.metric("Keys Removed", visualizer.summary['rows_removed'])
+            with col3:
+                st.metric("Keys Changed", visualizer.summary['rows_changed'])
+        
+        if visualizer.formulas or visualizer.styles:
+            layer_metrics = []
+            if visualizer.formulas:
+                layer_metrics += [
+                    ("Formulas Changed", visualizer.summary['formulas_changed'], None),
+                    ("Formula Changed, Value Same", visualizer.summary['formulas_value_same'],
+                     "Formula edits a value-only diff misses: the result is the same for now"),
+                ]
+            if visualizer.styles:
+                layer_metrics += [
+                    ("Formatting Changed", visualizer.summary['styles_changed'], None),
+                    ("Formatting Only", visualizer.summary['styles_value_same'],
+                     "Cells whose fill, font, border or number format changed but whose value did not"),
+                ]
+            for column, (label, value, help_text) in zip(st.columns(len(layer_metrics)), layer_metrics):
+                with column:
+                    st.metric(label, value, help=help_text)
+        
+        if visualizer.files_identical:
+            st.info("🟰 The files are byte-identical; no sheets were compared")
+        elif visualizer.summary['sheets_skipped']:
+            st.caption(f"🟰 Unchanged sheets skipped: {', '.join(visualizer.summary['sheets_skipped'])}")
+        if visualizer.cache_hits:
+            st.caption(f"⚡ Loaded from cache without parsing: {' and '.join(visualizer.cache_hits)} file")
+        if visualizer.load_stats.rows_reused:
+            st.caption(f"♻️ Reused {visualizer.load_stats.rows_reused:,} unchanged rows from earlier "
+                       f"parses; parsed {visualizer.load_stats.rows_parsed:,}")
+        
+        if visualizer.sheet_timings:
+            with st.expander("⏱️ Per-sheet timings"):
+                timings_df = pd.DataFrame(
+                    [(name, f"{seconds:.3f}s") for name, seconds in visualizer.sheet_timings.items()],
+                    columns=['Sheet', 'Time']
+                )
+                st.dataframe(timings_df, use_container_width=True, hide_index=True)
+        
         # Sheet navigation
         if visualizer.summary['sheets_modified']:
             st.markdown("### 📑 Sheet Modifications")
@@ -1171,23 +1579,33 @@ def main():
                         # Get the synchronized diff HTML
                         sheet_changes = changes.get(clean_name, {})
                         
-                        if sheet_changes and not sheet_changes.get('sheet_added') and not sheet_changes.get('sheet_removed'):
-                            # Use components for synchronized scrolling
-                            diff_html = visualizer.create_synchronized_diff_component(clean_name)
-                            components.html(diff_html, height=600, scrolling=False)
+                        if sheet_changes and not visualizer.keep_frames:
+                            # No frames kept: the grid reads its windows from the workbooks
+                            render_virtual_grid(visualizer, clean_name)
+                        elif sheet_changes and not sheet_changes.get('sheet_added') and not sheet_changes.get('sheet_removed'):
+                            rows, cols = grid_shape(sheet_changes)
+                            if rows * cols >= VIRTUAL_GRID_MIN_CELLS:
+                                # Large sheet: only the visible window is sent to the browser
+                                render_virtual_grid(visualizer, clean_name)
+                            else:
+                                # Use components for synchronized scrolling
+                                diff_html = visualizer.create_synchronized_diff_component(clean_name)
+                                components.html(diff_html, height=600, scrolling=False)
                         else:
                             # For added/removed sheets, use regular display
                             diff_html = visualizer.create_vs_code_diff_html(clean_name)
                             st.markdown(diff_html, unsafe_allow_html=True)
                         
-                        # Quick stats for this sheet
-                        if sheet_changes and sheet_changes.get('modifications'):
+                        # Quick stats for this sheet (counted once, by compare_sheets)
+                        index = sheet_changes.get('modification_index')
+                        if index is not None and index.total:
                             st.markdown("---")
                             
                             # Count change types
-                            blank_to_value = sum(1 for m in sheet_changes['modifications'] if m['change_type'] == 'blank_to_value')
-                            value_to_blank = sum(1 for m in sheet_changes['modifications'] if m['change_type'] == 'value_to_blank')
-                            value_to_value = sum(1 for m in sheet_changes['modifications'] if m['change_type'] == 'value_to_value')
+                            type_counts = index.counts
+                            blank_to_value = type_counts['blank_to_value']
+                            value_to_blank = type_counts['value_to_blank']
+                            value_to_value = type_counts['value_to_value']
                             
                             col1, col2, col3 = st.columns(3)
                             with col1:
@@ -1204,27 +1622,43 @@ def main():
                     sheet_changes = changes.get(clean_name, {})
                     
                     with st.expander(f"📋 {sheet_name}", expanded=True):
-                        if sheet_changes.get('modifications'):
-                            # Group modifications by type
+                        index = sheet_changes.get('modification_index')
+                        if index is not None and index.total:
                             mods = sheet_changes['modifications']
                             
                             # Filter based on user preference
-                            if not show_empty_changes:
-                                mods = [m for m in mods if m['change_type'] == 'value_to_value']
+                            change_types = CHANGE_TYPES if show_empty_changes else ('value_to_value',)
                             
-                            if mods:
-                                st.markdown(f"**{len(mods)} modifications found:**")
+                            # Column filter and pages come from the precomputed index,
+                            # so each rerun only reads the changes it shows
+                            column_counts = index.column_counts()
+                            headers = sheet_changes.get('column_headers', {})
+                            filter_col, page_col = st.columns([3, 1])
+                            with filter_col:
+                                column = st.selectbox(
+                                    "Column",
+                                    [None] + list(column_counts),
+                                    format_func=lambda col: "All columns" if col is None else
+                                        f"{headers.get(col) or get_column_letter(col)} ({column_counts[col]})",
+                                    key=f"change_list_column_{clean_name}"
+                                )
+                            n_matching = index.count(change_types, column)
+                            n_pages = max(1, -(-n_matching // CHANGE_LIST_PAGE_SIZE))
+                            with page_col:
+                                page = st.number_input(
+                                    "Page", min_value=1, max_value=n_pages, value=1,
+                                    key=f"change_list_page_{clean_name}_{column}_{show_empty_changes}"
+                                )
+                            
+                            if n_matching:
+                                page_note = f" (page {page} of {n_pages})" if n_pages > 1 else ""
+                                st.markdown(f"**{n_matching} modifications found:**{page_note}")
                                 
-                                # Show first 20 modifications with column names
-                                for mod in mods[:20]:
-                                    old_val = visualizer._format_value(mod['old_value'])
-                                    new_val = visualizer._format_value(mod['new_value'])
-                                    
-                                    # Use column name if available, otherwise use cell reference
-                                    if 'column_name' in mod:
-                                        location = f"{mod['column_name']}, Row {mod['row_number']}"
-                                    else:
-                                        location = f"Cell {mod['cell_ref']}"
+                                # Show one page of modifications with column names
+                                for mod in index.page(mods, page - 1, CHANGE_LIST_PAGE_SIZE, change_types, column):
+                                    old_val = visualizer._format_value(mod.old_value)
+                                    new_val = visualizer._format_value(mod.new_value)
+                                    location = f"{mod.column_name}, Row {mod.row_number}"
                                     
                                     change_html = f"""
                                     <div class="change-item">
@@ -1235,11 +1669,48 @@ def main():
                                     </div>
                                     """
                                     st.markdown(change_html, unsafe_allow_html=True)
-                                
-                                if len(mods) > 20:
-                                    st.info(f"... and {len(mods) - 20} more modifications")
                             else:
                                 st.info("No modifications to display (check filter settings)")
+                        
+                        row_changes = sheet_changes.get('row_changes', [])
+                        if row_changes:
+                            st.markdown(f"**{len(row_changes)} row changes found:**")
+                            
+                            for row_change in row_changes[:20]:
+                                change_html = f"""
+                                <div class="change-item">
+                                    <span class="change-location">{visualizer._describe_row_change(row_change)}</span>
+                                </div>
+                                """
+                                st.markdown(change_html, unsafe_allow_html=True)
+                            
+                            if len(row_changes) > 20:
+                                st.info(f"... and {len(row_changes) - 20} more row changes")
+                        
+                        for label, changes_key, same_key, same_note in (
+                                ("formula", 'formula_changes', 'formula_value_same', "value unchanged"),
+                                ("formatting", 'style_changes', 'style_value_same', "formatting only")):
+                            layer_changes = sheet_changes.get(changes_key, ())
+                            if not len(layer_changes):
+                                continue
+                            st.markdown(f"**{len(layer_changes)} {label} changes found:**")
+                            
+                            value_same = sheet_changes[same_key]
+                            for mod, same in zip(layer_changes[:20], value_same[:20]):
+                                location = f"{mod.column_name}, Row {mod.row_number}"
+                                note = f" ({same_note})" if same else ""
+                                change_html = f"""
+                                <div class="change-item">
+                                    <span class="change-location">{location}</span>
+                                    <span class="change-arrow">→</span>
+                                    {label.capitalize()} <span class="value-old">{visualizer._format_value(mod.old_value)}</span> 
+                                    to <span class="value-new">{visualizer._format_value(mod.new_value)}</span>{note}
+                                </div>
+                                """
+                                st.markdown(change_html, unsafe_allow_html=True)
+                            
+                            if len(layer_changes) > 20:
+                                st.info(f"... and {len(layer_changes) - 20} more {label} changes")
             
             else:  # Summary Only
                 st.markdown("### Summary View")
@@ -1249,19 +1720,25 @@ def main():
                     clean_name = sheet_name.replace(" (New Sheet)", "").replace(" (Sheet Removed)", "")
                     sheet_changes = changes.get(clean_name, {})
                     
-                    if sheet_changes.get('modifications'):
-                        mods = sheet_changes['modifications']
+                    if (len(sheet_changes.get('modifications', ())) or sheet_changes.get('row_changes')
+                            or len(sheet_changes.get('formula_changes', ()))
+                            or len(sheet_changes.get('style_changes', ()))):
+                        index = sheet_changes['modification_index']
                         
-                        blank_to_value = sum(1 for m in mods if m['change_type'] == 'blank_to_value')
-                        value_to_blank = sum(1 for m in mods if m['change_type'] == 'value_to_blank')
-                        value_to_value = sum(1 for m in mods if m['change_type'] == 'value_to_value')
+                        type_counts = index.counts
+                        blank_to_value = type_counts['blank_to_value']
+                        value_to_blank = type_counts['value_to_blank']
+                        value_to_value = type_counts['value_to_value']
                         
                         summary_data.append({
                             'Sheet': sheet_name,
                             '[empty] → Value': blank_to_value,
                             'Value → [empty]': value_to_blank,
                             'Value → Value': value_to_value,
-                            'Total': len(mods)
+                            'Row Changes': len(sheet_changes.get('row_changes', [])),
+                            'Formula Changes': len(sheet_changes.get('formula_changes', ())),
+                            'Formatting Changes': len(sheet_changes.get('style_changes', ())),
+                            'Total': index.total
                         })
                 
                 if summary_data:
@@ -1275,6 +1752,9 @@ def main():
                             "[empty] → Value": st.column_config.NumberColumn("Empty→Value", format="%d"),
                             "Value → [empty]": st.column_config.NumberColumn("Value→Empty", format="%d"),
                             "Value → Value": st.column_config.NumberColumn("Value→Value", format="%d"),
+                            "Row Changes": st.column_config.NumberColumn("Row Changes", format="%d"),
+                            "Formula Changes": st.column_config.NumberColumn("Formula Changes", format="%d"),
+                            "Formatting Changes": st.column_config.NumberColumn("Formatting Changes", format="%d"),
                             "Total": st.column_config.NumberColumn("Total Mods", format="%d"),
                         }
                     )
@@ -1290,38 +1770,10 @@ def main():
         with col1:
             if st.button("📄 Export Change Report", type="secondary"):
                 # Generate detailed text report
-                report = f"""EXCEL MODIFICATION REPORT
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-SUMMARY
-=======
-Total Modifications: {visualizer.summary['total_modifications']}
-- [empty] → Value: {visualizer.summary['blank_to_value']}
-- Value → [empty]: {visualizer.summary['value_to_blank']}
-- Value → Value: {visualizer.summary['value_to_value']}
-
-DETAILED CHANGES BY SHEET
-========================
-"""
-                for sheet_name in visualizer.summary['sheets_modified']:
-                    clean_name = sheet_name.replace(" (New Sheet)", "").replace(" (Sheet Removed)", "")
-                    sheet_changes = changes.get(clean_name, {})
-                    
-                    if sheet_changes.get('modifications'):
-                        report += f"\n\nSheet: {sheet_name}\n"
-                        report += "-" * (len(sheet_name) + 7) + "\n"
-                        
-                        for mod in sheet_changes['modifications']:
-                            old_val = visualizer._format_value(mod['old_value'])
-                            new_val = visualizer._format_value(mod['new_value'])
-                            
-                            # Use column name if available
-                            if 'column_name' in mod:
-                                location = f"{mod['column_name']}, Row {mod['row_number']}"
-                            else:
-                                location = mod['cell_ref']
-                            
-                            report += f"  {location}: {old_val} → {new_val}\n"
+                report_buffer = io.StringIO()
+                write_text_report(report_buffer, changes, visualizer.summary, visualizer._format_value,
+                                  visualizer._describe_row_change)
+                report = report_buffer.getvalue()
                 
                 st.download_button(
                     label="⬇️ Download Report",
@@ -1332,71 +1784,10 @@ DETAILED CHANGES BY SHEET
         
         with col2:
             if st.button("📊 Export Diff Excel", type="secondary"):
-                # Create diff Excel with highlighting
-                diff_wb = openpyxl.Workbook()
-                diff_wb.remove(diff_wb.active)
-                
-                # Color for modifications
-                yellow_fill = PatternFill(start_color="FFFF99", end_color="FFFF99", fill_type="solid")
-                
-                for sheet_name, sheet_changes in changes.items():
-                    if sheet_changes['sheet_removed']:
-                        continue
-                    
-                    diff_sheet = diff_wb.create_sheet(sheet_name)
-                    
-                    # Use modified version as base
-                    if sheet_name in visualizer.modified_wb.sheetnames:
-                        source_sheet = visualizer.modified_wb[sheet_name]
-                        
-                        # Copy all cells and highlight modifications
-                        for row in source_sheet.iter_rows():
-                            for cell in row:
-                                new_cell = diff_sheet.cell(row=cell.row, column=cell.column, value=cell.value)
-                                
-                                # Check if this cell was modified
-                                for mod in sheet_changes.get('modifications', []):
-                                    if mod['cell'] == (cell.row, cell.column):
-                                        new_cell.fill = yellow_fill
-                                        old_val = visualizer._format_value(mod['old_value'])
-                                        new_val = visualizer._format_value(mod['new_value'])
-                                        
-                                        # Include column name in comment
-                                        col_name = mod.get('column_name', mod['cell_ref'])
-                                        comment_text = f"Location: {col_name}, Row {mod['row_number']}\n"
-                                        comment_text += f"Modified from: {old_val}\n"
-                                        comment_text += f"Modified to: {new_val}"
-                                        
-                                        new_cell.comment = openpyxl.comments.Comment(
-                                            comment_text, 
-                                            "Diff Tool"
-                                        )
-                                        break
-                
-                # Add summary sheet
-                summary_sheet = diff_wb.create_sheet("MODIFICATION_SUMMARY", 0)
-                summary_data = [
-                    ["Excel Modification Report", ""],
-                    ["Generated:", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
-                    ["", ""],
-                    ["Total Modifications:", visualizer.summary['total_modifications']],
-                    ["[empty] → Value:", visualizer.summary['blank_to_value']],
-                    ["Value → [empty]:", visualizer.summary['value_to_blank']],
-                    ["Value → Value:", visualizer.summary['value_to_value']],
-                    ["", ""],
-                    ["Sheets Modified:", ", ".join(visualizer.summary['sheets_modified']) if visualizer.summary['sheets_modified'] else "None"],
-                ]
-                
-                for row_idx, row_data in enumerate(summary_data, 1):
-                    for col_idx, value in enumerate(row_data, 1):
-                        cell = summary_sheet.cell(row=row_idx, column=col_idx, value=value)
-                        if row_idx == 1:
-                            cell.font = Font(bold=True, size=14)
-                        elif col_idx == 1 and row_idx > 3:
-                            cell.font = Font(bold=True)
-                
+                # Stream the modified workbook into a write-only copy with changes highlighted
                 excel_buffer = io.BytesIO()
-                diff_wb.save(excel_buffer)
+                write_diff_workbook(excel_buffer, changes, visualizer.summary,
+                                    visualizer.modified_wb, visualizer._format_value)
                 excel_buffer.seek(0)
                 
                 st.download_button(
@@ -1408,29 +1799,10 @@ DETAILED CHANGES BY SHEET
         
         with col3:
             if st.button("📋 Export JSON", type="secondary"):
-                # Prepare JSON export
-                change_report = {
-                    'summary': visualizer.summary,
-                    'modifications_by_sheet': {},
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                for sheet_name, sheet_changes in changes.items():
-                    if sheet_changes.get('modifications'):
-                        change_report['modifications_by_sheet'][sheet_name] = [
-                            {
-                                'cell': mod['cell_ref'],
-                                'location': f"{mod.get('column_name', mod['cell_ref'])}, Row {mod['row_number']}",
-                                'column': mod.get('column_name', get_column_letter(mod['col'])),
-                                'row': mod['row_number'],
-                                'from': visualizer._format_value(mod['old_value']),
-                                'to': visualizer._format_value(mod['new_value']),
-                                'type': mod['change_type']
-                            }
-                            for mod in sheet_changes['modifications']
-                        ]
-                
-                json_str = json.dumps(change_report, indent=2, default=str)
+                # Stream the JSON export record by record
+                json_buffer = io.StringIO()
+                write_json_report(json_buffer, changes, visualizer.summary, visualizer._format_value)
+                json_str = json_buffer.getvalue()
                 
                 st.download_button(
                     label="⬇️ Download JSON",
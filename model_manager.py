@@ -7,11 +7,17 @@ Manages lifecycle of all ML models:
 - Optional LLM (Llama)
 
 Handles loading, caching, GPU detection, and resource management.
+
+Loaded models live in a process-wide ModelRegistry keyed by model name and
+device, so every ModelManager, comparator, Streamlit session and background
+job in a server process shares one copy of the weights, loaded once.
 """
 
 import os
+import threading
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Any, Callable, Optional, Dict, Tuple
 import warnings
 
 # Suppress some model loading warnings
@@ -19,6 +25,95 @@ warnings.filterwarnings('ignore', category=FutureWarning)
 warnings.filterwarnings('ignore', category=UserWarning)
 
 
+class ModelRegistry:
+    """
+    Models loaded in this process, keyed by (kind, model name, device)
+
+    Loading is done once per key: concurrent requests for a model that is
+    still loading wait for it instead of loading it again. Inference on a
+    shared model should hold its lock (using()), since tokenizers and
+    llama.cpp contexts are not safe to use from several threads at once.
+    """
+
+    def __init__(self):
+        self._models: Dict[Tuple[str, str, str], Any] = {}
+        self._load_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+        self._use_locks: Dict[int, threading.RLock] = {}  # id(model) -> lock
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, name: str, device: str, load: Callable[[], Any]) -> Any:
+        """
+        Get a loaded model, loading it on first use
+
+        Args:
+            kind: Model kind ('embedder', 'translator', 'llm')
+            name: Model name or path
+            device: Device the model runs on ('cpu', 'cuda')
+            load: Called without arguments to load the model
+
+        Returns:
+            The shared model
+        """
+        key = (kind, name, device)
+        with self._lock:
+            if key in self._models:
+                return self._models[key]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Per-key lock: loading one model does not hold up the others
+        with load_lock:
+            with self._lock:
+                if key in self._models:
+                    return self._models[key]
+            model = load()
+            with self._lock:
+                self._models[key] = model
+                self._use_locks[id(model)] = threading.RLock()
+            return model
+
+    def using(self, model: Any):
+        """Context manager held while running a shared model (no-op for unregistered ones)"""
+        with self._lock:
+            lock = self._use_locks.get(id(model))
+        return lock if lock is not None else nullcontext()
+
+    def loaded(self) -> Dict[Tuple[str, str, str], Any]:
+        """Snapshot of the loaded models"""
+        with self._lock:
+            return dict(self._models)
+
+    def clear(self):
+        """Drop all models (sessions still using one keep it until they finish)"""
+        with self._lock:
+            self._models.clear()
+            self._load_locks.clear()
+            self._use_locks.clear()
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def model_registry() -> ModelRegistry:
+    """The registry shared by everything in this process"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
+
+
+def torch_device(use_gpu: bool = True) -> str:
+    """'cuda' if requested and available, else 'cpu'"""
+    if not use_gpu:
+        return 'cpu'
+    try:
+        import torch
+        return 'cuda' if torch.cuda.is_available() else 'cpu'
+    except Exception:
+        return 'cpu'
+
+
 class ModelManager:
     """Centralized management of all ML models"""
 
@@ -67,6 +162,11 @@ class ModelManager:
             print(f"[!] Could not check GPU: {e}")
             self.gpu_available = False
 
+    @property
+    def device(self) -> str:
+        """Device models are loaded on"""
+        return 'cuda' if self.use_gpu and self.gpu_available else 'cpu'
+
     def get_embedder(self, model_name: str = 'paraphrase-multilingual-mpnet-base-v2'):
         """
         Get or load sentence transformer for embeddings
@@ -80,25 +180,26 @@ class ModelManager:
         if self._embedder is not None:
             return self._embedder
 
-        print(f"Loading embeddings model: {model_name}...")
-
-        try:
+        def load():
+            print(f"Loading embeddings model: {model_name}...")
             from sentence_transformers import SentenceTransformer
-            import torch
 
             # Load model
-            self._embedder = SentenceTransformer(
+            embedder = SentenceTransformer(
                 model_name,
                 cache_folder=str(self.models_dir)
             )
 
             # Move to GPU if available and requested
-            if self.use_gpu and self.gpu_available:
-                self._embedder = self._embedder.to('cuda')
+            if self.device == 'cuda':
+                embedder = embedder.to('cuda')
                 print(f"  [+] Model loaded on GPU")
             else:
                 print(f"  [+] Model loaded on CPU")
+            return embedder
 
+        try:
+            self._embedder = model_registry().get('embedder', model_name, self.device, load)
             return self._embedder
 
         except ImportError:
@@ -129,23 +230,21 @@ class ModelManager:
         elif lang_pair == 'en-de' and self._en_de_translator is not None:
             return self._en_de_translator
 
-        print(f"Loading translation model: {source_lang}→{target_lang}...")
-
-        try:
-            from transformers import MarianMTModel, MarianTokenizer
-            import torch
+        # Determine model name
+        model_mapping = {
+            'de-en': 'Helsinki-NLP/opus-mt-de-en',
+            'en-de': 'Helsinki-NLP/opus-mt-en-de',
+            'zh-en': 'Helsinki-NLP/opus-mt-zh-en',
+            'en-zh': 'Helsinki-NLP/opus-mt-en-zh',
+        }
 
-            # Determine model name
-            model_mapping = {
-                'de-en': 'Helsinki-NLP/opus-mt-de-en',
-                'en-de': 'Helsinki-NLP/opus-mt-en-de',
-                'zh-en': 'Helsinki-NLP/opus-mt-zh-en',
-                'en-zh': 'Helsinki-NLP/opus-mt-en-zh',
-            }
+        model_name = model_mapping.get(lang_pair)
+        if not model_name:
+            raise ValueError(f"Translation pair {lang_pair} not supported")
 
-            model_name = model_mapping.get(lang_pair)
-            if not model_name:
-                raise ValueError(f"Translation pair {lang_pair} not supported")
+        def load():
+            print(f"Loading translation model: {source_lang}→{target_lang}...")
+            from transformers import MarianMTModel, MarianTokenizer
 
             # Load tokenizer and model
             tokenizer = MarianTokenizer.from_pretrained(
@@ -159,14 +258,17 @@ class ModelManager:
             )
 
             # Move to GPU if available
-            if self.use_gpu and self.gpu_available:
+            if self.device == 'cuda':
                 model = model.to('cuda')
                 print(f"  [+] Translation model loaded on GPU")
             else:
                 print(f"  [+] Translation model loaded on CPU")
+            return (model, tokenizer)
+
+        try:
+            translator = model_registry().get('translator', model_name, self.device, load)
 
             # Cache the translator
-            translator = (model, tokenizer)
             if lang_pair == 'de-en':
                 self._de_en_translator = translator
             elif lang_pair == 'en-de':
@@ -249,6 +351,7 @@ class ModelManager:
             'translator_de_en_loaded': self._de_en_translator is not None,
             'translator_en_de_loaded': self._en_de_translator is not None,
             'llm_loaded': self._llm is not None,
+            'shared_models': [f"{kind}: {name} ({device})" for kind, name, device in model_registry().loaded()],
         }
 
         return info
@@ -257,10 +360,12 @@ class ModelManager:
         """
         Unload all models to free memory
 
-        Useful for resource cleanup or switching configurations
+        Useful for resource cleanup or switching configurations. This also
+        empties the process-wide registry, so other sessions reload on next use.
         """
         print("Unloading all models...")
 
+        model_registry().clear()
         self._embedder = None
         self._de_en_translator = None
         self._en_de_translator = None
@@ -6,7 +6,7 @@ Handles multi-line paragraphs, numbered sections, bullet points.
 """
 
 import re
-from typing import List, Dict, Tuple
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
 from dataclasses import dataclass
 
 
@@ -45,11 +45,64 @@ class ParagraphExtractor:
         if not content or not content.strip():
             return []
 
-        lines = content.split('\n')
-        paragraphs = []
+        return list(self.iter_paragraphs(content.split('\n')))
+
+    def stream_paragraphs(self, pages: Iterable[Optional[str]]) -> Iterator[str]:
+        """
+        Yield the paragraphs of a document as its pages arrive
+
+        A paragraph still open at the end of a page carries over to the next
+        page when it reads as unfinished (see _continues_on_next_page);
+        otherwise the page break ends it, like a blank line.
+
+        Args:
+            pages: Page texts in order (None for pages without text), e.g.
+                pdf_parallel.iter_pages()
+
+        Yields:
+            Paragraph texts, each as soon as the line after it is seen
+        """
+        return self.iter_paragraphs(self._page_lines(pages))
+
+    def _page_lines(self, pages: Iterable[Optional[str]]) -> Iterator[str]:
+        """Lines of consecutive pages, with a blank line at page breaks that end a paragraph"""
+        last_line = None
+        for text in pages:
+            if not text:
+                continue
+            lines = text.split('\n')
+            stripped = [line.strip() for line in lines if line.strip()]
+            if not stripped:
+                continue
+            if last_line is not None and not self._continues_on_next_page(last_line, stripped[0]):
+                yield ''
+            yield from lines
+            last_line = stripped[-1]
+
+    def _continues_on_next_page(self, last_line: str, first_line: str) -> bool:
+        """
+        Check if a page's last line continues on the next page's first line
+
+        Heuristics:
+        - Last line has no sentence terminator (page numbers and footers
+          usually end the page otherwise)
+        - Next page starts in lower case, mid-sentence
+        """
+        return not last_line.endswith(('.', '!', '?', ':', ';')) and first_line[0].islower()
+
+    def iter_paragraphs(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        Yield paragraphs from a stream of lines
+
+        Args:
+            lines: Lines of text
+
+        Yields:
+            Paragraph texts
+        """
         current_para = []
 
-        for i, line in enumerate(lines):
+        for line in lines:
             line_stripped = line.strip()
 
             # Skip empty lines
@@ -58,7 +111,7 @@ class ParagraphExtractor:
                     # End of paragraph
                     para_text = ' '.join(current_para)
                     if len(para_text) >= self.min_paragraph_length:
-                        paragraphs.append(para_text)
+                        yield para_text
                     current_para = []
                 continue
 
@@ -68,7 +121,7 @@ class ParagraphExtractor:
                 if current_para:
                     para_text = ' '.join(current_para)
                     if len(para_text) >= self.min_paragraph_length:
-                        paragraphs.append(para_text)
+                        yield para_text
                     current_para = []
 
                 # Start new paragraph
@@ -81,9 +134,7 @@ class ParagraphExtractor:
         if current_para:
             para_text = ' '.join(current_para)
             if len(para_text) >= self.min_paragraph_length:
-                paragraphs.append(para_text)
-
-        return paragraphs
+                yield para_text
 
     def extract_with_structure(self, content: str) -> List[Paragraph]:
         """
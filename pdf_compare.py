@@ -4,7 +4,6 @@ Intelligently compares PDF documents by extracting and matching
 hierarchical structures (chapters, sections, subsections)
 """
 
-import pdfplumber
 import re
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass, field
@@ -13,10 +12,23 @@ import numpy as np
 from collections import defaultdict
 import warnings
 
+from comparison_jobs import no_progress
+from pdf_parallel import extract_pages
+from pdf_text_backends import LAYOUT
+from pdf_extraction_cache import extraction_cache, extract_documents_cached
+
 # Suppress pdfplumber pattern warnings
 warnings.filterwarnings('ignore', message='.*cannot set gray color.*')
 warnings.filterwarnings('ignore', message='.*Pattern.*')
 
+# Section titles (and the section ids derived from them) come from
+# pdfplumber layout text; the fast backends' plain text splits and spaces
+# some titles differently, so it is not used here. Every page is parsed
+# for sections, so every page needs layout text: this extractor gets no
+# speedup from the fast backends, only from the extraction cache and the
+# process pool
+TEXT_MODE = LAYOUT
+
 
 @dataclass
 class Section:
@@ -93,34 +105,27 @@ class PDFStructureExtractor:
 
         self.sections: List[Section] = []
 
-    def extract_from_pdf(self, pdf_path) -> List[Section]:
-        """Extract structured sections from PDF"""
+    def extract_from_pdf(self, pdf_path, page_texts: Optional[List[Optional[str]]] = None) -> List[Section]:
+        """
+        Extract structured sections from PDF
+
+        Args:
+            pdf_path: Path to PDF file
+            page_texts: Text of each page, if already extracted (see pdf_parallel)
+        """
         sections = []
         current_section = None
         content_buffer = []
 
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages, start=1):
-                    try:
-                        # Use layout=True and disable pattern extraction to avoid pattern errors
-                        text = page.extract_text(layout=True, x_tolerance=3, y_tolerance=3)
-                        if not text:
-                            continue
-                    except Exception as e:
-                        # If extraction fails (e.g., pattern errors), try simpler method
-                        print(f"Warning: Complex graphics on page {page_num}, using basic extraction")
-                        try:
-                            text = page.extract_text()
-                        except:
-                            # If even basic extraction fails, skip this page
-                            print(f"Warning: Skipping page {page_num} due to extraction error")
-                            continue
-
-                        if not text:
-                            continue
-
-                    lines = text.split('\n')
+            if page_texts is None:
+                page_texts = extract_pages(pdf_path, mode=TEXT_MODE)
+
+            for page_num, text in enumerate(page_texts, start=1):
+                if not text:
+                    continue
+
+                lines = text.split('\n')
 
                 for line in lines:
                     line = line.strip()
@@ -233,10 +238,13 @@ class PDFStructureExtractor:
 class PDFStructureComparator:
     """Compare two PDF documents by their structure and content"""
 
-    def __init__(self, original_pdf_path, modified_pdf_path):
+    def __init__(self, original_pdf_path, modified_pdf_path, cache_enabled: bool = True):
         self.original_path = original_pdf_path
         self.modified_path = modified_pdf_path
 
+        # Page texts of PDFs seen before come from the extraction cache
+        self.cache = extraction_cache() if cache_enabled else None
+
         # Extract structures
         self.original_extractor = PDFStructureExtractor()
         self.modified_extractor = PDFStructureExtractor()
@@ -255,25 +263,47 @@ class PDFStructureComparator:
             'reordered': 0
         }
 
-    def compare(self) -> List[SectionMatch]:
-        """Perform full comparison"""
+    def compare(self, progress=None) -> List[SectionMatch]:
+        """
+        Perform full comparison
+
+        Args:
+            progress: Optional callback(stage, fraction, message) for the
+                'parse' and 'diff' stages (see comparison_jobs)
+        """
+        report = progress or no_progress
+
+        # Extract the pages of both PDFs at the same time
+        report('parse', 0.0, "Extracting text")
+        try:
+            original_pages, modified_pages = extract_documents_cached([self.original_path, self.modified_path],
+                                                                      mode=TEXT_MODE, cache=self.cache)
+        except Exception as e:
+            # Each extractor reports (and survives) its own file's errors
+            print(f"Error extracting documents: {str(e)}")
+            original_pages = modified_pages = None
+
         # Extract sections from both PDFs
-        self.original_sections = self.original_extractor.extract_from_pdf(self.original_path)
-        self.modified_sections = self.modified_extractor.extract_from_pdf(self.modified_path)
+        report('parse', 0.5, "Original document")
+        self.original_sections = self.original_extractor.extract_from_pdf(self.original_path, original_pages)
+        report('parse', 0.75, "Modified document")
+        self.modified_sections = self.modified_extractor.extract_from_pdf(self.modified_path, modified_pages)
 
         self.summary['total_sections_original'] = len(self.original_sections)
         self.summary['total_sections_modified'] = len(self.modified_sections)
 
         # Match sections using intelligent algorithm
+        report('diff', 0.0, "Matching sections")
         self.matches = self._match_sections()
 
         # Analyze content changes for matched sections
-        for match in self.matches:
+        for i, match in enumerate(self.matches):
             if match.original_section and match.modified_section:
                 match.content_changes = self._compare_content(
                     match.original_section.content,
                     match.modified_section.content
                 )
+            report('diff', (i + 1) / len(self.matches), "Comparing section content")
 
         # Update summary statistics
         self._update_summary()
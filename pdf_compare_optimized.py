@@ -1,15 +1,25 @@
 """
 Optimized PDF Comparison - Fast Table of Contents approach
 Extracts only headings first, then loads content on-demand
+
+Each document is parsed once into a PageTextIndex (the text lines of every
+page); heading detection, ToC parsing and section content all read from
+it, so selecting a section does not reopen the PDF.
 """
 
-import pdfplumber
 import re
 from typing import List, Dict, Tuple, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from difflib import SequenceMatcher
 import warnings
 
+from pdf_extraction_cache import extraction_cache, extract_documents_cached, cached, source_kind, HEADINGS
+from pdf_text_backends import PDFPLUMBER, PLAIN
+
+# Heading detection is tuned on pdfplumber text; pdfium, for one, finds
+# fewer headings on the same pages, so the fast backends are not used here
+TEXT_BACKEND = PDFPLUMBER
+
 # Suppress pattern warnings
 warnings.filterwarnings('ignore', message='.*cannot set gray color.*')
 warnings.filterwarnings('ignore', message='.*Pattern.*')
@@ -38,10 +48,36 @@ class SectionContent:
     raw_text: str
 
 
+@dataclass
+class PageTextIndex:
+    """Text lines of every page of one PDF, extracted in a single pass"""
+    pages: List[Optional[List[str]]]  # Lines per page (0-indexed); None if the page has no text
+
+    @classmethod
+    def from_texts(cls, page_texts: List[Optional[str]]) -> 'PageTextIndex':
+        """Index of page texts as returned by pdf_parallel"""
+        return cls(pages=[text.split('\n') if text else None for text in page_texts])
+
+    @property
+    def num_pages(self) -> int:
+        return len(self.pages)
+
+    def page_lines(self, start_page: int, end_page: int) -> Dict[int, List[str]]:
+        """Lines of the pages with text in start_page..end_page (0-indexed, inclusive)"""
+        return {page_num: self.pages[page_num]
+                for page_num in range(max(start_page, 0), min(end_page + 1, self.num_pages))
+                if self.pages[page_num] is not None}
+
+
 class OptimizedPDFExtractor:
     """Fast PDF extraction - headings first, content on-demand"""
 
-    def __init__(self):
+    def __init__(self, cache_enabled: bool = True, backend: str = TEXT_BACKEND):
+        """
+        Args:
+            cache_enabled: Reuse page texts and headings extracted from the same PDF before
+            backend: Text backend (see pdf_text_backends)
+        """
         # Patterns for identifying headings
         self.heading_patterns = [
             # Numbered patterns
@@ -58,98 +94,108 @@ class OptimizedPDFExtractor:
         ]
 
         self.toc_patterns = [
-            # Table of contents style entries
-            r'^(\d+\.?\d*\.?\d*\.?\d*)\s+([^\.\d]+?)\s*\.{2,}\s*\d+$',  # 1.2.3 Title .... 45
-            r'^([A-Z][A-Z\s]{2,50})\s*\.{2,}\s*\d+$',  # TITLE .... 45
+            # Table of contents style entries (leaders may be spaced: ". . . .")
+            r'^(\d+\.?\d*\.?\d*\.?\d*)\s+([^\.\d]+?)\s*(?:\.\s?){2,}\s*\d+$',  # 1.2.3 Title .... 45
+            r'^([A-Z][A-Z\s]{2,50})\s*(?:\.\s?){2,}\s*\d+$',  # TITLE .... 45
         ]
 
         # Cache for footer/header detection
         self.common_lines = {}  # Track lines that appear on multiple pages
 
+        # Parsed documents, by path
+        self._indexes: Dict[str, PageTextIndex] = {}
+        self.backend = backend
+        self.cache = extraction_cache() if cache_enabled else None
+
+    def load_documents(self, pdf_paths: List[str]):
+        """Parse several PDFs at the same time (see pdf_parallel)"""
+        pending = [pdf_path for pdf_path in pdf_paths if pdf_path not in self._indexes]
+        if not pending:
+            return
+        try:
+            documents = extract_documents_cached(pending, cache=self.cache, backend=self.backend)
+        except Exception as e:
+            # Left to page_index(), which reports the failing file
+            print(f"Error extracting documents: {str(e)}")
+            return
+        for pdf_path, page_texts in zip(pending, documents):
+            self._indexes[pdf_path] = PageTextIndex.from_texts(page_texts)
+
+    def page_index(self, pdf_path: str) -> PageTextIndex:
+        """Page text index of a PDF, parsed on first use and kept"""
+        if pdf_path not in self._indexes:
+            page_texts = extract_documents_cached([pdf_path], cache=self.cache, backend=self.backend)[0]
+            self._indexes[pdf_path] = PageTextIndex.from_texts(page_texts)
+        return self._indexes[pdf_path]
+
     def extract_toc_and_headings(self, pdf_path: str) -> List[HeadingInfo]:
         """
         Fast extraction of just headings and table of contents
         Returns list of all headings found
         """
+        try:
+            found = cached(self.cache, pdf_path, source_kind(HEADINGS, PLAIN, self.backend),
+                           lambda: [asdict(heading) for heading in self._find_headings(pdf_path)])
+        except Exception as e:
+            print(f"Error extracting headings: {str(e)}")
+            return []
+        return [HeadingInfo(**heading) for heading in found]
+
+    def _find_headings(self, pdf_path: str) -> List[HeadingInfo]:
+        """Detect the headings of a PDF from its page text index"""
         headings = []
         seen_titles = set()  # Avoid duplicates
 
-        try:
-            with pdfplumber.open(pdf_path) as pdf:
-                total_pages = len(pdf.pages)
-
-                # First, check first 5 pages for ToC
-                toc_headings = self._extract_from_toc(pdf, max_pages=5)
-
-                # Then scan all pages for headings (fast scan - no content extraction)
-                for page_num, page in enumerate(pdf.pages, start=1):
-                    # Show progress for long documents
-                    if page_num % 20 == 0:
-                        print(f"Scanning page {page_num}/{total_pages}...")
-
-                    try:
-                        # Quick text extraction
-                        text = page.extract_text()
-                        if not text:
-                            continue
+        index = self.page_index(pdf_path)
 
-                        lines = text.split('\n')
+        # First, check first 5 pages for ToC
+        toc_headings = self._extract_from_toc(index, max_pages=5)
 
-                        for line_num, line in enumerate(lines):
-                            line = line.strip()
-                            if not line or len(line) < 3:
-                                continue
+        # Then scan all pages for headings
+        for page_num, lines in enumerate(index.pages, start=1):
+            if not lines:
+                continue
 
-                            # Check if this is a heading
-                            heading_info = self._identify_heading(line, page_num, line_num)
+            for line_num, line in enumerate(lines):
+                line = line.strip()
+                if not line or len(line) < 3:
+                    continue
 
-                            if heading_info and heading_info.title not in seen_titles:
-                                headings.append(heading_info)
-                                seen_titles.add(heading_info.title)
+                # Check if this is a heading
+                heading_info = self._identify_heading(line, page_num, line_num)
 
-                    except Exception as e:
-                        # Skip problematic pages
-                        continue
+                if heading_info and heading_info.title not in seen_titles:
+                    headings.append(heading_info)
+                    seen_titles.add(heading_info.title)
 
-                # Merge ToC with found headings, prioritize ToC
-                if toc_headings:
-                    # Use ToC as primary structure
-                    final_headings = toc_headings
+        # Merge ToC with found headings, prioritize ToC
+        if toc_headings:
+            # Use ToC as primary structure
+            final_headings = toc_headings
 
-                    # Add any headings not in ToC
-                    toc_titles = {h.title for h in toc_headings}
-                    for heading in headings:
-                        if heading.title not in toc_titles:
-                            final_headings.append(heading)
-                else:
-                    final_headings = headings
+            # Add any headings not in ToC
+            toc_titles = {h.title for h in toc_headings}
+            for heading in headings:
+                if heading.title not in toc_titles:
+                    final_headings.append(heading)
+        else:
+            final_headings = headings
 
-                # Sort by page number, then by line number
-                final_headings.sort(key=lambda h: (h.page_number, h.start_line))
+        # Sort by page number, then by line number
+        final_headings.sort(key=lambda h: (h.page_number, h.start_line))
 
-                # Assign unique identifiers
-                for i, heading in enumerate(final_headings):
-                    heading.identifier = f"section_{i}_{heading.page_number}"
+        # Assign unique identifiers
+        for i, heading in enumerate(final_headings):
+            heading.identifier = f"section_{i}_{heading.page_number}"
 
-                return final_headings
+        return final_headings
 
-        except Exception as e:
-            print(f"Error extracting headings: {str(e)}")
-            return []
-
-    def _extract_from_toc(self, pdf, max_pages=5) -> List[HeadingInfo]:
+    def _extract_from_toc(self, index: PageTextIndex, max_pages=5) -> List[HeadingInfo]:
         """Extract headings from table of contents if present"""
         toc_headings = []
 
-        for page_num in range(min(max_pages, len(pdf.pages))):
+        for page_num, lines in index.page_lines(0, max_pages - 1).items():
             try:
-                page = pdf.pages[page_num]
-                text = page.extract_text()
-                if not text:
-                    continue
-
-                lines = text.split('\n')
-
                 # Look for ToC patterns
                 for line_num, line in enumerate(lines):
                     line = line.strip()
@@ -236,92 +282,81 @@ class OptimizedPDFExtractor:
         Extract content for a specific section on-demand
         Handles multi-page sections and removes headers/footers
         """
-        all_page_lines = {}  # Store lines by page for footer detection
         content_lines = []
 
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                # Determine page range - handle sections spanning multiple pages
-                start_page = heading.page_number - 1  # 0-indexed
+            index = self.page_index(pdf_path)
 
-                # Find actual end page by looking for next heading OR end of document
-                if next_heading:
-                    end_page = next_heading.page_number - 1
-                else:
-                    # No next heading, go to end of document
-                    end_page = len(pdf.pages) - 1
-
-                # First pass: collect all lines to detect footers/headers
-                for page_num in range(start_page, min(end_page + 1, len(pdf.pages))):
-                    try:
-                        page = pdf.pages[page_num]
-                        text = page.extract_text()
-                        if not text:
-                            continue
+            # Determine page range - handle sections spanning multiple pages
+            start_page = heading.page_number - 1  # 0-indexed
 
-                        lines = text.split('\n')
-                        all_page_lines[page_num] = lines
+            # Find actual end page by looking for next heading OR end of document
+            if next_heading:
+                end_page = next_heading.page_number - 1
+            else:
+                # No next heading, go to end of document
+                end_page = index.num_pages - 1
 
-                    except Exception as e:
-                        continue
+            # First pass: the section's lines, to detect footers/headers
+            all_page_lines = index.page_lines(start_page, end_page)
 
-                # Detect common headers/footers (appear on multiple pages)
-                headers_footers = self._detect_headers_footers(all_page_lines)
+            # Detect common headers/footers (appear on multiple pages)
+            headers_footers = self._detect_headers_footers(all_page_lines)
 
-                # Second pass: extract actual content, skip headers/footers
-                collecting = False
-                for page_num in range(start_page, min(end_page + 1, len(pdf.pages))):
-                    if page_num not in all_page_lines:
-                        continue
+            # Second pass: extract actual content, skip headers/footers
+            collecting = False
+            for page_num in range(start_page, min(end_page + 1, index.num_pages)):
+                if page_num not in all_page_lines:
+                    continue
 
-                    lines = all_page_lines[page_num]
+                lines = all_page_lines[page_num]
 
-                    for line_num, line in enumerate(lines):
-                        line_clean = line.strip()
+                for line_num, line in enumerate(lines):
+                    line_clean = line.strip()
 
-                        # Skip empty lines
-                        if not line_clean:
-                            continue
+                    # Skip empty lines
+                    if not line_clean:
+                        continue
 
-                        # On start page, skip until we reach the heading
-                        if page_num == start_page:
-                            if line_num < heading.start_line:
-                                continue
-                            elif line_num == heading.start_line:
-                                collecting = True
-                                continue  # Skip the heading itself
-
-                        # On end page with next heading, stop at next heading
-                        if next_heading and page_num == end_page:
-                            # Check if this line is the next heading
-                            if line_num >= next_heading.start_line:
-                                # Check if line matches next heading title
-                                if self._is_heading_line(line_clean, next_heading, all_headings):
-                                    break
-
-                        # Skip if this is a header/footer
-                        if line_clean in headers_footers:
+                    # On start page, skip until we reach the heading
+                    if page_num == start_page:
+                        if line_num < heading.start_line:
                             continue
+                        elif line_num == heading.start_line:
+                            collecting = True
+                            continue  # Skip the heading itself
+
+                    # On end page with next heading, stop at next heading
+                    if next_heading and page_num == end_page:
+                        # Check if this line is the next heading
+                        if line_num >= next_heading.start_line:
+                            # Check if line matches next heading title
+                            if self._is_heading_line(line_clean, next_heading, all_headings):
+                                break
+
+                    # Skip if this is a header/footer
+                    if line_clean in headers_footers:
+                        continue
 
-                        # Skip page numbers (common footer pattern)
-                        if self._is_page_number(line_clean):
-                            continue
+                    # Skip page numbers (common footer pattern)
+                    if self._is_page_number(line_clean):
+                        continue
+
+                    # Skip if this is actually a heading (not content)
+                    if collecting and self._looks_like_heading(line_clean, all_headings):
+                        # This might be a sub-heading within the section
+                        # Only skip if it's a major heading
+                        if all_headings:
+                            is_major_heading = any(
+                                h.title == line_clean and h.page_number == page_num + 1
+                                for h in all_headings
+                                if h != heading and (not next_heading or h != next_heading)
+                            )
+                            if is_major_heading:
+                                continue
 
-                        # Skip if this is actually a heading (not content)
-                        if collecting and self._looks_like_heading(line_clean, all_headings):
-                            # This might be a sub-heading within the section
-                            # Only skip if it's a major heading
-                            if all_headings:
-                                is_major_heading = any(
-                                    h.title == line_clean and h.page_number == page_num + 1
-                                    for h in all_headings
-                                    if h != heading and (not next_heading or h != next_heading)
-                                )
-                                if is_major_heading:
-                                    continue
-
-                        if collecting:
-                            content_lines.append(line_clean)
+                    if collecting:
+                        content_lines.append(line_clean)
 
         except Exception as e:
             print(f"Error extracting section content: {str(e)}")
@@ -409,10 +444,10 @@ class OptimizedPDFExtractor:
 class PDFComparator:
     """Compare two PDFs using heading-based navigation"""
 
-    def __init__(self, original_path: str, modified_path: str):
+    def __init__(self, original_path: str, modified_path: str, cache_enabled: bool = True):
         self.original_path = original_path
         self.modified_path = modified_path
-        self.extractor = OptimizedPDFExtractor()
+        self.extractor = OptimizedPDFExtractor(cache_enabled=cache_enabled)
 
         self.original_headings: List[HeadingInfo] = []
         self.modified_headings: List[HeadingInfo] = []
@@ -420,6 +455,9 @@ class PDFComparator:
 
     def extract_headings(self) -> Tuple[List[HeadingInfo], List[HeadingInfo]]:
         """Fast extraction of headings from both PDFs"""
+        # Both documents are parsed at once
+        self.extractor.load_documents([self.original_path, self.modified_path])
+
         print("Extracting headings from original PDF...")
         self.original_headings = self.extractor.extract_toc_and_headings(self.original_path)
 
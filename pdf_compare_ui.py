@@ -19,6 +19,10 @@ from typing import List
 import openpyxl
 from openpyxl.styles import PatternFill, Font, Alignment
 import io
+from comparison_jobs import job_registry, show_job_progress, track_job
+
+# Query parameter holding the running comparison's job id
+PDF_JOB_PARAM = 'pdf_job'
 
 
 def create_pdf_comparison_ui():
@@ -256,52 +260,67 @@ def create_pdf_comparison_ui():
         if st.button("🔍 Compare Documents", type="primary",
                     disabled=not (original_pdf and modified_pdf)):
             if original_pdf and modified_pdf:
-                with st.spinner("Analyzing document structures..."):
-                    perform_comparison(original_pdf, modified_pdf, critical_keywords)
+                # Runs in the background: reruns and page refreshes pick the job up again
+                registry = job_registry()
+                registry.forget(track_job(PDF_JOB_PARAM))
+                job_id = registry.submit('pdf', perform_comparison, original_pdf.getvalue(),
+                                         modified_pdf.getvalue(), critical_keywords, stages=('parse', 'diff'))
+                track_job(PDF_JOB_PARAM, job_id)
+                st.session_state['pdf_comparison_done'] = False
+
+    job = job_registry().get(track_job(PDF_JOB_PARAM))
+    if job is not None and job.active:
+        show_job_progress(job)
+    elif job is not None and not job.finished_ok:
+        st.error("❌ Error during comparison")
+        st.code(job.error)
+    elif job is not None and st.session_state.get('pdf_job_collected') != job.job_id:
+        # Finished job not yet shown in this session (e.g. after a refresh)
+        comparator, matches, critical_changes = job.result
+        st.session_state['pdf_job_collected'] = job.job_id
+        st.session_state['pdf_comparator'] = comparator
+        st.session_state['pdf_matches'] = matches
+        st.session_state['pdf_critical_changes'] = critical_changes
+        st.session_state['pdf_comparison_done'] = True
+        st.success(f"✅ Analysis complete! Found {len(matches)} sections.")
 
     # Main content area
     if 'pdf_comparison_done' in st.session_state and st.session_state['pdf_comparison_done']:
         display_comparison_results(view_mode, show_unchanged, show_content, critical_keywords)
 
 
-def perform_comparison(original_pdf, modified_pdf, critical_keywords):
-    """Perform the PDF comparison"""
-    try:
-        # Save uploaded files temporarily
-        import tempfile
-        import os
+def perform_comparison(original_data: bytes, modified_data: bytes, critical_keywords, progress=None):
+    """
+    Perform the PDF comparison (runs in a comparison_jobs worker thread)
+
+    Returns:
+        (comparator, matches, critical changes)
+    """
+    # Save uploaded files temporarily
+    import tempfile
+    import os
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_orig:
-            tmp_orig.write(original_pdf.read())
-            orig_path = tmp_orig.name
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_orig:
+        tmp_orig.write(original_data)
+        orig_path = tmp_orig.name
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_mod:
-            tmp_mod.write(modified_pdf.read())
-            mod_path = tmp_mod.name
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_mod:
+        tmp_mod.write(modified_data)
+        mod_path = tmp_mod.name
 
+    try:
         # Perform comparison
         comparator = PDFStructureComparator(orig_path, mod_path)
-        matches = comparator.compare()
+        matches = comparator.compare(progress=progress)
 
         # Find critical changes
         critical_changes = PDFComparisonAnalyzer.find_critical_changes(matches, critical_keywords)
-
-        # Store in session state
-        st.session_state['pdf_comparator'] = comparator
-        st.session_state['pdf_matches'] = matches
-        st.session_state['pdf_critical_changes'] = critical_changes
-        st.session_state['pdf_comparison_done'] = True
-
+    finally:
         # Clean up temp files
         os.unlink(orig_path)
         os.unlink(mod_path)
 
-        st.success(f"✅ Analysis complete! Found {len(matches)} sections.")
-
-    except Exception as e:
-        st.error(f"❌ Error during comparison: {str(e)}")
-        import traceback
-        st.code(traceback.format_exc())
+    return comparator, matches, critical_changes
 
 
 def display_comparison_results(view_mode, show_unchanged, show_content, critical_keywords):
@@ -14,6 +14,8 @@ import tempfile
 from pathlib import Path
 from datetime import datetime
 
+from comparison_jobs import job_registry, show_job_progress, track_job, untrack_job, no_progress
+
 try:
     from advanced_pdf_comparator import AdvancedPDFComparator, ComparisonConfig
     COMPARATOR_AVAILABLE = True
@@ -22,6 +24,10 @@ except ImportError:
     st.error("⚠️ Advanced PDF Comparator not available. Please check installation.")
 
 
+# Query parameter holding the running comparison's job id
+ADVANCED_JOB_PARAM = 'advanced_job'
+
+
 # Page configuration
 st.set_page_config(
     page_title="Advanced PDF Comparator",
@@ -190,48 +196,60 @@ def render_text_input():
     return None, None
 
 
-def run_comparison(old_file, new_file, old_text, new_text, config):
-    """Run document comparison"""
-    try:
-        # Initialize comparator
-        with st.spinner("🔧 Initializing comparison engine..."):
-            comparator = AdvancedPDFComparator(config)
-
-        # Determine comparison mode
-        if old_file and new_file:
-            # PDF comparison mode
-            with st.spinner("📄 Comparing PDF documents..."):
-                # Save uploaded files to temp directory
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_old:
-                    tmp_old.write(old_file.read())
-                    old_path = tmp_old.name
-
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_new:
-                    tmp_new.write(new_file.read())
-                    new_path = tmp_new.name
-
-                # Run comparison
-                report = comparator.compare_documents(old_path, new_path)
-
-                # Clean up temp files
-                Path(old_path).unlink()
-                Path(new_path).unlink()
-
-        elif old_text and new_text:
-            # Text comparison mode
-            with st.spinner("💬 Comparing text..."):
-                report = comparator.compare_texts(old_text, new_text)
-
-        else:
-            st.error("❌ Please provide documents or text to compare")
-            return None
-
-        return report
+def comparison_stages(config, documents: bool):
+    """Progress stages a comparison with this configuration goes through"""
+    if not documents:
+        return ('parse', 'embed', 'diff')
+    # Documents are translated and embedded while they are parsed
+    # (AdvancedPDFComparator.process_document), all reported as 'parse'
+    stages = ['parse', 'diff']
+    if config.enable_llm:
+        stages.append('explain')
+    return tuple(stages)
+
+
+def run_comparison(old_data, new_data, old_text, new_text, config, progress=no_progress):
+    """
+    Run document comparison (in a comparison_jobs worker thread)
+
+    Args:
+        old_data: Original PDF bytes, or None to compare text
+        new_data: Modified PDF bytes, or None to compare text
+        old_text: Original text (text mode)
+        new_text: Modified text (text mode)
+        config: ComparisonConfig
+        progress: JobProgress (no_progress outside a job)
+
+    Returns:
+        ComparisonReport
+    """
+    # Initialize comparator
+    progress('parse', 0.0, "Initializing comparison engine")
+    comparator = AdvancedPDFComparator(config)
+
+    if old_data and new_data:
+        # PDF comparison mode: save uploaded files to temp directory
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_old:
+            tmp_old.write(old_data)
+            old_path = tmp_old.name
+
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_new:
+            tmp_new.write(new_data)
+            new_path = tmp_new.name
+
+        try:
+            report = comparator.compare_documents(old_path, new_path, progress=progress)
+        finally:
+            # Clean up temp files
+            Path(old_path).unlink()
+            Path(new_path).unlink()
+    else:
+        # Text comparison mode
+        report = comparator.compare_texts(old_text, new_text, progress=progress)
 
-    except Exception as e:
-        st.error(f"❌ Comparison failed: {str(e)}")
-        st.exception(e)
-        return None
+    if report is None:
+        raise ValueError("No text could be extracted from one of the documents")
+    return report
 
 
 def render_summary(report):
@@ -480,20 +498,41 @@ def main():
             use_container_width=True
         )
 
-    # Run comparison
+    # Run comparison in the background: reruns and page refreshes pick the job up again
     if compare_button:
         if not COMPARATOR_AVAILABLE:
             st.error("❌ Comparator not available. Please check installation.")
             return
 
-        report = run_comparison(old_file, new_file, old_text, new_text, config)
-
-        if report:
-            st.session_state.report = report
-            st.session_state.comparison_done = True
-            st.session_state.config = config
-            st.success("✅ Comparison completed successfully!")
-            st.rerun()
+        documents = bool(old_file and new_file)
+        if not documents and not (old_text and new_text):
+            st.error("❌ Please provide documents or text to compare")
+        else:
+            registry = job_registry()
+            registry.forget(track_job(ADVANCED_JOB_PARAM))
+            job_id = registry.submit(
+                'advanced_pdf', run_comparison,
+                old_file.getvalue() if documents else None,
+                new_file.getvalue() if documents else None,
+                old_text, new_text, config,
+                stages=comparison_stages(config, documents)
+            )
+            track_job(ADVANCED_JOB_PARAM, job_id)
+            st.session_state.comparison_done = False
+
+    job = job_registry().get(track_job(ADVANCED_JOB_PARAM))
+    if job is not None and job.active:
+        show_job_progress(job)
+    elif job is not None and not job.finished_ok:
+        st.error("❌ Comparison failed")
+        st.code(job.error)
+    elif job is not None and st.session_state.get('advanced_job_collected') != job.job_id:
+        # Finished job not yet shown in this session (e.g. after a refresh)
+        st.session_state.advanced_job_collected = job.job_id
+        st.session_state.report = job.result
+        st.session_state.comparison_done = True
+        st.session_state.config = config
+        st.success("✅ Comparison completed successfully!")
 
     # Display results if comparison done
     if st.session_state.comparison_done and st.session_state.report:
@@ -515,6 +554,8 @@ def main():
 
         with col2:
             if st.button("🔄 Start New Comparison", use_container_width=True):
+                job_registry().forget(track_job(ADVANCED_JOB_PARAM))
+                untrack_job(ADVANCED_JOB_PARAM)
                 st.session_state.comparison_done = False
                 st.session_state.report = None
                 st.rerun()
@@ -0,0 +1,325 @@
+"""
+PDF Extraction Cache
+
+SQLite cache of what the PDF comparisons extract from a document - page
+texts, detected headings and paragraphs - keyed by the SHA-256 of the PDF
+file and the text backend used (see pdf_text_backends). Comparing every
+new revision against the same baseline then extracts the baseline once;
+later comparisons read it back without opening the PDF.
+
+Entries are zlib-compressed JSON blobs (no pickling) tagged with the
+extractor version, which includes the pdfplumber version: when either
+changes, old entries stop matching and age out. The least recently used
+entries are evicted once the cache grows past its size budget.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import pdfplumber
+
+from pdf_parallel import extract_documents, iter_pages
+from pdf_text_backends import backend_version, choose_backend, AUTO, PLAIN
+
+# Bump when what gets extracted changes (heading patterns, paragraph rules, ...)
+# pdfplumber is part of it as the fallback backend of every extraction
+EXTRACTOR_VERSION = f"4/pdfplumber-{pdfplumber.__version__}"
+
+DEFAULT_CACHE_PATH = 'pdf_extraction_cache.db'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MB
+
+# Entry kinds, qualified by the text they were extracted from (see source_kind)
+PAGES = 'pages'  # Page texts
+HEADINGS = 'headings'  # OptimizedPDFExtractor headings
+PARAGRAPHS = 'paragraphs'  # AdvancedPDFComparator paragraphs
+
+# (path, size, mtime) -> digest, so a file is hashed once while unchanged;
+# the least recently used of more than MAX_DIGESTS files are forgotten
+MAX_DIGESTS = 1024
+_digests: 'OrderedDict[tuple, str]' = OrderedDict()
+_digests_lock = threading.Lock()
+
+
+def source_kind(kind: str, mode: str = PLAIN, backend: str = AUTO) -> str:
+    """
+    Entry kind qualified by the extraction mode and text backend, e.g. 'pages/plain/pdfium-5.14.0'
+
+    Text from different backends differs, and so do headings and paragraphs found in it.
+    """
+    return f"{kind}/{mode}/{backend_version(choose_backend(mode, backend))}"
+
+
+def pdf_digest(pdf_path: str) -> str:
+    """
+    SHA-256 of a PDF file
+
+    Args:
+        pdf_path: Path to PDF file
+
+    Returns:
+        Hex digest
+    """
+    stat = os.stat(pdf_path)
+    key = (os.path.abspath(pdf_path), stat.st_size, stat.st_mtime_ns)
+    with _digests_lock:
+        if key in _digests:
+            _digests.move_to_end(key)
+            return _digests[key]
+
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+
+    with _digests_lock:
+        _digests[key] = digest.hexdigest()
+        while len(_digests) > MAX_DIGESTS:
+            _digests.popitem(last=False)
+    return digest.hexdigest()
+
+
+class PDFExtractionCache:
+    """SQLite-based cache of PDF extraction results with LRU eviction under a size budget"""
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize extraction cache
+
+        Args:
+            db_path: Path to SQLite database file
+            max_bytes: Size budget; least recently used entries are evicted past it
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.conn = None
+        self._lock = threading.Lock()
+        self._init_database()
+
+    def _init_database(self):
+        """Initialize database and create tables if needed"""
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS extractions (
+                digest TEXT,
+                kind TEXT,
+                version TEXT,
+                data BLOB,
+                size INTEGER,
+                last_used REAL,
+                PRIMARY KEY (digest, kind, version)
+            )
+        ''')
+        self.conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_last_used
+            ON extractions(last_used)
+        ''')
+        self.conn.commit()
+
+    def get(self, digest: str, kind: str) -> Optional[Any]:
+        """
+        Get a cached extraction result
+
+        Args:
+            digest: SHA-256 of the PDF file (see pdf_digest)
+            kind: What was extracted (see source_kind)
+
+        Returns:
+            The stored value, or None on a miss
+        """
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT data FROM extractions WHERE digest=? AND kind=? AND version=?',
+                (digest, kind, EXTRACTOR_VERSION)
+            ).fetchone()
+            if row is None:
+                return None
+
+            # Mark as recently used
+            self.conn.execute(
+                'UPDATE extractions SET last_used=? WHERE digest=? AND kind=? AND version=?',
+                (time.time(), digest, kind, EXTRACTOR_VERSION)
+            )
+            self.conn.commit()
+
+        return json.loads(zlib.decompress(row[0]).decode('utf-8'))
+
+    def set(self, digest: str, kind: str, value: Any):
+        """
+        Cache an extraction result
+
+        Args:
+            digest: SHA-256 of the PDF file
+            kind: What was extracted
+            value: JSON-serializable result
+        """
+        data = zlib.compress(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+        with self._lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO extractions (digest, kind, version, data, size, last_used) VALUES (?, ?, ?, ?, ?, ?)',
+                (digest, kind, EXTRACTOR_VERSION, data, len(data), time.time())
+            )
+            self.conn.commit()
+            self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits its budget (lock held)"""
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM extractions').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for rowid, size in self.conn.execute('SELECT rowid, size FROM extractions ORDER BY last_used'):
+            if total <= self.max_bytes:
+                break
+            evicted.append((rowid,))
+            total -= size
+        self.conn.executemany('DELETE FROM extractions WHERE rowid=?', evicted)
+        self.conn.commit()
+
+    def get_statistics(self) -> Dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dict with document and entry counts and total size
+        """
+        with self._lock:
+            documents, entries, total = self.conn.execute(
+                'SELECT COUNT(DISTINCT digest), COUNT(*), COALESCE(SUM(size), 0) FROM extractions'
+            ).fetchone()
+        return {
+            'documents': documents,
+            'entries': entries,
+            'total_bytes': total,
+            'max_bytes': self.max_bytes,
+        }
+
+    def clear(self):
+        """Clear all cached extractions"""
+        with self._lock:
+            self.conn.execute('DELETE FROM extractions')
+            self.conn.commit()
+
+    def close(self):
+        """Close database connection"""
+        if self.conn:
+            self.conn.close()
+
+
+_cache: Optional[PDFExtractionCache] = None
+_cache_lock = threading.Lock()
+
+
+def extraction_cache() -> PDFExtractionCache:
+    """The cache shared by the PDF comparisons of this process"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PDFExtractionCache(DEFAULT_CACHE_PATH)
+        return _cache
+
+
+def cached(cache: Optional[PDFExtractionCache], pdf_path: str, kind: str, compute: Callable[[], Any]) -> Any:
+    """
+    Cached extraction result for a PDF, computed and stored on a miss
+
+    Args:
+        cache: Cache to use (None computes without caching)
+        pdf_path: Path to PDF file
+        kind: What is extracted
+        compute: Called without arguments on a miss; returns a JSON-serializable value
+
+    Returns:
+        The extraction result
+    """
+    if cache is None:
+        return compute()
+    digest = pdf_digest(pdf_path)
+    value = cache.get(digest, kind)
+    if value is None:
+        value = compute()
+        cache.set(digest, kind, value)
+    return value
+
+
+def cached_stream(cache: Optional[PDFExtractionCache], pdf_path: str, kind: str,
+                  compute: Callable[[], Iterable]) -> Iterator:
+    """
+    Streaming counterpart of cached(): yield the items of a cached list, or compute them
+
+    On a miss, items are passed on as compute() produces them and the list
+    is stored once it has been consumed in full (a stream abandoned half
+    way is not cached).
+
+    Args:
+        cache: Cache to use (None computes without caching)
+        pdf_path: Path to PDF file
+        kind: What is extracted
+        compute: Called without arguments on a miss; returns an iterable of JSON-serializable items
+
+    Yields:
+        The extracted items
+    """
+    if cache is None:
+        yield from compute()
+        return
+    digest = pdf_digest(pdf_path)
+    value = cache.get(digest, kind)
+    if value is not None:
+        yield from value
+        return
+    value = []
+    for item in compute():
+        value.append(item)
+        yield item
+    cache.set(digest, kind, value)
+
+
+def iter_pages_cached(pdf_path: str, mode: str = PLAIN, cache: Optional[PDFExtractionCache] = None,
+                      backend: str = AUTO) -> Iterator[Optional[str]]:
+    """
+    Page texts of a PDF as they are extracted (see pdf_parallel.iter_pages), from the cache where possible
+
+    Yields:
+        The text of each page (None for pages without text)
+    """
+    return cached_stream(cache, pdf_path, source_kind(PAGES, mode, backend),
+                         lambda: iter_pages(pdf_path, mode, backend=backend))
+
+
+def extract_documents_cached(pdf_paths: Sequence[str], mode: str = PLAIN, cache: Optional[PDFExtractionCache] = None,
+                             backend: str = AUTO) -> List[List[Optional[str]]]:
+    """
+    Page texts of several PDFs (see pdf_parallel.extract_documents), from the cache where possible
+
+    Documents missing from the cache are extracted together and stored.
+
+    Args:
+        pdf_paths: PDFs to extract
+        mode: Extraction mode
+        cache: Cache to use (None extracts without caching)
+        backend: Text backend (see pdf_text_backends)
+
+    Returns:
+        Per document, the text of each page (None for pages without text)
+    """
+    if cache is None:
+        return extract_documents(pdf_paths, mode, backend=backend)
+
+    kind = source_kind(PAGES, mode, backend)
+    digests = [pdf_digest(path) for path in pdf_paths]
+    documents = [cache.get(digest, kind) for digest in digests]
+
+    missing = [i for i, pages in enumerate(documents) if pages is None]
+    if missing:
+        extracted = extract_documents([pdf_paths[i] for i in missing], mode, backend=backend)
+        for i, pages in zip(missing, extracted):
+            cache.set(digests[i], kind, pages)
+            documents[i] = pages
+    return documents
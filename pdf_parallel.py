@@ -0,0 +1,196 @@
+"""
+Parallel PDF Page Extraction
+
+Text extraction is CPU-bound and runs one page at a time. This splits a
+document's pages into contiguous ranges and extracts them across a process
+pool, using the backend chosen by pdf_text_backends; each worker opens the
+PDF itself and returns the text of its pages, and the ranges are merged
+back in page order, so the result is the same as extracting serially.
+extract_documents() puts the ranges of several documents (both sides of a
+comparison) into one pool, so they extract at the same time.
+
+Small documents are extracted in-process: starting the pool costs more
+than it saves below MIN_PARALLEL_PAGES pages (far more with the fast
+backends, which extract hundreds of pages per second).
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from pdf_text_backends import open_backend, choose_backend, AUTO, PDFPLUMBER, PLAIN
+
+# Below this many pages in total, extract in-process (pdfplumber / fast backends)
+MIN_PARALLEL_PAGES = 40
+MIN_PARALLEL_PAGES_FAST = 1000
+
+# Page ranges per worker, so a slow stretch of pages does not hold up the rest
+RANGES_PER_WORKER = 4
+
+# Smallest page range handed to a worker (each one reopens the PDF)
+MIN_RANGE_PAGES = 8
+
+
+def default_workers() -> int:
+    """Worker count when none is given: one per CPU, at most 8"""
+    return max(1, min(os.cpu_count() or 1, 8))
+
+
+def open_document(pdf_path: str, mode: str = PLAIN, backend: str = AUTO):
+    """
+    Open a PDF with the chosen backend, or pdfplumber if that backend cannot read it
+
+    Returns:
+        The open backend; close() it when done
+    """
+    name = choose_backend(mode, backend)
+    try:
+        return open_backend(name, pdf_path, mode)
+    except Exception:
+        if name == PDFPLUMBER:
+            raise
+        return open_backend(PDFPLUMBER, pdf_path, mode)
+
+
+def page_count(pdf_path: str, backend: str = AUTO) -> int:
+    """Number of pages in a PDF"""
+    document = open_document(pdf_path, PLAIN, backend)
+    try:
+        return len(document)
+    finally:
+        document.close()
+
+
+def page_ranges(n_pages: int, workers: int) -> List[Tuple[int, int]]:
+    """
+    Split pages into contiguous (start, end) ranges, 0-indexed, end exclusive
+
+    Args:
+        n_pages: Pages in the document
+        workers: Worker processes the ranges are spread over
+
+    Returns:
+        Ranges covering all pages, in page order
+    """
+    if n_pages <= 0:
+        return []
+    n_ranges = max(1, min(workers * RANGES_PER_WORKER, n_pages // MIN_RANGE_PAGES))
+    size = -(-n_pages // n_ranges)
+    return [(start, min(start + size, n_pages)) for start in range(0, n_pages, size)]
+
+
+def iter_page_range(pdf_path: str, start: int = 0, end: Optional[int] = None, mode: str = PLAIN,
+                    backend: str = AUTO) -> Iterator[Optional[str]]:
+    """
+    Open the PDF and yield the text of pages start..end-1 (0-indexed) as each is extracted
+
+    Pages (or whole files) the chosen backend cannot read are retried with
+    pdfplumber, which decodes some fonts the faster engines cannot.
+    """
+    fallback = None
+    document = open_document(pdf_path, mode, backend)
+    try:
+        for page_index in range(start, len(document) if end is None else min(end, len(document))):
+            text = document.page_text(page_index)
+            if text is None and document.name != PDFPLUMBER:
+                fallback = fallback or open_backend(PDFPLUMBER, pdf_path, mode)
+                text = fallback.page_text(page_index)
+            yield text
+    finally:
+        document.close()
+        if fallback is not None:
+            fallback.close()
+
+
+def extract_page_range(pdf_path: str, start: int, end: int, mode: str = PLAIN,
+                       backend: str = AUTO) -> List[Optional[str]]:
+    """Worker: open the PDF and extract pages start..end-1 (0-indexed)"""
+    return list(iter_page_range(pdf_path, start, end, mode, backend))
+
+
+def extract_documents(pdf_paths: Sequence[str], mode: str = PLAIN, workers: Optional[int] = None,
+                      backend: str = AUTO) -> List[List[Optional[str]]]:
+    """
+    Extract the page texts of several PDFs, sharing one process pool
+
+    Args:
+        pdf_paths: PDFs to extract
+        mode: PLAIN or LAYOUT
+        workers: Process count (default: one per CPU, at most 8; 1 = in-process)
+        backend: Text backend (see pdf_text_backends; AUTO picks the fastest for the mode)
+
+    Returns:
+        Per document, the text of each page (None for pages without text)
+    """
+    workers = workers or default_workers()
+    counts = [page_count(path, backend) for path in pdf_paths]
+
+    # The fast engines get through small documents quicker than the pool starts
+    threshold = MIN_PARALLEL_PAGES if choose_backend(mode, backend) == PDFPLUMBER else MIN_PARALLEL_PAGES_FAST
+    if workers == 1 or sum(counts) < threshold:
+        return [extract_page_range(path, 0, n_pages, mode, backend) for path, n_pages in zip(pdf_paths, counts)]
+
+    # Spawn rather than fork: the Streamlit server process runs threads
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = [[executor.submit(extract_page_range, path, start, end, mode, backend)
+                    for start, end in page_ranges(n_pages, workers)]
+                   for path, n_pages in zip(pdf_paths, counts)]
+        return [[text for future in document for text in future.result()] for document in futures]
+
+
+def extract_pages(pdf_path: str, mode: str = PLAIN, workers: Optional[int] = None,
+                  backend: str = AUTO) -> List[Optional[str]]:
+    """
+    Extract the page texts of one PDF
+
+    Args:
+        pdf_path: PDF to extract
+        mode: PLAIN or LAYOUT
+        workers: Process count (default: one per CPU, at most 8; 1 = in-process)
+        backend: Text backend (see pdf_text_backends)
+
+    Returns:
+        The text of each page (None for pages without text)
+    """
+    return extract_documents([pdf_path], mode, workers, backend)[0]
+
+
+def iter_pages(pdf_path: str, mode: str = PLAIN, workers: Optional[int] = None,
+               backend: str = AUTO) -> Iterator[Optional[str]]:
+    """
+    Yield the page texts of one PDF in page order, as they are extracted
+
+    Same pages as extract_pages(), but the first ones are available before
+    the rest of the document is read. Large documents are still extracted
+    across the process pool: every range is submitted up front, so the
+    workers keep extracting while the caller works on earlier pages.
+
+    Args:
+        pdf_path: PDF to extract
+        mode: PLAIN or LAYOUT
+        workers: Process count (default: one per CPU, at most 8; 1 = in-process)
+        backend: Text backend (see pdf_text_backends)
+
+    Yields:
+        The text of each page (None for pages without text)
+    """
+    workers = workers or default_workers()
+    threshold = MIN_PARALLEL_PAGES if choose_backend(mode, backend) == PDFPLUMBER else MIN_PARALLEL_PAGES_FAST
+    n_pages = page_count(pdf_path, backend) if workers > 1 else 0
+    if workers == 1 or n_pages < threshold:
+        yield from iter_page_range(pdf_path, mode=mode, backend=backend)
+        return
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = [executor.submit(extract_page_range, pdf_path, start, end, mode, backend)
+                   for start, end in page_ranges(n_pages, workers)]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # Stopped early: drop the ranges not started yet
+            for future in futures:
+                future.cancel()
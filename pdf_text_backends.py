@@ -0,0 +1,192 @@
+"""
+PDF Text Extraction Backends
+
+pdfplumber rebuilds every page from individual characters, which makes it
+the slowest part of every PDF comparison. Plain text is also available
+from faster engines:
+
+- pdfium (pypdfium2, installed with pdfplumber): native, by far the fastest
+- pypdf: pure Python, a few times faster than pdfplumber
+
+A backend opens one PDF and returns the text of a page, or None when the
+page has no text. choose_backend() picks the cheapest installed backend
+that can serve an extraction mode: layout text needs pdfplumber, plain
+text takes the fastest engine. Pages a fast engine returns nothing for
+are retried with pdfplumber (see pdf_parallel.extract_page_range).
+
+pdfium is not thread-safe; in-process calls into it are serialized with a
+lock (worker processes each have their own copy).
+"""
+
+import logging
+import threading
+from typing import List, Optional
+
+import pdfplumber
+
+try:
+    import pypdfium2
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+try:
+    import pypdf
+    PYPDF_AVAILABLE = True
+except ImportError:
+    try:
+        # PyPDF2 3.x has the same reader API
+        import PyPDF2 as pypdf
+        PYPDF_AVAILABLE = True
+    except ImportError:
+        PYPDF_AVAILABLE = False
+
+# Extraction modes: 'plain' is the page text; 'layout' keeps the layout and
+# falls back to plain text on pages it cannot handle
+PLAIN, LAYOUT = 'plain', 'layout'
+
+# Backends
+PDFPLUMBER, PDFIUM, PYPDF = 'pdfplumber', 'pdfium', 'pypdf'
+AUTO = 'auto'
+
+# Plain-text backends, fastest first
+FAST_BACKENDS = (PDFIUM, PYPDF)
+
+_pdfium_lock = threading.RLock()
+
+
+class PdfplumberBackend:
+    """Text via pdfplumber (plain or layout)"""
+    name = PDFPLUMBER
+
+    def __init__(self, pdf_path: str, mode: str = PLAIN):
+        self.mode = mode
+        self.pdf = pdfplumber.open(pdf_path)
+
+    def __len__(self):
+        return len(self.pdf.pages)
+
+    def page_text(self, page_index: int) -> Optional[str]:
+        """Text of a page (0-indexed), None if it has none or cannot be extracted"""
+        page = self.pdf.pages[page_index]
+        page_num = page_index + 1
+        if self.mode == LAYOUT:
+            try:
+                # Use layout=True and disable pattern extraction to avoid pattern errors
+                return page.extract_text(layout=True, x_tolerance=3, y_tolerance=3) or None
+            except Exception:
+                # If extraction fails (e.g., pattern errors), try simpler method
+                print(f"Warning: Complex graphics on page {page_num}, using basic extraction")
+        try:
+            return page.extract_text() or None
+        except Exception:
+            print(f"Warning: Skipping page {page_num} due to extraction error")
+            return None
+
+    def close(self):
+        self.pdf.close()
+
+
+class PdfiumBackend:
+    """Plain text via pdfium"""
+    name = PDFIUM
+
+    def __init__(self, pdf_path: str, mode: str = PLAIN):
+        with _pdfium_lock:
+            self.pdf = pypdfium2.PdfDocument(pdf_path)
+
+    def __len__(self):
+        with _pdfium_lock:
+            return len(self.pdf)
+
+    def page_text(self, page_index: int) -> Optional[str]:
+        """Text of a page (0-indexed), None if it has none or cannot be extracted"""
+        try:
+            with _pdfium_lock:
+                page = self.pdf[page_index]
+                textpage = page.get_textpage()
+                text = textpage.get_text_range()
+                textpage.close()
+                page.close()
+        except Exception:
+            return None
+        # pdfium ends lines with CRLF
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text if text.strip() else None
+
+    def close(self):
+        with _pdfium_lock:
+            self.pdf.close()
+
+
+class PypdfBackend:
+    """Plain text via pypdf"""
+    name = PYPDF
+
+    def __init__(self, pdf_path: str, mode: str = PLAIN):
+        self.reader = pypdf.PdfReader(pdf_path)
+
+    def __len__(self):
+        return len(self.reader.pages)
+
+    def page_text(self, page_index: int) -> Optional[str]:
+        """Text of a page (0-indexed), None if it has none or cannot be extracted"""
+        try:
+            text = self.reader.pages[page_index].extract_text()
+        except Exception:
+            return None
+        return text if text and text.strip() else None
+
+    def close(self):
+        pass
+
+
+BACKENDS = {PDFPLUMBER: PdfplumberBackend, PDFIUM: PdfiumBackend, PYPDF: PypdfBackend}
+
+# pypdf logs a warning per font it cannot fully decode
+logging.getLogger('pypdf').setLevel(logging.ERROR)
+
+
+def available_backends() -> List[str]:
+    """Installed backends, fastest first"""
+    installed = {PDFPLUMBER: True, PDFIUM: PDFIUM_AVAILABLE, PYPDF: PYPDF_AVAILABLE}
+    return [name for name in FAST_BACKENDS + (PDFPLUMBER,) if installed[name]]
+
+
+def choose_backend(mode: str = PLAIN, backend: str = AUTO) -> str:
+    """
+    Backend to extract with
+
+    Args:
+        mode: PLAIN or LAYOUT
+        backend: AUTO for the cheapest installed backend that supports the
+            mode, or a backend name
+
+    Returns:
+        Backend name
+    """
+    if backend == AUTO:
+        if mode == LAYOUT:
+            return PDFPLUMBER
+        return available_backends()[0]
+    if backend not in available_backends():
+        raise ValueError(f"PDF text backend {backend} not available")
+    if mode == LAYOUT and backend != PDFPLUMBER:
+        raise ValueError(f"PDF text backend {backend} cannot extract layout text")
+    return backend
+
+
+def backend_version(name: str) -> str:
+    """Backend name and library version, e.g. 'pdfium-4.30.0'"""
+    if name == PDFIUM:
+        version = pypdfium2.version.PYPDFIUM_INFO
+    elif name == PYPDF:
+        version = pypdf.__version__
+    else:
+        version = pdfplumber.__version__
+    return f"{name}-{version}"
+
+
+def open_backend(name: str, pdf_path: str, mode: str = PLAIN):
+    """Open a PDF with a backend; close() it when done"""
+    return BACKENDS[name](pdf_path, mode)
@@ -37,6 +37,7 @@ except ImportError:
     print("[!] scipy not available. Run: pip install scipy")
 
 from semantic_embedder import SemanticEmbedder, Embedding
+from comparison_jobs import no_progress
 
 
 class ChangeType(Enum):
@@ -190,7 +191,10 @@ class SemanticComparator:
     def compare_paragraphs(
         self,
         old_paragraphs: List[str],
-        new_paragraphs: List[str]
+        new_paragraphs: List[str],
+        progress=None,
+        old_embeddings: Optional[List[Optional[Embedding]]] = None,
+        new_embeddings: Optional[List[Optional[Embedding]]] = None
     ) -> ComparisonResult:
         """
         Compare two sets of paragraphs semantically
@@ -198,19 +202,29 @@ class SemanticComparator:
         Args:
             old_paragraphs: Paragraphs from old document
             new_paragraphs: Paragraphs from new document
+            progress: Optional callback(stage, fraction, message) for the
+                'embed' and 'diff' stages (see comparison_jobs)
+            old_embeddings: Embeddings of old_paragraphs, if already computed
+            new_embeddings: Embeddings of new_paragraphs, if already computed
 
         Returns:
             ComparisonResult with detailed matches
         """
+        report = progress or no_progress
         print(f"[i] Comparing {len(old_paragraphs)} old vs {len(new_paragraphs)} new paragraphs...")
 
         # Generate embeddings
         print("[i] Generating embeddings...")
-        old_embeddings = self.embedder.embed_batch(old_paragraphs)
-        new_embeddings = self.embedder.embed_batch(new_paragraphs)
+        if old_embeddings is None:
+            report('embed', 0.0, f"{len(old_paragraphs)} original paragraphs")
+            old_embeddings = self.embedder.embed_batch(old_paragraphs)
+        if new_embeddings is None:
+            report('embed', 0.5, f"{len(new_paragraphs)} modified paragraphs")
+            new_embeddings = self.embedder.embed_batch(new_paragraphs)
 
         # Compute similarity matrix
         print("[i] Computing similarity matrix...")
+        report('diff', 0.0, "Matching paragraphs")
         similarity_matrix = self._compute_similarity_matrix(old_embeddings, new_embeddings)
 
         # Find optimal matches using Hungarian algorithm
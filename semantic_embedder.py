@@ -39,10 +39,11 @@ except ImportError:
     SentenceTransformer = None
 
 try:
-    from model_manager import ModelManager
+    from model_manager import ModelManager, model_registry
 except ImportError:
     # ModelManager might also have dependency issues
     ModelManager = None
+    model_registry = None
 
 
 @dataclass
@@ -271,7 +272,8 @@ class SemanticEmbedder:
 
         try:
             # Generate embedding
-            vector = model.encode(text, convert_to_numpy=True, show_progress_bar=False)
+            with model_registry().using(model):
+                vector = model.encode(text, convert_to_numpy=True, show_progress_bar=False)
 
             # Create embedding object
             embedding = Embedding(
@@ -347,12 +349,13 @@ class SemanticEmbedder:
             # Generate embeddings in batches
             print(f"[i] Embedding {len(texts_to_embed)} texts (batch_size={batch_size})...")
 
-            vectors = model.encode(
-                texts_to_embed,
-                batch_size=batch_size,
-                convert_to_numpy=True,
-                show_progress_bar=show_progress
-            )
+            with model_registry().using(model):
+                vectors = model.encode(
+                    texts_to_embed,
+                    batch_size=batch_size,
+                    convert_to_numpy=True,
+                    show_progress_bar=show_progress
+                )
 
             # Create embedding objects
             for idx, text, vector in zip(indices_to_embed, texts_to_embed, vectors):
@@ -8,7 +8,16 @@ Author: Advanced PDF Comparison System
 Date: 2025-10-30
 """
 
+import os
 import sys
+import tempfile
+
+try:
+    import pdf_extraction_cache
+    # Comparators share one extraction cache; keep it out of the working directory
+    pdf_extraction_cache.DEFAULT_CACHE_PATH = os.path.join(tempfile.mkdtemp(), 'pdf_extraction_cache.db')
+except ImportError:
+    pass
 
 # Test counters
 tests_passed = 0
@@ -427,6 +436,232 @@ def test_config_in_report():
         return False
 
 
+def test_extraction_cache():
+    """Test 13: Extraction results are cached by PDF content"""
+    test_header("PDF Extraction Cache")
+
+    try:
+        import os
+        import tempfile
+        import time
+        from pdf_extraction_cache import PDFExtractionCache, pdf_digest, cached, PAGES, PARAGRAPHS
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pdf_path = os.path.join(temp_dir, 'spec.pdf')
+            copy_path = os.path.join(temp_dir, 'copy.pdf')
+            for path in (pdf_path, copy_path):
+                with open(path, 'wb') as f:
+                    f.write(b'%PDF-1.4 test document')
+
+            cache = PDFExtractionCache(os.path.join(temp_dir, 'cache.db'), max_bytes=10 * 1024)
+            assert_equals(pdf_digest(pdf_path), pdf_digest(copy_path), "Same content, same digest")
+
+            import pdf_extraction_cache
+            max_digests = pdf_extraction_cache.MAX_DIGESTS
+            pdf_extraction_cache.MAX_DIGESTS = 1
+            try:
+                other_path = os.path.join(temp_dir, 'other.pdf')
+                with open(other_path, 'wb') as f:
+                    f.write(b'%PDF-1.4 other document')
+                digest = pdf_digest(other_path)
+                assert_equals(list(pdf_extraction_cache._digests.values()), [digest],
+                              "Digest memo keeps only the most recent files")
+            finally:
+                pdf_extraction_cache.MAX_DIGESTS = max_digests
+
+            calls = []
+            def extract():
+                calls.append(1)
+                return ["First paragraph.", "Second paragraph."]
+
+            first = cached(cache, pdf_path, PARAGRAPHS, extract)
+            second = cached(cache, copy_path, PARAGRAPHS, extract)
+            assert_equals(second, first, "Cached paragraphs returned")
+            assert_equals(len(calls), 1, "Copy of a known PDF is not extracted again")
+
+            cache.set('a' * 64, f"{PAGES}/plain", ["Page one", None])
+            assert_equals(cache.get('a' * 64, f"{PAGES}/plain"), ["Page one", None], "Page texts round-trip")
+            assert_true(cache.get('a' * 64, f"{PAGES}/layout") is None, "Other mode is a miss")
+
+            # Past the budget the least recently used entries go
+            for i in range(20):
+                cache.set(f"{i:064d}", PARAGRAPHS, [os.urandom(1000).hex()])
+                time.sleep(0.001)
+            stats = cache.get_statistics()
+            assert_true(stats['total_bytes'] <= 10 * 1024, "Cache stays within its size budget")
+            assert_true(cache.get(f"{19:064d}", PARAGRAPHS) is not None, "Recent entry kept")
+            assert_true(cache.get(f"{0:064d}", PARAGRAPHS) is None, "Oldest entry evicted")
+            cache.close()
+
+        return True
+
+    except Exception as e:
+        assert_true(False, f"Extraction cache test failed: {e}")
+        return False
+
+
+def test_text_backends():
+    """Test 14: Cheapest text backend chosen per extraction mode"""
+    test_header("PDF Text Backends")
+
+    try:
+        from pdf_text_backends import available_backends, choose_backend, PDFPLUMBER, PLAIN, LAYOUT
+        from pdf_extraction_cache import source_kind, PAGES
+
+        backends = available_backends()
+        assert_equals(backends[-1], PDFPLUMBER, "pdfplumber is the slowest backend")
+        assert_equals(choose_backend(PLAIN), backends[0], "Plain text uses the fastest backend")
+        assert_equals(choose_backend(LAYOUT), PDFPLUMBER, "Layout text needs pdfplumber")
+
+        for name in backends[:-1]:
+            try:
+                choose_backend(LAYOUT, name)
+                assert_true(False, f"{name} rejected for layout text")
+            except ValueError:
+                assert_true(True, f"{name} rejected for layout text")
+
+        assert_true(source_kind(PAGES, PLAIN, PDFPLUMBER) != source_kind(PAGES, LAYOUT),
+                    "Cache entries are kept per mode")
+        if len(backends) > 1:
+            assert_true(source_kind(PAGES) != source_kind(PAGES, backend=PDFPLUMBER),
+                        "Cache entries are kept per backend")
+
+        return True
+
+    except Exception as e:
+        assert_true(False, f"Text backend test failed: {e}")
+        return False
+
+
+def test_heading_backends():
+    """Test 15: ToC leader styles, and headings of a real PDF per text backend"""
+    test_header("Headings Per Text Backend")
+
+    try:
+        import os
+        from pdf_compare_optimized import OptimizedPDFExtractor, PageTextIndex, TEXT_BACKEND
+        from pdf_text_backends import available_backends, PDFPLUMBER
+
+        # ToC lines as pdfplumber returns them, with dense and spaced dot leaders
+        index = PageTextIndex.from_texts(["Contents\n"
+                                          "1 Introduction ........ 1\n"
+                                          "2.1 Spaced Leaders . . . . . . 3\n"
+                                          "APPENDIX . . . . 9\n"
+                                          "3 Not an entry . 5"])
+        toc = OptimizedPDFExtractor(cache_enabled=False)._extract_from_toc(index)
+        assert_equals([(heading.title, heading.level) for heading in toc],
+                      [("Introduction", 1), ("Spaced Leaders", 2), ("APPENDIX", 1)],
+                      "ToC entries with dense and spaced leaders")
+
+        pdf_path = os.environ.get('SAMPLE_PDF', '/usr/share/doc/libtasn1-doc/libtasn1.pdf')
+        if not os.path.exists(pdf_path):
+            print(f"[i] Skipped: no sample PDF at {pdf_path} (set SAMPLE_PDF)")
+            return True
+
+        def headings(backend):
+            extractor = OptimizedPDFExtractor(cache_enabled=False, backend=backend)
+            index = extractor.page_index(pdf_path)
+            toc = [heading.title for heading in extractor._extract_from_toc(index)]
+            found = [(heading.title, heading.page_number) for heading in extractor.extract_toc_and_headings(pdf_path)]
+            return toc, found
+
+        reference_toc, reference = headings(PDFPLUMBER)
+        for name in available_backends():
+            toc, _ = headings(name)
+            assert_equals(toc, reference_toc, f"{name}: same ToC entries as pdfplumber")
+
+        _, default = headings(TEXT_BACKEND)
+        assert_equals(default, reference, "Default backend finds the same headings as pdfplumber")
+
+        return True
+
+    except Exception as e:
+        assert_true(False, f"Heading backend test failed: {e}")
+        return False
+
+
+def test_streamed_paragraphs():
+    """Test 16: Paragraphs stream from pages, carrying over page breaks"""
+    test_header("Streamed Paragraphs")
+
+    try:
+        import os
+        import tempfile
+        from paragraph_extractor import ParagraphExtractor
+        from pdf_extraction_cache import PDFExtractionCache, cached_stream, PARAGRAPHS
+
+        extractor = ParagraphExtractor()
+        pages = [
+            "The system must authenticate all users\nbefore they access",
+            "sensitive data of any kind.",
+            "Passwords are stored as salted hashes.\n12",
+            "Sessions expire after 30 minutes.",
+        ]
+        paragraphs = list(extractor.stream_paragraphs(pages))
+        assert_equals(paragraphs[0], "The system must authenticate all users before they access sensitive data of any kind.",
+                      "Unfinished sentence carries over the page break")
+        assert_equals(paragraphs[-1], "Sessions expire after 30 minutes.", "Page break after a footer ends the paragraph")
+
+        # The first paragraph is out before the last page is read
+        read = []
+        def page_stream():
+            for text in pages:
+                read.append(text)
+                yield text
+        next(extractor.stream_paragraphs(page_stream()))
+        assert_true(len(read) < len(pages), "Paragraphs emitted while pages are still being read")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pdf_path = os.path.join(temp_dir, 'spec.pdf')
+            with open(pdf_path, 'wb') as f:
+                f.write(b'%PDF-1.4 streamed document')
+            cache = PDFExtractionCache(os.path.join(temp_dir, 'cache.db'))
+
+            stream = cached_stream(cache, pdf_path, PARAGRAPHS, lambda: extractor.stream_paragraphs(pages))
+            next(stream)
+            stream.close()
+            assert_equals(len(list(cached_stream(cache, pdf_path, PARAGRAPHS, lambda: iter(["Recomputed paragraph"])))), 1,
+                          "Abandoned stream is not cached")
+            assert_equals(list(cached_stream(cache, pdf_path, PARAGRAPHS, lambda: iter([]))), ["Recomputed paragraph"],
+                          "Fully read stream is cached")
+            cache.close()
+
+        # Extraction runs ahead on its own thread, within its bound
+        import time
+        from advanced_pdf_comparator import PrefetchedStream
+        produced = []
+        def items():
+            for i in range(10):
+                produced.append(i)
+                yield i
+        stream = PrefetchedStream(items(), max_items=3)
+        time.sleep(0.2)
+        assert_true(3 <= len(produced) <= 4, "Items produced before they are asked for, up to the bound")
+        assert_equals(list(stream), list(range(10)), "Prefetched items in order")
+
+        def failing():
+            yield "first"
+            raise ValueError("broken page")
+        stream = PrefetchedStream(failing(), max_items=3)
+        assert_equals(next(stream), "first", "Items before the error delivered")
+        try:
+            next(stream)
+            assert_true(False, "Producer error raised to the consumer")
+        except ValueError:
+            assert_true(True, "Producer error raised to the consumer")
+
+        stream = PrefetchedStream(iter(range(100)), max_items=2)
+        stream.close()
+        stream._thread.join(timeout=2)
+        assert_true(not stream._thread.is_alive() and list(stream) == [], "Closed stream stops its thread")
+
+        return True
+
+    except Exception as e:
+        assert_true(False, f"Streamed paragraph test failed: {e}")
+        return False
+
+
 def run_all_tests():
     """Run all tests"""
     print("\n" + "=" * 60)
@@ -446,7 +681,11 @@ def run_all_tests():
         test_multi_paragraph_comparison,
         test_language_detection_integration,
         test_processing_time,
-        test_config_in_report
+        test_config_in_report,
+        test_extraction_cache,
+        test_text_backends,
+        test_heading_backends,
+        test_streamed_paragraphs
     ]
 
     for test_func in tests:
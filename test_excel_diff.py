@@ -0,0 +1,950 @@
+"""
+Test Suite for the Excel Diff Engine
+
+Unit tests for excel_diff_engine.py: grid loading, vectorized cell
+comparison, change categorisation and modification records.
+"""
+
+import sys
+
+import numpy as np
+import openpyxl
+
+# Test counters
+tests_passed = 0
+tests_failed = 0
+
+
+def print_header(name: str):
+    """Print test header"""
+    print("\n" + "=" * 60)
+    print(f"TEST: {name}")
+    print("=" * 60)
+
+
+def assert_true(condition: bool, message: str):
+    """Assert condition is true"""
+    global tests_passed, tests_failed
+    if condition:
+        print(f"[+] PASS: {message}")
+        tests_passed += 1
+    else:
+        print(f"[-] FAIL: {message}")
+        tests_failed += 1
+    assert condition, message
+
+
+def assert_equals(actual, expected, message: str):
+    """Assert values are equal"""
+    global tests_passed, tests_failed
+    if actual == expected:
+        print(f"[+] PASS: {message}")
+        tests_passed += 1
+    else:
+        print(f"[-] FAIL: {message}")
+        print(f"    Expected: {expected}")
+        print(f"    Actual: {actual}")
+        tests_failed += 1
+    assert actual == expected, message
+
+
+def make_sheet(rows):
+    """Build an in-memory worksheet from a list of row tuples"""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for row in rows:
+        ws.append(list(row))
+    return ws
+
+
+def workbook_bytes(sheets):
+    """Save a workbook to an in-memory buffer, from rows for one "Sheet" or a {name: rows} dict"""
+    import io
+
+    if isinstance(sheets, dict):
+        wb = openpyxl.Workbook()
+        wb.remove(wb.active)
+        for name, rows in sheets.items():
+            ws = wb.create_sheet(name)
+            for row in rows:
+                ws.append(list(row))
+    else:
+        wb = make_sheet(sheets).parent
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def with_shared_strings(data: bytes):
+    """Move the inline strings openpyxl writes into a shared strings table, as Excel saves them"""
+    import io
+    import re
+    import zipfile
+
+    strings = []
+
+    def share(match):
+        if match.group(2) not in strings:
+            strings.append(match.group(2))
+        return match.group(1) + b't="s"><v>' + str(strings.index(match.group(2))).encode() + b'</v></c>'
+
+    source = zipfile.ZipFile(io.BytesIO(data))
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, 'w') as target:
+        for item in source.infolist():
+            content = source.read(item.filename)
+            if item.filename.startswith('xl/worksheets/'):
+                content = re.sub(rb'(<c r="[A-Z]+\d+" )t="inlineStr"><is><t>(.*?)</t></is></c>', share, content)
+            elif item.filename == '[Content_Types].xml':
+                content = content.replace(b'</Types>', b'<Override PartName="/xl/sharedStrings.xml" ContentType='
+                                          b'"application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/></Types>')
+            elif item.filename == 'xl/_rels/workbook.xml.rels':
+                content = content.replace(b'</Relationships>', b'<Relationship Type="http://schemas.openxmlformats.org/'
+                                          b'officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml" '
+                                          b'Id="rIdStrings"/></Relationships>')
+            target.writestr(item, content)
+        target.writestr('xl/sharedStrings.xml',
+                        b'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                        + b''.join(b'<si><t>' + text + b'</t></si>' for text in strings) + b'</sst>')
+    output.seek(0)
+    return output
+
+
+def legacy_diff(original_sheet, modified_sheet):
+    """Reference implementation: the original per-cell openpyxl loop"""
+    max_row = max(original_sheet.max_row, modified_sheet.max_row, 10)
+    max_col = max(original_sheet.max_column, modified_sheet.max_column, 5)
+    changes = []
+    for row in range(1, max_row + 1):
+        for col in range(1, max_col + 1):
+            old = original_sheet.cell(row=row, column=col).value
+            new = modified_sheet.cell(row=row, column=col).value
+            if old != new:
+                changes.append((row, col, old, new))
+    return changes
+
+
+def test_sheet_to_array():
+    """Test 1: Sheet grid loading"""
+    print_header("Sheet To Array")
+
+    from excel_diff_engine import sheet_to_array
+
+    ws = make_sheet([("ID", "Name"), (1, None), (2, "b")])
+    values = sheet_to_array(ws)
+
+    assert_equals(values.shape, (3, 2), "Grid matches sheet dimensions")
+    assert_true(values[1, 1] is None, "Empty cells are None")
+    assert_equals(values[2, 1], "b", "Values are preserved")
+
+
+def test_diff_matches_legacy_loop():
+    """Test 2: Vectorized diff matches the per-cell loop"""
+    print_header("Diff Matches Legacy Loop")
+
+    from excel_diff_engine import sheet_to_array, diff_grids
+
+    original = make_sheet([("ID", "Name", "Qty"), (1, "a", 10), (2, "b", 20), (3, None, 1.5)])
+    modified = make_sheet([("ID", "Name", "Qty"), (1, "A", 10), (2, "b", None), (3, "c", 1.5), (4, "d", 5, "x")])
+
+    grid_diff = diff_grids(sheet_to_array(original), sheet_to_array(modified))
+    vectorized = list(zip(grid_diff.rows.tolist(), grid_diff.cols.tolist(),
+                          grid_diff.old_values.tolist(), grid_diff.new_values.tolist()))
+
+    assert_equals(vectorized, legacy_diff(original, modified), "Same changes in the same order")
+    assert_equals(grid_diff.shape, (10, 5), "Grid padded to the minimum 10 x 5")
+
+
+def test_change_categories():
+    """Test 3: Change categorisation and counters"""
+    print_header("Change Categories")
+
+    from excel_diff_engine import diff_grids, CHANGE_TYPES
+
+    original = np.array([[None, "x", "y", 1]], dtype=object)
+    modified = np.array([["a", None, "z", 1.0]], dtype=object)
+    grid_diff = diff_grids(original, modified, min_rows=1, min_cols=1)
+
+    types = [CHANGE_TYPES[c] for c in grid_diff.codes.tolist()]
+    assert_equals(types, ['blank_to_value', 'value_to_blank', 'value_to_value'], "Change types")
+    assert_equals(grid_diff.counts, {'blank_to_value': 1, 'value_to_blank': 1, 'value_to_value': 1},
+                  "Summary counters")
+    assert_equals(len(grid_diff), 3, "1 == 1.0 is not a change")
+
+
+def test_build_modifications():
+    """Test 4: Modification records"""
+    print_header("Build Modifications")
+
+    from excel_diff_engine import diff_grids, build_modifications, column_headers_from_array
+
+    original = np.array([["Product", "Price"], ["Widget", 10]], dtype=object)
+    modified = np.array([["Product", "Price"], ["Widget", 12]], dtype=object)
+    headers = column_headers_from_array(modified)
+
+    mods = build_modifications(diff_grids(original, modified), headers)
+
+    assert_equals(len(mods), 1, "One modification")
+    assert_equals(mods[0].cell, (2, 2), "Cell coordinates")
+    assert_equals(mods[0].cell_ref, "B2", "Cell reference")
+    assert_equals(mods[0].column_name, "Price", "Column header name")
+    assert_equals((mods[0].old_value, mods[0].new_value), (10, 12), "Old and new values")
+    assert_true(isinstance(mods[0].row, int), "Coordinates are plain ints")
+    assert_equals(mods.rows.dtype, np.int32, "Rows stored as int32")
+    assert_equals(mods.codes.dtype, np.uint8, "Change types stored as uint8")
+
+    # Equal values are interned once; 1, 1.0 and True stay distinct
+    original = np.array([["A", "B", "C", "D"], [1, 1.0, True, "x"]], dtype=object)
+    modified = np.array([["A", "B", "C", "D"], ["x", "x", None, "y"]], dtype=object)
+    mods = build_modifications(diff_grids(original, modified), column_headers_from_array(modified))
+    assert_equals([(mod.old_value, type(mod.old_value)) for mod in mods],
+                  [(1, int), (1.0, float), (True, bool), ("x", str)], "Value types preserved")
+    assert_equals(len(mods.values), 6, "Pool holds None plus each distinct value once")
+    assert_equals(mods.counts()['value_to_blank'], 1, "Counts by change type")
+    assert_equals([mod.cell_ref for mod in mods.where(['value_to_blank'])], ["C2"], "Filter by change type")
+
+
+def test_frame_keeps_empty_cells():
+    """Test 5: DataFrame keeps None for empty cells"""
+    print_header("Frame From Array")
+
+    from excel_diff_engine import frame_from_array
+
+    df = frame_from_array(np.array([["a", None], [None, 2]], dtype=object))
+
+    assert_equals(list(df.columns), ["A", "B"], "Excel column letters")
+    assert_true(df.iloc[1, 0] is None, "Empty text cell stays None")
+    assert_true(df.iloc[0, 1] is None, "Empty numeric cell stays None")
+
+
+def test_stream_diff_matches_grid_diff():
+    """Test 6: Streaming block diff matches the in-memory diff"""
+    print_header("Stream Diff")
+
+    from excel_diff_engine import open_workbook, sheet_to_array, diff_grids, stream_diff, ColumnBuffer
+
+    original_rows = [("ID", "Name", "Qty")] + [(i, f"n{i}", i * 1.5) for i in range(1, 40)]
+    modified_rows = [("ID", "Name", "Qty")] + [(i, f"n{i}" if i % 7 else None, i * 1.5) for i in range(1, 45)]
+    modified_rows[20] = modified_rows[20] + ("extra",)
+
+    full = diff_grids(sheet_to_array(make_sheet(original_rows)), sheet_to_array(make_sheet(modified_rows)))
+
+    original_buffer = ColumnBuffer()
+    streamed = stream_diff(open_workbook(workbook_bytes(original_rows), read_only=True).active,
+                           open_workbook(workbook_bytes(modified_rows), read_only=True).active,
+                           block_rows=8, original_buffer=original_buffer)
+
+    assert_equals(streamed.rows.tolist(), full.rows.tolist(), "Same changed rows")
+    assert_equals(streamed.cols.tolist(), full.cols.tolist(), "Same changed columns")
+    assert_equals(streamed.new_values.tolist(), full.new_values.tolist(), "Same new values")
+    assert_equals(streamed.counts, full.counts, "Same counters")
+    assert_equals(streamed.shape, full.shape, "Same compared shape")
+
+    frame = original_buffer.to_frame()
+    assert_equals(frame.shape, (40, 3), "Buffered frame has every streamed row")
+    assert_equals(str(frame['A'].dtype), "object", "Mixed header/int column stays object")
+    assert_equals(original_buffer.column_headers(), {1: "ID", 2: "Name", 3: "Qty"}, "Headers from first row")
+
+
+def test_compact_column():
+    """Test 7: Compact column storage"""
+    print_header("Compact Column")
+
+    from excel_diff_engine import compact_column, is_blank
+
+    ints = compact_column(np.array([1, None, 3], dtype=object))
+    floats = compact_column(np.array([1.5, None], dtype=object))
+    text = compact_column(np.array(["a", None, 2], dtype=object))
+
+    assert_equals(str(ints.dtype), "Int64", "Integer column is nullable Int64")
+    assert_equals(str(floats.dtype), "Float64", "Float column is nullable Float64")
+    assert_equals(text.dtype, np.dtype(object), "Mixed column stays object")
+    assert_true(is_blank(ints[1]) and is_blank(text[1]), "Missing cells read back as blank")
+
+
+def test_row_alignment():
+    """Test 8: Row alignment reports inserted/deleted/moved rows once"""
+    print_header("Row Alignment")
+
+    from excel_row_matching import align_sheet
+
+    original = np.array([["ID", "Name"]] + [[i, f"n{i}"] for i in range(1, 31)], dtype=object)
+    modified = np.vstack([original[:3], np.array([["new", "row"]], dtype=object), original[3:]])
+    modified[15, 1] = "edited"  # original row 15 (ID 14), now row 16
+    modified = np.delete(modified, 25, axis=0)  # original row 25 (ID 24)
+    modified = np.vstack([np.delete(modified, 5, axis=0), modified[5:6]])  # original row 5 moved to the end
+
+    aligned = align_sheet(original, modified)
+
+    assert_equals(aligned.counts, {'rows_inserted': 1, 'rows_deleted': 1, 'rows_moved': 1}, "Row change counters")
+    assert_equals([(c['type'], c['original_row'], c['modified_row']) for c in aligned.row_changes],
+                  [('inserted', None, 4), ('deleted', 25, None), ('moved', 5, 31)], "Row changes")
+    assert_equals(len(aligned.cells), 1, "Only the edited cell is a cell change")
+    assert_equals((aligned.cells.original_rows.tolist(), aligned.cells.rows.tolist()), ([15], [15]),
+                  "Edited cell located on both sides")
+
+    # A block replaced wholesale is too large to pair by similarity: rows pair by ID only
+    original = np.array([["ID", "Name", "Qty"]] + [[i, f"n{i}", i % 7] for i in range(1, 301)], dtype=object)
+    modified = original.copy()
+    modified[101:251] = [[1000 + i, f"new{i}", 0] for i in range(150)]
+    modified[180] = [180, "edited", 180 % 7]
+
+    aligned = align_sheet(original, modified)
+
+    assert_equals(aligned.counts, {'rows_inserted': 149, 'rows_deleted': 149, 'rows_moved': 0},
+                  "Replaced rows are deletes and inserts")
+    assert_equals(list(zip(aligned.cells.rows.tolist(), aligned.cells.cols.tolist(), aligned.cells.new_values.tolist())),
+                  [(181, 2, "edited")], "Only the row with a matching ID is cell-diffed")
+
+
+def test_key_join():
+    """Test 9: Key-column join matches re-sorted rows"""
+    print_header("Key Column Join")
+
+    from excel_row_matching import key_join_sheet, resolve_key_columns
+
+    original = np.array([["ID", "Name", "Qty"]] + [[i, f"n{i}", i] for i in range(1, 8)], dtype=object)
+    modified = np.array([["ID", "Name", "Qty"]] + [[i, f"n{i}", i] for i in [7, 6, 5, 4, 3, 1]] +
+                        [[9, "new", 0]], dtype=object)
+    modified[3, 2] = 99  # ID 5, now on row 4
+
+    key_columns = resolve_key_columns({1: "ID", 2: "Name", 3: "Qty"}, ["ID"])
+    assert_equals(key_columns, [1], "Key column resolved by header name")
+    assert_equals(resolve_key_columns({1: "ID"}, ["Missing"]), [], "Unknown key column")
+
+    keyed = key_join_sheet(original, modified, key_columns)
+
+    assert_equals(keyed.counts, {'rows_added': 1, 'rows_removed': 1, 'rows_changed': 1}, "Key counters")
+    assert_equals([(c['type'], c['key'], c['original_row'], c['modified_row']) for c in keyed.row_changes],
+                  [('removed', (2,), 3, None), ('changed', (5,), 6, 4), ('added', (9,), None, 8)],
+                  "Per-key row changes")
+    assert_equals(list(zip(keyed.cells.rows.tolist(), keyed.cells.cols.tolist(), keyed.cells.new_values.tolist())),
+                  [(4, 3, 99)], "Re-sorting alone is not a change")
+
+
+def test_parallel_matches_serial():
+    """Test 10: Process-pool comparison gives the serial changes and summary"""
+    print_header("Parallel Sheet Comparison")
+
+    from excel_diff_engine import open_workbook
+    from excel_sheet_compare import CompareOptions, sheet_order, compare_workbook_sheets, summarize_results
+    from excel_parallel import compare_sheets_parallel, partition_sheets
+
+    rows = [("ID", "Name")] + [(i, f"n{i}") for i in range(1, 25)]
+    edited = rows[:5] + [(5, "edited")] + rows[6:]
+    original = workbook_bytes({"Same": rows, "Edited": rows, "Removed": rows})
+    modified = workbook_bytes({"Same": rows, "Edited": edited, "Added": rows})
+
+    original_wb = open_workbook(original, read_only=True)
+    modified_wb = open_workbook(modified, read_only=True)
+    sheet_names = sheet_order(original_wb.sheetnames, modified_wb.sheetnames)
+    assert_equals(sheet_names, ["Same", "Edited", "Removed", "Added"], "Deterministic sheet order")
+
+    serial_summary, serial_changes = summarize_results(
+        compare_workbook_sheets(original_wb, modified_wb, sheet_names, CompareOptions()))
+    results = compare_sheets_parallel(original, modified, sheet_names, CompareOptions(), workers=2)
+    parallel_summary, parallel_changes = summarize_results(results)
+
+    assert_equals(parallel_summary, serial_summary, "Same summary")
+    assert_equals(list(parallel_changes), list(serial_changes), "Same sheets in the same order")
+    assert_equals([list(parallel_changes[name]['modifications']) for name in sheet_names],
+                  [list(serial_changes[name]['modifications']) for name in sheet_names], "Same modifications")
+    assert_true(all(result.seconds >= 0 for result in results), "Per-sheet timings reported")
+    assert_equals(partition_sheets(["a", "b", "c"], {"a": 100, "b": 60, "c": 50}, 2), [["a"], ["b", "c"]],
+                  "Largest sheets spread across workers")
+
+
+def test_identical_sheets_skipped():
+    """Test 11: Sheets with identical content are skipped"""
+    print_header("Fingerprint Skip")
+
+    import io
+    from excel_diff_engine import open_workbook
+    from excel_fingerprint import file_digest
+    from excel_sheet_compare import CompareOptions, compare_workbook_sheets, summarize_results
+
+    rows = [("ID", "Name")] + [(i, f"n{i}") for i in range(1, 25)]
+    edited = rows[:5] + [(50, "n5")] + rows[6:]
+    original = workbook_bytes({"Same": rows, "Edited": rows})
+    modified = workbook_bytes({"Same": rows, "Edited": edited})
+
+    assert_true(file_digest(original) != file_digest(modified), "Different files, different digests")
+    assert_equals(file_digest(original), file_digest(io.BytesIO(original.getvalue())), "Digest is content-based")
+
+    def compare(options):
+        return summarize_results(compare_workbook_sheets(open_workbook(original, read_only=True),
+                                                         open_workbook(modified, read_only=True),
+                                                         ["Same", "Edited"], options))
+
+    summary, changes = compare(CompareOptions())
+    full_summary, _ = compare(CompareOptions(skip_identical=False))
+
+    assert_equals(summary['sheets_skipped'], ["Same"], "Identical sheet skipped")
+    assert_true(changes["Same"]['skipped'] and not changes["Edited"]['skipped'], "Skip recorded per sheet")
+    assert_equals(summary['sheets_modified'], ["Edited"], "Changed sheet still compared")
+    assert_equals({k: v for k, v in summary.items() if k != 'sheets_skipped'},
+                  {k: v for k, v in full_summary.items() if k != 'sheets_skipped'}, "Same result as a full compare")
+
+
+def test_export_diff_workbook():
+    """Test 12: Exported diff workbook highlights changed cells and inserted rows"""
+    print_header("Export Diff Workbook")
+
+    import io
+    from excel_diff_engine import open_workbook
+    from excel_sheet_compare import CompareOptions, compare_workbook_sheets, summarize_results
+    import json
+    from excel_diff_export import write_diff_workbook, write_json_report, MODIFIED_FILL, INSERTED_FILL
+
+    rows = [("ID", "Name")] + [(i, f"n{i}") for i in range(1, 20)]
+    edited = rows[:3] + [("new", "row")] + rows[3:]
+    edited[8] = (7, "edited")
+    modified_wb = open_workbook(workbook_bytes(edited), read_only=True)
+    summary, changes = summarize_results(compare_workbook_sheets(
+        open_workbook(workbook_bytes(rows), read_only=True), modified_wb, ["Sheet"], CompareOptions(mode='aligned')))
+
+    output = io.BytesIO()
+    write_diff_workbook(output, changes, summary, modified_wb, str)
+    exported = openpyxl.load_workbook(output)
+    ws = exported["Sheet"]
+
+    assert_equals(exported.sheetnames, ["MODIFICATION_SUMMARY", "Sheet"], "Summary sheet first")
+    assert_equals([list(r) for r in ws.iter_rows(values_only=True)], [list(r) for r in edited],
+                  "Values copied from the modified sheet")
+    assert_equals(ws["B9"].fill.start_color.rgb, MODIFIED_FILL.start_color.rgb, "Changed cell highlighted")
+    assert_true("Modified to: edited" in ws["B9"].comment.text, "Changed cell annotated")
+    assert_equals(ws["A4"].fill.start_color.rgb, INSERTED_FILL.start_color.rgb, "Inserted row highlighted")
+    assert_equals(ws["A5"].fill.fill_type, None, "Unchanged cells left plain")
+
+    report = io.StringIO()
+    write_json_report(report, changes, summary, str)
+    report = json.loads(report.getvalue())
+    assert_equals(report['modifications_by_sheet']["Sheet"],
+                  [{'cell': "B9", 'location': "Name, Row 9", 'column': "Name", 'row': 9,
+                    'from': "n7", 'to': "edited", 'type': "value_to_value"}], "JSON report records")
+    assert_equals(report['row_changes_by_sheet']["Sheet"], changes["Sheet"]['row_changes'], "JSON row changes")
+
+
+def test_grid_window():
+    """Test 13: Virtualized grid sends only the requested window"""
+    print_header("Grid Window")
+
+    from excel_diff_engine import diff_grids, build_modifications, column_headers_from_array, frame_from_array
+    from excel_grid_view import sheet_window, build_change_index, grid_shape
+
+    original = np.array([["ID", "Qty"]] + [[i, i * 10] for i in range(1, 500)], dtype=object)
+    modified = original.copy()
+    modified[300, 1] = None
+    modified[5, 0] = "x"
+    headers = column_headers_from_array(modified)
+    sheet_changes = {
+        'original_df': frame_from_array(original),
+        'modified_df': frame_from_array(modified),
+        'column_headers': headers,
+        'modifications': build_modifications(diff_grids(original, modified), headers),
+        'row_changes': [{'type': 'inserted', 'original_row': None, 'modified_row': 320}],
+    }
+    change_index = build_change_index(sheet_changes)
+
+    window = sheet_window(sheet_changes, change_index, r0=250, c0=0, n_rows=100, n_cols=40)
+
+    assert_equals(grid_shape(sheet_changes), (500, 5), "Grid padded to 5 columns")
+    assert_equals((window['r0'], window['r1'], window['c1']), (250, 350, 5), "Window clipped to the grid")
+    assert_equals(len(window['modified']), 100, "Only the window's rows are sent")
+    assert_equals(window['headers'][:2], ["ID", "Qty"], "Window headers")
+    assert_equals(window['original'][50][1], "3000", "Values as display strings")
+    assert_true(window['modified'][50][1] is None, "Empty cells are null")
+    assert_equals(window['modified_cells'], [[300, 1]], "Changed cells inside the window only")
+    assert_equals(window['modified_rows'], [[319, 'inserted']], "Whole-row changes inside the window")
+
+    # Without frames (low-memory streaming) windows are read from the workbooks
+    from excel_diff_engine import open_workbook
+    from excel_grid_view import read_sheet_window
+    from excel_sheet_compare import compare_sheet, CompareOptions
+
+    original_sheet = open_workbook(workbook_bytes(original.tolist()), read_only=True).active
+    modified_sheet = open_workbook(workbook_bytes(modified.tolist()), read_only=True).active
+    streamed = compare_sheet("Sheet", original_sheet, modified_sheet,
+                             CompareOptions(streaming=True, keep_frames=False)).sheet_changes
+    sheets = {'original': original_sheet, 'modified': modified_sheet}
+    streamed_window = sheet_window(streamed, build_change_index(streamed), r0=250, c0=0, n_rows=100, n_cols=40,
+                                   read_values=lambda side, *bounds: read_sheet_window(sheets[side], *bounds))
+    assert_true(streamed['modified_df'].empty, "No frames kept")
+    assert_equals(grid_shape(streamed), (500, 5), "Grid shape recorded without frames")
+    for key in ('r1', 'c1', 'original', 'modified', 'modified_cells'):
+        assert_equals(streamed_window[key], window[key], f"Window read on demand: {key}")
+
+
+def test_workbook_cache():
+    """Test 14: Parsed-workbook cache round trip and LRU eviction"""
+    print_header("Workbook Cache")
+
+    import io
+    import os
+    import datetime
+    import tempfile
+    from excel_diff_engine import open_workbook, sheet_to_array
+    from excel_workbook_cache import WorkbookCache, encode_grid, decode_grid
+    from excel_sheet_compare import CompareOptions, compare_workbook_sheets, summarize_results
+
+    grid = np.array([[None, 1, 2.5, "text", True],
+                     [datetime.datetime(2024, 1, 2, 3, 4, 5), datetime.date(2020, 5, 1),
+                      datetime.time(1, 2, 3), datetime.timedelta(hours=30), ""]], dtype=object)
+    decoded = decode_grid(encode_grid(grid))
+    assert_equals([(type(v), v) for v in decoded.ravel()], [(type(v), v) for v in grid.ravel()],
+                  "Values and types survive encoding")
+
+    rows = [("ID", "Name")] + [(i, f"n{i}") for i in range(1, 30)]
+    edited = rows[:4] + [(4, "edited")] + rows[5:]
+    cache = WorkbookCache(tempfile.mkdtemp())
+
+    assert_true(cache.load("template") is None, "Miss before storing")
+    cache.store("template", open_workbook(workbook_bytes(rows), read_only=True))
+    cache.store("client", open_workbook(workbook_bytes(edited), read_only=True))
+    template = cache.load("template")
+    assert_equals(template.sheetnames, ["Sheet"], "Sheet names from the manifest")
+    assert_equals(sheet_to_array(template["Sheet"]).tolist(), [list(r) for r in rows], "Grid loaded from disk")
+
+    summary, _ = summarize_results(compare_workbook_sheets(template, cache.load("client"), ["Sheet"],
+                                                           CompareOptions()))
+    assert_equals(summary['total_modifications'], 1, "Cached workbooks compare like parsed ones")
+
+    # Make "client" the least recently used entry, then shrink the budget
+    os.utime(os.path.join(cache.cache_dir, "client", "manifest.json"), (0, 0))
+    cache.max_bytes = cache.get_statistics()['total_bytes'] - 1
+    cache.evict()
+    assert_true(cache.load("client") is None and cache.load("template") is not None,
+                "Least recently used entry evicted")
+
+    # Entries are written once; readers of an entry survive its eviction
+    cache.max_bytes = 1024 * 1024 * 1024
+    source = workbook_bytes(edited)
+    cache.store("client", open_workbook(source, read_only=True))
+    reader = cache.load("client", source)
+    manifest_path = os.path.join(cache.cache_dir, "client", "manifest.json")
+    created = os.stat(manifest_path).st_ino
+    cache.store("client", open_workbook(source, read_only=True))
+    assert_equals(os.stat(manifest_path).st_ino, created, "Existing entry is not rewritten")
+    cache.clear()
+    assert_equals(reader["Sheet"].grid.tolist(), [list(r) for r in edited], "Evicted sheet is parsed again")
+    assert_true(reader["Sheet"].row_fingerprints is not None, "Evicted sheet's row fingerprints are recomputed")
+
+    # Sessions storing the same workbook at once each get it back; one entry is kept
+    import threading
+    data = workbook_bytes(rows).getvalue()
+    errors = []
+    for attempt in range(5):
+        cache.clear()
+        barrier = threading.Barrier(4)
+        def store():
+            workbook = open_workbook(io.BytesIO(data), read_only=True)
+            barrier.wait()
+            try:
+                cache.store("shared", workbook)
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=store) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert_equals(errors, [], "Concurrent stores of one workbook do not fail")
+    assert_equals(sheet_to_array(cache.load("shared")["Sheet"]).tolist(), [list(r) for r in rows],
+                  "Concurrently stored entry is complete")
+    assert_equals(sorted(os.listdir(cache.cache_dir)), ["shared"], "No temporary directories left behind")
+
+
+def test_batch_runner():
+    """Test 15: Headless batch runner writes per-pair reports and an NDJSON stream"""
+    print_header("Batch Runner")
+
+    import json
+    import os
+    import tempfile
+    from excel_sheet_compare import CompareOptions
+    from excel_batch_diff import load_manifest, run_batch, RESULTS_FILE
+
+    work_dir = tempfile.mkdtemp()
+    rows = [("ID", "Name")] + [(i, f"n{i}") for i in range(1, 20)]
+    make_sheet(rows).parent.save(os.path.join(work_dir, "template.xlsx"))
+    make_sheet(rows[:5] + [(5, "edited")] + rows[6:]).parent.save(os.path.join(work_dir, "client.xlsx"))
+
+    manifest = os.path.join(work_dir, "manifest.csv")
+    with open(manifest, "w", encoding="utf-8") as f:
+        f.write("original,modified\ntemplate.xlsx,client.xlsx\ntemplate.xlsx,missing.xlsx\n")
+
+    jobs = load_manifest(manifest)
+    assert_equals([job.name for job in jobs], ["client", "missing"], "Job names from the modified files")
+
+    output_dir = os.path.join(work_dir, "out")
+    stats = run_batch(jobs, output_dir, CompareOptions(keep_frames=False), workers=1)
+    with open(os.path.join(output_dir, RESULTS_FILE), encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+
+    assert_equals((stats['succeeded'], stats['failed']), (1, 1), "Failures recorded, not raised")
+    assert_equals([record['status'] for record in records], ["ok", "error"], "One NDJSON line per pair")
+    assert_equals(records[0]['summary']['total_modifications'], 1, "Change summary in the record")
+    assert_true(os.path.exists(os.path.join(output_dir, "client_diff.xlsx")), "Diff workbook written")
+    with open(os.path.join(output_dir, "client.json"), encoding="utf-8") as f:
+        assert_equals(json.load(f)['modifications_by_sheet']["Sheet"][0]['cell'], "B6", "JSON report written")
+    assert_true(stats['cells_per_second'] > 0, "Throughput measured")
+
+
+def test_incremental_load():
+    """Test 16: Incremental load reuses unchanged rows and matches a full parse"""
+    print_header("Incremental Load")
+
+    import datetime
+    from excel_diff_engine import open_workbook, sheet_to_array
+    from excel_incremental import load_workbook_incremental
+
+    rows = [("ID", "Date", "Name")] + [(i, datetime.datetime(2024, 1, i % 28 + 1), f"n{i}")
+                                       for i in range(1, 40)]
+    revision = list(rows)
+    revision[10] = (10, None, "edited")
+    revision.append((40, datetime.datetime(2024, 2, 1), "new"))
+
+    template, _ = load_workbook_incremental(open_workbook(workbook_bytes(rows), read_only=True), "t", [])
+    loaded, stats = load_workbook_incremental(open_workbook(workbook_bytes(revision), read_only=True),
+                                              "r", [template])
+    full = sheet_to_array(open_workbook(workbook_bytes(revision), read_only=True)["Sheet"])
+
+    assert_equals((stats.rows_reused, stats.rows_parsed), (39, 2), "Only changed and new rows parsed")
+    assert_equals(loaded["Sheet"].grid.tolist(), full.tolist(), "Same grid as a full parse")
+    assert_equals(loaded["Sheet"].grid[5, 1], datetime.datetime(2024, 1, 6), "Reused rows keep value types")
+
+    _, stats = load_workbook_incremental(open_workbook(workbook_bytes(rows), read_only=True), "t2",
+                                         [template])
+    assert_equals(stats.rows_parsed, 0, "Unchanged revision parses nothing")
+
+    # Excel keeps text in a shared strings table, which an edited string rewrites
+    names = [("ID", "Name")] + [(i, f"n{i}") for i in range(1, 40)]
+    renamed = [names[0], (1, "renamed")] + names[2:]
+    template, _ = load_workbook_incremental(
+        open_workbook(with_shared_strings(workbook_bytes(names).getvalue()), read_only=True), "t3", [])
+    loaded, stats = load_workbook_incremental(
+        open_workbook(with_shared_strings(workbook_bytes(renamed).getvalue()), read_only=True), "r3", [template])
+    assert_equals((stats.rows_reused, stats.rows_parsed), (39, 1), "Rows reused across a rewritten shared strings table")
+    assert_equals(loaded["Sheet"].grid.tolist(), [list(r) for r in renamed], "Shared strings resolved to the revision's text")
+
+
+def test_formula_diff():
+    """Test 17: Formula mode flags formula edits whose cached value did not change"""
+    print_header("Formula Diff")
+
+    import io
+    import re
+    import json
+    import zipfile
+    from excel_diff_engine import open_workbook, sheet_to_array
+    from excel_sheet_compare import CompareOptions, compare_workbook_sheets, summarize_results
+    from excel_formulas import read_values_and_formulas
+    from excel_diff_export import write_json_report, format_value
+
+    def with_cached_values(rows, cached):
+        # openpyxl writes formulas without results; add them as Excel would
+        source = zipfile.ZipFile(workbook_bytes(rows))
+        output = io.BytesIO()
+        with zipfile.ZipFile(output, "w") as target:
+            for item in source.infolist():
+                data = source.read(item.filename)
+                if item.filename == "xl/worksheets/sheet1.xml":
+                    for ref, value in cached.items():
+                        data = re.sub(rb'(<c r="%s"[^>]*><f>[^<]*</f>)<v\s*/>' % ref.encode(),
+                                      rb"\1<v>%d</v>" % value, data)
+                target.writestr(item, data)
+        output.seek(0)
+        return output
+
+    original = with_cached_values([(1, "=A1+1"), (2, "=A2*2")], {"B1": 2, "B2": 4})
+    modified = with_cached_values([(1, "=A1*2"), (2, "=A2*2"), (3, "=B2")], {"B1": 2, "B2": 4, "B3": 4})
+
+    values, formulas = read_values_and_formulas(open_workbook(modified, read_only=True)["Sheet"])
+    modified.seek(0)
+    assert_equals(values.tolist(), sheet_to_array(open_workbook(modified, read_only=True)["Sheet"]).tolist(),
+                  "Same values as a data_only read")
+    assert_equals(formulas[:, 1].tolist(), ["=A1*2", "=A2*2", "=B2"], "Formula text read in the same pass")
+
+    original.seek(0)
+    modified.seek(0)
+    results = compare_workbook_sheets(open_workbook(original, read_only=True), open_workbook(modified, read_only=True),
+                                      ["Sheet"], CompareOptions(formulas=True))
+    summary, changes = summarize_results(results)
+    formula_changes = changes["Sheet"]["formula_changes"]
+
+    assert_equals([mod.cell_ref for mod in formula_changes], ["B1", "B3"], "Changed and added formulas")
+    assert_equals(changes["Sheet"]["formula_value_same"].tolist(), [True, False], "B1 kept its value")
+    assert_equals((summary["formulas_changed"], summary["formulas_value_same"]), (2, 1), "Formula counters")
+    assert_equals([mod.cell_ref for mod in changes["Sheet"]["modifications"]], ["A3", "B3"], "Value diff unchanged")
+
+    report = io.StringIO()
+    write_json_report(report, changes, summary, format_value)
+    records = json.loads(report.getvalue())["formula_changes_by_sheet"]["Sheet"]
+    assert_equals((records[0]["from"], records[0]["to"], records[0]["value_changed"]), ("=A1+1", "=A1*2", False),
+                  "Formula changes in the JSON report")
+
+
+def test_style_diff():
+    """Test 18: Style mode reports formatting changes by signature, across style tables"""
+    print_header("Style Diff")
+
+    import io
+    from openpyxl.styles import Font, PatternFill
+    from excel_diff_engine import open_workbook
+    from excel_sheet_compare import CompareOptions, compare_workbook_sheets, summarize_results
+    from excel_styles import workbook_styles
+
+    def to_stream(rows, styles):
+        sheet = make_sheet(rows)
+        for ref, (attribute, value) in styles.items():
+            setattr(sheet[ref], attribute, value)
+        buffer = io.BytesIO()
+        sheet.parent.save(buffer)
+        buffer.seek(0)
+        return buffer
+
+    rows = [("Name", "Amount"), ("a", 1), ("b", 2)]
+    yellow = PatternFill("solid", fgColor="FFFF00")
+    # Same formatting added in a different order: different style ids, same signatures
+    original = to_stream(rows, {"A1": ("font", Font(bold=True)), "B2": ("fill", yellow)})
+    modified = to_stream(rows[:2] + [("b", 3)], {"B2": ("fill", yellow), "A1": ("font", Font(bold=True)),
+                                                 "B3": ("number_format", "0.00"), "A3": ("font", Font(italic=True))})
+
+    original_wb = open_workbook(original, read_only=True)
+    modified_wb = open_workbook(modified, read_only=True)
+    original_styles = workbook_styles(original_wb)
+    modified_styles = workbook_styles(modified_wb)
+    assert_true(set(original_styles.signatures) < set(modified_styles.signatures), "Signatures match across workbooks")
+
+    results = compare_workbook_sheets(original_wb, modified_wb, ["Sheet"], CompareOptions(styles=True))
+    summary, changes = summarize_results(results)
+    style_changes = changes["Sheet"]["style_changes"]
+
+    assert_equals([mod.cell_ref for mod in style_changes], ["A3", "B3"], "Only restyled cells reported")
+    assert_equals(changes["Sheet"]["style_value_same"].tolist(), [True, False], "A3 is a formatting-only change")
+    assert_equals(style_changes[1].new_value, "number format: 0.00", "Change names the differing part")
+    assert_equals((summary["styles_changed"], summary["styles_value_same"]), (2, 1), "Style counters")
+
+    original.seek(0)
+    modified.seek(0)
+    results = compare_workbook_sheets(open_workbook(original, read_only=True), open_workbook(modified, read_only=True),
+                                      ["Sheet"], CompareOptions())
+    assert_equals(len(results[0].sheet_changes["style_changes"]), 0, "No style diff unless asked for")
+
+
+def test_nway_compare():
+    """Test 19: N-way comparison counts per cell how many submissions changed it"""
+    print_header("N-Way Comparison")
+
+    from excel_nway import compare_against_template
+    from excel_sheet_compare import CompareOptions
+
+    template = [("ID", "Name", "Amount")] + [(i, f"n{i}", i * 10) for i in range(1, 30)]
+    submissions = []
+    for k in range(3):
+        rows = list(template)
+        rows[4] = (4, f"edited {k}", 40)  # Every submission edits B5
+        if k == 1:
+            rows[9] = (9, "n9", -1)  # Only one edits C10
+        submissions.append((f"region{k}", workbook_bytes(rows)))
+    submissions.append(("unchanged", workbook_bytes(template)))
+
+    result = compare_against_template(workbook_bytes(template), submissions, CompareOptions(), workers=1)
+    heatmap = result.heatmaps["Sheet"]
+
+    assert_equals((int(heatmap[4, 1]), int(heatmap[9, 2]), int(heatmap.sum())), (3, 1, 4), "Per-cell change counts")
+    assert_equals(result.hot_cells("Sheet").iloc[0]["Cell"], "B5", "Most-changed cell first")
+    assert_true(all(submission.rows_reused >= 27 for submission in result.submissions), "Template rows reused")
+
+    table = result.file_table()
+    assert_equals(table["File"].tolist(), ["region0", "region1", "region2", "unchanged"], "One row per file")
+    assert_equals(table["total"].tolist(), [1, 2, 1, 0], "Per-file change totals")
+
+
+def test_csv_compare():
+    """Test 20: CSV files diff like worksheets, with per-cell typed values"""
+    print_header("CSV Comparison")
+
+    import io
+    from excel_diff_engine import open_workbook, sheet_to_array, diff_grids, stream_diff
+
+    def to_csv(text, name="data.csv"):
+        buffer = io.BytesIO(text.encode("utf-8"))
+        buffer.name = name
+        return buffer
+
+    original_text = "ID,Name,Amount\n" + "".join(f"{i},n{i},{i}.50\n" for i in range(1, 30))
+    modified_text = original_text.replace("7,n7,7.50", "7,n7,8").replace("12,n12", "12,")
+
+    grid = sheet_to_array(open_workbook(to_csv(original_text)).active)
+    assert_equals(grid[:2].tolist(), [["ID", "Name", "Amount"], [1, "n1", 1.5]], "Fields typed per cell")
+    assert_equals(open_workbook(to_csv("a\tb\n", "data.tsv")).active.grid.tolist(), [["a", "b"]],
+                  "TSV split on tabs")
+
+    full = diff_grids(grid, sheet_to_array(open_workbook(to_csv(modified_text)).active))
+    assert_equals(list(zip(full.rows.tolist(), full.cols.tolist())), [(8, 3), (13, 2)], "Changed cells")
+    assert_equals(full.new_values.tolist(), [8, None], "Typed new values")
+
+    streamed = stream_diff(open_workbook(to_csv(original_text)).active,
+                           open_workbook(to_csv(modified_text)).active, block_rows=8)
+    assert_equals(streamed.rows.tolist(), full.rows.tolist(), "Streaming diff matches in-memory")
+
+    ragged = "a,b\n" * 10 + "c,d,e\n"
+    blocks = list(open_workbook(to_csv(ragged)).active.iter_blocks(4))
+    assert_equals((sum(len(block) for block in blocks), blocks[-1][-1].tolist()), (11, ["c", "d", "e"]),
+                  "Ragged rows read by the fallback reader")
+
+
+def test_spilled_changes():
+    """Test 21: Streamed changes spilled to disk read back like a ModificationTable"""
+    print_header("Spilled Changes")
+
+    import io
+    import os
+    import pickle
+    import tempfile
+    import excel_spill
+    from excel_diff_engine import open_workbook, build_modifications
+    from excel_sheet_compare import compare_sheet, CompareOptions
+
+    original_rows = [("ID", "Name", "Qty")] + [(i, f"n{i}", i * 1.5) for i in range(1, 200)]
+    modified_rows = [("ID", "Name", "Qty")] + [(i, f"m{i}" if i % 3 else None, i * 1.5) for i in range(1, 210)]
+
+    def compare(spill_dir):
+        return compare_sheet("Sheet", open_workbook(workbook_bytes(original_rows), read_only=True).active,
+                             open_workbook(workbook_bytes(modified_rows), read_only=True).active,
+                             CompareOptions(streaming=True, keep_frames=False, spill_dir=spill_dir))
+
+    with tempfile.TemporaryDirectory() as spill_dir:
+        segment_changes = excel_spill.SEGMENT_CHANGES
+        excel_spill.SEGMENT_CHANGES = 50  # Several value segments
+        try:
+            spilled = compare(spill_dir)
+        finally:
+            excel_spill.SEGMENT_CHANGES = segment_changes
+        in_memory = compare(None)
+
+        table = spilled.sheet_changes['modifications']
+        expected = in_memory.sheet_changes['modifications']
+        assert_true(isinstance(table, excel_spill.SpilledModifications), "Changes spilled to disk")
+        assert_true(len(table.segment_starts) > 3, "Values written in segments")
+        assert_equals(spilled.counts, in_memory.counts, "Same summary counters")
+        assert_equals(list(table), list(expected), "Same modifications in order")
+        assert_equals((table[123], table[-1]), (expected[123], expected[-1]), "Int lookups")
+
+        pages = list(table.pages(64))
+        assert_equals([len(page) for page in pages][-2:], [64, len(table) % 64], "Fixed-size pages")
+        assert_equals(list(table.where(['value_to_blank'])[:5]), list(expected.where(['value_to_blank'])[:5]),
+                      "Filtered slice")
+
+        # The export merges spilled pages with the sheet rows
+        from excel_diff_export import write_diff_sheet, iter_changed_rows
+        def grouped(page_size):
+            return [(row, sorted(mods)) for row, mods in iter_changed_rows(table, page_size)]
+        assert_equals(grouped(7), grouped(len(table)), "Rows grouped across page boundaries")
+        def export(sheet_changes):
+            diff_wb = openpyxl.Workbook(write_only=True)
+            write_diff_sheet(diff_wb.create_sheet("Sheet"), make_sheet(modified_rows), sheet_changes, str)
+            output = io.BytesIO()
+            diff_wb.save(output)
+            return [[(cell.value, cell.comment.text if cell.comment else None) for cell in row]
+                    for row in openpyxl.load_workbook(output)["Sheet"].iter_rows()]
+        exported = export(spilled.sheet_changes)
+        assert_equals(exported, export(in_memory.sheet_changes), "Same export from spilled changes")
+        assert_equals(sum(comment is not None for row in exported for _, comment in row), len(expected),
+                      "Every spilled change annotated")
+
+        path = table.path
+        copy = pickle.loads(pickle.dumps(table))
+        del table, spilled
+        assert_true(os.path.isdir(path), "Unpickled copy keeps the spill")
+        assert_equals(len(copy), len(expected), "Unpickled copy reads the spill")
+        del copy
+        assert_true(not os.path.exists(path), "Spill removed with its last reader")
+
+
+def test_modification_index():
+    """Test 22: Precomputed counters and row/column lookups match scanning the changes"""
+    print_header("Modification Index")
+
+    from excel_sheet_compare import compare_sheet, CompareOptions
+
+    original_rows = [("ID", "Name", "Qty")] + [(i, f"n{i}", i) for i in range(1, 60)]
+    modified_rows = [("ID", "Name", "Qty")] + [(i, f"m{i}" if i % 4 else None, i + i % 2) for i in range(1, 60)]
+    result = compare_sheet("Sheet", make_sheet(original_rows), make_sheet(modified_rows), CompareOptions())
+    table = result.sheet_changes['modifications']
+    index = result.sheet_changes['modification_index']
+
+    assert_equals((index.counts, index.total), (table.counts(), len(table)), "Counters match the table")
+    assert_equals(index.column_counts(), {2: 59, 3: 30}, "Changes per column")
+    assert_equals([table[i].cell_ref for i in index.row(4)], ["B4", "C4"], "Row lookup")
+    assert_equals(len(index.row(1)), 0, "Unchanged row")
+
+    blanked = [mod for mod in table if mod.col == 2 and mod.change_type == 'value_to_blank']
+    assert_equals(index.count(['value_to_blank'], column=2), len(blanked), "Filtered count")
+    assert_equals(list(index.page(table, 1, 5, ['value_to_blank'], column=2)), blanked[5:10], "Filtered page")
+    assert_equals(list(index.page(table, 2, 10)), list(table[20:30]), "Unfiltered page")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("\n" + "=" * 60)
+    print("EXCEL DIFF ENGINE TEST SUITE")
+    print("=" * 60)
+
+    tests = [
+        test_sheet_to_array,
+        test_diff_matches_legacy_loop,
+        test_change_categories,
+        test_build_modifications,
+        test_frame_keeps_empty_cells,
+        test_stream_diff_matches_grid_diff,
+        test_compact_column,
+        test_row_alignment,
+        test_key_join,
+        test_parallel_matches_serial,
+        test_identical_sheets_skipped,
+        test_export_diff_workbook,
+        test_grid_window,
+        test_workbook_cache,
+        test_batch_runner,
+        test_incremental_load,
+        test_formula_diff,
+        test_style_diff,
+        test_nway_compare,
+        test_csv_compare,
+        test_spilled_changes,
+        test_modification_index
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError:
+            pass
+        except Exception as e:
+            print(f"\n[-] EXCEPTION in {test_func.__name__}: {e}")
+            global tests_failed
+            tests_failed += 1
+
+    # Summary
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    total_tests = tests_passed + tests_failed
+    print(f"Total assertions: {total_tests}")
+    print(f"Passed: {tests_passed}/{total_tests}")
+    print(f"Failed: {tests_failed}/{total_tests}")
+
+    if tests_failed == 0:
+        print("\n[+] All tests passed!")
+        return 0
+    else:
+        print(f"\n[-] {tests_failed} test(s) failed")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = run_all_tests()
+    sys.exit(exit_code)
@@ -428,6 +428,41 @@ def test_result_serialization():
         return False
 
 
+def test_model_registry():
+    """Test 11: Models load once per process and are shared"""
+    test_header("Shared Model Registry")
+
+    import threading
+    import time
+    from model_manager import ModelRegistry
+
+    registry = ModelRegistry()
+    loads = []
+
+    def load():
+        loads.append(1)
+        time.sleep(0.05)  # Let the other threads ask while it is loading
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get('embedder', 'm', 'cpu', load)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert_equals(len(loads), 1, "Concurrent requests load the model once")
+    assert_true(all(model is results[0] for model in results), "All requests get the same model")
+
+    other = registry.get('embedder', 'm', 'cuda', object)
+    assert_true(other is not results[0], "Different device is a separate model")
+    assert_true(registry.using(results[0]) is registry.using(results[0]), "Shared model has one usage lock")
+
+    registry.clear()
+    assert_equals(len(registry.loaded()), 0, "Clear drops all models")
+
+
 def run_all_tests():
     """Run all tests"""
     print("\n" + "=" * 60)
@@ -445,7 +480,8 @@ def run_all_tests():
         test_document_comparison,
         test_change_detection,
         test_similarity_matrix,
-        test_result_serialization
+        test_result_serialization,
+        test_model_registry
     ]
 
     for test_func in tests:
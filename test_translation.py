@@ -82,6 +82,24 @@ def test_translation_without_models():
     print("[+] Translation service test passed!\n")
 
 
+def test_translation_pairs():
+    """Test which detected languages have a translation model"""
+    print("="*70)
+    print("Test 3b: Translation Pairs")
+    print("="*70)
+
+    translator = LocalTranslator(cache_enabled=False)
+
+    assert translator.supports('de', 'en'), "German should translate to English"
+    assert translator.supports('zh-cn', 'en'), "Simplified Chinese should use the zh model"
+    assert translator.supports('zh-tw', 'en'), "Traditional Chinese should use the zh model"
+    assert not translator.supports('fr', 'en'), "French has no model"
+    assert not translator.supports('unknown', 'en'), "Unknown language has no model"
+    print("[+] Detected languages mapped to translation models")
+
+    print("[+] Translation pair test passed!\n")
+
+
 def test_translation_with_models():
     """Test actual translation (only if models available)"""
     print("="*70)
@@ -210,6 +228,7 @@ def run_all_tests():
         ("Cache Functionality", test_cache),
         ("Language Detection", test_language_detection),
         ("Translation Service Init", test_translation_without_models),
+        ("Translation Pairs", test_translation_pairs),
         ("Actual Translation", test_translation_with_models),
         ("End-to-End Workflow", test_end_to_end_workflow),
     ]
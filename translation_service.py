@@ -16,10 +16,28 @@ from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 import warnings
 
+from model_manager import model_registry, torch_device
+
 # Suppress transformers warnings
 warnings.filterwarnings('ignore', category=FutureWarning)
 warnings.filterwarnings('ignore', category=UserWarning)
 
+# Opus-MT models by language pair
+TRANSLATION_MODELS = {
+    'de-en': 'Helsinki-NLP/opus-mt-de-en',
+    'en-de': 'Helsinki-NLP/opus-mt-en-de',
+    'zh-en': 'Helsinki-NLP/opus-mt-zh-en',
+}
+
+# Detected language codes (see language_detector) translated by another code's model
+MODEL_LANGUAGES = {'zh-cn': 'zh', 'zh-tw': 'zh'}
+
+
+def model_language(lang: str) -> str:
+    """Language code the translation models use for a detected language, e.g. 'zh-cn' -> 'zh'"""
+    lang = lang.lower()
+    return MODEL_LANGUAGES.get(lang, lang)
+
 
 class TranslationCache:
     """SQLite-based cache for translations"""
@@ -195,6 +213,7 @@ class LocalTranslator:
         Returns:
             Tuple of (model, tokenizer)
         """
+        source_lang, target_lang = model_language(source_lang), model_language(target_lang)
         lang_pair = f"{source_lang}-{target_lang}"
 
         # Check if already loaded
@@ -203,42 +222,33 @@ class LocalTranslator:
 
         # Use model manager if available
         if self.model_manager:
-            model, tokenizer = self.model_manager.get_translator(source_lang, target_lang)
-            self._models[lang_pair] = (model, tokenizer)
-            return model, tokenizer
+            self._models[lang_pair] = self.model_manager.get_translator(source_lang, target_lang)
+            return self._models[lang_pair]
 
-        # Otherwise load directly
-        print(f"Loading translation model: {source_lang}->{target_lang}...")
+        # Otherwise load directly (once per process, shared through the registry)
+        model_name = TRANSLATION_MODELS.get(lang_pair)
+        if not model_name:
+            raise ValueError(f"Translation pair {lang_pair} not supported")
+        device = torch_device()
 
-        try:
+        def load():
+            print(f"Loading translation model: {source_lang}->{target_lang}...")
             from transformers import MarianMTModel, MarianTokenizer
 
-            model_mapping = {
-                'de-en': 'Helsinki-NLP/opus-mt-de-en',
-                'en-de': 'Helsinki-NLP/opus-mt-en-de',
-                'zh-en': 'Helsinki-NLP/opus-mt-zh-en',
-            }
-
-            model_name = model_mapping.get(lang_pair)
-            if not model_name:
-                raise ValueError(f"Translation pair {lang_pair} not supported")
-
             tokenizer = MarianTokenizer.from_pretrained(model_name)
             model = MarianMTModel.from_pretrained(model_name)
 
             # Move to GPU if available
-            try:
-                import torch
-                if torch.cuda.is_available():
-                    model = model.to('cuda')
-                    print(f"  [+] Model loaded on GPU")
-                else:
-                    print(f"  [i] Model loaded on CPU")
-            except:
+            if device == 'cuda':
+                model = model.to('cuda')
+                print(f"  [+] Model loaded on GPU")
+            else:
                 print(f"  [i] Model loaded on CPU")
+            return (model, tokenizer)
 
-            self._models[lang_pair] = (model, tokenizer)
-            return model, tokenizer
+        try:
+            self._models[lang_pair] = model_registry().get('translator', model_name, device, load)
+            return self._models[lang_pair]
 
         except ImportError:
             print("[-] transformers not installed")
@@ -248,6 +258,19 @@ class LocalTranslator:
             print(f"[-] Error loading model: {e}")
             raise
 
+    def supports(self, source_lang: str, target_lang: str) -> bool:
+        """
+        Check if there is a model for a language pair
+
+        Args:
+            source_lang: Source language code (detected codes such as 'zh-cn' work too)
+            target_lang: Target language code
+
+        Returns:
+            True if texts in this pair can be translated
+        """
+        return f"{model_language(source_lang)}-{model_language(target_lang)}" in TRANSLATION_MODELS
+
     def translate(self, text: str, source_lang: str, target_lang: str) -> str:
         """
         Translate text from source to target language
@@ -270,18 +293,20 @@ class LocalTranslator:
                 return cached
 
         # Load model
-        model, tokenizer = self._load_model(source_lang, target_lang)
+        translator = self._load_model(source_lang, target_lang)
+        model, tokenizer = translator
 
         # Translate
         try:
-            inputs = tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=512)
+            with model_registry().using(translator):
+                inputs = tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=512)
 
-            # Move inputs to same device as model
-            if hasattr(model, 'device'):
-                inputs = {k: v.to(model.device) for k, v in inputs.items()}
+                # Move inputs to same device as model
+                if hasattr(model, 'device'):
+                    inputs = {k: v.to(model.device) for k, v in inputs.items()}
 
-            outputs = model.generate(**inputs, max_length=512)
-            translated = tokenizer.decode(outputs[0], skip_special_tokens=True)
+                outputs = model.generate(**inputs, max_length=512)
+                translated = tokenizer.decode(outputs[0], skip_special_tokens=True)
 
             # Cache the result
             if self.cache:
@@ -328,26 +353,28 @@ class LocalTranslator:
 
         # Translate uncached texts
         if uncached_texts:
-            model, tokenizer = self._load_model(source_lang, target_lang)
+            translator = self._load_model(source_lang, target_lang)
+            model, tokenizer = translator
 
             # Process in batches
             for i in range(0, len(uncached_texts), batch_size):
                 batch = uncached_texts[i:i + batch_size]
 
                 try:
-                    inputs = tokenizer(batch, return_tensors="pt", padding=True,
-                                     truncation=True, max_length=512)
+                    with model_registry().using(translator):
+                        inputs = tokenizer(batch, return_tensors="pt", padding=True,
+                                         truncation=True, max_length=512)
 
-                    # Move to device
-                    if hasattr(model, 'device'):
-                        inputs = {k: v.to(model.device) for k, v in inputs.items()}
+                        # Move to device
+                        if hasattr(model, 'device'):
+                            inputs = {k: v.to(model.device) for k, v in inputs.items()}
 
-                    outputs = model.generate(**inputs, max_length=512)
+                        outputs = model.generate(**inputs, max_length=512)
 
-                    batch_translated = [
-                        tokenizer.decode(output, skip_special_tokens=True)
-                        for output in outputs
-                    ]
+                        batch_translated = [
+                            tokenizer.decode(output, skip_special_tokens=True)
+                            for output in outputs
+                        ]
 
                     # Cache results
                     if self.cache: